@@ -0,0 +1,47 @@
+"""Create documents registry table
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create documents table
+    op.create_table(
+        'documents',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('filename', sa.String(512), nullable=False),
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('status', sa.String(32), nullable=False, server_default='processing'),
+        sa.Column('chunk_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('point_ids', postgresql.JSONB(), nullable=True),
+        sa.Column('embedding_model', sa.String(128), nullable=False),
+        sa.Column('timings', postgresql.JSONB(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('indexed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint('content_hash', 'embedding_model', name='uq_documents_content_hash_model')
+    )
+    
+    # Listing is ordered by upload time
+    op.create_index('idx_documents_created_at', 'documents', ['created_at'])
+    op.create_index('idx_documents_status', 'documents', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_documents_status', table_name='documents')
+    op.drop_index('idx_documents_created_at', table_name='documents')
+    op.drop_table('documents')
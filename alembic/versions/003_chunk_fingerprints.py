@@ -0,0 +1,59 @@
+"""Create chunk fingerprints table for duplicate suppression
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create chunk_fingerprints table
+    op.create_table(
+        'chunk_fingerprints',
+        sa.Column('point_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('content_hash', sa.String(40), nullable=False, unique=True),
+        sa.Column('simhash', sa.BigInteger(), nullable=False),
+        sa.Column('band0', sa.Integer(), nullable=False),
+        sa.Column('band1', sa.Integer(), nullable=False),
+        sa.Column('band2', sa.Integer(), nullable=False),
+        sa.Column('band3', sa.Integer(), nullable=False),
+        sa.Column('document_ids', postgresql.JSONB(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+    )
+    
+    # Near-duplicate lookup probes each SimHash band
+    for band in range(4):
+        op.create_index(f'idx_chunk_fingerprints_band{band}', 'chunk_fingerprints', [f'band{band}'])
+    
+    # Document deletes find the fingerprints a document references
+    op.create_index(
+        'idx_chunk_fingerprints_document_ids',
+        'chunk_fingerprints',
+        ['document_ids'],
+        postgresql_using='gin'
+    )
+    
+    op.add_column(
+        'documents',
+        sa.Column('duplicate_chunk_count', sa.Integer(), nullable=False, server_default='0')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('documents', 'duplicate_chunk_count')
+    op.drop_index('idx_chunk_fingerprints_document_ids', table_name='chunk_fingerprints')
+    for band in range(4):
+        op.drop_index(f'idx_chunk_fingerprints_band{band}', table_name='chunk_fingerprints')
+    op.drop_table('chunk_fingerprints')
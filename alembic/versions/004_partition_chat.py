@@ -0,0 +1,126 @@
+"""Partition chat table by month and add daily chat statistics
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 00:00:00.000000
+
+The existing table is not copied: it is renamed and attached as the
+partition holding everything before next month. The slow parts run first
+and outside the migration transaction without blocking writes: the new
+primary key index (id, created_at) is built concurrently and a CHECK
+matching the partition bound is added NOT VALID and validated in its own
+transaction. The remaining steps (swap the primary key to that index,
+rename, attach without scanning) only change metadata, so the exclusive
+lock they take is held briefly.
+
+New rows from next month on go to monthly partitions created here and
+then kept ahead by the chat maintenance job; rows of a month without a
+partition land in chat_default instead of failing. Once all rows of the
+legacy partition are past the retention window the job may drop or
+archive it like any other.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# Monthly partitions created beyond the legacy one
+PREMAKE_MONTHS = 3
+
+
+def _add_months(month_start, months):
+    years, month = divmod(month_start.month - 1 + months, 12)
+    return month_start.replace(year=month_start.year + years, month=month + 1, day=1)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    # Month boundaries in UTC, like the partitions the maintenance job creates
+    next_month = conn.execute(sa.text(
+        "SELECT (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '1 month')::date"
+    )).scalar()
+
+    with op.get_context().autocommit_block():
+        # Partition keys must be part of the primary key; build its index without blocking writes
+        # (an invalid leftover of an interrupted run is dropped first)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS chat_legacy_pkey")
+        op.execute("CREATE UNIQUE INDEX CONCURRENTLY chat_legacy_pkey ON chat (id, created_at)")
+        # A validated CHECK matching the bound lets ATTACH skip scanning the table.
+        # Each statement commits on its own, VALIDATE only takes a lock that allows writes
+        op.execute("ALTER TABLE chat DROP CONSTRAINT IF EXISTS chat_legacy_created_at_range")
+        op.execute(
+            f"ALTER TABLE chat ADD CONSTRAINT chat_legacy_created_at_range "
+            f"CHECK (created_at < TIMESTAMPTZ '{next_month} 00:00:00+00') NOT VALID"
+        )
+        op.execute("ALTER TABLE chat VALIDATE CONSTRAINT chat_legacy_created_at_range")
+
+    # Metadata only from here on
+    op.execute("ALTER TABLE chat DROP CONSTRAINT chat_pkey")
+    op.execute("ALTER TABLE chat ADD CONSTRAINT chat_legacy_pkey PRIMARY KEY USING INDEX chat_legacy_pkey")
+    op.execute("ALTER TABLE chat RENAME TO chat_legacy")
+    op.execute("ALTER INDEX idx_chat_created_at RENAME TO chat_legacy_created_at_idx")
+
+    op.execute("""
+        CREATE TABLE chat (
+            id UUID NOT NULL,
+            question TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            sources JSONB,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute(
+        f"ALTER TABLE chat ATTACH PARTITION chat_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{next_month} 00:00:00+00')"
+    )
+    # Adopts the existing index of the legacy partition
+    op.create_index('idx_chat_created_at', 'chat', ['created_at'])
+
+    for month in range(PREMAKE_MONTHS + 1):
+        start = _add_months(next_month, month)
+        end = _add_months(start, 1)
+        op.execute(
+            f"CREATE TABLE chat_p{start:%Y_%m} PARTITION OF chat "
+            f"FOR VALUES FROM ('{start} 00:00:00+00') TO ('{end} 00:00:00+00')"
+        )
+    # Catches rows of months the maintenance job has not created yet
+    op.execute("CREATE TABLE chat_default PARTITION OF chat DEFAULT")
+
+    # Per-day rollup, kept after the partitions holding the rows are dropped
+    op.create_table(
+        'chat_daily_stats',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('chat_count', sa.Integer(), nullable=False),
+        sa.Column('no_source_count', sa.Integer(), nullable=False),
+        sa.Column('source_count', sa.BigInteger(), nullable=False),
+        sa.Column('question_chars', sa.BigInteger(), nullable=False),
+        sa.Column('answer_chars', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('chat_daily_stats')
+
+    op.execute("ALTER TABLE chat RENAME TO chat_partitioned")
+    op.execute("ALTER INDEX chat_pkey RENAME TO chat_partitioned_pkey")
+    op.execute("ALTER INDEX idx_chat_created_at RENAME TO chat_partitioned_created_at_idx")
+    op.create_table(
+        'chat',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('question', sa.Text(), nullable=False),
+        sa.Column('answer', sa.Text(), nullable=False),
+        sa.Column('sources', postgresql.JSONB(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+    )
+    op.execute("INSERT INTO chat SELECT id, question, answer, sources, created_at, updated_at FROM chat_partitioned")
+    op.execute("DROP TABLE chat_partitioned CASCADE")
+    op.create_index('idx_chat_created_at', 'chat', ['created_at'])
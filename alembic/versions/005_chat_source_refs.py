@@ -0,0 +1,176 @@
+"""Store chat sources as chunk references
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 00:00:00.000000
+
+Existing chat.sources entries carry a copy of the chunk text. Entries whose
+chunk is found in the vector store (by document_id and chunk_index, chunks
+indexed before this series have random point ids) are rewritten to
+{point_id, document_id, chunk_index, score}; the text is loaded from the
+vector store when history is read. Entries whose chunk is not found (it
+was deleted) keep their text untouched. Rows are converted in
+keyset-ordered batches, each committed on its own, so the table is never
+locked for the whole conversion and an interrupted run simply continues.
+
+If there are rows to convert and the vector store cannot be reached, the
+upgrade fails instead of being recorded as applied without converting
+anything. To apply it anyway and keep the text copies:
+
+    alembic -x skip_source_refs=true upgrade head
+"""
+import json
+import logging
+import os
+import sqlite3
+from typing import Dict, Optional, Tuple
+from alembic import context, op
+import sqlalchemy as sa
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger(f"alembic.{__name__}")
+
+BATCH_SIZE = 1000
+SCROLL_LIMIT = 1000
+
+
+class _ChunkIds:
+    """(document_id, chunk_index) -> point id of the stored chunk, loaded per document"""
+
+    def __init__(self):
+        self.known: Dict[Tuple[str, int], str] = {}
+        self.loaded = set()
+        self.error: Optional[Exception] = None
+        self._qdrant = None
+        self._sidecar: Optional[sqlite3.Connection] = None
+        try:
+            if settings.VECTOR_STORE_BACKEND == "numpy":
+                path = os.path.join(settings.NUMPY_STORE_DIR, settings.QDRANT_COLLECTION_NAME, "payloads.sqlite3")
+                if not os.path.exists(path):
+                    raise FileNotFoundError(path)
+                self._sidecar = sqlite3.connect(path)
+            else:
+                from qdrant_client import QdrantClient
+
+                if settings.QDRANT_URL:
+                    self._qdrant = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY, timeout=60)
+                else:
+                    self._qdrant = QdrantClient(host=settings.QDRANT_HOST, port=settings.QDRANT_PORT, timeout=60)
+                self._qdrant.get_collection(settings.QDRANT_COLLECTION_NAME)
+        except Exception as e:
+            self.error = e
+
+    def get(self, document_id: str, chunk_index: int) -> Optional[str]:
+        if document_id not in self.loaded:
+            self._load(document_id)
+            self.loaded.add(document_id)
+        return self.known.get((document_id, chunk_index))
+
+    def _load(self, document_id: str) -> None:
+        if self._sidecar is not None:
+            rows = self._sidecar.execute(
+                "SELECT point_id, payload FROM points WHERE payload LIKE ?", (f'%"{document_id}"%',)
+            )
+            for point_id, payload in rows:
+                payload = json.loads(payload)
+                if payload.get("document_id") == document_id and payload.get("chunk_index") is not None:
+                    self.known[(document_id, payload["chunk_index"])] = point_id
+            return
+
+        from qdrant_client.models import FieldCondition, Filter, MatchValue
+
+        offset = None
+        while True:
+            records, offset = self._qdrant.scroll(
+                collection_name=settings.QDRANT_COLLECTION_NAME,
+                scroll_filter=Filter(must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))]),
+                limit=SCROLL_LIMIT,
+                offset=offset,
+                with_payload=["chunk_index"],
+                with_vectors=False
+            )
+            for record in records:
+                chunk_index = (record.payload or {}).get("chunk_index")
+                if chunk_index is not None:
+                    self.known[(document_id, chunk_index)] = str(record.id)
+            if offset is None:
+                break
+
+
+def _to_ref(source: Dict, chunk_ids: _ChunkIds) -> Dict:
+    """Reference to the stored chunk, or the entry unchanged if its chunk is not found"""
+    document_id = source.get("document_id")
+    chunk_index = source.get("chunk_index")
+    if "content" not in source or not document_id or chunk_index is None:
+        return source
+    point_id = chunk_ids.get(document_id, chunk_index)
+    if point_id is None:
+        return source
+    return {
+        "point_id": point_id,
+        "document_id": document_id,
+        "chunk_index": chunk_index,
+        "score": source.get("score")
+    }
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    select = sa.text(
+        "SELECT id, created_at, sources FROM chat "
+        "WHERE (created_at, id) > (:created_at, :id) "
+        "AND jsonb_path_exists(sources, '$[*] ? (exists(@.content))') "
+        "ORDER BY created_at, id LIMIT :limit"
+    )
+    update = sa.text(
+        "UPDATE chat SET sources = CAST(:sources AS jsonb) "
+        "WHERE id = :id AND created_at = :created_at"
+    )
+
+    pending = conn.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM chat WHERE jsonb_path_exists(sources, '$[*] ? (exists(@.content))'))"
+    )).scalar()
+    if not pending:
+        return
+
+    chunk_ids = _ChunkIds()
+    if chunk_ids.error is not None:
+        if context.get_x_argument(as_dictionary=True).get("skip_source_refs") == "true":
+            logger.warning(f"Vector store not reachable ({chunk_ids.error}), chat sources keep their text")
+            return
+        raise RuntimeError(
+            f"Chat sources cannot be converted, the vector store is not reachable: {chunk_ids.error}. "
+            "Start the vector store and run the upgrade again, or keep the text copies with "
+            "'alembic -x skip_source_refs=true upgrade head'"
+        )
+
+    last = {"created_at": "-infinity", "id": "00000000-0000-0000-0000-000000000000"}
+    converted = kept = 0
+    with op.get_context().autocommit_block():
+        while True:
+            rows = conn.execute(select, {**last, "limit": BATCH_SIZE}).all()
+            if not rows:
+                break
+            updates = []
+            for chat_id, created_at, sources in rows:
+                refs = [_to_ref(source, chunk_ids) for source in sources]
+                changed = sum(ref is not source for ref, source in zip(refs, sources))
+                converted += changed
+                kept += sum("content" in ref for ref in refs)
+                if changed:
+                    updates.append({"id": chat_id, "created_at": created_at, "sources": json.dumps(refs)})
+            if updates:
+                conn.execute(update, updates)
+            last = {"created_at": rows[-1][1], "id": rows[-1][0]}
+    logger.info(f"Chat sources: {converted} converted to references, {kept} kept with their text")
+
+
+def downgrade() -> None:
+    # Converted entries point at chunks that exist; readers handle both formats
+    pass
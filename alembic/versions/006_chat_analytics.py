@@ -0,0 +1,122 @@
+"""Chat analytics: latency and answer flag on chats, hourly summary tables
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 00:00:00.000000
+
+The summary tables are filled incrementally by the chat maintenance job
+(only the hours since the last refresh are recomputed), so the analytics
+API never scans the chat table.
+
+The (created_at, id) index is built partition by partition without
+blocking chat inserts. Existing chats without sources (answered with
+"javob topilmadi") are flagged answered=false in keyset-ordered batches,
+each committed on its own, so the no-answer rate covers history too.
+"""
+import logging
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger(f"alembic.{__name__}")
+
+BATCH_SIZE = 1000
+
+
+def _create_chat_index(name: str, suffix: str, columns: str) -> None:
+    """
+    Build an index on the partitioned chat table without blocking writes
+
+    CREATE INDEX on a partitioned table cannot run CONCURRENTLY and locks
+    every partition for the whole build. The parent index is created on
+    ONLY chat instead (invalid, nothing built), each partition's index is
+    built concurrently and attached, and the parent turns valid with the
+    last one. Runs inside autocommit_block(); partition indexes left valid
+    by an interrupted run are reused, invalid ones rebuilt.
+    """
+    conn = op.get_bind()
+    partitions = conn.execute(sa.text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'chat'::regclass ORDER BY 1"
+    )).scalars().all()
+
+    op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY chat ({columns})")
+    for partition in partitions:
+        index = f"{partition}_{suffix}_idx"
+        valid = conn.execute(
+            sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:index)"),
+            {"index": index}
+        ).scalar()
+        if valid is False:
+            op.execute(f"DROP INDEX CONCURRENTLY {index}")
+        if not valid:
+            op.execute(f"CREATE INDEX CONCURRENTLY {index} ON {partition} ({columns})")
+        op.execute(f"ALTER INDEX {name} ATTACH PARTITION {index}")
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    with op.get_context().autocommit_block():
+        # Keyset pagination orders by (created_at, id); replaces the created_at index
+        _create_chat_index('idx_chat_created_at_id', 'created_at_id', 'created_at, id')
+        op.execute("DROP INDEX IF EXISTS idx_chat_created_at")
+
+    # Constant defaults: no table rewrite
+    op.add_column('chat', sa.Column('answered', sa.Boolean(), nullable=False, server_default=sa.true()))
+    op.add_column('chat', sa.Column('latency_ms', sa.Integer(), nullable=True))
+
+    # Chats saved without sources were not answered
+    select = sa.text(
+        "SELECT id, created_at FROM chat "
+        "WHERE (created_at, id) > (:created_at, :id) "
+        "AND (sources IS NULL OR sources = '[]'::jsonb) "
+        "ORDER BY created_at, id LIMIT :limit"
+    )
+    update = sa.text("UPDATE chat SET answered = false WHERE id = :id AND created_at = :created_at")
+    last = {"created_at": "-infinity", "id": "00000000-0000-0000-0000-000000000000"}
+    flagged = 0
+    with op.get_context().autocommit_block():
+        while True:
+            rows = conn.execute(select, {**last, "limit": BATCH_SIZE}).all()
+            if not rows:
+                break
+            conn.execute(update, [{"id": chat_id, "created_at": created_at} for chat_id, created_at in rows])
+            flagged += len(rows)
+            last = {"created_at": rows[-1][1], "id": rows[-1][0]}
+    logger.info(f"Chats flagged as not answered: {flagged}")
+
+    op.create_table(
+        'chat_hourly_stats',
+        sa.Column('hour', sa.DateTime(timezone=True), primary_key=True),
+        sa.Column('chat_count', sa.Integer(), nullable=False),
+        sa.Column('answered_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+    )
+    op.create_table(
+        'chat_latency_hourly',
+        sa.Column('hour', sa.DateTime(timezone=True), primary_key=True),
+        sa.Column('bucket', sa.SmallInteger(), primary_key=True),
+        sa.Column('chat_count', sa.Integer(), nullable=False)
+    )
+    op.create_table(
+        'chat_document_hourly',
+        sa.Column('hour', sa.DateTime(timezone=True), primary_key=True),
+        sa.Column('document_id', sa.String(64), primary_key=True),
+        sa.Column('citations', sa.Integer(), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('chat_document_hourly')
+    op.drop_table('chat_latency_hourly')
+    op.drop_table('chat_hourly_stats')
+    with op.get_context().autocommit_block():
+        _create_chat_index('idx_chat_created_at', 'created_at', 'created_at')
+        op.execute("DROP INDEX IF EXISTS idx_chat_created_at_id")
+    op.drop_column('chat', 'latency_ms')
+    op.drop_column('chat', 'answered')
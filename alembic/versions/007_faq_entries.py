@@ -0,0 +1,38 @@
+"""FAQ entries mined from chat history
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 00:00:00.000000
+
+Filled by the FAQ mining job; every API instance keeps them in an
+in-memory index consulted before search.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'faq_entries',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('question', sa.Text(), nullable=False),
+        sa.Column('answer', sa.Text(), nullable=False),
+        sa.Column('sources', postgresql.JSONB(), nullable=False),
+        sa.Column('variants', postgresql.JSONB(), nullable=False),
+        sa.Column('centroid', sa.LargeBinary(), nullable=False),
+        sa.Column('source_versions', postgresql.JSONB(), nullable=False),
+        sa.Column('chat_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('faq_entries')
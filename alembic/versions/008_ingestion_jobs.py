@@ -0,0 +1,55 @@
+"""Ingestion job queue
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 00:00:00.000000
+
+Uploads are queued here (file contents included, so a worker on any node
+can run them) and claimed by `python -m app.worker` processes with
+FOR UPDATE SKIP LOCKED. The partial indexes cover exactly the rows the
+claim query looks at: queued jobs that are due and running jobs whose
+lease may have expired.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingestion_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('document_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('filename', sa.String(512), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=True),
+        sa.Column('status', sa.String(16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('locked_by', sa.String(128), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+    )
+    op.create_index('idx_ingestion_jobs_document_id', 'ingestion_jobs', ['document_id'])
+    op.create_index(
+        'idx_ingestion_jobs_due', 'ingestion_jobs', ['run_after'],
+        postgresql_where=sa.text("status = 'queued'")
+    )
+    op.create_index(
+        'idx_ingestion_jobs_lease', 'ingestion_jobs', ['lease_expires_at'],
+        postgresql_where=sa.text("status = 'running'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ingestion_jobs')
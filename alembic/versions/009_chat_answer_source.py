@@ -0,0 +1,28 @@
+"""Record where the answer of a chat came from
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 00:00:00.000000
+
+Answers reused from a FAQ entry or the semantic cache are stored in chat
+history like generated ones. answer_source tells them apart, so FAQ
+mining only learns from answers that were actually generated from the
+documents and a wrong answer cannot reinforce itself.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Constant default: no table rewrite
+    op.add_column('chat', sa.Column('answer_source', sa.String(16), nullable=False, server_default='generated'))
+
+
+def downgrade() -> None:
+    op.drop_column('chat', 'answer_source')
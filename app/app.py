@@ -1,4 +1,8 @@
+import asyncio
 import os
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
 from dotenv import load_dotenv
 
 import chromadb
@@ -10,9 +14,13 @@ from chainlit.input_widget import Slider
 import google.generativeai as genai
 
 
+EMBEDDING_MODEL = 'models/embedding-001'
+QUERY_CACHE_SIZE = 1024
+
+
 class GeminiEmbeddingFunction(EmbeddingFunction):
     def __call__(self, input: Documents) -> Embeddings:
-        model = 'models/embedding-001'
+        model = EMBEDDING_MODEL
         title = "Custom query"
         return genai.embed_content(model=model,
                                    content=input,
@@ -20,8 +28,40 @@ class GeminiEmbeddingFunction(EmbeddingFunction):
                                    title=title)["embedding"]
 
 
+class QueryEmbeddingCache:
+    """LRU cache of query embeddings, shared by all sessions"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query):
+        key = " ".join(query.lower().split())
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        # Queries are embedded as queries, the passages were stored as documents
+        embedding = genai.embed_content(model=EMBEDDING_MODEL,
+                                        content=query,
+                                        task_type="retrieval_query")["embedding"]
+        with self.lock:
+            self.entries[key] = embedding
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return embedding
+
+
 def get_relevant_passages(query, db, n_results=10):
-    passages = db.query(query_texts=[query], n_results=n_results)['documents'][0]
+    embedding = query_cache.get(query)
+    passages = db.query(query_embeddings=[embedding], n_results=n_results)['documents'][0]
     return passages
 
 
@@ -54,12 +94,11 @@ config = {
     'top_k': 50,
 }
 
+query_cache = QueryEmbeddingCache(QUERY_CACHE_SIZE)
+
 
 @cl.on_chat_start
 async def start():
-    setUpGoogleAPI()
-    loadVectorDataBase()
-
     settings = await cl.ChatSettings([
         Slider(
             id="temperature",
@@ -100,15 +139,16 @@ async def start():
 
 @cl.on_settings_update
 async def setup_model(settings):
-    config['temperature'] = settings['temperature']
-    config['top_p'] = float(settings['top_p'])
-    config['top_k'] = int(settings['top_k'])
-    config['max_output_tokens'] = int(settings['max_output_tokens'])
-    
-    model = genai.GenerativeModel(model_name="gemini-pro", generation_config=config)
-    cl.user_session.set('model', model)
-    
+    # Generation settings belong to the session, the model itself is shared
+    cl.user_session.set('generation_config', {
+        'temperature': float(settings['temperature']),
+        'top_p': float(settings['top_p']),
+        'top_k': int(settings['top_k']),
+        'max_output_tokens': int(settings['max_output_tokens']),
+    })
+
 
+@lru_cache(maxsize=None)
 def setUpGoogleAPI():
     load_dotenv()
 
@@ -116,27 +156,38 @@ def setUpGoogleAPI():
     genai.configure(api_key=api_key)
 
 
+@lru_cache(maxsize=None)
+def get_model():
+    setUpGoogleAPI()
+    return genai.GenerativeModel(model_name="gemini-pro")
+
+
+@lru_cache(maxsize=None)
 def loadVectorDataBase():
+    setUpGoogleAPI()
     chroma_client = chromadb.PersistentClient(path="../database/")
 
-    db = chroma_client.get_or_create_collection(
+    return chroma_client.get_or_create_collection(
         name="sme_db", embedding_function=GeminiEmbeddingFunction())
 
-    cl.user_session.set('db', db)
-    
-    
+
 @cl.on_message
 async def main(message):
-    model = cl.user_session.get('model')
-    
+    generation_config = cl.user_session.get('generation_config') or config
+
     question = message.content
-    db = cl.user_session.get('db')
-    passages = get_relevant_passages(question, db, 5)
-    
+    # Embedding and Chroma calls are blocking, keep them off the event loop
+    db = await asyncio.to_thread(loadVectorDataBase)
+    passages = await asyncio.to_thread(get_relevant_passages, question, db, 5)
+
     prompt = make_prompt(message.content, convert_pasages_to_string(passages))
-    
-    answer = model.generate_content(prompt)
-    await cl.Message(content=answer.text).send()
-    
-    
-    
\ No newline at end of file
+
+    answer = cl.Message(content="")
+    response = await get_model().generate_content_async(prompt,
+                                                        generation_config=generation_config,
+                                                        stream=True)
+    async for chunk in response:
+        # Blocked or empty chunks have no text
+        if chunk.parts:
+            await answer.stream_token(chunk.text)
+    await answer.send()
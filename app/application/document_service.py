@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterator, List, Optional
+from app.domain.chunks import TextBlock, TextChunk
 
 
 class DocumentService(ABC):
@@ -10,7 +11,21 @@ class DocumentService(ABC):
         """Extract text from Word document"""
         pass
     
+    @abstractmethod
+    async def extract_blocks_from_word(self, file_path: str) -> List[TextBlock]:
+        """Extract structural blocks from Word document"""
+        pass
+    
+    @abstractmethod
+    def iter_chunks(
+        self, 
+        text: str, 
+        blocks: Optional[List[TextBlock]] = None
+    ) -> Iterator[TextChunk]:
+        """Lazily split text into chunks with offsets"""
+        pass
+    
     @abstractmethod
     def chunk_text(self, text: str) -> List[str]:
         """Split text into chunks"""
-        pass
\ No newline at end of file
+        pass
@@ -5,6 +5,12 @@ from typing import List
 class EmbeddingService(ABC):
     """Interface for embedding generation"""
     
+    @property
+    @abstractmethod
+    def model_name(self) -> str:
+        """Embedding model the vectors are produced with"""
+        pass
+    
     @abstractmethod
     async def embed_text(self, text: str) -> List[float]:
         """Generate embedding for single text"""
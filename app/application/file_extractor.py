@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from typing import List
+from app.domain.chunks import TextBlock
 
 
 class FileExtractor(ABC):
@@ -7,4 +9,9 @@ class FileExtractor(ABC):
     @abstractmethod
     async def extract_text(self, file_path: str) -> str:
         """Extract text from file"""
-        pass
\ No newline at end of file
+        pass
+    
+    @abstractmethod
+    async def extract_blocks(self, file_path: str) -> List[TextBlock]:
+        """Extract structural blocks (paragraphs, headings, tables) from file"""
+        pass
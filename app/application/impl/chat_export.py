@@ -0,0 +1,250 @@
+"""
+Streaming export of chat history
+
+Chats are read through a server-side cursor in batches of
+CHAT_EXPORT_BATCH_SIZE rows, in (created_at, id) order, and every batch is
+encoded and handed out before the next one is fetched, so memory stays
+constant however many rows are exported. After each batch the position of
+its last row is available as a cursor to resume from. Sources are exported
+as stored (chunk references, no chunk text); answer_source tells generated
+answers from reused FAQ and cache answers.
+"""
+
+import csv
+import io
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import select, tuple_
+from app.domain.chat_cursor import encode_chat_cursor
+from app.domain.models import Chat
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["id", "created_at", "question", "answer", "answered", "answer_source", "latency_ms", "sources"]
+
+
+class _CsvEncoder:
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self, header: bool = True):
+        self.header = header
+
+    def start(self) -> bytes:
+        return self._encode([COLUMNS]) if self.header else b""
+
+    def write(self, rows) -> bytes:
+        return self._encode(
+            [
+                str(row.id), row.created_at.isoformat(), row.question, row.answer,
+                row.answered, row.answer_source, row.latency_ms, json.dumps(row.sources, ensure_ascii=False)
+            ]
+            for row in rows
+        )
+
+    def finish(self) -> bytes:
+        return b""
+
+    @staticmethod
+    def _encode(records) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(records)
+        return buffer.getvalue().encode("utf-8")
+
+
+class _NdjsonEncoder:
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def start(self) -> bytes:
+        return b""
+
+    def write(self, rows) -> bytes:
+        return "".join(
+            json.dumps({
+                "id": str(row.id),
+                "created_at": row.created_at.isoformat(),
+                "question": row.question,
+                "answer": row.answer,
+                "answered": row.answered,
+                "answer_source": row.answer_source,
+                "latency_ms": row.latency_ms,
+                "sources": row.sources
+            }, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only file handing out what was written since the last drain"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # Parquet footers record offsets, tell must count everything ever written
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class _ParquetEncoder:
+    """One row group per batch; the footer is written by finish()"""
+
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError(
+                "Parquet export needs pyarrow, install the optional requirements: "
+                "pip install -r requirements-parquet.txt"
+            ) from None
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ("id", pa.string()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+            ("question", pa.string()),
+            ("answer", pa.string()),
+            ("answered", pa.bool_()),
+            ("answer_source", pa.string()),
+            ("latency_ms", pa.int32()),
+            ("sources", pa.string())
+        ])
+        self.sink = _StreamSink()
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+    def start(self) -> bytes:
+        return b""
+
+    def write(self, rows) -> bytes:
+        columns = {
+            "id": [str(row.id) for row in rows],
+            "created_at": [row.created_at for row in rows],
+            "question": [row.question for row in rows],
+            "answer": [row.answer for row in rows],
+            "answered": [row.answered for row in rows],
+            "answer_source": [row.answer_source for row in rows],
+            "latency_ms": [row.latency_ms for row in rows],
+            "sources": [json.dumps(row.sources, ensure_ascii=False) for row in rows]
+        }
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+        return self.sink.drain()
+
+    def finish(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+
+def _create_encoder(export_format: str, header: bool):
+    if export_format == "csv":
+        return _CsvEncoder(header=header)
+    if export_format == "ndjson":
+        return _NdjsonEncoder()
+    if export_format == "parquet":
+        return _ParquetEncoder()
+    raise ValueError(f"Unknown export format: {export_format} (csv, ndjson or parquet)")
+
+
+class ChatExport:
+    """
+    One export run
+
+    Args:
+        engine: Database engine (a connection is held for the whole export)
+        export_format: csv, ndjson or parquet
+        batch_size: Rows fetched and encoded at a time
+        since: Only chats created at or after
+        until: Only chats created before
+        after: (created_at, id) of the last chat already exported
+        header: Write the CSV header (off when appending to an earlier run)
+
+    Raises:
+        ValueError: Unknown format
+        RuntimeError: Parquet requested without pyarrow installed
+    """
+
+    def __init__(
+        self,
+        engine,
+        export_format: str,
+        batch_size: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None,
+        header: bool = True
+    ):
+        self.engine = engine
+        self.encoder = _create_encoder(export_format, header)
+        self.batch_size = batch_size
+        self.since = since
+        self.until = until
+        self.after = after
+        self.rows = 0
+        self.cursor: Optional[str] = None
+
+    @property
+    def media_type(self) -> str:
+        return self.encoder.media_type
+
+    @property
+    def extension(self) -> str:
+        return self.encoder.extension
+
+    def _statement(self):
+        table = Chat.__table__
+        statement = select(*(table.c[column] for column in COLUMNS))
+        if self.after is not None:
+            statement = statement.where(tuple_(table.c.created_at, table.c.id) > tuple_(*self.after))
+        if self.since is not None:
+            statement = statement.where(table.c.created_at >= self.since)
+        if self.until is not None:
+            statement = statement.where(table.c.created_at < self.until)
+        return statement.order_by(table.c.created_at, table.c.id)
+
+    def stream(self) -> Iterator[bytes]:
+        """
+        Encoded export, one chunk per batch
+
+        After each chunk, rows and cursor describe everything handed out so
+        far. Blocking: iterate in a worker thread when serving requests.
+        """
+        yield self.encoder.start()
+        with self.engine.connect() as connection:
+            # Server-side cursor: rows arrive batch by batch instead of all at once
+            result = connection.execution_options(
+                stream_results=True,
+                max_row_buffer=self.batch_size
+            ).execute(self._statement())
+            for rows in result.partitions(self.batch_size):
+                chunk = self.encoder.write(rows)
+                self.rows += len(rows)
+                self.cursor = encode_chat_cursor(rows[-1].created_at, rows[-1].id)
+                yield chunk
+        yield self.encoder.finish()
+        logger.info(f"Exported {self.rows} chats as {self.extension}")
+
+    def progress(self) -> Dict:
+        return {"rows": self.rows, "cursor": self.cursor}
@@ -0,0 +1,72 @@
+"""
+Chat sources stored as chunk references
+
+Chat history keeps point id, document_id, chunk_index and score per source
+instead of a copy of the chunk text. The text is loaded from the vector
+store only when history is read, with one lookup for all chats of a page.
+Rows written before references were introduced still carry their content
+and are returned as they are.
+"""
+
+from typing import Dict, List, Optional
+from app.application.vector_store import VectorStore
+from app.domain.schemas import SourceDocument
+
+
+def to_source_ref(source: Dict) -> Dict:
+    """
+    Reference to the chunk of a source
+
+    A source without point_id is returned unchanged with its content: chunk
+    ids used to be random, so they cannot be derived from the position.
+    """
+    if not source.get("point_id"):
+        return source
+    return {
+        "point_id": source["point_id"],
+        "document_id": source.get("document_id"),
+        "chunk_index": source.get("chunk_index"),
+        "score": source.get("score")
+    }
+
+
+def to_source_refs(sources: List[SourceDocument]) -> List[Dict]:
+    """Compact references to store in chat.sources"""
+    return [to_source_ref(source.dict()) for source in sources]
+
+
+async def hydrate_sources(vector_store: VectorStore, stored: List[Optional[List[Dict]]]) -> List[List[SourceDocument]]:
+    """
+    Resolve stored sources of several chats with one chunk lookup
+
+    Args:
+        vector_store: Vector store holding the chunks
+        stored: chat.sources of each chat
+
+    Returns:
+        Sources per chat; chunks deleted since have empty content
+    """
+    point_ids = list(dict.fromkeys(
+        ref["point_id"]
+        for refs in stored for ref in refs or []
+        if "content" not in ref and ref.get("point_id")
+    ))
+    chunks = await vector_store.get_chunks(point_ids) if point_ids else {}
+
+    hydrated = []
+    for refs in stored:
+        sources = []
+        for ref in refs or []:
+            if "content" in ref:
+                sources.append(SourceDocument(**ref))
+                continue
+            chunk = chunks.get(ref.get("point_id"), {})
+            sources.append(SourceDocument(
+                content=chunk.get("content", ""),
+                score=ref.get("score") or 0.0,
+                document_id=ref.get("document_id"),
+                chunk_index=ref.get("chunk_index"),
+                point_id=ref.get("point_id")
+            ))
+        hydrated.append(sources)
+    return hydrated
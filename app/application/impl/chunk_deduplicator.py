@@ -0,0 +1,214 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import logging
+from app.application.vector_store import VectorStore
+from app.application.impl.chunk_fingerprint import (
+    SimHashIndex,
+    content_hash,
+    from_signed64,
+    hamming_distance,
+    is_near_duplicate,
+    simhash,
+    simhash_bands,
+    to_signed64,
+)
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.domain.chunks import TextChunk
+from app.infrastructure.repositories.fingerprint_repository import ChunkFingerprintRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ChunkFingerprintInfo:
+    """Fingerprints of a single chunk"""
+    content_hash: str
+    simhash: int
+
+
+@dataclass
+class DedupResult:
+    """Classification of a chunk batch"""
+    new: List[TextChunk]  # Chunks to embed and store as points of this document
+    shared: List[Tuple[TextChunk, str]]  # Chunks resolved to a point of another document
+    repeated: List[Tuple[TextChunk, int]]  # Chunks repeating an earlier chunk of the same document
+    fingerprints: Dict[int, ChunkFingerprintInfo]
+
+
+class ChunkDeduplicator:
+    """
+    Exact and near-duplicate chunk detection for one document ingestion
+
+    Chunks are matched by the hash of their normalized text against the
+    corpus-wide fingerprint table and against earlier chunks of the same
+    document. With DEDUP_NEAR_ENABLED, chunks of at least
+    DEDUP_NEAR_MIN_TOKENS are also matched by SimHash distance; a SimHash
+    match is only accepted when the stored text has the same numbers and a
+    shingle overlap of DEDUP_NEAR_MIN_JACCARD, so a chunk differing by a
+    figure or a name is never served as another chunk's text.
+    """
+
+    def __init__(
+        self,
+        document_id: str,
+        vector_store: Optional[VectorStore] = None,
+        repository: Optional[ChunkFingerprintRepository] = None,
+        session_factory=SessionLocal
+    ):
+        self.document_id = document_id
+        self.vector_store = vector_store
+        self.repository = repository or ChunkFingerprintRepository()
+        self.session_factory = session_factory
+        # Near matching needs the stored texts to confirm a SimHash match
+        self.near_enabled = settings.DEDUP_NEAR_ENABLED and vector_store is not None
+        self.max_distance = settings.DEDUP_SIMHASH_MAX_DISTANCE
+        self.near_min_tokens = settings.DEDUP_NEAR_MIN_TOKENS
+        self.min_jaccard = settings.DEDUP_NEAR_MIN_JACCARD
+        self._seen_hashes: Dict[str, int] = {}
+        self._seen_simhashes = SimHashIndex(self.max_distance)
+        self._seen_texts: Dict[int, str] = {}
+
+    async def classify(self, batch: List[TextChunk]) -> DedupResult:
+        """
+        Split batch into new, shared and repeated chunks
+
+        Args:
+            batch: Chunks in document order
+
+        Returns:
+            DedupResult
+        """
+        fingerprints = {
+            chunk.index: ChunkFingerprintInfo(content_hash(chunk.text), simhash(chunk.text))
+            for chunk in batch
+        }
+        candidates = await self._find_candidates(batch, fingerprints)
+        by_hash = {row.content_hash: row for row in candidates}
+        texts = await self._candidate_texts(batch, fingerprints, candidates, by_hash)
+
+        result = DedupResult(new=[], shared=[], repeated=[], fingerprints=fingerprints)
+        for chunk in batch:
+            info = fingerprints[chunk.index]
+            near = self._near(chunk)
+
+            earlier = self._seen_hashes.get(info.content_hash)
+            if earlier is None and near:
+                earlier = next(
+                    (
+                        index for index in self._seen_simhashes.find_all(info.simhash)
+                        if is_near_duplicate(chunk.text, self._seen_texts[index], self.min_jaccard)
+                    ),
+                    None
+                )
+            if earlier is not None:
+                result.repeated.append((chunk, earlier))
+                continue
+
+            match = by_hash.get(info.content_hash)
+            if match is None and near:
+                match = next(
+                    (
+                        row for row in self._nearest(info.simhash, candidates)
+                        if str(row.point_id) in texts
+                        and is_near_duplicate(chunk.text, texts[str(row.point_id)], self.min_jaccard)
+                    ),
+                    None
+                )
+
+            self._seen_hashes[info.content_hash] = chunk.index
+            if near:
+                self._seen_simhashes.add(info.simhash, chunk.index)
+                self._seen_texts[chunk.index] = chunk.text
+
+            if match is not None:
+                result.shared.append((chunk, str(match.point_id)))
+            else:
+                result.new.append(chunk)
+
+        return result
+
+    async def register(self, point_ids: Dict[int, str], fingerprints: Dict[int, ChunkFingerprintInfo]) -> None:
+        """
+        Record fingerprints of points stored for this document
+
+        Args:
+            point_ids: Chunk index to stored point ID
+            fingerprints: Chunk index to fingerprints
+        """
+        entries = []
+        for index, point_id in point_ids.items():
+            info = fingerprints[index]
+            value = to_signed64(info.simhash)
+            bands = simhash_bands(info.simhash)
+            entries.append({
+                "point_id": point_id,
+                "content_hash": info.content_hash,
+                "simhash": value,
+                "band0": bands[0],
+                "band1": bands[1],
+                "band2": bands[2],
+                "band3": bands[3],
+                "document_ids": [self.document_id],
+                "ref_count": 1
+            })
+
+        db = self.session_factory()
+        try:
+            await self.repository.register(db, entries)
+        finally:
+            db.close()
+
+    async def attach(self, point_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Add this document to the references of shared points
+
+        Returns:
+            Point ID to referencing documents after the update
+        """
+        db = self.session_factory()
+        try:
+            return await self.repository.add_reference(db, sorted(set(point_ids)), self.document_id)
+        finally:
+            db.close()
+
+    async def _find_candidates(self, batch: List[TextChunk], fingerprints: Dict[int, ChunkFingerprintInfo]):
+        hashes = sorted({info.content_hash for info in fingerprints.values()})
+        bands = [set() for _ in range(4)]
+        for chunk in batch:
+            if self._near(chunk):
+                for position, value in enumerate(simhash_bands(fingerprints[chunk.index].simhash)):
+                    bands[position].add(value)
+
+        db = self.session_factory()
+        try:
+            return await self.repository.find_candidates(db, hashes, bands)
+        finally:
+            db.close()
+
+    async def _candidate_texts(
+        self,
+        batch: List[TextChunk],
+        fingerprints: Dict[int, ChunkFingerprintInfo],
+        candidates,
+        by_hash
+    ) -> Dict[str, str]:
+        """Stored texts of the SimHash candidates, fetched in one lookup"""
+        point_ids = {
+            str(row.point_id)
+            for chunk in batch
+            if self._near(chunk) and fingerprints[chunk.index].content_hash not in by_hash
+            for row in self._nearest(fingerprints[chunk.index].simhash, candidates)
+        }
+        if not point_ids:
+            return {}
+        chunks = await self.vector_store.get_chunks(sorted(point_ids))
+        return {point_id: chunk["content"] for point_id, chunk in chunks.items()}
+
+    def _near(self, chunk: TextChunk) -> bool:
+        return self.near_enabled and chunk.token_count >= self.near_min_tokens
+
+    def _nearest(self, value: int, candidates) -> List[object]:
+        """Candidates within the distance threshold, closest first"""
+        distances = [(hamming_distance(value, from_signed64(row.simhash)), row) for row in candidates]
+        return [row for distance, row in sorted(distances, key=lambda item: item[0]) if distance <= self.max_distance]
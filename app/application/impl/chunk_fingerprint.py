@@ -0,0 +1,128 @@
+from typing import Dict, List, Optional
+import hashlib
+import re
+import numpy as np
+
+WORD = re.compile(r'\w+', re.UNICODE)
+NUMBER = re.compile(r'\d+(?:[.,]\d+)*')
+
+SIMHASH_BITS = 64
+# 4 bands of 16 bits: by pigeonhole, fingerprints within Hamming distance 3 share a band
+SIMHASH_BANDS = 4
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse punctuation/whitespace so formatting does not change the hash"""
+    return " ".join(WORD.findall(text.lower()))
+
+
+def content_hash(text: str) -> str:
+    """Exact-duplicate fingerprint of normalized text"""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash over the distinct words of the text
+
+    Word sets (rather than shingles) keep the fingerprint stable when a
+    boilerplate block differs by a date, name or number.
+
+    Args:
+        text: Chunk text
+
+    Returns:
+        Unsigned 64-bit fingerprint; similar texts differ in few bits
+    """
+    words = set(WORD.findall(text.lower()))
+    if not words:
+        return 0
+
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(w.encode("utf-8"), digest_size=8).digest(), "little") for w in words],
+        dtype=np.uint64
+    )
+    # Vote per bit: +1 if set, -1 if not, summed over all words
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(words)
+    packed = np.packbits(votes > 0, bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+def simhash_bands(value: int) -> List[int]:
+    """Split fingerprint into 16-bit bands used as lookup keys"""
+    mask = (1 << BAND_BITS) - 1
+    return [(value >> (BAND_BITS * i)) & mask for i in range(SIMHASH_BANDS)]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def shingle_jaccard(a: str, b: str, size: int = 3) -> float:
+    """Jaccard similarity of the word shingles of two texts"""
+    def shingles(text: str) -> set:
+        words = WORD.findall(text.lower())
+        return {tuple(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+    first, second = shingles(a), shingles(b)
+    union = first | second
+    return len(first & second) / len(union) if union else 1.0
+
+
+def is_near_duplicate(a: str, b: str, min_jaccard: float) -> bool:
+    """
+    Text-level confirmation of a SimHash match
+
+    SimHash over word sets cannot see a changed number or a swapped name, so
+    a match is only accepted when both texts carry the same numbers and most
+    of their word shingles.
+
+    Args:
+        a: Chunk text
+        b: Candidate text
+        min_jaccard: Minimum shingle overlap
+
+    Returns:
+        True if b may stand in for a
+    """
+    if NUMBER.findall(a) != NUMBER.findall(b):
+        return False
+    return shingle_jaccard(a, b) >= min_jaccard
+
+
+def to_signed64(value: int) -> int:
+    """Store unsigned fingerprint in a signed BIGINT column"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def from_signed64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class SimHashIndex:
+    """In-memory banded SimHash index"""
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        self._buckets: List[Dict[int, List[tuple]]] = [{} for _ in range(SIMHASH_BANDS)]
+
+    def add(self, value: int, key) -> None:
+        for band, bucket in zip(simhash_bands(value), self._buckets):
+            bucket.setdefault(band, []).append((value, key))
+
+    def find(self, value: int) -> Optional[object]:
+        """Key of an indexed fingerprint within max_distance, if any"""
+        keys = self.find_all(value)
+        return keys[0] if keys else None
+
+    def find_all(self, value: int) -> List[object]:
+        """Keys of indexed fingerprints within max_distance, closest first"""
+        found = {}
+        for band, bucket in zip(simhash_bands(value), self._buckets):
+            for candidate, key in bucket.get(band, ()):
+                distance = hamming_distance(value, candidate)
+                if distance <= self.max_distance and key not in found:
+                    found[key] = distance
+        return sorted(found, key=found.get)
@@ -0,0 +1,163 @@
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+import logging
+from app.core.config import settings
+from app.domain.context import BuiltContext, ContextPassage
+from app.infrastructure.embeddings.tokenizer import Tokenizer
+
+logger = logging.getLogger(__name__)
+
+# Separator between passages (same as the former plain join of hits)
+PASSAGE_SEPARATOR = "\n\n"
+# Longest overlap searched for when hits carry no character offsets
+MAX_TEXT_OVERLAP = 2000
+MIN_TEXT_OVERLAP = 16
+
+
+def _text_overlap(previous: str, following: str) -> int:
+    """Length of the longest suffix of previous that is a prefix of following"""
+    if len(following) < MIN_TEXT_OVERLAP:
+        return 0
+    anchor = following[:MIN_TEXT_OVERLAP]
+    window_start = max(len(previous) - MAX_TEXT_OVERLAP, 0)
+    position = previous.find(anchor, window_start)
+    while position != -1:
+        if following.startswith(previous[position:]):
+            return len(previous) - position
+        position = previous.find(anchor, position + 1)
+    return 0
+
+
+class ContextBuilder:
+    """
+    Token-budgeted context assembly
+
+    Hits are admitted best score first while the assembled context fits into
+    max_tokens. Admitted hits are grouped by document and ordered by chunk
+    index; neighbouring chunks are merged into one passage with the overlap
+    between them removed, so the LLM sees each piece of text once and in
+    document order.
+    """
+
+    def __init__(self, max_tokens: int, token_counter: Callable[[str], int]):
+        self.max_tokens = max_tokens
+        self.count_tokens = token_counter
+
+    @classmethod
+    def from_settings(cls) -> "ContextBuilder":
+        return cls(
+            max_tokens=settings.CONTEXT_MAX_TOKENS,
+            token_counter=Tokenizer(settings.OPENAI_LLM_MODEL).count
+        )
+
+    def with_max_tokens(self, max_tokens: int) -> "ContextBuilder":
+        """Same builder with another token budget"""
+        return ContextBuilder(max_tokens, self.count_tokens)
+
+    def build(self, hits: List[Dict], original_hits: Optional[List[Dict]] = None) -> BuiltContext:
+        """
+        Assemble context from search hits
+
+        Args:
+            hits: Search results (content, score, document_id, chunk_index and
+                optionally char_start/char_end)
+            original_hits: Hits before compression, the baseline for tokens saved
+
+        Returns:
+            BuiltContext with token accounting
+        """
+        baseline = original_hits if original_hits is not None else hits
+        raw_tokens = self.count_tokens(PASSAGE_SEPARATOR.join(hit["content"] for hit in baseline)) if baseline else 0
+
+        admitted: List[Dict] = []
+        passages: List[ContextPassage] = []
+        tokens = 0
+        dropped = 0
+        for hit in sorted(hits, key=lambda h: h["score"], reverse=True):
+            trial = self._assemble(admitted + [hit])
+            trial_tokens = self.count_tokens(self._render(trial))
+            if trial_tokens > self.max_tokens:
+                dropped += 1
+                continue
+            admitted.append(hit)
+            passages, tokens = trial, trial_tokens
+
+        merged = len(admitted) - len(passages)
+        if dropped:
+            logger.info(f"Context budget of {self.max_tokens} tokens left out {dropped} of {len(hits)} chunks")
+
+        return BuiltContext(
+            text=self._render(passages),
+            passages=passages,
+            used_hits=admitted,
+            raw_tokens=raw_tokens,
+            tokens=tokens,
+            merged_chunks=merged,
+            dropped_chunks=dropped
+        )
+
+    def _assemble(self, hits: List[Dict]) -> List[ContextPassage]:
+        """Group hits by document, merge neighbours and order passages by best score"""
+        by_document: Dict[str, List[Dict]] = defaultdict(list)
+        for hit in hits:
+            by_document[hit.get("document_id", "")].append(hit)
+
+        passages = []
+        for document_id, document_hits in by_document.items():
+            document_hits.sort(key=lambda h: (h.get("chunk_index", 0), h.get("char_start") or 0))
+            current: Optional[ContextPassage] = None
+            for hit in document_hits:
+                if current is not None and self._adjacent(current, hit):
+                    self._append(current, hit)
+                    continue
+                current = ContextPassage(
+                    document_id=document_id,
+                    text=hit["content"],
+                    score=hit["score"],
+                    chunk_indices=[hit.get("chunk_index", 0)],
+                    end=self._end(hit)
+                )
+                passages.append(current)
+
+        passages.sort(key=lambda p: p.score, reverse=True)
+        return passages
+
+    @staticmethod
+    def _end(hit: Dict) -> Optional[int]:
+        """Character end offset of a hit whose offsets match its text"""
+        start, end = hit.get("char_start"), hit.get("char_end")
+        if start is None or end is None or end - start != len(hit["content"]):
+            return None
+        return end
+
+    def _adjacent(self, passage: ContextPassage, hit: Dict) -> bool:
+        if hit.get("chunk_index", 0) == passage.chunk_indices[-1] + 1:
+            return True
+        # Offsets also reveal overlapping chunks that are not direct neighbours
+        start = hit.get("char_start")
+        return passage.end is not None and self._end(hit) is not None and start <= passage.end
+
+    def _append(self, passage: ContextPassage, hit: Dict) -> None:
+        """Append hit to passage without repeating the text they share"""
+        text = hit["content"]
+        end = self._end(hit)
+        if passage.end is not None and end is not None:
+            start = hit["char_start"]
+            if end <= passage.end:
+                tail = ""
+            elif start < passage.end:
+                tail = text[passage.end - start:]
+            else:
+                tail = "\n" + text
+        else:
+            overlap = _text_overlap(passage.text, text)
+            tail = text[overlap:] if overlap else "\n" + text
+
+        passage.text += tail
+        passage.score = max(passage.score, hit["score"])
+        passage.chunk_indices.append(hit.get("chunk_index", 0))
+        passage.end = max(passage.end, end) if passage.end is not None and end is not None else None
+
+    @staticmethod
+    def _render(passages: List[ContextPassage]) -> str:
+        return PASSAGE_SEPARATOR.join(passage.text for passage in passages)
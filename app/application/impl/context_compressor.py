@@ -0,0 +1,129 @@
+from typing import Dict, List, Tuple
+import logging
+import time
+import numpy as np
+from app.application.vector_store import VectorStore
+from app.core.config import settings
+from app.domain.context import CompressionStats
+
+logger = logging.getLogger(__name__)
+
+
+class ContextCompressor:
+    """
+    Sentence-level compression of retrieved chunks
+
+    Sentence embeddings stored at ingestion are fetched for the retrieved
+    chunks in one request and scored against the question embedding in a
+    single matrix product. The best sentences across all chunks are kept
+    together with their neighbours, in their original order. Chunks without
+    stored sentences pass through unchanged.
+    """
+
+    def __init__(self, vector_store: VectorStore, top_sentences: int, neighbours: int):
+        self.vector_store = vector_store
+        self.top_sentences = top_sentences
+        self.neighbours = neighbours
+
+    @classmethod
+    def from_settings(cls, vector_store: VectorStore) -> "ContextCompressor":
+        return cls(
+            vector_store=vector_store,
+            top_sentences=settings.COMPRESSION_TOP_SENTENCES,
+            neighbours=settings.COMPRESSION_NEIGHBOURS
+        )
+
+    async def compress(
+        self,
+        question_embedding: List[float],
+        hits: List[Dict]
+    ) -> Tuple[List[Dict], CompressionStats]:
+        """
+        Keep the sentences of hits that are relevant to the question
+
+        Args:
+            question_embedding: Question embedding vector
+            hits: Search results with point_id and sentence_count
+
+        Returns:
+            Tuple of (compressed hits, compression stats)
+        """
+        started = time.perf_counter()
+        stats = CompressionStats(original_chars=sum(len(hit["content"]) for hit in hits))
+
+        counts = {hit["point_id"]: hit["sentence_count"] for hit in hits if hit.get("sentence_count")}
+        sentences = await self.vector_store.get_sentences(counts) if counts else {}
+        covered = [index for index, hit in enumerate(hits) if hit.get("point_id") in sentences]
+
+        keep = np.zeros(0, dtype=bool)
+        if covered:
+            keep = self._select(
+                question_embedding,
+                [np.asarray(sentences[hits[index]["point_id"]][1], dtype=np.float32) for index in covered]
+            )
+
+        compressed = []
+        kept_by_document: Dict[str, List[str]] = {}
+        position = 0
+        covered_set = set(covered)
+        for index, hit in enumerate(hits):
+            if index not in covered_set:
+                compressed.append(hit)
+                stats.compressed_chars += len(hit["content"])
+                continue
+
+            spans = sentences[hit["point_id"]][0]
+            mask = keep[position:position + len(spans)]
+            position += len(spans)
+            stats.sentences_total += len(spans)
+
+            seen = kept_by_document.setdefault(hit.get("document_id", ""), [])
+            parts = []
+            for (start, end), selected in zip(spans, mask):
+                sentence = hit["content"][start:end]
+                # Overlapping neighbour chunks repeat sentences (or their tails)
+                if not selected or any(self._repeats(sentence, other) for other in seen):
+                    continue
+                seen.append(sentence)
+                parts.append(sentence)
+
+            if not parts:
+                continue
+            text = " ".join(parts)
+            stats.sentences_kept += len(parts)
+            stats.compressed_chars += len(text)
+            reduced = {key: value for key, value in hit.items() if key not in ("char_start", "char_end")}
+            reduced["content"] = text
+            compressed.append(reduced)
+
+        stats.seconds = time.perf_counter() - started
+        logger.info(
+            f"Compressed context to {stats.ratio:.0%} ({stats.sentences_kept}/{stats.sentences_total} sentences) "
+            f"in {stats.seconds * 1000:.1f}ms"
+        )
+        return compressed, stats
+
+    @staticmethod
+    def _repeats(sentence: str, other: str) -> bool:
+        # Short sentences ("Ha.", "1.") only count as repeats when identical
+        return sentence == other or (len(sentence) >= 20 and sentence in other)
+
+    def _select(self, question_embedding: List[float], chunk_vectors: List[np.ndarray]) -> np.ndarray:
+        """Mask over all sentences: top scores plus neighbours within the same chunk"""
+        matrix = np.vstack(chunk_vectors)
+        owner = np.repeat(np.arange(len(chunk_vectors)), [len(vectors) for vectors in chunk_vectors])
+        query = np.asarray(question_embedding, dtype=np.float32)
+
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = matrix @ query / np.maximum(norms, 1e-12)
+
+        top = min(self.top_sentences, len(scores))
+        selected = np.zeros(len(scores), dtype=bool)
+        selected[np.argpartition(-scores, top - 1)[:top]] = True
+
+        keep = selected.copy()
+        for shift in range(1, self.neighbours + 1):
+            same_owner = owner[shift:] == owner[:-shift]
+            keep[:-shift] |= selected[shift:] & same_owner
+            keep[shift:] |= selected[:-shift] & same_owner
+        return keep
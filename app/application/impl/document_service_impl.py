@@ -1,8 +1,9 @@
-from typing import List
+from typing import Iterator, List, Optional
 import logging
 from app.application.document_service import DocumentService
 from app.application.file_extractor import FileExtractor
-from app.core.config import settings
+from app.application.impl.text_chunker import TextChunker
+from app.domain.chunks import TextBlock, TextChunk
 
 logger = logging.getLogger(__name__)
 
@@ -10,8 +11,9 @@ logger = logging.getLogger(__name__)
 class DocumentServiceImpl(DocumentService):
     """Implementation of document processing service"""
     
-    def __init__(self, file_extractor: FileExtractor):
+    def __init__(self, file_extractor: FileExtractor, chunker: Optional[TextChunker] = None):
         self.extractor = file_extractor
+        self.chunker = chunker or TextChunker.from_settings()
     
     async def extract_text_from_word(self, file_path: str) -> str:
         """
@@ -31,6 +33,41 @@ class DocumentServiceImpl(DocumentService):
             logger.error(f"Error extracting text from {file_path}: {str(e)}")
             raise
     
+    async def extract_blocks_from_word(self, file_path: str) -> List[TextBlock]:
+        """
+        Extract structural blocks from Word document
+        
+        Args:
+            file_path: Path to Word file
+            
+        Returns:
+            List of paragraph, heading and table blocks
+        """
+        try:
+            blocks = await self.extractor.extract_blocks(file_path)
+            logger.info(f"Successfully extracted {len(blocks)} blocks from {file_path}")
+            return blocks
+        except Exception as e:
+            logger.error(f"Error extracting blocks from {file_path}: {str(e)}")
+            raise
+    
+    def iter_chunks(
+        self, 
+        text: str, 
+        blocks: Optional[List[TextBlock]] = None
+    ) -> Iterator[TextChunk]:
+        """
+        Lazily split text into token-sized chunks
+        
+        Args:
+            text: Text to split
+            blocks: Structural blocks of the text (optional)
+            
+        Yields:
+            Chunks with character offsets and token counts
+        """
+        return self.chunker.iter_chunks(text, blocks)
+    
     def chunk_text(self, text: str) -> List[str]:
         """
         Split text into chunks
@@ -41,29 +78,6 @@ class DocumentServiceImpl(DocumentService):
         Returns:
             List of text chunks
         """
-        chunk_size = settings.CHUNK_SIZE
-        chunk_overlap = settings.CHUNK_OVERLAP
-        
-        chunks = []
-        start = 0
-        text_length = len(text)
-        
-        while start < text_length:
-            end = start + chunk_size
-            chunk = text[start:end]
-            
-            # Find last sentence boundary if not at end
-            if end < text_length:
-                last_period = chunk.rfind('.')
-                last_newline = chunk.rfind('\n')
-                boundary = max(last_period, last_newline)
-                
-                if boundary > chunk_size * 0.5:
-                    end = start + boundary + 1
-                    chunk = text[start:end]
-            
-            chunks.append(chunk.strip())
-            start = end - chunk_overlap
-        
+        chunks = [chunk.text for chunk in self.iter_chunks(text)]
         logger.info(f"Split text into {len(chunks)} chunks")
-        return chunks
\ No newline at end of file
+        return chunks
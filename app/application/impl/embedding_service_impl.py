@@ -1,7 +1,7 @@
 from typing import List
 import logging
 from app.application.embedding_service import EmbeddingService
-from app.infrastructure.embeddings.openai_embedding import OpenAIEmbedding  # YANGILANDI
+from app.infrastructure.embeddings.openai_embedding import get_embedding_client
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +10,11 @@ class EmbeddingServiceImpl(EmbeddingService):
     """Implementation of embedding service"""
     
     def __init__(self):
-        self.embedding_client = OpenAIEmbedding()  # YANGILANDI
+        self.embedding_client = get_embedding_client()
+    
+    @property
+    def model_name(self) -> str:
+        return self.embedding_client.model_name
     
     async def embed_text(self, text: str) -> List[float]:
         """
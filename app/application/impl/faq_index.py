@@ -0,0 +1,119 @@
+"""
+In-memory index of the FAQ entries
+
+Consulted at the start of every query: a question whose normalized text is
+a known wording of an entry is answered by a dict lookup, before it is even
+embedded; otherwise its embedding is compared with the entry centroids in
+one matrix product. Either way a match skips search and the LLM. Entries
+are loaded from faq_entries by the FAQ jobs and replaced as a whole, so a
+lookup never sees a half-loaded index.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from app.core.config import settings
+from app.domain.schemas import SourceDocument
+
+logger = logging.getLogger(__name__)
+
+_APOSTROPHES = re.compile(r"[‘’ʻʼ`]")
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase words only, so wordings differing in case, spacing or punctuation match"""
+    question = _APOSTROPHES.sub("'", question.lower())
+    return " ".join(_NON_WORD.sub(" ", question).split())
+
+
+class FaqMatch:
+    """FAQ entry answering a question"""
+
+    def __init__(self, entry_id: str, question: str, answer: str, sources: List[SourceDocument], score: float):
+        self.entry_id = entry_id
+        self.question = question
+        self.answer = answer
+        self.sources = sources
+        self.score = score
+
+    def __repr__(self):
+        return f"<FaqMatch(entry_id={self.entry_id}, score={self.score:.3f})>"
+
+
+class FaqIndex:
+    """
+    Lookup of FAQ entries by wording and by embedding
+
+    Args:
+        threshold: Minimum cosine similarity of a question to an entry centroid
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._entries: List[Dict] = []
+        self._exact: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self, entries: List[Dict]) -> None:
+        """
+        Replace the indexed entries
+
+        Args:
+            entries: Dicts with id, question, answer, sources (SourceDocument
+                list), variants (normalized wordings), centroid (unit vector)
+                and document_ids
+        """
+        exact = {}
+        for position, entry in enumerate(entries):
+            for variant in entry["variants"]:
+                exact.setdefault(variant, position)
+        matrix = np.vstack([entry["centroid"] for entry in entries]).astype(np.float32) if entries else None
+        # Swap all three at once, lookups between awaits never see a mix
+        self._entries, self._exact, self._matrix = list(entries), exact, matrix
+        logger.info(f"FAQ index loaded with {len(entries)} entries")
+
+    def invalidate_documents(self, document_ids: Iterable[str]) -> int:
+        """Drop the entries citing any of the documents (before the next reload notices)"""
+        document_ids = set(document_ids)
+        kept = [entry for entry in self._entries if not document_ids & set(entry["document_ids"])]
+        dropped = len(self._entries) - len(kept)
+        if dropped:
+            self.load(kept)
+        return dropped
+
+    def match_text(self, question: str) -> Optional[FaqMatch]:
+        """Entry having the question as one of its wordings"""
+        position = self._exact.get(normalize_question(question))
+        if position is None:
+            return None
+        return self._match(position, 1.0)
+
+    def match_embedding(self, embedding: List[float]) -> Optional[FaqMatch]:
+        """Entry whose centroid is closest to the question, if at least threshold"""
+        if self._matrix is None:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if not norm:
+            return None
+        scores = self._matrix @ (vector / norm)
+        position = int(np.argmax(scores))
+        if scores[position] < self.threshold:
+            return None
+        return self._match(position, float(scores[position]))
+
+    def _match(self, position: int, score: float) -> FaqMatch:
+        entry = self._entries[position]
+        return FaqMatch(str(entry["id"]), entry["question"], entry["answer"], entry["sources"], score)
+
+
+@lru_cache(maxsize=None)
+def get_faq_index() -> FaqIndex:
+    """Process-wide FAQ index (empty until the first load)"""
+    return FaqIndex(settings.FAQ_MATCH_THRESHOLD)
@@ -0,0 +1,176 @@
+"""
+FAQ mining from chat history
+
+Recent answered questions are grouped by normalized wording, the most
+asked wordings are embedded and clustered greedily: most asked first, each
+wording joins the closest cluster whose centroid is within
+FAQ_CLUSTER_THRESHOLD or starts its own. Clusters asked at least
+FAQ_MIN_CLUSTER_SIZE times become FAQ entries. An entry takes the answer of
+the most recent chat of the cluster asked after all its source documents
+were indexed, so an answer given from a since replaced document is never
+reused; a cluster without such a chat is left out until users ask again.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.application.embedding_service import EmbeddingService
+from app.application.impl.chat_sources import to_source_ref
+from app.application.impl.faq_index import normalize_question
+from app.core.config import settings
+from app.domain.models import Chat
+
+logger = logging.getLogger(__name__)
+
+# Wordings of an entry kept for exact lookup
+MAX_VARIANTS = 100
+
+
+def cluster_questions(embeddings: np.ndarray, weights: List[int], threshold: float) -> List[List[int]]:
+    """
+    Greedy single-pass clustering of unit vectors, heaviest first
+
+    Returns:
+        Member positions per cluster, heaviest member first
+    """
+    clusters: List[List[int]] = []
+    sums = np.zeros_like(embeddings)
+    centroids = np.zeros_like(embeddings)
+    for position in sorted(range(len(weights)), key=lambda i: -weights[i]):
+        vector = embeddings[position]
+        if clusters:
+            scores = centroids[:len(clusters)] @ vector
+            best = int(np.argmax(scores))
+            if scores[best] >= threshold:
+                clusters[best].append(position)
+                sums[best] += vector * weights[position]
+                centroids[best] = sums[best] / np.linalg.norm(sums[best])
+                continue
+        sums[len(clusters)] = vector * weights[position]
+        centroids[len(clusters)] = vector
+        clusters.append([position])
+    return clusters
+
+
+class FaqMiner:
+    """
+    Build FAQ entries from chats
+
+    Args:
+        embedding_service: Embeds the question wordings
+        cluster_threshold: Minimum similarity of a wording to its cluster centroid
+        match_threshold: Minimum similarity of a wording kept for exact lookup
+        min_cluster_size: Chats a cluster needs to become an entry
+        max_questions: Most asked wordings clustered
+        max_entries: Entries kept, most asked first
+    """
+
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        cluster_threshold: float,
+        match_threshold: float,
+        min_cluster_size: int,
+        max_questions: int,
+        max_entries: int
+    ):
+        self.embedding_service = embedding_service
+        self.cluster_threshold = cluster_threshold
+        self.match_threshold = match_threshold
+        self.min_cluster_size = min_cluster_size
+        self.max_questions = max_questions
+        self.max_entries = max_entries
+
+    @classmethod
+    def from_settings(cls, embedding_service: EmbeddingService) -> "FaqMiner":
+        return cls(
+            embedding_service,
+            cluster_threshold=settings.FAQ_CLUSTER_THRESHOLD,
+            match_threshold=settings.FAQ_MATCH_THRESHOLD,
+            min_cluster_size=settings.FAQ_MIN_CLUSTER_SIZE,
+            max_questions=settings.FAQ_MAX_QUESTIONS,
+            max_entries=settings.FAQ_MAX_ENTRIES
+        )
+
+    async def mine(self, chats: List[Chat], documents: Dict[str, Tuple[str, Optional[datetime]]]) -> List[Dict]:
+        """
+        FAQ entries of the chats
+
+        Args:
+            chats: Answered chats, newest first
+            documents: Current (source_version, indexed_at) of the indexed source documents
+
+        Returns:
+            faq_entries rows, most asked first
+        """
+        by_wording: Dict[str, List[Chat]] = {}
+        for chat in chats:
+            by_wording.setdefault(normalize_question(chat.question), []).append(chat)
+        by_wording.pop("", None)
+        counts = Counter({wording: len(asked) for wording, asked in by_wording.items()})
+        wordings = [wording for wording, _ in counts.most_common(self.max_questions)]
+        if not wordings:
+            return []
+
+        # Most recent original wording stands for each normalized one
+        texts = [by_wording[wording][0].question for wording in wordings]
+        embeddings = np.asarray(await self.embedding_service.embed_texts(texts), dtype=np.float32)
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        weights = [counts[wording] for wording in wordings]
+        clusters = await asyncio.to_thread(cluster_questions, embeddings, weights, self.cluster_threshold)
+
+        entries = []
+        for members in clusters:
+            chat_count = sum(weights[position] for position in members)
+            if chat_count < self.min_cluster_size:
+                continue
+            answer_chat = self._answer_chat(
+                [chat for position in members for chat in by_wording[wordings[position]]],
+                documents
+            )
+            if answer_chat is None:
+                continue
+
+            centroid = np.sum([embeddings[position] * weights[position] for position in members], axis=0)
+            centroid /= np.linalg.norm(centroid)
+            # Only wordings that would match by embedding too are answered by text
+            variants = [
+                wordings[position] for position in members
+                if float(embeddings[position] @ centroid) >= self.match_threshold
+            ][:MAX_VARIANTS]
+            refs = [to_source_ref(source) for source in answer_chat.sources]
+            entries.append({
+                "question": texts[members[0]],
+                "answer": answer_chat.answer,
+                "sources": refs,
+                "variants": variants,
+                "centroid": centroid.astype(np.float32).tobytes(),
+                "source_versions": {ref["document_id"]: documents[ref["document_id"]][0] for ref in refs},
+                "chat_count": chat_count
+            })
+
+        entries.sort(key=lambda entry: -entry["chat_count"])
+        logger.info(
+            f"Mined {min(len(entries), self.max_entries)} FAQ entries from {len(chats)} chats "
+            f"({len(wordings)} wordings, {len(clusters)} clusters)"
+        )
+        return entries[:self.max_entries]
+
+    @staticmethod
+    def _answer_chat(chats: List[Chat], documents: Dict[str, Tuple[str, Optional[datetime]]]) -> Optional[Chat]:
+        """Most recent chat whose sources are all indexed documents, asked after their indexing"""
+        for chat in sorted(chats, key=lambda chat: chat.created_at, reverse=True):
+            if not chat.sources:
+                continue
+            current = True
+            for source in chat.sources:
+                document = documents.get(source.get("document_id"))
+                if document is None or (document[1] is not None and chat.created_at < document[1]):
+                    current = False
+                    break
+            if current:
+                return chat
+        return None
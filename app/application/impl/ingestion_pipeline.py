@@ -0,0 +1,382 @@
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import time
+import numpy as np
+from app.application.document_service import DocumentService
+from app.application.embedding_service import EmbeddingService
+from app.application.vector_store import VectorStore
+from app.application.impl.chunk_deduplicator import ChunkDeduplicator, DedupResult
+from app.application.impl.text_chunker import sentence_spans
+from app.core.config import settings
+from app.domain.chunks import TextChunk, blocks_to_text, make_point_id
+from app.domain.ingestion import IngestionReport
+from app.infrastructure.repositories.checkpoint_repository import IngestionCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# Queue sentinel signalling that an upstream stage is finished
+_DONE = object()
+
+
+class _Centroid:
+    """Running sum of the distinct point vectors a document refers to"""
+
+    def __init__(self):
+        self.total: Optional[np.ndarray] = None
+        self.point_ids = set()
+
+    def add(self, point_id: str, vector: List[float]) -> None:
+        if point_id in self.point_ids:
+            return
+        self.point_ids.add(point_id)
+        vector = np.asarray(vector, dtype=np.float64)
+        self.total = vector if self.total is None else self.total + vector
+
+    def vector(self) -> Optional[List[float]]:
+        """Unit-length mean, None when nothing was added"""
+        if self.total is None:
+            return None
+        norm = np.linalg.norm(self.total)
+        return (self.total / norm).tolist() if norm > 0 else None
+
+
+class IngestionPipeline:
+    """
+    Streaming extract → chunk → embed → upsert pipeline
+
+    Stages are connected by bounded queues, so chunks are embedded while the
+    document is still being chunked and batch N is upserted while batch N+1 is
+    being embedded. Peak memory is bounded by the queue sizes instead of the
+    document size, and wall time approaches the slowest stage.
+
+    With DEDUP_ENABLED, chunks that duplicate an already stored chunk (exact
+    normalized text, or near-duplicates with DEDUP_NEAR_ENABLED) are not
+    embedded; the document is attached to the existing point instead. With
+    COMPRESSION_ENABLED, the sentences of new chunks are embedded and stored
+    alongside them for query-time context compression. With
+    HIERARCHICAL_SEARCH_ENABLED, the mean of the document's chunk vectors is
+    accumulated as batches are stored and saved as its document vector.
+    """
+
+    def __init__(
+        self,
+        document_service: DocumentService,
+        embedding_service: EmbeddingService,
+        vector_store: VectorStore,
+        batch_size: Optional[int] = None,
+        embed_concurrency: Optional[int] = None,
+        upsert_concurrency: Optional[int] = None,
+        queue_size: Optional[int] = None
+    ):
+        self.document_service = document_service
+        self.embedding_service = embedding_service
+        self.vector_store = vector_store
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.embed_concurrency = embed_concurrency or settings.INGEST_EMBED_CONCURRENCY
+        self.upsert_concurrency = upsert_concurrency or settings.INGEST_UPSERT_CONCURRENCY
+        self.queue_size = queue_size or settings.INGEST_QUEUE_SIZE
+        self.dedup_enabled = settings.DEDUP_ENABLED
+        self.sentences_enabled = settings.COMPRESSION_ENABLED
+        self.centroid_enabled = settings.HIERARCHICAL_SEARCH_ENABLED
+
+    @property
+    def signature(self) -> dict:
+        """Configuration a checkpoint must match to be resumed"""
+        return {
+            "chunk_size_tokens": settings.CHUNK_SIZE_TOKENS,
+            "chunk_overlap_tokens": settings.CHUNK_OVERLAP_TOKENS,
+            "batch_size": self.batch_size,
+            "embedding_model": self.embedding_service.model_name
+        }
+
+    async def run(
+        self,
+        file_path: str,
+        document_id: str,
+        checkpoint: Optional[IngestionCheckpoint] = None
+    ) -> IngestionReport:
+        """
+        Run the pipeline for a single document
+
+        Args:
+            file_path: Path to document file
+            document_id: Document identifier
+            checkpoint: Progress of a previous run, batches it holds are not redone
+
+        Returns:
+            Ingestion report
+        """
+        report = IngestionReport(document_id=document_id)
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        upsert_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        embedders_left = [self.embed_concurrency]
+        deduplicator = ChunkDeduplicator(document_id, self.vector_store) if self.dedup_enabled else None
+        # Chunk index → point holding the chunk (own point or a shared one)
+        points: Dict[int, str] = {}
+        centroid = _Centroid() if self.centroid_enabled else None
+        started = time.perf_counter()
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._produce(file_path, document_id, embed_queue, checkpoint, deduplicator, points, centroid, report))
+                for _ in range(self.embed_concurrency):
+                    group.create_task(self._embed(embed_queue, upsert_queue, embedders_left, checkpoint, report))
+                for _ in range(self.upsert_concurrency):
+                    group.create_task(self._upsert(upsert_queue, document_id, checkpoint, deduplicator, points, centroid, report))
+        except* Exception as group_error:
+            # Surface the first real failure instead of the exception group
+            raise group_error.exceptions[0]
+
+        if centroid is not None and points:
+            stage_started = time.perf_counter()
+            await self._store_centroid(document_id, centroid, points)
+            report.add_stage_time("centroid", time.perf_counter() - stage_started)
+
+        report.wall_seconds = time.perf_counter() - started
+        report.point_ids = [points[index] for index in sorted(points)]
+
+        busy = sum(report.stage_seconds.values())
+        logger.info(
+            f"Pipeline finished for {document_id}: {report.chunks_count} chunks in "
+            f"{report.batches_count} batches ({report.resumed_batches} resumed, "
+            f"{report.duplicate_chunks} duplicates, {report.saved_embedding_tokens} embedding tokens saved), "
+            f"wall {report.wall_seconds:.2f}s (sum of stages {busy:.2f}s, {report.timings_ms})"
+        )
+        return report
+
+    async def _produce(
+        self,
+        file_path: str,
+        document_id: str,
+        embed_queue: asyncio.Queue,
+        checkpoint: Optional[IngestionCheckpoint],
+        deduplicator: Optional[ChunkDeduplicator],
+        points: Dict[int, str],
+        centroid: Optional[_Centroid],
+        report: IngestionReport
+    ):
+        """Extract and chunk the document, feeding fixed-size batches downstream"""
+        stage_started = time.perf_counter()
+        blocks = await self.document_service.extract_blocks_from_word(file_path)
+        text = blocks_to_text(blocks)
+        report.add_stage_time("extract", time.perf_counter() - stage_started)
+
+        batch: List[TextChunk] = []
+        chunk_seconds = 0.0
+        mark = time.perf_counter()
+        for chunk in self.document_service.iter_chunks(text, blocks):
+            batch.append(chunk)
+            if len(batch) == self.batch_size:
+                chunk_seconds += time.perf_counter() - mark
+                await self._submit(report.batches_count, batch, document_id, embed_queue, checkpoint, deduplicator, points, centroid, report)
+                report.batches_count += 1
+                batch = []
+                mark = time.perf_counter()
+
+        if batch:
+            chunk_seconds += time.perf_counter() - mark
+            await self._submit(report.batches_count, batch, document_id, embed_queue, checkpoint, deduplicator, points, centroid, report)
+            report.batches_count += 1
+        report.add_stage_time("chunk", chunk_seconds)
+
+        for _ in range(self.embed_concurrency):
+            await embed_queue.put(_DONE)
+
+    async def _submit(
+        self,
+        batch_no: int,
+        batch: List[TextChunk],
+        document_id: str,
+        embed_queue: asyncio.Queue,
+        checkpoint: Optional[IngestionCheckpoint],
+        deduplicator: Optional[ChunkDeduplicator],
+        points: Dict[int, str],
+        centroid: Optional[_Centroid],
+        report: IngestionReport
+    ):
+        """Deduplicate batch and queue it for embedding, reusing checkpointed work when it is still valid"""
+        embeddings: Optional[Dict[int, List[float]]] = None
+        if checkpoint is not None:
+            saved = await asyncio.to_thread(checkpoint.load_batch, batch_no)
+            if saved is not None and saved[0] == self._boundaries(batch):
+                stored_points = checkpoint.batch_points(batch_no)
+                if checkpoint.is_upserted(batch_no):
+                    if stored_points is None:
+                        stored_points = [make_point_id(document_id, chunk.index) for chunk in batch]
+                    report.resumed_batches += 1
+                    report.chunks_count += len(batch)
+                    for chunk, point_id in zip(batch, stored_points):
+                        points[chunk.index] = point_id
+                        if point_id != make_point_id(document_id, chunk.index):
+                            report.duplicate_chunks += 1
+                        elif centroid is not None and chunk.index in saved[1]:
+                            centroid.add(point_id, saved[1][chunk.index])
+                    return
+                embeddings = saved[1]
+                report.reused_embeddings += 1
+
+        if deduplicator is not None:
+            stage_started = time.perf_counter()
+            result = await deduplicator.classify(batch)
+            report.add_stage_time("dedup", time.perf_counter() - stage_started)
+        else:
+            result = DedupResult(new=list(batch), shared=[], repeated=[], fingerprints={})
+
+        # Resolve points now: repeated chunks refer to earlier chunks of this document
+        for chunk in result.new:
+            points[chunk.index] = make_point_id(document_id, chunk.index)
+        for chunk, point_id in result.shared:
+            points[chunk.index] = point_id
+        for chunk, earlier in result.repeated:
+            points[chunk.index] = points[earlier]
+
+        await embed_queue.put((batch_no, batch, result, embeddings))
+
+    async def _embed(
+        self,
+        embed_queue: asyncio.Queue,
+        upsert_queue: asyncio.Queue,
+        embedders_left: List[int],
+        checkpoint: Optional[IngestionCheckpoint],
+        report: IngestionReport
+    ):
+        """Embed the new chunks of each batch"""
+        while True:
+            item = await embed_queue.get()
+            if item is _DONE:
+                break
+
+            batch_no, batch, result, saved = item
+            embeddings = dict(saved or {})
+            missing = [chunk for chunk in result.new if chunk.index not in embeddings]
+            if missing:
+                stage_started = time.perf_counter()
+                vectors = await self.embedding_service.embed_texts([chunk.text for chunk in missing])
+                report.add_stage_time("embed", time.perf_counter() - stage_started)
+                embeddings.update((chunk.index, vector) for chunk, vector in zip(missing, vectors))
+
+            # Batches of duplicates only are saved too, their boundaries identify them on resume
+            if checkpoint is not None and (missing or saved is None):
+                await asyncio.to_thread(
+                    checkpoint.save_batch,
+                    batch_no,
+                    self._boundaries(batch),
+                    {chunk.index: embeddings[chunk.index] for chunk in result.new}
+                )
+
+            sentences = None
+            if self.sentences_enabled and result.new:
+                stage_started = time.perf_counter()
+                sentences = await self._embed_sentences(result.new)
+                report.add_stage_time("embed_sentences", time.perf_counter() - stage_started)
+
+            await upsert_queue.put((batch_no, batch, result, embeddings, sentences))
+
+        # The last embedder to finish closes the upsert stage
+        embedders_left[0] -= 1
+        if embedders_left[0] == 0:
+            for _ in range(self.upsert_concurrency):
+                await upsert_queue.put(_DONE)
+
+    async def _upsert(
+        self,
+        upsert_queue: asyncio.Queue,
+        document_id: str,
+        checkpoint: Optional[IngestionCheckpoint],
+        deduplicator: Optional[ChunkDeduplicator],
+        points: Dict[int, str],
+        centroid: Optional[_Centroid],
+        report: IngestionReport
+    ):
+        """Store new chunks and attach the document to points it shares"""
+        while True:
+            item = await upsert_queue.get()
+            if item is _DONE:
+                break
+
+            batch_no, batch, result, embeddings, sentences = item
+            stage_started = time.perf_counter()
+            if sentences is not None:
+                # Sentences first, so a stored chunk always has its sentences
+                await self.vector_store.add_sentences(
+                    [points[chunk.index] for chunk in result.new],
+                    [sentences[chunk.index][0] for chunk in result.new],
+                    [sentences[chunk.index][1] for chunk in result.new]
+                )
+            if result.new:
+                await self.vector_store.add_documents(
+                    texts=[chunk.text for chunk in result.new],
+                    embeddings=[embeddings[chunk.index] for chunk in result.new],
+                    document_id=document_id,
+                    chunk_indices=[chunk.index for chunk in result.new],
+                    payloads=[
+                        {
+                            "char_start": chunk.start,
+                            "char_end": chunk.end,
+                            "token_count": chunk.token_count,
+                            "sentence_count": len(sentences[chunk.index][0]) if sentences else 0
+                        }
+                        for chunk in result.new
+                    ]
+                )
+            report.add_stage_time("upsert", time.perf_counter() - stage_started)
+            if centroid is not None:
+                for chunk in result.new:
+                    centroid.add(points[chunk.index], embeddings[chunk.index])
+
+            if deduplicator is not None:
+                stage_started = time.perf_counter()
+                # Fingerprints are registered only once their points exist
+                await deduplicator.register(
+                    {chunk.index: points[chunk.index] for chunk in result.new},
+                    result.fingerprints
+                )
+                if result.shared:
+                    refs = await deduplicator.attach([point_id for _, point_id in result.shared])
+                    await self.vector_store.set_document_refs(refs)
+                report.add_stage_time("dedup", time.perf_counter() - stage_started)
+
+            duplicates = len(result.shared) + len(result.repeated)
+            report.chunks_count += len(batch)
+            report.duplicate_chunks += duplicates
+            report.saved_embedding_tokens += sum(
+                chunk.token_count for chunk, _ in result.shared + result.repeated
+            )
+
+            if checkpoint is not None:
+                await asyncio.to_thread(
+                    checkpoint.mark_upserted,
+                    batch_no,
+                    len(batch),
+                    [points[chunk.index] for chunk in batch]
+                )
+
+    async def _store_centroid(self, document_id: str, centroid: _Centroid, points: Dict[int, str]) -> None:
+        """Complete the centroid with vectors of shared points and store it"""
+        shared = sorted(set(points.values()) - centroid.point_ids)
+        if shared:
+            for point_id, vector in (await self.vector_store.get_vectors(shared)).items():
+                centroid.add(point_id, vector)
+
+        vector = centroid.vector()
+        if vector is not None:
+            await self.vector_store.upsert_document_vector(document_id, vector, len(centroid.point_ids))
+
+    async def _embed_sentences(self, chunks: List[TextChunk]) -> Dict[int, tuple]:
+        """Embed the sentences of chunks in one request, returns index → (spans, embeddings)"""
+        spans = {chunk.index: sentence_spans(chunk.text) for chunk in chunks}
+        texts = [chunk.text[start:end] for chunk in chunks for start, end in spans[chunk.index]]
+        vectors = await self.embedding_service.embed_texts(texts) if texts else []
+
+        sentences, position = {}, 0
+        for chunk in chunks:
+            count = len(spans[chunk.index])
+            sentences[chunk.index] = (spans[chunk.index], vectors[position:position + count])
+            position += count
+        return sentences
+
+    @staticmethod
+    def _boundaries(batch: List[TextChunk]) -> List[List[int]]:
+        """Chunk boundaries recorded in checkpoints"""
+        return [[chunk.index, chunk.start, chunk.end, chunk.token_count] for chunk in batch]
@@ -1,9 +1,29 @@
-from typing import Tuple
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
 import logging
+import os
 from app.application.ingestion_service import IngestionService
 from app.application.document_service import DocumentService
 from app.application.embedding_service import EmbeddingService
 from app.application.vector_store import VectorStore
+from app.application.impl.ingestion_pipeline import IngestionPipeline
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.domain.ingestion import IngestionReport
+from app.infrastructure.repositories.checkpoint_repository import (
+    STATUS_FAILED,
+    STATUS_PARTIAL,
+    STATUS_RUNNING,
+    IngestionCheckpoint,
+    IngestionCheckpointRepository,
+)
+from app.infrastructure.repositories.document_repository import (
+    STATUS_FAILED as DOCUMENT_STATUS_FAILED,
+    STATUS_INDEXED,
+    STATUS_PROCESSING,
+    DocumentRepository,
+)
+from app.infrastructure.repositories.fingerprint_repository import ChunkFingerprintRepository
 
 logger = logging.getLogger(__name__)
 
@@ -15,54 +35,264 @@ class IngestionServiceImpl(IngestionService):
         self,
         document_service: DocumentService,
         embedding_service: EmbeddingService,
-        vector_store: VectorStore
+        vector_store: VectorStore,
+        checkpoints: Optional[IngestionCheckpointRepository] = None,
+        document_repo: Optional[DocumentRepository] = None,
+        fingerprint_repo: Optional[ChunkFingerprintRepository] = None
     ):
         self.document_service = document_service
         self.embedding_service = embedding_service
         self.vector_store = vector_store
+        self.checkpoints = checkpoints or IngestionCheckpointRepository()
+        self.document_repo = document_repo or DocumentRepository()
+        self.fingerprint_repo = fingerprint_repo or ChunkFingerprintRepository()
+        self.pipeline = IngestionPipeline(
+            document_service=document_service,
+            embedding_service=embedding_service,
+            vector_store=vector_store
+        )
     
-    async def ingest_document(
+    @property
+    def embedding_model(self) -> str:
+        """Embedding model the document chunks are stored with"""
+        return self.embedding_service.model_name
+    
+    async def ingest(
         self, 
         file_path: str, 
-        document_id: str
-    ) -> Tuple[bool, int]:
+        document_id: str,
+        filename: Optional[str] = None
+    ) -> IngestionReport:
         """
-        Ingest document into system
+        Ingest document through the streaming pipeline
+        
+        Progress is checkpointed per batch. Calling this again for the same
+        document_id after a failure continues from the last stored batch.
+        The source file is removed only after the document is fully indexed.
+        If the document is registered in the documents table, its status,
+        point IDs and timings are kept up to date. The checkpoint is claimed
+        for the duration, so one document is never ingested twice at once.
         
         Args:
             file_path: Path to document file
             document_id: Document identifier
+            filename: Original file name (for the registry)
             
         Returns:
-            Tuple of (success, chunks_count)
+            Ingestion report with chunk count and stage timings
         """
+        claim = self.checkpoints.claim(document_id)
+        if claim is None:
+            raise ValueError(f"Document {document_id} is already being ingested")
         try:
-            # 1. Extract text
-            logger.info(f"Extracting text from {file_path}")
-            text = await self.document_service.extract_text_from_word(file_path)
+            return await self._ingest(file_path, document_id, filename)
+        finally:
+            claim.release()
+    
+    async def _ingest(self, file_path: str, document_id: str, filename: Optional[str]) -> IngestionReport:
+        """Run the ingestion of a claimed document"""
+        signature = self.pipeline.signature
+        checkpoint = self.checkpoints.open(document_id, file_path, filename, signature)
+        
+        try:
+            if not checkpoint.matches(signature):
+                # Chunk boundaries would differ, previous points cannot be reused
+                logger.warning(f"Checkpoint of {document_id} was created with other settings, starting over")
+                await self.remove_document_points(document_id)
+                checkpoint.reset(signature)
+            
+            checkpoint.update(
+                status=STATUS_RUNNING,
+                attempts=checkpoint.manifest["attempts"] + 1,
+                error=None
+            )
+            await self._update_registry(document_id, status=STATUS_PROCESSING, error=None)
             
-            # 2. Chunk text
-            logger.info(f"Chunking text")
-            chunks = self.document_service.chunk_text(text)
+            logger.info(f"Ingesting {file_path} as document {document_id} (attempt {checkpoint.manifest['attempts']})")
+            report = await self.pipeline.run(file_path, document_id, checkpoint)
             
-            if not chunks:
+            if report.chunks_count == 0:
                 raise ValueError("No chunks created from document")
             
-            # 3. Generate embeddings
-            logger.info(f"Generating embeddings for {len(chunks)} chunks")
-            embeddings = await self.embedding_service.embed_texts(chunks)
-            
-            # 4. Store in vector database
-            logger.info(f"Storing in vector database")
-            stored_count = await self.vector_store.add_documents(
-                texts=chunks,
-                embeddings=embeddings,
-                document_id=document_id
+            checkpoint.complete(report.chunks_count)
+            self._remove_source(file_path)
+            await self._update_registry(
+                document_id,
+                status=STATUS_INDEXED,
+                chunk_count=report.chunks_count,
+                duplicate_chunk_count=report.duplicate_chunks,
+                point_ids=report.point_ids,
+                timings=report.timings_ms,
+                embedding_model=self.embedding_model,
+                error=None,
+                indexed_at=datetime.now(timezone.utc)
             )
             
-            logger.info(f"Successfully ingested document {document_id} with {stored_count} chunks")
-            return True, stored_count
+            logger.info(
+                f"Successfully ingested document {document_id} with {report.chunks_count} chunks "
+                f"({report.duplicate_chunks} attached to existing points)"
+            )
+            return report
             
         except Exception as e:
+            checkpoint.fail(str(e))
+            await self._update_registry(
+                document_id,
+                status=checkpoint.status,
+                chunk_count=checkpoint.manifest["chunks_indexed"],
+                error=str(e)
+            )
             logger.error(f"Error ingesting document: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    async def ingest_document(
+        self, 
+        file_path: str, 
+        document_id: str
+    ) -> Tuple[bool, int]:
+        """
+        Ingest document into system
+        
+        Args:
+            file_path: Path to document file
+            document_id: Document identifier
+            
+        Returns:
+            Tuple of (success, chunks_count)
+        """
+        report = await self.ingest(file_path, document_id)
+        return True, report.chunks_count
+    
+    async def resume(self, document_id: str) -> IngestionReport:
+        """
+        Resume an interrupted or failed ingestion from its last checkpoint
+        
+        Args:
+            document_id: Document identifier
+            
+        Returns:
+            Ingestion report
+        """
+        checkpoint = self.checkpoints.get(document_id)
+        if checkpoint is None:
+            raise ValueError(f"No ingestion checkpoint for document {document_id}")
+        
+        if not os.path.exists(checkpoint.file_path):
+            raise FileNotFoundError(f"Source file of {document_id} is gone: {checkpoint.file_path}")
+        
+        return await self.ingest(
+            checkpoint.file_path,
+            document_id,
+            checkpoint.manifest.get("filename")
+        )
+    
+    async def resume_interrupted(self) -> List[str]:
+        """
+        Resume every unfinished ingestion that has attempts left
+        
+        Each checkpoint is claimed first; one claimed by another replica or a
+        running request is skipped. Checkpoints out of attempts, or whose
+        source file is gone, are given up: their points, source file and
+        checkpoint are removed and the document is marked failed.
+        
+        Returns:
+            IDs of documents that were completed
+        """
+        completed = []
+        for listed in self.checkpoints.list_checkpoints([STATUS_RUNNING, STATUS_PARTIAL, STATUS_FAILED]):
+            document_id = listed.document_id
+            claim = self.checkpoints.claim(document_id)
+            if claim is None:
+                continue
+            try:
+                # Read again under the claim, the previous holder may have finished it
+                checkpoint = self.checkpoints.get(document_id)
+                if checkpoint is None:
+                    # Deleted meanwhile, drop the directory the claim recreated
+                    self.checkpoints.delete(document_id)
+                    continue
+                if checkpoint.status not in (STATUS_RUNNING, STATUS_PARTIAL, STATUS_FAILED):
+                    continue
+                if checkpoint.manifest["attempts"] >= settings.INGEST_MAX_ATTEMPTS:
+                    await self._give_up(checkpoint, f"Gave up after {checkpoint.manifest['attempts']} attempts: {checkpoint.manifest['error']}")
+                    continue
+                if not os.path.exists(checkpoint.file_path):
+                    await self._give_up(checkpoint, f"Source file is gone: {checkpoint.file_path}")
+                    continue
+                await self._ingest(checkpoint.file_path, document_id, checkpoint.manifest.get("filename"))
+                completed.append(document_id)
+            except Exception as e:
+                logger.error(f"Resuming {document_id} failed: {str(e)}")
+            finally:
+                claim.release()
+        
+        logger.info(f"Resumed {len(completed)} interrupted ingestions")
+        return completed
+    
+    async def _give_up(self, checkpoint: IngestionCheckpoint, error: str) -> None:
+        """Drop an ingestion that will not be resumed automatically (a new upload starts it over)"""
+        document_id = checkpoint.document_id
+        logger.warning(f"Giving up ingestion of {document_id}: {error}")
+        if checkpoint.manifest["chunks_indexed"]:
+            await self.remove_document_points(document_id)
+        self._remove_source(checkpoint.file_path)
+        self.checkpoints.delete(document_id)
+        await self._update_registry(document_id, status=DOCUMENT_STATUS_FAILED, chunk_count=0, error=error)
+    
+    async def remove_document_points(self, document_id: str, point_ids: Optional[List[str]] = None) -> bool:
+        """
+        Remove document from the vector store, keeping points other documents still share
+        
+        The document's references are released first: points nobody else
+        references are deleted, shared points are re-attributed to the
+        remaining documents.
+        
+        Args:
+            document_id: Document identifier
+            point_ids: Points recorded for the document (all its points are
+                found by document_id when omitted)
+            
+        Returns:
+            Success status
+        """
+        db = SessionLocal()
+        try:
+            orphaned, retained = await self.fingerprint_repo.release_document(db, document_id)
+        finally:
+            db.close()
+        
+        # Re-attribute shared points before the delete, so a filter delete cannot hit them
+        await self.vector_store.set_document_refs(retained)
+        
+        if point_ids:
+            doomed = (set(point_ids) | set(orphaned)) - set(retained)
+            deleted = await self.vector_store.delete_points(sorted(doomed))
+        else:
+            deleted = await self.vector_store.delete_points(orphaned)
+            deleted = await self.vector_store.delete_by_document_id(document_id) and deleted
+        deleted = await self.vector_store.delete_document_vector(document_id) and deleted
+        
+        logger.info(
+            f"Removed points of {document_id}: {len(orphaned)} unreferenced, "
+            f"{len(retained)} kept for other documents"
+        )
+        return deleted
+    
+    async def _update_registry(self, document_id: str, **fields) -> None:
+        """Mirror ingestion state into the documents table (no-op for unregistered documents)"""
+        db = SessionLocal()
+        try:
+            await self.document_repo.update_document(db, document_id, **fields)
+        except Exception as e:
+            logger.error(f"Could not update registry for {document_id}: {str(e)}")
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _remove_source(file_path: str) -> None:
+        """Remove the uploaded file once it is no longer needed for a resume"""
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        except Exception as e:
+            logger.warning(f"Could not remove temporary file: {str(e)}")
@@ -1,15 +1,37 @@
-from typing import List, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+import asyncio
 import logging
+import random
+import time
 from sqlalchemy.orm import Session
 from app.application.query_service import QueryService
 from app.application.embedding_service import EmbeddingService
 from app.application.vector_store import VectorStore
-from app.infrastructure.llm.openai_llm import OpenAILLM  # YANGILANDI
-from app.infrastructure.repositories.chat_repository import ChatRepository
-from app.domain.schemas import SourceDocument
+from app.application.impl.chat_sources import to_source_refs
+from app.application.impl.context_builder import ContextBuilder
+from app.application.impl.context_compressor import ContextCompressor
+from app.application.impl.faq_index import FaqIndex, get_faq_index
+from app.application.impl.semantic_cache import CacheHit, SemanticCache, get_semantic_cache
+from app.infrastructure.llm.llm_router import get_llm_router
+from app.infrastructure.repositories.chat_repository import ANSWER_SOURCE_CACHE, ANSWER_SOURCE_FAQ, ChatRepository
+from app.infrastructure.repositories.document_repository import DocumentRepository
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.deadline import Deadline, DeadlineExceeded
+from app.domain.context import BuiltContext, CompressionStats
+from app.domain.schemas import BatchQueryResult, QueryDiagnostics, SourceDocument
 
 logger = logging.getLogger(__name__)
 
+# Degradations applied when a query runs short of time
+DEGRADED_SKIPPED_COMPRESSION = "skipped_compression"
+DEGRADED_SHRUNK_CONTEXT = "shrunk_context"
+DEGRADED_NO_ANSWER = "no_answer"
+DEGRADED_HISTORY_NOT_SAVED = "history_not_saved"
+
+# Background audits of semantic cache hits (kept referenced until done)
+_audit_tasks: Set[asyncio.Task] = set()
+
 
 class QueryServiceImpl(QueryService):
     """Implementation of query processing service"""
@@ -17,66 +39,455 @@ class QueryServiceImpl(QueryService):
     def __init__(
         self,
         embedding_service: EmbeddingService,
-        vector_store: VectorStore
+        vector_store: VectorStore,
+        context_builder: Optional[ContextBuilder] = None,
+        compressor: Optional[ContextCompressor] = None,
+        faq_index: Optional[FaqIndex] = None,
+        semantic_cache: Optional[SemanticCache] = None
     ):
         self.embedding_service = embedding_service
         self.vector_store = vector_store
-        self.llm = OpenAILLM()  # YANGILANDI
+        self.context_builder = context_builder or ContextBuilder.from_settings()
+        self.compressor = compressor
+        if self.compressor is None and settings.COMPRESSION_ENABLED:
+            self.compressor = ContextCompressor.from_settings(vector_store)
+        self.faq_index = faq_index
+        if self.faq_index is None and settings.FAQ_ENABLED:
+            self.faq_index = get_faq_index()
+        self.semantic_cache = semantic_cache
+        if self.semantic_cache is None and settings.SEMANTIC_CACHE_ENABLED:
+            self.semantic_cache = get_semantic_cache()
+        self.llm = get_llm_router()
         self.chat_repo = ChatRepository()
+        self.document_repo = DocumentRepository()
+        self.session_factory = SessionLocal
     
     async def process_query(
         self, 
         question: str, 
-        db: Session
-    ) -> Tuple[str, List[SourceDocument]]:
+        db: Session,
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[str, List[SourceDocument], QueryDiagnostics]:
         """
-        Process user query
+        Process user query within a deadline
+        
+        Every stage gets the time that is left. When time runs short the
+        query degrades instead of failing: sentence compression is skipped,
+        the context budget is halved, and finally sources are returned
+        without an answer. Applied degradations are listed in the diagnostics.
         
         Args:
             question: User question
             db: Database session
+            deadline: Request deadline (QUERY_TIMEOUT_SECONDS from now if omitted)
             
         Returns:
-            Tuple of (answer, sources)
+            Tuple of (answer, sources, diagnostics)
+            
+        Raises:
+            DeadlineExceeded: Embedding or search did not finish in time
         """
         try:
-            # 1. Generate question embedding
+            deadline = deadline or Deadline(settings.QUERY_TIMEOUT_SECONDS)
+            degradations: List[str] = []
+            timings = {}
+            started = time.perf_counter()
+            
+            # 0. Known wording of a frequently asked question: no embedding, search or LLM
             logger.info(f"Processing query: {question}")
-            question_embedding = await self.embedding_service.embed_text(question)
+            faq_match = self.faq_index.match_text(question) if self.faq_index is not None else None
+            if faq_match is not None:
+                return await self._reuse_answer(
+                    question, faq_match.answer, faq_match.sources, db, deadline, started, timings, ANSWER_SOURCE_FAQ,
+                    faq_id=faq_match.entry_id, faq_score=round(faq_match.score, 4)
+                )
+            
+            # 1. Generate question embedding
+            question_embedding = await deadline.run(self.embedding_service.embed_text(question), "embed")
+            timings["embed"] = self._elapsed_ms(started)
+            
+            # Close enough to a frequently asked question: no search or LLM
+            faq_match = self.faq_index.match_embedding(question_embedding) if self.faq_index is not None else None
+            if faq_match is not None:
+                return await self._reuse_answer(
+                    question, faq_match.answer, faq_match.sources, db, deadline, started, timings, ANSWER_SOURCE_FAQ,
+                    faq_id=faq_match.entry_id, faq_score=round(faq_match.score, 4)
+                )
+            
+            # Paraphrase of a recently answered question whose documents are unchanged: no search or LLM
+            cache_hit = await self._cache_lookup(question_embedding, db)
+            if cache_hit is not None:
+                self._schedule_audit(question, question_embedding, cache_hit)
+                return await self._reuse_answer(
+                    question, cache_hit.answer, cache_hit.sources, db, deadline, started, timings, ANSWER_SOURCE_CACHE,
+                    cache_score=round(cache_hit.score, 4)
+                )
             
             # 2. Search similar documents
-            search_results = await self.vector_store.search(question_embedding)
+            mark = time.perf_counter()
+            search_results = (await deadline.run(self._retrieve([question_embedding]), "search"))[0]
+            timings["search"] = self._elapsed_ms(mark)
             
             if not search_results:
                 logger.warning("No relevant documents found")
-                return "Kechirasiz, bu savolga javob topilmadi. Iltimos, boshqa savol bering.", []
+                answer = "Kechirasiz, bu savolga javob topilmadi. Iltimos, boshqa savol bering."
+                timings["total"] = self._elapsed_ms(started)
+                # Unanswered questions are kept too, they make the no-answer rate
+                await self._save_chat(
+                    deadline,
+                    degradations,
+                    question=question,
+                    answer=answer,
+                    sources=[],
+                    answered=False,
+                    latency_ms=timings["total"]
+                )
+                return answer, [], QueryDiagnostics(timings_ms=timings, degradations=degradations)
             
-            # 3. Prepare context
-            context = "\n\n".join([result['content'] for result in search_results])
+            # 3. Keep only relevant sentences (optional, first to go when time is short)
+            hits, compression = search_results, None
+            if self.compressor is not None:
+                if deadline.remaining() < settings.QUERY_COMPRESSION_MIN_SECONDS:
+                    degradations.append(DEGRADED_SKIPPED_COMPRESSION)
+                else:
+                    try:
+                        hits, compression = await deadline.run(
+                            self._compress(question_embedding, search_results),
+                            "compress",
+                            reserve=settings.QUERY_MIN_LLM_SECONDS
+                        )
+                    except DeadlineExceeded:
+                        degradations.append(DEGRADED_SKIPPED_COMPRESSION)
+                if compression is not None:
+                    timings["compress"] = int(compression.seconds * 1000)
             
-            # 4. Generate answer using LLM
-            answer = await self.llm.generate_answer(question, context)
+            # 4. Prepare context within the token budget (halved when time is short)
+            mark = time.perf_counter()
+            builder = self.context_builder
+            if deadline.remaining() < settings.QUERY_SHRINK_CONTEXT_SECONDS:
+                builder = builder.with_max_tokens(builder.max_tokens // 2)
+                degradations.append(DEGRADED_SHRUNK_CONTEXT)
+            context = builder.build(hits, original_hits=search_results)
+            timings["context"] = self._elapsed_ms(mark)
             
-            # 5. Prepare sources
-            sources = [
-                SourceDocument(
-                    content=result['content'],
-                    score=result['score']
-                )
-                for result in search_results
-            ]
+            # 5. Generate answer using LLM, or give up on it and return the sources
+            sources = self._to_sources(context.used_hits)
+            answer = None
+            mark = time.perf_counter()
+            reserve = settings.QUERY_PERSIST_RESERVE_SECONDS
+            if deadline.remaining() - reserve >= settings.QUERY_MIN_LLM_SECONDS:
+                try:
+                    answer = await deadline.run(self.llm.generate_answer(question, context.text), "llm", reserve=reserve)
+                except DeadlineExceeded:
+                    logger.warning("LLM did not answer before the deadline, returning sources only")
+            timings["llm"] = self._elapsed_ms(mark)
             
-            # 6. Save to database
-            await self.chat_repo.create_chat(
-                db=db,
+            # 6. Save to database in the time left (unanswered ones flagged for analytics)
+            answered = answer is not None
+            if not answered:
+                degradations.append(DEGRADED_NO_ANSWER)
+                answer = "Kechirasiz, javob tayyorlashga vaqt yetmadi. Quyida savolga tegishli manbalar keltirilgan."
+            await self._save_chat(
+                deadline,
+                degradations,
                 question=question,
                 answer=answer,
-                sources=[s.dict() for s in sources]
+                sources=to_source_refs(sources),
+                answered=answered,
+                latency_ms=self._elapsed_ms(started)
             )
+            if answered and not degradations:
+                await self._cache_store(question_embedding, question, answer, sources, db)
             
-            logger.info(f"Successfully processed query")
-            return answer, sources
+            timings["total"] = self._elapsed_ms(started)
+            diagnostics = self._diagnostics(search_results, context, timings, compression, degradations)
+            if degradations:
+                logger.warning(f"Query degraded ({', '.join(degradations)}), {deadline.remaining():.2f}s left")
+            logger.info(
+                f"Successfully processed query: context {diagnostics.context_tokens} tokens "
+                f"({diagnostics.tokens_saved} saved), {timings}"
+            )
+            return answer, sources, diagnostics
             
         except Exception as e:
             logger.error(f"Error processing query: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    async def _reuse_answer(
+        self,
+        question: str,
+        answer: str,
+        sources: List[SourceDocument],
+        db: Session,
+        deadline: Deadline,
+        started: float,
+        timings: Dict[str, int],
+        answer_source: str,
+        **diagnostics
+    ) -> Tuple[str, List[SourceDocument], QueryDiagnostics]:
+        """Answer with a FAQ entry or cached answer, saved to history marked with its answer_source"""
+        timings["total"] = self._elapsed_ms(started)
+        degradations = []
+        await self._save_chat(
+            deadline,
+            degradations,
+            question=question,
+            answer=answer,
+            sources=to_source_refs(sources),
+            latency_ms=timings["total"],
+            answer_source=answer_source
+        )
+        logger.info(f"Reused stored answer ({diagnostics}), {timings}")
+        return answer, sources, QueryDiagnostics(
+            chunks_used=len(sources),
+            timings_ms=timings,
+            degradations=degradations,
+            **diagnostics
+        )
+    
+    async def _save_chat(self, deadline: Deadline, degradations: List[str], **chat) -> None:
+        """
+        Save to chat history within the time that is left
+        
+        The insert runs in a thread on its own session, so a slow commit does
+        not hold the response past the deadline; the query then reports
+        history_not_saved.
+        """
+        try:
+            await deadline.run(asyncio.to_thread(self._insert_chat, chat), "history")
+        except DeadlineExceeded:
+            logger.warning("Chat history not saved before the deadline")
+            degradations.append(DEGRADED_HISTORY_NOT_SAVED)
+    
+    def _insert_chat(self, chat: Dict) -> None:
+        db = self.session_factory()
+        try:
+            self.chat_repo.insert_chat(db, **chat)
+        finally:
+            db.close()
+    
+    async def _cache_lookup(self, question_embedding: List[float], db: Session) -> Optional[CacheHit]:
+        """Cached answer of a similar question, unless a document it cites has changed since"""
+        if self.semantic_cache is None:
+            return None
+        try:
+            hit = self.semantic_cache.lookup(question_embedding)
+            if hit is None:
+                return None
+            current = await self.document_repo.get_versions(db, hit.document_versions)
+            if any(current.get(document_id, (None,))[0] != version for document_id, version in hit.document_versions.items()):
+                self.semantic_cache.discard(hit.slot)
+                return None
+            self.semantic_cache.record_hit()
+            return hit
+        except Exception as e:
+            logger.error(f"Semantic cache lookup failed, answering normally: {str(e)}")
+            return None
+    
+    async def _cache_store(
+        self,
+        question_embedding: List[float],
+        question: str,
+        answer: str,
+        sources: List[SourceDocument],
+        db: Session
+    ) -> None:
+        """Cache an answer with the versions of the documents it cites"""
+        if self.semantic_cache is None or not sources:
+            return
+        try:
+            document_ids = {source.document_id for source in sources}
+            if None in document_ids:
+                return
+            current = await self.document_repo.get_versions(db, document_ids)
+            if len(current) < len(document_ids):
+                # Cites a document still being indexed, its version is not final
+                return
+            versions = {document_id: version for document_id, (version, _) in current.items()}
+            self.semantic_cache.store(question_embedding, question, answer, sources, versions)
+        except Exception as e:
+            logger.error(f"Caching answer failed: {str(e)}")
+    
+    def _schedule_audit(self, question: str, question_embedding: List[float], hit: CacheHit) -> None:
+        """Search a share of the cache hits again in the background to spot false hits"""
+        if random.random() >= settings.SEMANTIC_CACHE_AUDIT_RATE:
+            return
+        task = asyncio.create_task(self._audit_cache_hit(question, question_embedding, hit))
+        _audit_tasks.add(task)
+        task.add_done_callback(_audit_tasks.discard)
+    
+    async def _audit_cache_hit(self, question: str, question_embedding: List[float], hit: CacheHit) -> None:
+        try:
+            results = (await self._retrieve([question_embedding]))[0]
+            self.semantic_cache.record_audit(question, hit, [result.get("point_id") for result in results])
+        except Exception as e:
+            logger.error(f"Semantic cache audit failed: {str(e)}")
+    
+    async def process_batch(
+        self, 
+        questions: List[str], 
+        db: Session,
+        save_history: bool = False
+    ) -> AsyncIterator[BatchQueryResult]:
+        """
+        Process many queries with one embedding request and one batched search
+        
+        Questions are compressed and answered under QUERY_BATCH_LLM_CONCURRENCY
+        and yielded as soon as each one completes. A failed answer is reported in its own
+        result and does not stop the batch.
+        
+        Args:
+            questions: User questions
+            db: Database session
+            save_history: Store answers in chat history
+            
+        Yields:
+            BatchQueryResult per question, in completion order
+        """
+        logger.info(f"Processing batch of {len(questions)} queries")
+        embeddings = await self.embedding_service.embed_texts(questions)
+        all_results = await self._retrieve(embeddings)
+        
+        semaphore = asyncio.Semaphore(settings.QUERY_BATCH_LLM_CONCURRENCY)
+        
+        async def answer(index: int) -> BatchQueryResult:
+            question = questions[index]
+            search_results = all_results[index]
+            if not search_results:
+                return BatchQueryResult(
+                    index=index,
+                    question=question,
+                    success=True,
+                    answer="Kechirasiz, bu savolga javob topilmadi. Iltimos, boshqa savol bering."
+                )
+            try:
+                # Compression looks sentences up in the vector store: capped together with the LLM call
+                async with semaphore:
+                    hits, compression = await self._compress(embeddings[index], search_results)
+                    context = self.context_builder.build(hits, original_hits=search_results)
+                    mark = time.perf_counter()
+                    text = await self.llm.generate_answer(question, context.text)
+                return BatchQueryResult(
+                    index=index,
+                    question=question,
+                    success=True,
+                    answer=text,
+                    sources=self._to_sources(context.used_hits),
+                    diagnostics=self._diagnostics(
+                        search_results, context, {"llm": self._elapsed_ms(mark)}, compression
+                    )
+                )
+            except Exception as e:
+                logger.error(f"Error answering batch question {index}: {str(e)}")
+                return BatchQueryResult(index=index, question=question, success=False, error=str(e))
+        
+        tasks = [asyncio.create_task(answer(index)) for index in range(len(questions))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if save_history and result.success and result.sources:
+                    await self.chat_repo.create_chat(
+                        db=db,
+                        question=result.question,
+                        answer=result.answer,
+                        sources=to_source_refs(result.sources)
+                    )
+                yield result
+        finally:
+            # Client went away or a save failed: stop spending LLM calls
+            for task in tasks:
+                task.cancel()
+    
+    async def _retrieve(self, embeddings: List[List[float]]) -> List[List[Dict]]:
+        """
+        Search context candidates for each query embedding
+        
+        With HIERARCHICAL_SEARCH_ENABLED, the closest documents are shortlisted
+        by their document vectors first and chunks are searched only inside
+        them. Queries whose shortlist is empty or yields no chunks fall back
+        to the flat search over all chunks. Until every document with chunks
+        has a document vector (backfilled at startup), all queries use the
+        flat search, so older documents are never left out.
+        """
+        top_k = settings.CONTEXT_CANDIDATES
+        if not settings.HIERARCHICAL_SEARCH_ENABLED or not self.vector_store.document_vectors_ready:
+            return await self._search(embeddings, top_k)
+        
+        try:
+            shortlists = await self.vector_store.search_documents(embeddings, settings.HIERARCHICAL_TOP_DOCS)
+        except Exception as e:
+            logger.error(f"Document shortlist failed, using flat search: {str(e)}")
+            return await self._search(embeddings, top_k)
+        
+        results = await self._search(embeddings, top_k, [shortlist or None for shortlist in shortlists])
+        fallback = [i for i, hits in enumerate(results) if not hits]
+        if fallback:
+            flat = await self._search([embeddings[i] for i in fallback], top_k)
+            for i, hits in zip(fallback, flat):
+                results[i] = hits
+        return results
+    
+    async def _search(
+        self,
+        embeddings: List[List[float]],
+        top_k: int,
+        document_ids: Optional[List[Optional[List[str]]]] = None
+    ) -> List[List[Dict]]:
+        """Single queries use the plain search, several go in one batched request"""
+        if len(embeddings) == 1:
+            return [await self.vector_store.search(embeddings[0], top_k, document_ids[0] if document_ids else None)]
+        return await self.vector_store.search_batch(embeddings, top_k, document_ids)
+    
+    @staticmethod
+    def _to_sources(search_results: List[Dict]) -> List[SourceDocument]:
+        """Convert search results to response sources"""
+        return [
+            SourceDocument(
+                content=result['content'],
+                score=result['score'],
+                document_id=result.get('document_id'),
+                chunk_index=result.get('chunk_index'),
+                point_id=result.get('point_id')
+            )
+            for result in search_results
+        ]
+    
+    async def _compress(
+        self,
+        question_embedding: List[float],
+        search_results: List[Dict]
+    ) -> Tuple[List[Dict], Optional[CompressionStats]]:
+        """Apply sentence compression when enabled; failures fall back to whole chunks"""
+        if self.compressor is None:
+            return search_results, None
+        try:
+            return await self.compressor.compress(question_embedding, search_results)
+        except Exception as e:
+            logger.error(f"Context compression failed, using whole chunks: {str(e)}")
+            return search_results, None
+    
+    @staticmethod
+    def _diagnostics(
+        search_results: List[Dict],
+        context: BuiltContext,
+        timings: Dict[str, int],
+        compression: Optional[CompressionStats] = None,
+        degradations: Optional[List[str]] = None
+    ) -> QueryDiagnostics:
+        if compression is not None:
+            timings.setdefault("compress", int(compression.seconds * 1000))
+        return QueryDiagnostics(
+            chunks_retrieved=len(search_results),
+            chunks_used=len(context.used_hits),
+            chunks_merged=context.merged_chunks,
+            raw_context_tokens=context.raw_tokens,
+            context_tokens=context.tokens,
+            tokens_saved=context.tokens_saved,
+            compression_ratio=round(compression.ratio, 4) if compression is not None else None,
+            timings_ms=timings,
+            degradations=degradations or []
+        )
+    
+    @staticmethod
+    def _elapsed_ms(started: float) -> int:
+        return int((time.perf_counter() - started) * 1000)
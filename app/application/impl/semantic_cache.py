@@ -0,0 +1,193 @@
+"""
+Semantic answer cache
+
+Keeps the embeddings of recently answered questions in a fixed-size matrix
+(the oldest slot is overwritten first) with the answer and sources given.
+A new question whose embedding is within SEMANTIC_CACHE_THRESHOLD cosine
+similarity of a cached one gets the cached answer, provided the documents
+it cites are still the versions it was answered from. Lookups are one
+matrix-vector product, so paraphrases hit without search or LLM.
+
+A share of the hits (SEMANTIC_CACHE_AUDIT_RATE) is audited in the
+background: the new question is searched anyway and the overlap of the
+retrieved chunks with the cached sources is recorded. Low overlap marks a
+likely false hit; the latest audits are kept for review with the hit rate.
+"""
+
+import logging
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional
+import numpy as np
+from app.core.config import settings
+from app.domain.schemas import SourceDocument
+
+logger = logging.getLogger(__name__)
+
+
+class CacheHit:
+    """Cached answer reused for a question"""
+
+    def __init__(self, slot: int, question: str, answer: str, sources: List[SourceDocument], document_versions: Dict[str, str], score: float):
+        self.slot = slot
+        self.question = question
+        self.answer = answer
+        self.sources = sources
+        self.document_versions = document_versions
+        self.score = score
+
+    def __repr__(self):
+        return f"<CacheHit(slot={self.slot}, score={self.score:.3f})>"
+
+
+class SemanticCache:
+    """
+    Recent answers looked up by question similarity
+
+    Args:
+        capacity: Questions kept
+        threshold: Minimum cosine similarity to reuse an answer
+        ttl_seconds: Age after which an answer is no longer reused
+        audit_samples: Audited hits kept for review
+    """
+
+    def __init__(self, capacity: int, threshold: float, ttl_seconds: float, audit_samples: int):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._matrix: Optional[np.ndarray] = None
+        self._expires = np.zeros(capacity, dtype=np.float64)
+        self._entries: List[Optional[Dict]] = [None] * capacity
+        self._next = 0
+        self._stats = {"lookups": 0, "hits": 0, "stale": 0, "stores": 0}
+        self._audits = deque(maxlen=audit_samples)
+
+    @classmethod
+    def from_settings(cls) -> "SemanticCache":
+        return cls(
+            capacity=settings.SEMANTIC_CACHE_SIZE,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+            audit_samples=settings.SEMANTIC_CACHE_AUDIT_SAMPLES
+        )
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _best(self, vector: np.ndarray):
+        """Live slot closest to vector and its score (None if the cache is empty)"""
+        if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+            return None, 0.0
+        scores = self._matrix @ vector
+        scores[self._expires < time.monotonic()] = -1.0
+        slot = int(np.argmax(scores))
+        return slot, float(scores[slot])
+
+    def lookup(self, embedding: List[float]) -> Optional[CacheHit]:
+        """Cached answer of the closest question, if within the threshold and not expired"""
+        self._stats["lookups"] += 1
+        vector = self._unit(embedding)
+        if vector is None:
+            return None
+        slot, score = self._best(vector)
+        if slot is None or score < self.threshold:
+            return None
+        entry = self._entries[slot]
+        return CacheHit(slot, entry["question"], entry["answer"], entry["sources"], entry["document_versions"], score)
+
+    def record_hit(self) -> None:
+        self._stats["hits"] += 1
+
+    def discard(self, slot: int) -> None:
+        """Drop a cached answer whose documents have changed"""
+        self._stats["stale"] += 1
+        self._expires[slot] = 0.0
+        self._entries[slot] = None
+
+    def store(
+        self,
+        embedding: List[float],
+        question: str,
+        answer: str,
+        sources: List[SourceDocument],
+        document_versions: Dict[str, str]
+    ) -> None:
+        """Cache an answer; a near-identical cached question is replaced instead of duplicated"""
+        vector = self._unit(embedding)
+        if vector is None:
+            return
+        if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+            self._matrix = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+            self._expires[:] = 0.0
+            self._entries = [None] * self.capacity
+        slot, score = self._best(vector)
+        if slot is None or score < self.threshold:
+            slot = self._next
+            self._next = (self._next + 1) % self.capacity
+        self._matrix[slot] = vector
+        self._expires[slot] = time.monotonic() + self.ttl_seconds
+        self._entries[slot] = {
+            "question": question,
+            "answer": answer,
+            "sources": sources,
+            "document_versions": document_versions
+        }
+        self._stats["stores"] += 1
+
+    def invalidate_documents(self, document_ids: List[str]) -> int:
+        """Drop the answers citing any of the documents"""
+        document_ids = set(document_ids)
+        dropped = 0
+        for slot, entry in enumerate(self._entries):
+            if entry is not None and document_ids & set(entry["document_versions"]):
+                self.discard(slot)
+                dropped += 1
+        return dropped
+
+    def record_audit(self, question: str, hit: CacheHit, retrieved_point_ids: List[str]) -> Dict:
+        """
+        Record how well the cached sources match a fresh search for the question
+
+        Returns:
+            Audit sample; suspected_false_hit when fewer than half the cached
+            sources are retrieved again
+        """
+        cached = {source.point_id for source in hit.sources if source.point_id}
+        overlap = len(cached & set(retrieved_point_ids)) / len(cached) if cached else 0.0
+        sample = {
+            "at": time.time(),
+            "question": question,
+            "cached_question": hit.question,
+            "score": round(hit.score, 4),
+            "source_overlap": round(overlap, 4),
+            "suspected_false_hit": overlap < 0.5
+        }
+        self._audits.append(sample)
+        if sample["suspected_false_hit"]:
+            logger.warning(f"Suspected semantic cache false hit: {question!r} answered as {hit.question!r} ({hit.score:.3f})")
+        return sample
+
+    def stats(self) -> Dict:
+        """Hit rate, sizes and the latest audit samples"""
+        lookups = self._stats["lookups"]
+        audits = list(self._audits)
+        return {
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else None,
+            "size": int(np.count_nonzero(self._expires >= time.monotonic())),
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "audited": len(audits),
+            "suspected_false_hits": sum(sample["suspected_false_hit"] for sample in audits),
+            "audit_samples": audits
+        }
+
+
+@lru_cache(maxsize=None)
+def get_semantic_cache() -> SemanticCache:
+    """Process-wide semantic answer cache"""
+    return SemanticCache.from_settings()
@@ -0,0 +1,243 @@
+from collections import deque
+from typing import Callable, Deque, Iterator, List, NamedTuple, Optional, Tuple
+import logging
+import re
+from app.core.config import settings
+from app.domain.chunks import (
+    BLOCK_HEADING,
+    BLOCK_PARAGRAPH,
+    BLOCK_TABLE,
+    TextBlock,
+    TextChunk,
+    build_blocks,
+)
+
+logger = logging.getLogger(__name__)
+
+# Sentence end: terminal punctuation (optionally followed by closing quotes/brackets) and whitespace
+SENTENCE_END = re.compile(r'[.!?…]+["»”\')\]]*\s+|\n+')
+WORD = re.compile(r'\S+\s*')
+
+
+class _Unit(NamedTuple):
+    """Smallest piece of text the chunker places into a chunk"""
+    start: int
+    end: int
+    tokens: int
+
+
+def split_sentences(text: str, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Split text[start:end] into sentence spans
+
+    Args:
+        text: Source text
+        start: Start offset
+        end: End offset (defaults to len(text))
+
+    Returns:
+        List of (start, end) offsets, trailing whitespace included
+    """
+    if end is None:
+        end = len(text)
+
+    spans = []
+    position = start
+    for match in SENTENCE_END.finditer(text, start, end):
+        if match.end() > position:
+            spans.append((position, match.end()))
+            position = match.end()
+    if position < end:
+        spans.append((position, end))
+    return spans
+
+
+def sentence_spans(text: str) -> List[List[int]]:
+    """
+    Sentence offsets within text, surrounding whitespace excluded
+
+    Args:
+        text: Chunk text
+
+    Returns:
+        List of [start, end] of non-empty sentences
+    """
+    spans = []
+    for start, end in split_sentences(text):
+        sentence = text[start:end]
+        stripped = sentence.strip()
+        if stripped:
+            left = start + len(sentence) - len(sentence.lstrip())
+            spans.append([left, left + len(stripped)])
+    return spans
+
+
+class TextChunker:
+    """
+    Single-pass, structure-aware chunker sized in tokens
+
+    Blocks are consumed in order and split into units (whole blocks, sentences,
+    words or hard character cuts) that each fit into a chunk. A block that fits
+    is tokenized once; an oversized block is counted again at each level it is
+    split into (sentences, words, character halves). Chunk token counts are the
+    sum of their unit counts, so overlap is not re-encoded (the sum may differ
+    from encoding the chunk text by a few tokens). Headings start a new chunk and
+    tables are kept apart from the surrounding text. Overlap is carried between
+    chunks of the same section only and is trimmed so that every chunk contains
+    at least one unit that was not in the previous one.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        overlap_tokens: int,
+        token_counter: Callable[[str], int]
+    ):
+        if max_tokens <= 0:
+            raise ValueError(f"max_tokens must be positive, got {max_tokens}")
+
+        self.max_tokens = max_tokens
+        self.overlap_tokens = max(0, min(overlap_tokens, max_tokens - 1))
+        self.count_tokens = token_counter
+
+    @classmethod
+    def from_settings(cls) -> "TextChunker":
+        """Create chunker configured for the embedding model tokenizer"""
+        from app.infrastructure.embeddings.tokenizer import Tokenizer
+
+        return cls(
+            max_tokens=settings.CHUNK_SIZE_TOKENS,
+            overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+            token_counter=Tokenizer().count
+        )
+
+    def iter_chunks(
+        self,
+        text: str,
+        blocks: Optional[List[TextBlock]] = None
+    ) -> Iterator[TextChunk]:
+        """
+        Lazily split text into chunks
+
+        Args:
+            text: Document text the block offsets refer to
+            blocks: Structural blocks (defaults to one paragraph per line)
+
+        Yields:
+            TextChunk objects in document order
+        """
+        if blocks is None:
+            blocks = build_blocks([(BLOCK_PARAGRAPH, line) for line in text.split("\n")])
+
+        window: Deque[_Unit] = deque()
+        window_tokens = 0
+        index = 0
+
+        for block in blocks:
+            if block.kind in (BLOCK_HEADING, BLOCK_TABLE) and window:
+                # Structural boundary: flush without carrying overlap
+                chunk = self._make_chunk(text, window, window_tokens, index)
+                if chunk:
+                    yield chunk
+                    index += 1
+                window.clear()
+                window_tokens = 0
+
+            for unit in self._iter_units(text, block):
+                if window and window_tokens + unit.tokens > self.max_tokens:
+                    chunk = self._make_chunk(text, window, window_tokens, index)
+                    if chunk:
+                        yield chunk
+                        index += 1
+                    window_tokens = self._carry_overlap(window, window_tokens, unit.tokens)
+
+                window.append(unit)
+                window_tokens += unit.tokens
+
+            if block.kind == BLOCK_TABLE and window:
+                chunk = self._make_chunk(text, window, window_tokens, index)
+                if chunk:
+                    yield chunk
+                    index += 1
+                window.clear()
+                window_tokens = 0
+
+        if window:
+            chunk = self._make_chunk(text, window, window_tokens, index)
+            if chunk:
+                yield chunk
+
+    def _carry_overlap(self, window: Deque[_Unit], window_tokens: int, next_tokens: int) -> int:
+        """
+        Keep the trailing units of the emitted chunk as overlap
+
+        Drops units from the left until the rest fits the overlap budget and
+        leaves room for the next unit. The window always loses at least one
+        unit, which guarantees forward progress.
+        """
+        window_tokens -= window.popleft().tokens
+        while window and (
+            window_tokens > self.overlap_tokens
+            or window_tokens + next_tokens > self.max_tokens
+        ):
+            window_tokens -= window.popleft().tokens
+        return window_tokens
+
+    def _iter_units(self, text: str, block: TextBlock) -> Iterator[_Unit]:
+        """Split block into units that fit into a single chunk"""
+        if block.start >= block.end:
+            return
+
+        if block.kind == BLOCK_TABLE:
+            # Table rows are the natural unit
+            spans = []
+            position = block.start
+            for line in block.text.split("\n"):
+                spans.append((position, position + len(line)))
+                position += len(line) + 1
+        else:
+            tokens = self.count_tokens(text[block.start:block.end])
+            if tokens <= self.max_tokens:
+                yield _Unit(block.start, block.end, tokens)
+                return
+            spans = split_sentences(text, block.start, block.end)
+
+        for start, end in spans:
+            if start < end:
+                yield from self._fit(text, start, end, WORD)
+
+    def _fit(self, text: str, start: int, end: int, splitter: Optional[re.Pattern]) -> Iterator[_Unit]:
+        """Yield span as one unit if it fits, otherwise split it further"""
+        tokens = self.count_tokens(text[start:end])
+        if tokens <= self.max_tokens:
+            yield _Unit(start, end, tokens)
+            return
+
+        if splitter is not None:
+            pieces = [(m.start(), m.end()) for m in splitter.finditer(text, start, end)]
+            if len(pieces) > 1:
+                for piece_start, piece_end in pieces:
+                    yield from self._fit(text, piece_start, piece_end, None)
+                return
+
+        if end - start <= 1:
+            # A single character always makes progress, even if it exceeds the budget
+            yield _Unit(start, end, tokens)
+            return
+
+        middle = start + (end - start) // 2
+        yield from self._fit(text, start, middle, None)
+        yield from self._fit(text, middle, end, None)
+
+    @staticmethod
+    def _make_chunk(text: str, window: Deque[_Unit], tokens: int, index: int) -> Optional[TextChunk]:
+        """Build chunk from window, trimming surrounding whitespace"""
+        start = window[0].start
+        end = window[-1].end
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start == end:
+            return None
+        return TextChunk(index=index, text=text[start:end], start=start, end=end, token_count=tokens)
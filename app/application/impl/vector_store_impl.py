@@ -1,22 +1,43 @@
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 import logging
 from app.application.vector_store import VectorStore
-from app.infrastructure.vectorstore.qdrant_client import QdrantClient as QdrantClientInfra
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def get_vector_store_client():
+    """
+    Process-wide backend client
+    
+    Connecting and checking the collections happens once instead of on every
+    request. Backends are imported on demand, the numpy one runs without
+    qdrant-client.
+    """
+    if settings.VECTOR_STORE_BACKEND == "numpy":
+        from app.infrastructure.vectorstore.numpy_store import NumpyVectorStore
+        return NumpyVectorStore()
+    if settings.VECTOR_STORE_BACKEND == "qdrant":
+        from app.infrastructure.vectorstore.qdrant_client import QdrantClient as QdrantClientInfra
+        return QdrantClientInfra()
+    raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {settings.VECTOR_STORE_BACKEND}")
+
+
 class VectorStoreImpl(VectorStore):
     """Implementation of vector store service"""
     
     def __init__(self):
-        self.client = QdrantClientInfra()
+        self.client = get_vector_store_client()
     
     async def add_documents(
         self, 
         texts: List[str], 
         embeddings: List[List[float]], 
-        document_id: str
+        document_id: str,
+        chunk_indices: Optional[List[int]] = None,
+        payloads: Optional[List[Dict]] = None
     ) -> int:
         """
         Add documents to vector store
@@ -25,12 +46,16 @@ class VectorStoreImpl(VectorStore):
             texts: List of text chunks
             embeddings: List of embeddings
             document_id: Document identifier
+            chunk_indices: Chunk positions in the document (defaults to 0..n-1)
+            payloads: Extra payload fields per chunk
             
         Returns:
             Number of documents added
         """
         try:
-            count = await self.client.add_documents(texts, embeddings, document_id)
+            count = await self.client.add_documents(
+                texts, embeddings, document_id, chunk_indices, payloads
+            )
             logger.info(f"Added {count} documents to vector store")
             return count
         except Exception as e:
@@ -40,7 +65,8 @@ class VectorStoreImpl(VectorStore):
     async def search(
         self, 
         query_embedding: List[float], 
-        top_k: int = None
+        top_k: int = None,
+        document_ids: Optional[List[str]] = None
     ) -> List[Dict]:
         """
         Search similar documents
@@ -48,18 +74,44 @@ class VectorStoreImpl(VectorStore):
         Args:
             query_embedding: Query embedding vector
             top_k: Number of results
+            document_ids: Restrict the search to chunks of these documents
             
         Returns:
             List of search results
         """
         try:
-            results = await self.client.search(query_embedding, top_k)
+            results = await self.client.search(query_embedding, top_k, document_ids)
             logger.info(f"Found {len(results)} similar documents")
             return results
         except Exception as e:
             logger.error(f"Error searching documents: {str(e)}")
             raise
     
+    async def search_batch(
+        self, 
+        query_embeddings: List[List[float]], 
+        top_k: int = None,
+        document_ids: Optional[List[Optional[List[str]]]] = None
+    ) -> List[List[Dict]]:
+        """
+        Search similar documents for several queries in one request
+        
+        Args:
+            query_embeddings: Query embedding vectors
+            top_k: Number of results per query
+            document_ids: Per query, documents to restrict the search to
+            
+        Returns:
+            Search results per query, in query order
+        """
+        try:
+            results = await self.client.search_batch(query_embeddings, top_k, document_ids)
+            logger.info(f"Batch search for {len(query_embeddings)} queries found {sum(len(r) for r in results)} documents")
+            return results
+        except Exception as e:
+            logger.error(f"Error batch searching documents: {str(e)}")
+            raise
+    
     async def delete_by_document_id(self, document_id: str) -> bool:
         """
         Delete documents by document ID
@@ -76,4 +128,199 @@ class VectorStoreImpl(VectorStore):
             return success
         except Exception as e:
             logger.error(f"Error deleting documents: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+    
+    async def delete_points(self, point_ids: List[str]) -> bool:
+        """
+        Delete points by ID
+        
+        Args:
+            point_ids: Point identifiers
+            
+        Returns:
+            Success status
+        """
+        try:
+            success = await self.client.delete_points(point_ids)
+            logger.info(f"Deleted {len(point_ids)} points: {success}")
+            return success
+        except Exception as e:
+            logger.error(f"Error deleting points: {str(e)}")
+            return False
+    
+    async def set_document_refs(self, refs: Dict[str, List[str]]) -> None:
+        """
+        Set the documents referencing each shared point
+        
+        Args:
+            refs: Point ID to referencing document IDs
+        """
+        try:
+            await self.client.set_document_refs(refs)
+            logger.info(f"Updated document references of {len(refs)} points")
+        except Exception as e:
+            logger.error(f"Error updating document references: {str(e)}")
+            raise
+    
+    async def add_sentences(
+        self,
+        chunk_point_ids: List[str],
+        spans: List[List[List[int]]],
+        embeddings: List[List[List[float]]]
+    ) -> int:
+        """
+        Store sentence embeddings of chunks
+        
+        Args:
+            chunk_point_ids: Point IDs of the chunks
+            spans: Per chunk, [start, end] of each sentence within the chunk text
+            embeddings: Per chunk, embedding of each sentence
+            
+        Returns:
+            Number of sentences stored
+        """
+        try:
+            count = await self.client.add_sentences(chunk_point_ids, spans, embeddings)
+            logger.info(f"Added {count} sentences to vector store")
+            return count
+        except Exception as e:
+            logger.error(f"Error adding sentences: {str(e)}")
+            raise
+    
+    async def get_sentences(self, chunks: Dict[str, int]) -> Dict[str, Tuple[List[List[int]], List[List[float]]]]:
+        """
+        Fetch sentence spans and embeddings of chunks
+        
+        Args:
+            chunks: Chunk point ID to its sentence count
+            
+        Returns:
+            Chunk point ID to (sentence spans, sentence embeddings)
+        """
+        try:
+            return await self.client.get_sentences(chunks)
+        except Exception as e:
+            logger.error(f"Error getting sentences: {str(e)}")
+            raise
+    
+    async def search_documents(self, query_embeddings: List[List[float]], top_n: int) -> List[List[str]]:
+        """
+        Shortlist documents by their centroid vectors
+        
+        Args:
+            query_embeddings: Query embedding vectors
+            top_n: Documents per query
+            
+        Returns:
+            Per query, IDs of the closest documents
+        """
+        try:
+            return await self.client.search_documents(query_embeddings, top_n)
+        except Exception as e:
+            logger.error(f"Error searching document vectors: {str(e)}")
+            raise
+    
+    async def upsert_document_vector(self, document_id: str, vector: List[float], chunk_count: int) -> None:
+        """
+        Store centroid vector of a document
+        
+        Args:
+            document_id: Document identifier
+            vector: Normalized mean of the document's chunk embeddings
+            chunk_count: Number of chunks averaged
+        """
+        try:
+            await self.client.upsert_document_vector(document_id, vector, chunk_count)
+        except Exception as e:
+            logger.error(f"Error storing document vector: {str(e)}")
+            raise
+    
+    async def delete_document_vector(self, document_id: str) -> bool:
+        """
+        Delete centroid vector of a document
+        
+        Args:
+            document_id: Document identifier
+            
+        Returns:
+            Success status
+        """
+        try:
+            return await self.client.delete_document_vector(document_id)
+        except Exception as e:
+            logger.error(f"Error deleting document vector: {str(e)}")
+            return False
+    
+    async def get_vectors(self, point_ids: List[str]) -> Dict[str, List[float]]:
+        """
+        Fetch stored chunk vectors
+        
+        Args:
+            point_ids: Point identifiers
+            
+        Returns:
+            Point ID to vector
+        """
+        try:
+            return await self.client.get_vectors(point_ids)
+        except Exception as e:
+            logger.error(f"Error getting vectors: {str(e)}")
+            raise
+    
+    async def get_chunks(self, point_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch stored chunks in one lookup
+        
+        Args:
+            point_ids: Point identifiers
+            
+        Returns:
+            Point ID to content, document_id and chunk_index (missing points are left out)
+        """
+        try:
+            return await self.client.get_chunks(point_ids)
+        except Exception as e:
+            logger.error(f"Error getting chunks: {str(e)}")
+            raise
+    
+    async def rebuild_document_vectors(self) -> int:
+        """
+        Recompute every document centroid from the stored chunks
+        
+        Returns:
+            Number of document vectors stored
+        """
+        try:
+            count = await self.client.rebuild_document_vectors()
+            logger.info(f"Rebuilt {count} document vectors")
+            return count
+        except Exception as e:
+            logger.error(f"Error rebuilding document vectors: {str(e)}")
+            raise
+    
+    async def ensure_document_vectors(self) -> int:
+        """
+        Rebuild document centroids if any document with chunks has none
+        
+        Documents indexed before hierarchical retrieval was enabled have no
+        centroid and would never be shortlisted. Until this check has passed
+        (or a rebuild finished), document_vectors_ready is False and queries
+        use the flat search.
+        
+        Returns:
+            Number of document vectors stored (0 when none were missing)
+        """
+        try:
+            missing = await self.client.missing_document_vectors()
+            if not missing:
+                self.client.document_vectors_ready = True
+                return 0
+            logger.info(f"{len(missing)} documents have no document vector, rebuilding")
+            return await self.rebuild_document_vectors()
+        except Exception as e:
+            logger.error(f"Error checking document vectors: {str(e)}")
+            raise
+    
+    @property
+    def document_vectors_ready(self) -> bool:
+        return self.client.document_vectors_ready
@@ -1,10 +1,26 @@
+import asyncio
 import logging
+from typing import List
 from docx import Document
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
 import os
 from app.application.file_extractor import FileExtractor
+from app.domain.chunks import (
+    BLOCK_HEADING,
+    BLOCK_PARAGRAPH,
+    BLOCK_TABLE,
+    TextBlock,
+    blocks_to_text,
+    build_blocks,
+)
 
 logger = logging.getLogger(__name__)
 
+# Style name prefixes treated as headings (English, Russian and Uzbek Word locales)
+HEADING_STYLE_PREFIXES = ("heading", "title", "заголовок", "название", "sarlavha")
+
 
 class WordExtractorImpl(FileExtractor):
     """Implementation of Word document text extractor"""
@@ -19,6 +35,19 @@ class WordExtractorImpl(FileExtractor):
         Returns:
             Extracted text
         """
+        blocks = await self.extract_blocks(file_path)
+        return blocks_to_text(blocks)
+    
+    async def extract_blocks(self, file_path: str) -> List[TextBlock]:
+        """
+        Extract paragraphs, headings and tables in document order (.docx only)
+        
+        Args:
+            file_path: Path to Word file
+            
+        Returns:
+            List of blocks with offsets into the joined document text
+        """
         try:
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"File not found: {file_path}")
@@ -33,29 +62,58 @@ class WordExtractorImpl(FileExtractor):
                     f"Microsoft Word da ochib → File → Save As → .docx formatda saqlang"
                 )
             
-            doc = Document(file_path)
+            # Parsing is CPU/IO bound, keep it off the event loop
+            blocks = await asyncio.to_thread(self._read_blocks, file_path)
             
-            # Extract text from paragraphs
-            text_parts = []
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_parts.append(paragraph.text.strip())
-            
-            # Extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            text_parts.append(cell.text.strip())
-            
-            full_text = "\n".join(text_parts)
-            
-            if not full_text.strip():
+            if not blocks:
                 raise ValueError("Hujjatda matn topilmadi")
             
-            logger.info(f"Extracted {len(full_text)} characters from {file_path}")
-            return full_text
+            logger.info(f"Extracted {len(blocks)} blocks ({blocks[-1].end} characters) from {file_path}")
+            return blocks
             
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def _read_blocks(self, file_path: str) -> List[TextBlock]:
+        """Parse document body, keeping paragraphs and tables in their original order"""
+        doc = Document(file_path)
+        
+        parts = []
+        for element in doc.element.body.iterchildren():
+            if element.tag == qn('w:p'):
+                paragraph = Paragraph(element, doc)
+                text = paragraph.text.strip()
+                if text:
+                    kind = BLOCK_HEADING if self._is_heading(paragraph) else BLOCK_PARAGRAPH
+                    parts.append((kind, text))
+            
+            elif element.tag == qn('w:tbl'):
+                text = self._table_text(Table(element, doc))
+                if text:
+                    parts.append((BLOCK_TABLE, text))
+        
+        return build_blocks(parts)
+    
+    @staticmethod
+    def _is_heading(paragraph: Paragraph) -> bool:
+        """Check if paragraph uses a heading style"""
+        style = paragraph.style
+        if style is None or not style.name:
+            return False
+        return style.name.lower().startswith(HEADING_STYLE_PREFIXES)
+    
+    @staticmethod
+    def _table_text(table: Table) -> str:
+        """Render table as one line per row, cells separated by ' | '"""
+        rows = []
+        for row in table.rows:
+            cells = []
+            for cell in row.cells:
+                text = " ".join(cell.text.split())
+                # Merged cells are repeated by python-docx
+                if text and (not cells or cells[-1] != text):
+                    cells.append(text)
+            if cells:
+                rows.append(" | ".join(cells))
+        return "\n".join(rows)
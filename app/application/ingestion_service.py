@@ -1,10 +1,24 @@
 from abc import ABC, abstractmethod
-from typing import Tuple
+from typing import List, Optional, Tuple
+from app.domain.ingestion import IngestionReport
 
 
 class IngestionService(ABC):
     """Interface for document ingestion"""
     
+    @abstractmethod
+    async def ingest(
+        self, 
+        file_path: str, 
+        document_id: str,
+        filename: Optional[str] = None
+    ) -> IngestionReport:
+        """
+        Ingest document into system (resumes from a checkpoint if one exists)
+        Returns: ingestion report with chunk count and stage timings
+        """
+        pass
+    
     @abstractmethod
     async def ingest_document(
         self, 
@@ -15,4 +29,20 @@ class IngestionService(ABC):
         Ingest document into system
         Returns: (success, chunks_count)
         """
-        pass
\ No newline at end of file
+        pass
+
+    
+    @abstractmethod
+    async def resume(self, document_id: str) -> IngestionReport:
+        """Resume an interrupted or failed ingestion from its last checkpoint"""
+        pass
+    
+    @abstractmethod
+    async def resume_interrupted(self) -> List[str]:
+        """Resume all unfinished ingestions, returns completed document IDs"""
+        pass
+    
+    @abstractmethod
+    async def remove_document_points(self, document_id: str, point_ids: Optional[List[str]] = None) -> bool:
+        """Remove document from the vector store, keeping points other documents still share"""
+        pass
@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import AsyncIterator, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from app.domain.schemas import SourceDocument
+from app.core.deadline import Deadline
+from app.domain.schemas import BatchQueryResult, QueryDiagnostics, SourceDocument
 
 
 class QueryService(ABC):
@@ -11,10 +12,24 @@ class QueryService(ABC):
     async def process_query(
         self, 
         question: str, 
-        db: Session
-    ) -> Tuple[str, List[SourceDocument]]:
+        db: Session,
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[str, List[SourceDocument], QueryDiagnostics]:
         """
-        Process user query
-        Returns: (answer, sources)
+        Process user query within a deadline
+        Returns: (answer, sources, diagnostics)
         """
-        pass
\ No newline at end of file
+        pass
+    
+    @abstractmethod
+    def process_batch(
+        self, 
+        questions: List[str], 
+        db: Session,
+        save_history: bool = False
+    ) -> AsyncIterator[BatchQueryResult]:
+        """
+        Process many queries with one embedding request and one batched search
+        Yields: results in completion order
+        """
+        pass
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 
 class VectorStore(ABC):
@@ -10,7 +10,9 @@ class VectorStore(ABC):
         self, 
         texts: List[str], 
         embeddings: List[List[float]], 
-        document_id: str
+        document_id: str,
+        chunk_indices: Optional[List[int]] = None,
+        payloads: Optional[List[Dict]] = None
     ) -> int:
         """Add documents to vector store"""
         pass
@@ -19,12 +21,89 @@ class VectorStore(ABC):
     async def search(
         self, 
         query_embedding: List[float], 
-        top_k: int = None
+        top_k: int = None,
+        document_ids: Optional[List[str]] = None
     ) -> List[Dict]:
         """Search similar documents"""
         pass
     
+    @abstractmethod
+    async def search_batch(
+        self, 
+        query_embeddings: List[List[float]], 
+        top_k: int = None,
+        document_ids: Optional[List[Optional[List[str]]]] = None
+    ) -> List[List[Dict]]:
+        """Search similar documents for several queries in one request"""
+        pass
+    
     @abstractmethod
     async def delete_by_document_id(self, document_id: str) -> bool:
         """Delete documents by document ID"""
-        pass
\ No newline at end of file
+        pass
+    
+    @abstractmethod
+    async def delete_points(self, point_ids: List[str]) -> bool:
+        """Delete points by ID"""
+        pass
+    
+    @abstractmethod
+    async def set_document_refs(self, refs: Dict[str, List[str]]) -> None:
+        """Set the documents referencing each shared point"""
+        pass
+    
+    @abstractmethod
+    async def add_sentences(
+        self,
+        chunk_point_ids: List[str],
+        spans: List[List[List[int]]],
+        embeddings: List[List[List[float]]]
+    ) -> int:
+        """Store sentence embeddings of chunks"""
+        pass
+    
+    @abstractmethod
+    async def get_sentences(self, chunks: Dict[str, int]) -> Dict[str, Tuple[List[List[int]], List[List[float]]]]:
+        """Fetch sentence spans and embeddings of chunks (point ID → sentence count)"""
+        pass
+    
+    @abstractmethod
+    async def search_documents(self, query_embeddings: List[List[float]], top_n: int) -> List[List[str]]:
+        """Shortlist documents by their centroid vectors"""
+        pass
+    
+    @abstractmethod
+    async def upsert_document_vector(self, document_id: str, vector: List[float], chunk_count: int) -> None:
+        """Store centroid vector of a document"""
+        pass
+    
+    @abstractmethod
+    async def delete_document_vector(self, document_id: str) -> bool:
+        """Delete centroid vector of a document"""
+        pass
+    
+    @abstractmethod
+    async def get_vectors(self, point_ids: List[str]) -> Dict[str, List[float]]:
+        """Fetch stored chunk vectors by point ID"""
+        pass
+    
+    @abstractmethod
+    async def get_chunks(self, point_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch stored chunk texts and positions by point ID"""
+        pass
+    
+    @abstractmethod
+    async def rebuild_document_vectors(self) -> int:
+        """Recompute every document centroid from the stored chunks"""
+        pass
+    
+    @abstractmethod
+    async def ensure_document_vectors(self) -> int:
+        """Rebuild document centroids if any document with chunks has none"""
+        pass
+    
+    @property
+    @abstractmethod
+    def document_vectors_ready(self) -> bool:
+        """Every document with chunks has a centroid (hierarchical search may be used)"""
+        pass
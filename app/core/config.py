@@ -16,6 +16,21 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
     OPENAI_LLM_MODEL: str = "gpt-4o-mini"
+    OPENAI_EMBEDDING_MAX_INPUT_TOKENS: int = 8191  # Per-input model limit
+    OPENAI_EMBEDDING_MAX_BATCH_TOKENS: int = 300000  # Per-request token cap
+    OPENAI_EMBEDDING_MAX_BATCH_SIZE: int = 2048  # Per-request input cap
+    OPENAI_EMBEDDING_CONCURRENCY: int = 4  # Embedding requests in flight
+    OPENAI_EMBEDDING_MAX_RETRIES: int = 3  # Client retries on 429/5xx/connection errors
+    
+    # Google Gemini API (optional provider)
+    GEMINI_API_KEY: Optional[str] = None
+    GEMINI_EMBEDDING_MODEL: str = "models/text-embedding-004"
+    GEMINI_LLM_MODEL: str = "gemini-1.5-flash"
+    GEMINI_EMBED_BATCH_SIZE: int = 100  # Texts per batchEmbedContents request (API max 100)
+    GEMINI_EMBED_CONCURRENCY: int = 2  # Embedding requests in flight
+    GEMINI_EMBED_MAX_RETRIES: int = 6
+    GEMINI_RATE_LIMIT_INITIAL_RPS: float = 1.0  # Starting request rate, adapted at runtime
+    GEMINI_RATE_LIMIT_MAX_RPS: float = 25.0  # Upper bound for the learned rate
     
     # PostgreSQL - Support both individual vars and DATABASE_URL
     DATABASE_URL: Optional[str] = None
@@ -32,18 +47,134 @@ class Settings(BaseSettings):
     QDRANT_PORT: int = 6333  # Fallback for local
     QDRANT_COLLECTION_NAME: str = "documents"
     
+    # Vector store backend: "qdrant", or "numpy" for the in-process store (small corpora, CI)
+    VECTOR_STORE_BACKEND: str = "qdrant"
+    NUMPY_STORE_DIR: str = "uploads/vectors"  # Collections of the numpy backend
+    NUMPY_STORE_DTYPE: str = "float32"  # float32 or float16 (half the size, ~3 decimal digits)
+    NUMPY_STORE_COMPACT_RATIO: float = 0.25  # Share of deleted rows that triggers compaction
+    
     # File Upload
     MAX_FILE_SIZE_MB: int = 10
     ALLOWED_EXTENSIONS: str = ".docx,.doc"
     
     # RAG Settings
-    CHUNK_SIZE: int = 500
-    CHUNK_OVERLAP: int = 50
+    CHUNK_SIZE: int = 500  # Legacy character-based chunker (benchmarks only)
+    CHUNK_OVERLAP: int = 50  # Legacy character-based chunker (benchmarks only)
+    CHUNK_SIZE_TOKENS: int = 256  # Max tokens per chunk (embedding model tokenizer)
+    CHUNK_OVERLAP_TOKENS: int = 32  # Overlap between consecutive chunks of a section
     TOP_K_RESULTS: int = 3
+    CONTEXT_CANDIDATES: int = 6  # Chunks retrieved per query before the context budget is applied
+    CONTEXT_MAX_TOKENS: int = 1024  # Token budget of the LLM context (LLM tokenizer)
+    
+    # Hierarchical retrieval (document centroids are stored at ingestion while enabled)
+    HIERARCHICAL_SEARCH_ENABLED: bool = False
+    HIERARCHICAL_TOP_DOCS: int = 5  # Documents shortlisted before the chunk search
+    
+    # Context compression (sentence embeddings are stored at ingestion while enabled)
+    COMPRESSION_ENABLED: bool = False
+    COMPRESSION_TOP_SENTENCES: int = 8  # Best-scoring sentences kept across all retrieved chunks
+    COMPRESSION_NEIGHBOURS: int = 1  # Sentences kept on each side of a selected sentence
+    QUERY_BATCH_MAX_QUESTIONS: int = 1000  # Questions per /query/batch request
+    QUERY_BATCH_LLM_CONCURRENCY: int = 8  # LLM calls in flight per batch
+    
+    # Request deadlines (/query)
+    QUERY_TIMEOUT_SECONDS: float = 20.0  # Budget from request arrival to response
+    QUERY_COMPRESSION_MIN_SECONDS: float = 6.0  # Less time left: skip sentence compression
+    QUERY_SHRINK_CONTEXT_SECONDS: float = 8.0  # Less time left: halve the context token budget
+    QUERY_MIN_LLM_SECONDS: float = 3.0  # Less time left: return sources without an answer
+    QUERY_PERSIST_RESERVE_SECONDS: float = 0.5  # Kept back from the LLM for saving chat history
+    
+    # Ingestion pipeline
+    INGEST_BATCH_SIZE: int = 64  # Chunks per embedding request / upsert
+    INGEST_EMBED_CONCURRENCY: int = 4  # Embedding batches in flight
+    INGEST_UPSERT_CONCURRENCY: int = 2  # Upserts in flight
+    INGEST_QUEUE_SIZE: int = 4  # Bounded queue length between stages
+    INGEST_CHECKPOINT_DIR: str = "uploads/checkpoints"  # Per-batch progress of ingestions
+    INGEST_MAX_ATTEMPTS: int = 3  # Automatic resume attempts per document, then its checkpoint and points are dropped
+    INGEST_RESUME_ON_STARTUP: bool = True  # Resume interrupted ingestions when the API starts (not with INGEST_JOB_QUEUE_ENABLED)
+    INGEST_PROCESSING_TIMEOUT_SECONDS: float = 3600.0  # Document "processing" this long without updates (and no queued job) counts as failed
+    
+    # Ingestion queue (uploads run by `python -m app.worker` processes on any node, PostgreSQL only)
+    INGEST_JOB_QUEUE_ENABLED: bool = False  # Queue uploads instead of ingesting them in the API process
+    INGEST_JOB_MAX_ATTEMPTS: int = 5  # Claims before a job is dead-lettered
+    INGEST_JOB_LEASE_SECONDS: float = 120.0  # Job is reclaimed by another worker when not extended in time
+    INGEST_JOB_HEARTBEAT_SECONDS: float = 30.0  # Lease extension interval
+    INGEST_JOB_BACKOFF_SECONDS: float = 30.0  # Delay after the first failure, doubles per attempt
+    INGEST_JOB_BACKOFF_MAX_SECONDS: float = 1800.0
+    INGEST_WORKER_CONCURRENCY: int = 2  # Jobs per worker process
+    INGEST_WORKER_POLL_SECONDS: float = 2.0  # Wait before looking again when the queue is empty
+    
+    # Chunk deduplication
+    DEDUP_ENABLED: bool = True  # Attach duplicate chunks to existing points instead of embedding them
+    DEDUP_NEAR_ENABLED: bool = False  # Also attach near-duplicates (SimHash); off: exact normalized text only
+    DEDUP_SIMHASH_MAX_DISTANCE: int = 3  # Max differing SimHash bits for a near-duplicate (4 bands guarantee recall up to 3)
+    DEDUP_NEAR_MIN_TOKENS: int = 32  # Shorter chunks are matched exactly only
+    DEDUP_NEAR_MIN_JACCARD: float = 0.9  # Min word 3-shingle overlap of a near-duplicate (numbers must also be equal)
     
     # LLM Settings
     LLM_TEMPERATURE: float = 0.7
     LLM_MAX_TOKENS: int = 1000
+    LLM_PRIMARY_PROVIDER: str = "openai"  # openai or gemini; the other one (if configured) is the fallback
+    LLM_HEDGE_ENABLED: bool = False  # Each hedge is an extra paid completion
+    LLM_HEDGE_TARGET: str = "alternate"  # Hedge to the alternate provider (skipped without one) or the "same" one
+    LLM_HEDGE_PERCENTILE: float = 95.0  # Latency percentile of the provider after which a hedge is sent
+    LLM_HEDGE_INITIAL_DELAY_MS: int = 3000  # Hedge delay until enough latencies are recorded
+    LLM_HEDGE_MIN_DELAY_MS: int = 500
+    LLM_LATENCY_WINDOW: int = 500  # Recent latencies kept per provider
+    LLM_BREAKER_FAILURES: int = 5  # Consecutive failures that open a provider's circuit
+    LLM_BREAKER_COOLDOWN_SECONDS: float = 30.0
+    
+    # Admission control (POST requests per traffic class; full queue → 429, wait expired → 503)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_QUERY_PATHS: str = "/api/v1/query"
+    ADMISSION_QUERY_CONCURRENCY: int = 32
+    ADMISSION_QUERY_QUEUE_SIZE: int = 64
+    ADMISSION_QUERY_MAX_WAIT_SECONDS: float = 5.0
+    ADMISSION_UPLOAD_PATHS: str = "/api/v1/upload,/api/v1/ingestion/jobs"
+    ADMISSION_UPLOAD_CONCURRENCY: int = 2
+    ADMISSION_UPLOAD_QUEUE_SIZE: int = 8
+    ADMISSION_UPLOAD_MAX_WAIT_SECONDS: float = 30.0
+    UPLOAD_BATCH_FILE_CONCURRENCY: int = 2  # Files of one /upload/batch ingested at a time
+    
+    # Chat history partitions (monthly) and retention
+    CHAT_MAINTENANCE_ENABLED: bool = True  # Periodic partition/rollup/retention job inside the API
+    CHAT_MAINTENANCE_INTERVAL_HOURS: float = 6.0
+    CHAT_PARTITION_MONTHS_AHEAD: int = 3  # Partitions created beyond the current month
+    CHAT_RETENTION_MONTHS: int = 0  # Whole months of chats kept (0 keeps everything)
+    CHAT_ARCHIVE_EXPIRED: bool = True  # Detach expired partitions as archive_* tables; false drops them
+    CHAT_ANALYTICS_ENABLED: bool = True  # Periodic refresh of the /chats/analytics summaries inside the API
+    CHAT_ANALYTICS_REFRESH_SECONDS: float = 300.0  # Refresh of the hourly summaries behind /chats/analytics
+    CHAT_PAGE_MAX_SIZE: int = 100  # Max chats per /chats page
+    CHAT_EXPORT_BATCH_SIZE: int = 5000  # Rows fetched and encoded per batch by /chats/export and the export CLI
+    
+    # FAQ mined from chat history, answered without search or LLM
+    FAQ_ENABLED: bool = False
+    FAQ_LOOKBACK_DAYS: int = 30  # Chats mined
+    FAQ_MAX_CHATS: int = 20000  # Most recent answered chats read per mining run
+    FAQ_MAX_QUESTIONS: int = 5000  # Most asked distinct wordings clustered
+    FAQ_CLUSTER_THRESHOLD: float = 0.90  # Question similarity to join a cluster
+    FAQ_MIN_CLUSTER_SIZE: int = 5  # Chats a cluster needs to become an entry
+    FAQ_MAX_ENTRIES: int = 500
+    FAQ_MATCH_THRESHOLD: float = 0.95  # Question similarity to answer from an entry
+    FAQ_MINING_INTERVAL_HOURS: float = 6.0
+    FAQ_INDEX_REFRESH_SECONDS: float = 60.0  # Reload of the in-memory index (drops entries of changed documents)
+    
+    # Semantic answer cache (reuses answers of paraphrased questions)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_SIZE: int = 2000  # Recent questions kept per instance
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95  # Question similarity to reuse an answer
+    SEMANTIC_CACHE_TTL_SECONDS: float = 3600.0
+    SEMANTIC_CACHE_AUDIT_RATE: float = 0.05  # Share of hits searched again to check the cached sources
+    SEMANTIC_CACHE_AUDIT_SAMPLES: int = 50  # Latest audits kept for /query/cache/stats
+    
+    # Startup warm-up (/readyz reports 503 until it has finished)
+    WARMUP_ENABLED: bool = True
+    WARMUP_DB_CONNECTIONS: int = 4  # Pool connections opened before the first request
+    
+    # Health checks (run in background, /livez /readyz /health only read the cached results)
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 10.0  # Postgres and vector store
+    HEALTH_PROVIDER_INTERVAL_SECONDS: float = 60.0  # LLM providers (API calls, checked less often)
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 3.0
     
     @property
     def database_url(self) -> str:
@@ -60,6 +191,14 @@ class Settings(BaseSettings):
         """Get list of allowed extensions"""
         return [ext.strip() for ext in self.ALLOWED_EXTENSIONS.split(",")]
     
+    @property
+    def ADMISSION_QUERY_PATHS_LIST(self) -> List[str]:
+        return [path.strip() for path in self.ADMISSION_QUERY_PATHS.split(",") if path.strip()]
+    
+    @property
+    def ADMISSION_UPLOAD_PATHS_LIST(self) -> List[str]:
+        return [path.strip() for path in self.ADMISSION_UPLOAD_PATHS.split(",") if path.strip()]
+    
     @property
     def MAX_FILE_SIZE_BYTES(self) -> int:
         """Get max file size in bytes"""
@@ -0,0 +1,63 @@
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """A request stage could not finish within the time left"""
+
+    def __init__(self, stage: str, budget: float):
+        self.stage = stage
+        self.budget = budget
+        super().__init__(f"Deadline exceeded during {stage} (had {budget:.2f}s)")
+
+
+class Deadline:
+    """
+    Point in time by which a request must be answered
+
+    Created once when the request arrives and passed down through the
+    stages, each of which gets the time that is left instead of its own
+    fixed timeout.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    async def run(self, awaitable: Awaitable[T], stage: str, reserve: float = 0.0, cap: Optional[float] = None) -> T:
+        """
+        Await within the remaining time
+
+        Args:
+            awaitable: Stage to run (cancelled when the time is up)
+            stage: Stage name reported on timeout
+            reserve: Seconds kept back for the stages that follow
+            cap: Upper bound for this stage
+
+        Raises:
+            DeadlineExceeded: The stage did not finish in time
+        """
+        budget = self.remaining() - reserve
+        if cap is not None:
+            budget = min(budget, cap)
+        if budget <= 0:
+            # Still a coroutine object: close it so it is not reported as never awaited
+            close = getattr(awaitable, "close", None)
+            if close is not None:
+                close()
+            raise DeadlineExceeded(stage, 0.0)
+        try:
+            return await asyncio.wait_for(awaitable, timeout=budget)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(stage, budget) from None
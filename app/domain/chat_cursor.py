@@ -0,0 +1,25 @@
+import base64
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_chat_cursor(created_at: datetime, chat_id: uuid.UUID) -> str:
+    """Opaque cursor of a chat position in (created_at, id) order"""
+    raw = f"{created_at.isoformat()}|{chat_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_chat_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Chat position of a cursor
+
+    Raises:
+        ValueError: Not a cursor returned by encode_chat_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, chat_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(chat_id)
+    except Exception:
+        raise ValueError(f"Invalid chat cursor: {cursor}") from None
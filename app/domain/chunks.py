@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+from typing import List
+import uuid
+
+
+# Block kinds produced by file extractors
+BLOCK_PARAGRAPH = "paragraph"
+BLOCK_HEADING = "heading"
+BLOCK_TABLE = "table"
+
+# Separator used when blocks are joined into the document text
+BLOCK_SEPARATOR = "\n"
+
+
+@dataclass(frozen=True)
+class TextBlock:
+    """Structural block of an extracted document (paragraph, heading or table)"""
+    kind: str
+    text: str
+    start: int
+    end: int
+
+
+@dataclass(frozen=True)
+class TextChunk:
+    """Chunk of document text with character offsets into the joined text"""
+    index: int
+    text: str
+    start: int
+    end: int
+    token_count: int
+
+
+def build_blocks(parts: List[tuple]) -> List[TextBlock]:
+    """
+    Build blocks with offsets from (kind, text) pairs
+
+    Args:
+        parts: List of (kind, text) tuples in document order
+
+    Returns:
+        List of TextBlock with offsets matching blocks_to_text()
+    """
+    blocks = []
+    offset = 0
+    for kind, text in parts:
+        blocks.append(TextBlock(kind=kind, text=text, start=offset, end=offset + len(text)))
+        offset += len(text) + len(BLOCK_SEPARATOR)
+    return blocks
+
+
+def blocks_to_text(blocks: List[TextBlock]) -> str:
+    """Join blocks into the document text their offsets refer to"""
+    return BLOCK_SEPARATOR.join(block.text for block in blocks)
+
+
+def make_point_id(document_id: str, chunk_index: int) -> str:
+    """Deterministic vector store point ID, so re-ingesting a chunk overwrites it"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"rag-chunk:{document_id}:{chunk_index}"))
+
+
+def make_document_point_id(document_id: str) -> str:
+    """Point ID of a document's centroid vector"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"rag-document:{document_id}"))
+
+
+def make_sentence_point_id(chunk_point_id: str, sentence_no: int) -> str:
+    """Deterministic point ID of a chunk's sentence, so sentences are fetched by ID"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"rag-sentence:{chunk_point_id}:{sentence_no}"))
@@ -0,0 +1,45 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class ContextPassage:
+    """Contiguous span of a document assembled from one or more retrieved chunks"""
+    document_id: str
+    text: str
+    score: float  # Best score among the merged chunks
+    chunk_indices: List[int] = field(default_factory=list)
+    end: Optional[int] = None  # Character offset where the passage ends, if known
+
+
+@dataclass
+class BuiltContext:
+    """LLM context assembled from search hits"""
+    text: str
+    passages: List[ContextPassage]
+    used_hits: List[Dict]  # Hits included in the context, best score first
+    raw_tokens: int  # Tokens of all hits joined as-is
+    tokens: int  # Tokens of the assembled context
+    merged_chunks: int = 0  # Hits appended to a neighbouring chunk's passage
+    dropped_chunks: int = 0  # Hits left out by the token budget
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.raw_tokens - self.tokens, 0)
+
+
+@dataclass
+class CompressionStats:
+    """Outcome of sentence-level context compression"""
+    original_chars: int = 0
+    compressed_chars: int = 0
+    sentences_total: int = 0
+    sentences_kept: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        """Share of retrieved text kept (1.0 = nothing removed)"""
+        if not self.original_chars:
+            return 1.0
+        return self.compressed_chars / self.original_chars
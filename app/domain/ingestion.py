@@ -0,0 +1,28 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+@dataclass
+class IngestionReport:
+    """Outcome and stage timings of a document ingestion"""
+    document_id: str
+    chunks_count: int = 0
+    batches_count: int = 0
+    resumed_batches: int = 0  # Batches skipped because a checkpoint had them stored
+    reused_embeddings: int = 0  # Batches upserted from checkpointed embeddings
+    duplicate_chunks: int = 0  # Chunks attached to existing points instead of embedded
+    saved_embedding_tokens: int = 0  # Tokens of duplicate chunks that were not embedded
+    wall_seconds: float = 0.0
+    point_ids: List[str] = field(default_factory=list)  # Point of each chunk in chunk order
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+
+    def add_stage_time(self, stage: str, seconds: float) -> None:
+        """Accumulate busy time of a pipeline stage"""
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    @property
+    def timings_ms(self) -> Dict[str, int]:
+        """Stage and wall timings in milliseconds"""
+        timings = {stage: int(seconds * 1000) for stage, seconds in self.stage_seconds.items()}
+        timings["total"] = int(self.wall_seconds * 1000)
+        return timings
@@ -1,11 +1,11 @@
-from sqlalchemy import Column, String, Text, DateTime, func
+from sqlalchemy import Column, Boolean, Date, String, Text, DateTime, Integer, BigInteger, SmallInteger, LargeBinary, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 import uuid
 from app.core.database import Base
 
 
 class Chat(Base):
-    """Chat model for storing questions and answers"""
+    """Chat model for storing questions and answers (partitioned by month of created_at)"""
     
     __tablename__ = "chat"
     
@@ -13,8 +13,153 @@ class Chat(Base):
     question = Column(Text, nullable=False, comment="User question")
     answer = Column(Text, nullable=False, comment="AI generated answer")
     sources = Column(JSONB, nullable=True, comment="Source documents used")
+    answered = Column(Boolean, nullable=False, server_default="true", comment="False when no answer could be given")
+    latency_ms = Column(Integer, nullable=True, comment="Time to answer")
+    answer_source = Column(String(16), nullable=False, server_default="generated", comment="generated, or faq/cache when reused")
+    # Partition key, part of the primary key
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<Chat(id={self.id}, question={self.question[:50]}...)>"
+
+
+class ChatDailyStats(Base):
+    """Per-day rollup of chats, kept after their partitions are dropped"""
+    
+    __tablename__ = "chat_daily_stats"
+    
+    day = Column(Date, primary_key=True, comment="UTC day")
+    chat_count = Column(Integer, nullable=False, comment="Chats of the day")
+    no_source_count = Column(Integer, nullable=False, comment="Chats answered without sources")
+    source_count = Column(BigInteger, nullable=False, comment="Sources over all chats")
+    question_chars = Column(BigInteger, nullable=False, comment="Question length over all chats")
+    answer_chars = Column(BigInteger, nullable=False, comment="Answer length over all chats")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<ChatDailyStats(day={self.day}, chat_count={self.chat_count})>"
+
+
+class ChatHourlyStats(Base):
+    """Per-hour chat counts, refreshed incrementally for the analytics API"""
+    
+    __tablename__ = "chat_hourly_stats"
+    
+    hour = Column(DateTime(timezone=True), primary_key=True, comment="Start of the hour (UTC)")
+    chat_count = Column(Integer, nullable=False)
+    answered_count = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class ChatLatencyHourly(Base):
+    """Per-hour latency histogram (chat counts per CHAT_LATENCY_BUCKETS_MS bucket)"""
+    
+    __tablename__ = "chat_latency_hourly"
+    
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    bucket = Column(SmallInteger, primary_key=True, comment="Index of the latency bucket")
+    chat_count = Column(Integer, nullable=False)
+
+
+class ChatDocumentHourly(Base):
+    """Per-hour citations of each document in chat sources"""
+    
+    __tablename__ = "chat_document_hourly"
+    
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    document_id = Column(String(64), primary_key=True)
+    citations = Column(Integer, nullable=False)
+
+
+class FaqEntry(Base):
+    """Frequently asked question mined from chat history, answered without search or LLM"""
+    
+    __tablename__ = "faq_entries"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    question = Column(Text, nullable=False, comment="Canonical question (most asked wording)")
+    answer = Column(Text, nullable=False, comment="Answer of the most recent chat with current sources")
+    sources = Column(JSONB, nullable=False, comment="Chunk references of the answer")
+    variants = Column(JSONB, nullable=False, comment="Normalized wordings asked in the cluster")
+    centroid = Column(LargeBinary, nullable=False, comment="Normalized mean question embedding (float32)")
+    source_versions = Column(JSONB, nullable=False, comment="document_id -> content_hash:indexed_at of the sources")
+    chat_count = Column(Integer, nullable=False, comment="Chats of the cluster in the mining window")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<FaqEntry(id={self.id}, question={self.question[:50]}...)>"
+
+
+class Document(Base):
+    """Registry of uploaded documents"""
+    
+    __tablename__ = "documents"
+    __table_args__ = (
+        UniqueConstraint("content_hash", "embedding_model", name="uq_documents_content_hash_model"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, comment="Document ID (document_id in the vector store)")
+    filename = Column(String(512), nullable=False, comment="Original file name")
+    content_hash = Column(String(64), nullable=False, comment="SHA-256 of the file contents")
+    size_bytes = Column(BigInteger, nullable=False, comment="File size in bytes")
+    status = Column(String(32), nullable=False, default="processing", comment="processing, indexed, partial or failed")
+    chunk_count = Column(Integer, nullable=False, default=0, comment="Number of stored chunks")
+    duplicate_chunk_count = Column(Integer, nullable=False, default=0, comment="Chunks attached to existing points instead of stored")
+    point_ids = Column(JSONB, nullable=True, comment="Vector store point IDs in chunk order")
+    embedding_model = Column(String(128), nullable=False, comment="Embedding model used for the chunks")
+    timings = Column(JSONB, nullable=True, comment="Ingestion stage timings in milliseconds")
+    error = Column(Text, nullable=True, comment="Last ingestion error")
+    indexed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<Document(id={self.id}, filename={self.filename}, status={self.status})>"
+
+
+class IngestionJob(Base):
+    """Queued ingestion of an uploaded file, claimed by workers with FOR UPDATE SKIP LOCKED"""
+    
+    __tablename__ = "ingestion_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    document_id = Column(UUID(as_uuid=True), nullable=False, index=True, comment="Document being ingested")
+    filename = Column(String(512), nullable=False, comment="Original file name")
+    payload = Column(LargeBinary, nullable=True, comment="File contents (cleared once indexed)")
+    status = Column(String(16), nullable=False, comment="queued, running, completed or dead")
+    attempts = Column(Integer, nullable=False, server_default="0", comment="Claims so far")
+    max_attempts = Column(Integer, nullable=False, comment="Claims before the job is dead-lettered")
+    run_after = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, comment="Not claimed before (retry backoff)")
+    locked_by = Column(String(128), nullable=True, comment="Worker holding the lease")
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True, comment="Reclaimable by other workers after")
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<IngestionJob(id={self.id}, document_id={self.document_id}, status={self.status})>"
+
+
+class ChunkFingerprint(Base):
+    """Fingerprint of a stored chunk, shared by every document that contains it"""
+    
+    __tablename__ = "chunk_fingerprints"
+    
+    point_id = Column(UUID(as_uuid=True), primary_key=True, comment="Vector store point holding the chunk")
+    content_hash = Column(String(40), nullable=False, unique=True, comment="SHA-1 of the normalized chunk text")
+    simhash = Column(BigInteger, nullable=False, comment="64-bit SimHash (signed)")
+    band0 = Column(Integer, nullable=False, comment="SimHash bits 0-15")
+    band1 = Column(Integer, nullable=False, comment="SimHash bits 16-31")
+    band2 = Column(Integer, nullable=False, comment="SimHash bits 32-47")
+    band3 = Column(Integer, nullable=False, comment="SimHash bits 48-63")
+    document_ids = Column(JSONB, nullable=False, comment="Documents referencing the point")
+    ref_count = Column(Integer, nullable=False, default=1, comment="Number of referencing documents")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
     def __repr__(self):
-        return f"<Chat(id={self.id}, question={self.question[:50]}...)>"
\ No newline at end of file
+        return f"<ChunkFingerprint(point_id={self.point_id}, ref_count={self.ref_count})>"
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 import uuid
 
@@ -32,11 +32,29 @@ class SourceDocument(BaseModel):
     score: float = Field(..., description="Relevance score")
     document_id: Optional[str] = None
     chunk_index: Optional[int] = None
+    point_id: Optional[str] = Field(None, description="Vector store point of the chunk")
 
 
 class QueryRequest(BaseModel):
     """Query request schema"""
     question: str = Field(..., min_length=1, max_length=1000, description="Question to ask")
+    timeout_seconds: Optional[float] = Field(None, gt=0, description="Answer within this time (capped by the server timeout)")
+
+
+class QueryDiagnostics(BaseModel):
+    """Context assembly and timing details of a query"""
+    chunks_retrieved: int = 0
+    chunks_used: int = 0
+    chunks_merged: int = Field(0, description="Chunks merged into a neighbouring chunk's passage")
+    raw_context_tokens: int = Field(0, description="Tokens of all retrieved chunks joined as-is")
+    context_tokens: int = Field(0, description="Tokens of the context sent to the LLM")
+    tokens_saved: int = 0
+    compression_ratio: Optional[float] = Field(None, description="Share of retrieved text kept by sentence compression")
+    timings_ms: Dict[str, int] = {}
+    degradations: List[str] = Field([], description="Shortcuts taken to meet the deadline (skipped_compression, shrunk_context, no_answer, history_not_saved)")
+    faq_id: Optional[str] = Field(None, description="FAQ entry that answered the question without search or LLM")
+    faq_score: Optional[float] = Field(None, description="Similarity of the question to the FAQ entry (1.0 for a known wording)")
+    cache_score: Optional[float] = Field(None, description="Similarity to the earlier question whose cached answer was reused")
 
 
 class QueryResponse(BaseModel):
@@ -45,6 +63,24 @@ class QueryResponse(BaseModel):
     question: str
     answer: str
     sources: List[SourceDocument]
+    diagnostics: Optional[QueryDiagnostics] = None
+
+
+class BatchQueryRequest(BaseModel):
+    """Batch query request schema"""
+    questions: List[str] = Field(..., min_length=1, description="Questions to ask")
+    save_history: bool = Field(False, description="Store answers in chat history")
+
+
+class BatchQueryResult(BaseModel):
+    """Single answer of a batch query (one NDJSON line)"""
+    index: int = Field(..., description="Position of the question in the request")
+    question: str
+    success: bool
+    answer: Optional[str] = None
+    sources: List[SourceDocument] = []
+    diagnostics: Optional[QueryDiagnostics] = None
+    error: Optional[str] = None
 
 
 class UploadResponse(BaseModel):
@@ -53,6 +89,8 @@ class UploadResponse(BaseModel):
     message: str
     document_id: str
     chunks_count: int
+    duplicate: bool = False
+    job_id: Optional[str] = Field(None, description="Ingestion queue job (INGEST_JOB_QUEUE_ENABLED), chunks_count is 0 until it completes")
 
 
 class FileUploadResult(BaseModel):
@@ -62,6 +100,8 @@ class FileUploadResult(BaseModel):
     error: Optional[str] = None
     document_id: Optional[str] = None
     chunks_count: int = 0
+    duplicate: bool = False
+    job_id: Optional[str] = None
 
 
 class BatchUploadResponse(BaseModel):
@@ -72,4 +112,132 @@ class BatchUploadResponse(BaseModel):
     successful_uploads: int
     failed_uploads: int
     total_chunks: int
-    results: List[FileUploadResult]
\ No newline at end of file
+    results: List[FileUploadResult]
+
+
+class IngestionJobResponse(BaseModel):
+    """Ingestion checkpoint (registry entry) schema"""
+    document_id: str
+    filename: str
+    status: str
+    chunks_indexed: int
+    total_chunks: Optional[int] = None
+    batches_indexed: int
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class IngestionJobListResponse(BaseModel):
+    """Ingestion registry listing schema"""
+    total: int
+    jobs: List[IngestionJobResponse]
+
+
+class QueuedIngestionJobResponse(BaseModel):
+    """Ingestion queue job schema"""
+    id: str
+    document_id: str
+    filename: str
+    status: str = Field(..., description="queued, running, completed or dead")
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    locked_by: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class IngestionQueueResponse(BaseModel):
+    """Ingestion queue listing schema"""
+    counts: Dict[str, int] = Field(..., description="Jobs per status")
+    jobs: List[QueuedIngestionJobResponse]
+
+
+
+class DocumentResponse(BaseModel):
+    """Registered document schema"""
+    id: uuid.UUID
+    filename: str
+    content_hash: str
+    size_bytes: int
+    status: str
+    chunk_count: int
+    duplicate_chunk_count: int = 0
+    embedding_model: str
+    timings: Optional[dict] = None
+    error: Optional[str] = None
+    indexed_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class DocumentDetailResponse(DocumentResponse):
+    """Registered document schema with point IDs"""
+    point_ids: Optional[List[str]] = None
+
+
+class DocumentListResponse(BaseModel):
+    """Document registry listing schema"""
+    total: int
+    documents: List[DocumentResponse]
+
+
+class DedupStatsResponse(BaseModel):
+    """Chunk deduplication savings schema"""
+    stored_points: int  # Points holding fingerprinted chunks
+    document_references: int  # Document → point references across those points
+    total_chunks: int  # Chunks of all registered documents
+    duplicate_chunks: int  # Chunks attached to existing points (points and embeddings saved)
+    saved_ratio: float
+
+
+class ChatHistoryItem(BaseModel):
+    """Stored chat with its sources resolved"""
+    id: uuid.UUID
+    question: str
+    answer: str
+    answered: bool = True
+    latency_ms: Optional[int] = None
+    answer_source: str = "generated"
+    sources: List[SourceDocument] = []
+    created_at: datetime
+
+
+class ChatPageResponse(BaseModel):
+    """Page of chat history, newest first"""
+    chats: List[ChatHistoryItem]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to get the next page; absent on the last page")
+
+
+class HourlyQuestions(BaseModel):
+    hour: datetime
+    questions: int
+
+
+class DocumentCitations(BaseModel):
+    document_id: str
+    filename: Optional[str] = None
+    citations: int
+
+
+class ChatAnalyticsResponse(BaseModel):
+    """Usage of the chat over a time range, from the hourly summaries"""
+    since: datetime
+    until: datetime
+    refreshed_at: Optional[datetime] = Field(None, description="Last refresh of the summaries; later chats are not counted yet")
+    questions: int
+    answered: int
+    no_answer_rate: Optional[float] = None
+    latency_p50_ms: Optional[int] = Field(None, description="Upper bound of the histogram bucket holding the median")
+    latency_p95_ms: Optional[int] = Field(None, description="Upper bound of the histogram bucket holding the 95th percentile")
+    questions_per_hour: List[HourlyQuestions]
+    top_documents: List[DocumentCitations]
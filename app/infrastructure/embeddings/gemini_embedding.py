@@ -1,80 +1,73 @@
 import logging
+from functools import lru_cache
 from typing import List
-import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from app.core.config import settings
-import time
+from app.infrastructure.embeddings.rate_limiter import AdaptiveRateLimiter
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+# Errors worth retrying without lowering the learned rate
+TRANSIENT_ERRORS = (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+THROTTLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+)
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """Process-wide limiter, the quota belongs to the API key and not to a client instance"""
+    return AdaptiveRateLimiter(
+        initial_rate=settings.GEMINI_RATE_LIMIT_INITIAL_RPS,
+        max_rate=settings.GEMINI_RATE_LIMIT_MAX_RPS
+    )
+
 
 class GeminiEmbedding:
-    """Google Gemini embedding client with rate limiting"""
+    """Google Gemini embedding client with batched requests and adaptive rate limiting"""
     
     def __init__(self):
         try:
+            # The SDK is slow to import, only load it when Gemini is configured
+            import google.generativeai as genai
+            
             genai.configure(api_key=settings.GEMINI_API_KEY)
+            self.embed_content = genai.embed_content
             self.model_name = settings.GEMINI_EMBEDDING_MODEL
+            self.limiter = get_rate_limiter()
+            self.semaphore = asyncio.Semaphore(settings.GEMINI_EMBED_CONCURRENCY)
             logger.info(f"✅ Gemini configured with model: {self.model_name}")
             logger.info(f"✅ API Key: {settings.GEMINI_API_KEY[:20]}...")
         except Exception as e:
             logger.error(f"❌ Failed to configure Gemini: {str(e)}")
             raise
     
-    async def embed_text(self, text: str, retry_count: int = 3) -> List[float]:
+    async def embed_text(self, text: str) -> List[float]:
         """
-        Embed single text using Gemini with retry logic
+        Embed single text using Gemini
         
         Args:
             text: Text to embed
-            retry_count: Number of retries on failure
             
         Returns:
             List of floats representing the embedding
         """
-        for attempt in range(retry_count):
-            try:
-                logger.info(f"🔄 Generating embedding (attempt {attempt + 1}/{retry_count})...")
-                
-                result = genai.embed_content(
-                    model=self.model_name,
-                    content=text[:2000],  # Limit text length to 2000 chars
-                    task_type="retrieval_document"
-                )
-                
-                embedding = result['embedding']
-                logger.info(f"✅ Successfully generated embedding of dimension {len(embedding)}")
-                return embedding
-                
-            except Exception as e:
-                error_str = str(e).lower()
-                
-                # Check for quota/rate limit errors
-                if any(keyword in error_str for keyword in ['quota', 'limit', 'rate', 'exhausted', '429']):
-                    logger.error(f"⚠️ Rate limit hit on attempt {attempt + 1}")
-                    
-                    if attempt < retry_count - 1:
-                        wait_time = (2 ** attempt) * 5  # Exponential backoff: 5, 10, 20 seconds
-                        logger.info(f"⏳ Waiting {wait_time} seconds before retry...")
-                        await asyncio.sleep(wait_time)
-                        continue
-                    else:
-                        logger.error("❌ GEMINI API LIMIT REACHED after all retries!")
-                        raise Exception(
-                            "Gemini API limiti tugadi. Iltimos:\n"
-                            "1. Bir necha daqiqa kuting\n"
-                            "2. Yangi API key yarating: https://makersuite.google.com/app/apikey\n"
-                            "3. Yoki to'lov rejasiga o'ting: https://ai.google.dev/pricing"
-                        )
-                else:
-                    logger.error(f"❌ Gemini error: {str(e)}")
-                    raise Exception(f"Gemini embedding xatoligi: {str(e)}")
-        
-        raise Exception("Failed to generate embedding after all retries")
+        embeddings = await self._embed_batch([text], "1/1")
+        return embeddings[0]
     
     async def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """
-        Embed multiple texts with rate limiting
+        Embed multiple texts with batched requests
+        
+        Texts are sent GEMINI_EMBED_BATCH_SIZE per request, up to
+        GEMINI_EMBED_CONCURRENCY requests at a time, paced by the shared
+        adaptive rate limiter.
         
         Args:
             texts: List of texts to embed
@@ -83,38 +76,78 @@ class GeminiEmbedding:
             List of embeddings
         """
         try:
-            logger.info(f"🔄 Generating embeddings for {len(texts)} texts...")
-            embeddings = []
+            if not texts:
+                return []
             
-            # Process in small batches to avoid rate limits
-            batch_size = 5  # Process 5 at a time
+            logger.info(f"🔄 Generating embeddings for {len(texts)} texts...")
+            batch_size = settings.GEMINI_EMBED_BATCH_SIZE
+            total_batches = (len(texts) + batch_size - 1) // batch_size
             
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                batch_num = i // batch_size + 1
-                total_batches = (len(texts) + batch_size - 1) // batch_size
-                
-                logger.info(f"📦 Processing batch {batch_num}/{total_batches} ({len(batch)} texts)")
-                
-                for j, text in enumerate(batch):
-                    text_num = i + j + 1
-                    logger.info(f"Processing text {text_num}/{len(texts)}...")
-                    
-                    embedding = await self.embed_text(text)
-                    embeddings.append(embedding)
-                    
-                    # Delay between requests to avoid rate limits
-                    if text_num < len(texts):
-                        await asyncio.sleep(2)  # 2 second delay between each request
-                
-                # Longer delay between batches
-                if i + batch_size < len(texts):
-                    logger.info(f"⏳ Batch {batch_num} complete. Waiting 10 seconds before next batch...")
-                    await asyncio.sleep(10)
+            results = await asyncio.gather(*[
+                self._embed_batch(texts[i:i + batch_size], f"{i // batch_size + 1}/{total_batches}")
+                for i in range(0, len(texts), batch_size)
+            ])
             
+            embeddings = [embedding for batch in results for embedding in batch]
             logger.info(f"✅ Successfully generated {len(embeddings)} embeddings")
             return embeddings
             
         except Exception as e:
             logger.error(f"❌ Error in embed_texts: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    async def _embed_batch(self, batch: List[str], label: str) -> List[List[float]]:
+        """
+        Send one batch embedding request with adaptive retries
+        
+        Args:
+            batch: Texts of a single request
+            label: Batch label for logging
+            
+        Returns:
+            Embeddings in input order
+        """
+        retry_count = settings.GEMINI_EMBED_MAX_RETRIES
+        contents = [text[:2000] for text in batch]  # Limit text length to 2000 chars
+        
+        async with self.semaphore:
+            for attempt in range(retry_count):
+                await self.limiter.acquire()
+                try:
+                    # The SDK call is blocking, keep it off the event loop
+                    result = await asyncio.to_thread(
+                        self.embed_content,
+                        model=self.model_name,
+                        content=contents,
+                        task_type="retrieval_document"
+                    )
+                    self.limiter.on_success()
+                    
+                    embeddings = result['embedding']
+                    logger.info(f"✅ Batch {label} completed ({len(embeddings)} texts)")
+                    return embeddings
+                    
+                except THROTTLE_ERRORS as e:
+                    logger.error(f"⚠️ Rate limit hit on batch {label}, attempt {attempt + 1}/{retry_count}")
+                    self.limiter.on_throttle()
+                    if attempt == retry_count - 1:
+                        logger.error("❌ GEMINI API LIMIT REACHED after all retries!")
+                        raise Exception(
+                            "Gemini API limiti tugadi. Iltimos:\n"
+                            "1. Bir necha daqiqa kuting\n"
+                            "2. Yangi API key yarating: https://makersuite.google.com/app/apikey\n"
+                            "3. Yoki to'lov rejasiga o'ting: https://ai.google.dev/pricing"
+                        ) from e
+                    
+                except TRANSIENT_ERRORS as e:
+                    if attempt == retry_count - 1:
+                        raise Exception(f"Gemini embedding xatoligi: {str(e)}") from e
+                    wait_time = self.limiter.on_error()
+                    logger.warning(f"⏳ Transient error on batch {label} ({str(e)}), retrying in {wait_time:.1f}s")
+                    await asyncio.sleep(wait_time)
+                    
+                except Exception as e:
+                    logger.error(f"❌ Gemini error: {str(e)}")
+                    raise Exception(f"Gemini embedding xatoligi: {str(e)}") from e
+        
+        raise Exception("Failed to generate embedding after all retries")
@@ -1,18 +1,33 @@
+import asyncio
 import logging
-from typing import List
-from openai import OpenAI
+from functools import lru_cache
+from typing import List, Tuple
+from openai import AsyncOpenAI, BadRequestError
 from app.core.config import settings
+from app.infrastructure.embeddings.tokenizer import Tokenizer
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def get_embedding_client() -> "OpenAIEmbedding":
+    """Process-wide client: one connection pool, and OPENAI_EMBEDDING_CONCURRENCY applies to all callers"""
+    return OpenAIEmbedding()
+
+
 class OpenAIEmbedding:
-    """OpenAI embedding client"""
+    """OpenAI embedding client with token-aware concurrent batching"""
     
     def __init__(self):
         try:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+            # Rate limits, 5xx and connection errors are retried with backoff by the client
+            self.client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                max_retries=settings.OPENAI_EMBEDDING_MAX_RETRIES
+            )
             self.model_name = settings.OPENAI_EMBEDDING_MODEL
+            self.tokenizer = Tokenizer(self.model_name)
+            self.semaphore = asyncio.Semaphore(settings.OPENAI_EMBEDDING_CONCURRENCY)
             logger.info(f"✅ OpenAI configured with model: {self.model_name}")
             logger.info(f"✅ API Key: {settings.OPENAI_API_KEY[:20]}...")
         except Exception as e:
@@ -32,10 +47,9 @@ class OpenAIEmbedding:
         try:
             logger.info(f"🔄 Generating embedding for text (length: {len(text)})...")
             
-            # OpenAI embedding
-            response = self.client.embeddings.create(
+            response = await self.client.embeddings.create(
                 model=self.model_name,
-                input=text[:8000],  # OpenAI limit: 8191 tokens (~8000 chars)
+                input=self.tokenizer.truncate(text, settings.OPENAI_EMBEDDING_MAX_INPUT_TOKENS),
                 encoding_format="float"
             )
             
@@ -44,27 +58,16 @@ class OpenAIEmbedding:
             return embedding
             
         except Exception as e:
-            logger.error(f"❌ OPENAI EMBEDDING ERROR:")
-            logger.error(f"Error type: {type(e).__name__}")
-            logger.error(f"Error message: {str(e)}")
-            
-            # Check for rate limit or quota errors
-            error_str = str(e).lower()
-            if any(keyword in error_str for keyword in ['rate_limit', 'quota', 'insufficient', '429']):
-                logger.error("⚠️ OPENAI API LIMIT/QUOTA ERROR!")
-                raise Exception(
-                    "OpenAI API limiti yoki quota tugadi. Iltimos:\n"
-                    "1. https://platform.openai.com/usage da balansni tekshiring\n"
-                    "2. Credit qo'shing: https://platform.openai.com/account/billing\n"
-                    "3. Bir necha daqiqa kuting va qayta urinib ko'ring"
-                )
-            
-            raise Exception(f"OpenAI embedding xatoligi: {str(e)}")
+            raise self._translate_error(e)
     
     async def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """
         Embed multiple texts using OpenAI (batch processing)
         
+        Inputs are truncated to the model token limit and packed into requests
+        by token count. Requests run concurrently up to
+        OPENAI_EMBEDDING_CONCURRENCY and results keep the input order.
+        
         Args:
             texts: List of texts to embed
             
@@ -72,39 +75,112 @@ class OpenAIEmbedding:
             List of embeddings
         """
         try:
+            if not texts:
+                return []
+            
             logger.info(f"🔄 Generating embeddings for {len(texts)} texts...")
             
-            # OpenAI supports batch processing (up to 2048 inputs)
-            # We'll process in batches of 100 for safety
-            all_embeddings = []
-            batch_size = 100
+            prepared, token_counts = self._prepare(texts)
+            batches = self._pack(token_counts)
             
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                batch_num = i // batch_size + 1
-                total_batches = (len(texts) + batch_size - 1) // batch_size
-                
-                logger.info(f"📦 Processing batch {batch_num}/{total_batches} ({len(batch)} texts)")
-                
-                # Truncate texts to fit OpenAI limits
-                truncated_batch = [text[:8000] for text in batch]
-                
-                # Batch embedding request
-                response = self.client.embeddings.create(
-                    model=self.model_name,
-                    input=truncated_batch,
-                    encoding_format="float"
-                )
-                
-                # Extract embeddings
-                batch_embeddings = [item.embedding for item in response.data]
-                all_embeddings.extend(batch_embeddings)
-                
-                logger.info(f"✅ Batch {batch_num} completed")
+            logger.info(f"📦 Packed {len(texts)} texts ({sum(token_counts)} tokens) into {len(batches)} requests")
+            
+            results = await asyncio.gather(*[
+                self._embed_batch(prepared[start:end], f"{num}/{len(batches)}")
+                for num, (start, end) in enumerate(batches, start=1)
+            ])
             
+            all_embeddings = [embedding for batch in results for embedding in batch]
             logger.info(f"✅ Successfully generated {len(all_embeddings)} embeddings")
             return all_embeddings
             
         except Exception as e:
             logger.error(f"❌ Error in embed_texts: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def _prepare(self, texts: List[str]) -> Tuple[List[str], List[int]]:
+        """Truncate texts to the per-input token limit and count their tokens"""
+        max_tokens = settings.OPENAI_EMBEDDING_MAX_INPUT_TOKENS
+        encoding = self.tokenizer.encoding
+        
+        prepared = []
+        token_counts = []
+        for text, tokens in zip(texts, encoding.encode_ordinary_batch(texts)):
+            if len(tokens) > max_tokens:
+                text = encoding.decode(tokens[:max_tokens])
+                tokens = tokens[:max_tokens]
+            prepared.append(text)
+            token_counts.append(max(len(tokens), 1))
+        return prepared, token_counts
+    
+    @staticmethod
+    def _pack(token_counts: List[int]) -> List[Tuple[int, int]]:
+        """Group consecutive inputs into (start, end) ranges under the request limits"""
+        max_tokens = settings.OPENAI_EMBEDDING_MAX_BATCH_TOKENS
+        max_items = settings.OPENAI_EMBEDDING_MAX_BATCH_SIZE
+        
+        batches = []
+        start = 0
+        batch_tokens = 0
+        for i, tokens in enumerate(token_counts):
+            if i > start and (batch_tokens + tokens > max_tokens or i - start >= max_items):
+                batches.append((start, i))
+                start = i
+                batch_tokens = 0
+            batch_tokens += tokens
+        batches.append((start, len(token_counts)))
+        return batches
+    
+    async def _embed_batch(self, batch: List[str], label: str) -> List[List[float]]:
+        """
+        Embed one request worth of inputs
+        
+        A rejected request is split in half and each half retried, so one bad
+        input only fails itself instead of the whole document.
+        """
+        try:
+            async with self.semaphore:
+                response = await self.client.embeddings.create(
+                    model=self.model_name,
+                    input=batch,
+                    encoding_format="float"
+                )
+            
+            logger.info(f"✅ Batch {label} completed ({len(batch)} texts)")
+            # The API may return items out of order, sort by input index
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        
+        except BadRequestError as e:
+            if len(batch) == 1:
+                raise self._translate_error(e)
+            
+            middle = len(batch) // 2
+            logger.warning(f"⚠️ Batch {label} rejected ({str(e)}), splitting into {middle} + {len(batch) - middle}")
+            left, right = await asyncio.gather(
+                self._embed_batch(batch[:middle], f"{label}a"),
+                self._embed_batch(batch[middle:], f"{label}b")
+            )
+            return left + right
+        
+        except Exception as e:
+            raise self._translate_error(e)
+    
+    @staticmethod
+    def _translate_error(e: Exception) -> Exception:
+        """Log provider error and convert it to a user-facing exception"""
+        logger.error(f"❌ OPENAI EMBEDDING ERROR:")
+        logger.error(f"Error type: {type(e).__name__}")
+        logger.error(f"Error message: {str(e)}")
+        
+        # Check for rate limit or quota errors
+        error_str = str(e).lower()
+        if any(keyword in error_str for keyword in ['rate_limit', 'quota', 'insufficient', '429']):
+            logger.error("⚠️ OPENAI API LIMIT/QUOTA ERROR!")
+            return Exception(
+                "OpenAI API limiti yoki quota tugadi. Iltimos:\n"
+                "1. https://platform.openai.com/usage da balansni tekshiring\n"
+                "2. Credit qo'shing: https://platform.openai.com/account/billing\n"
+                "3. Bir necha daqiqa kuting va qayta urinib ko'ring"
+            )
+        
+        return Exception(f"OpenAI embedding xatoligi: {str(e)}")
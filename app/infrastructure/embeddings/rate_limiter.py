@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateLimiter:
+    """
+    Request pacer that learns the allowed rate (AIMD)
+
+    Requests are spaced 1/rate seconds apart. Every success raises the rate
+    additively (about +increase requests/s per second of traffic), every
+    throttling response halves it and blocks all callers for a jittered
+    exponential backoff, so throughput converges on the real quota.
+    """
+
+    def __init__(
+        self,
+        initial_rate: float,
+        max_rate: float,
+        min_rate: float = 0.1,
+        increase: float = 0.5,
+        decrease_factor: float = 0.5,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 60.0
+    ):
+        self.rate = initial_rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+        self._consecutive_throttles = 0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait for the next request slot"""
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._blocked_until)
+            self._next_slot = slot + 1.0 / self.rate
+
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self) -> None:
+        """Additive increase after a successful request"""
+        self._consecutive_throttles = 0
+        self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> float:
+        """
+        Multiplicative decrease after a 429 response
+
+        Args:
+            retry_after: Server-provided delay in seconds, if any
+
+        Returns:
+            Backoff in seconds applied to all callers
+        """
+        self._consecutive_throttles += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+
+        # Jitter keeps concurrent callers from retrying in lockstep
+        ceiling = min(self.backoff_cap, self.backoff_base * 2 ** self._consecutive_throttles)
+        backoff = random.uniform(ceiling / 2, ceiling)
+        if retry_after:
+            backoff = max(backoff, retry_after)
+
+        self._blocked_until = max(self._blocked_until, time.monotonic() + backoff)
+        logger.warning(f"⚠️ Rate limited, rate lowered to {self.rate:.2f} req/s, backing off {backoff:.1f}s")
+        return backoff
+
+    def on_error(self) -> float:
+        """
+        Jittered backoff for transient (non-throttling) errors
+
+        Returns:
+            Seconds the caller should wait before retrying
+        """
+        ceiling = min(self.backoff_cap, self.backoff_base * 2 ** (self._consecutive_throttles + 1))
+        return random.uniform(0, ceiling)
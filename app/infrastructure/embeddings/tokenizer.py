@@ -0,0 +1,64 @@
+import logging
+from functools import lru_cache
+from typing import List, Optional
+import tiktoken
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str) -> tiktoken.Encoding:
+    """Get (cached) tiktoken encoding for a model"""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        # Logged once per model (cached): token counts, chunk sizes and budgets are approximate
+        logger.warning(
+            f"No tiktoken tokenizer registered for model {model_name!r}, falling back to "
+            f"{FALLBACK_ENCODING}; token counts for this model are approximate"
+        )
+        return tiktoken.get_encoding(FALLBACK_ENCODING)
+
+
+def is_fallback(model_name: str) -> bool:
+    """True when the model has no registered tokenizer and is counted with FALLBACK_ENCODING"""
+    try:
+        tiktoken.encoding_name_for_model(model_name)
+        return False
+    except KeyError:
+        return True
+
+
+class Tokenizer:
+    """Token counter for the configured embedding model"""
+
+    def __init__(self, model_name: Optional[str] = None):
+        self.model_name = model_name or settings.OPENAI_EMBEDDING_MODEL
+        self.encoding = get_encoding(self.model_name)
+
+    def count(self, text: str) -> int:
+        """Count tokens in text"""
+        return len(self.encoding.encode_ordinary(text))
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        """Count tokens for multiple texts"""
+        return [len(tokens) for tokens in self.encoding.encode_ordinary_batch(texts)]
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Truncate text to at most max_tokens tokens
+
+        Args:
+            text: Text to truncate
+            max_tokens: Token limit
+
+        Returns:
+            Text unchanged if it fits, otherwise its first max_tokens tokens
+        """
+        tokens = self.encoding.encode_ordinary(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoding.decode(tokens[:max_tokens])
@@ -1,7 +1,6 @@
+import asyncio
 import logging
-import google.generativeai as genai
 from app.core.config import settings
-import time
 
 logger = logging.getLogger(__name__)
 
@@ -11,8 +10,12 @@ class GeminiLLM:
     
     def __init__(self):
         try:
+            # The SDK is slow to import, only load it when Gemini is configured
+            import google.generativeai as genai
+            
             genai.configure(api_key=settings.GEMINI_API_KEY)
             self.model = genai.GenerativeModel(settings.GEMINI_LLM_MODEL)
+            self.get_model = genai.get_model
             self.generation_config = {
                 "temperature": settings.LLM_TEMPERATURE,
                 "max_output_tokens": settings.LLM_MAX_TOKENS,
@@ -37,7 +40,7 @@ class GeminiLLM:
             logger.info(f"Generating answer with Gemini...")
             prompt = self._create_prompt(question, context)
             
-            response = self.model.generate_content(
+            response = await self.model.generate_content_async(
                 prompt,
                 generation_config=self.generation_config
             )
@@ -61,6 +64,14 @@ class GeminiLLM:
             
             raise Exception(f"Gemini LLM xatoligi: {str(e)}")
     
+    async def ping(self) -> None:
+        """Check the API is reachable and the key valid (model lookup, no tokens used)"""
+        name = settings.GEMINI_LLM_MODEL
+        if not name.startswith("models/"):
+            name = f"models/{name}"
+        # The SDK call is blocking, keep it off the event loop
+        await asyncio.to_thread(self.get_model, name)
+    
     def _create_prompt(self, question: str, context: str) -> str:
         """
         Create prompt for LLM
@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Latency samples needed before the percentile replaces the initial hedge delay
+MIN_LATENCY_SAMPLES = 20
+
+
+class LLMProvidersFailed(Exception):
+    """Every provider tried for a request failed"""
+
+    def __init__(self, errors: List[Tuple[str, Exception]]):
+        self.errors = errors
+        super().__init__("; ".join(f"{name}: {error}" for name, error in errors))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    After failure_threshold failures in a row the circuit opens and the
+    provider is skipped for cooldown seconds. Then a single trial request is
+    let through (half-open): success closes the circuit, failure reopens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (claims the trial slot when half-open)"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def on_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def on_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_running:
+                logger.warning(f"⚠️ Circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+
+    def on_cancel(self) -> None:
+        """A cancelled trial says nothing about the provider, free the slot"""
+        self._trial_running = False
+
+
+class _Provider:
+    """LLM client with its breaker, latency window and counters"""
+
+    def __init__(self, name: str, client):
+        self.name = name
+        self.client = client
+        self.breaker = CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_COOLDOWN_SECONDS)
+        self.latencies: deque = deque(maxlen=settings.LLM_LATENCY_WINDOW)
+        self.requests = 0
+        self.failures = 0
+        self.wins = 0
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        return float(np.percentile(self.latencies, q))
+
+
+class LLMRouter:
+    """
+    Hedged LLM requests with cross-provider fallback
+
+    The request goes to the first provider whose circuit is closed. With
+    LLM_HEDGE_ENABLED, if no answer arrived after the LLM_HEDGE_PERCENTILE
+    latency of that provider, a second request is sent to the alternate
+    provider if its circuit is closed (to the same provider only with
+    LLM_HEDGE_TARGET=same); whichever answers first wins and the other
+    request is cancelled. A failed request is retried on the other provider
+    at once. Hedging adds roughly (100 - percentile)% paid requests in
+    exchange for cutting the latency tail.
+    """
+
+    def __init__(self, providers: Dict[str, object]):
+        if not providers:
+            raise ValueError("At least one LLM provider is required")
+        self.providers: List[_Provider] = [_Provider(name, client) for name, client in providers.items()]
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+
+    async def generate_answer(self, question: str, context: str) -> str:
+        """
+        Generate answer, hedging slow requests and falling back on failures
+
+        Args:
+            question: User question
+            context: Context from retrieved documents
+
+        Returns:
+            Generated answer of the first provider to succeed
+        
+        Raises:
+            LLMProvidersFailed: If every provider tried failed
+        """
+        primary = self._pick()
+        tasks: Dict[asyncio.Task, tuple] = {}
+        tasks[self._start(primary, question, context)] = (primary, False)
+        backup_started = False
+        errors = []
+
+        try:
+            while tasks:
+                timeout = None
+                if not backup_started and settings.LLM_HEDGE_ENABLED:
+                    timeout = self._hedge_delay(primary)
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Primary is slow: hedge
+                    backup = self._pick_backup(primary, hedge=True)
+                    backup_started = True
+                    if backup is not None:
+                        self.hedges += 1
+                        logger.info(f"⏱️ No answer from {primary.name} after {timeout:.2f}s, hedging to {backup.name}")
+                        tasks[self._start(backup, question, context)] = (backup, True)
+                    continue
+
+                for task in done:
+                    provider, is_hedge = tasks.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        provider.wins += 1
+                        if is_hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    errors.append((provider.name, error))
+
+                if not tasks and not backup_started:
+                    # Primary failed before the hedge delay: fall back at once
+                    backup_started = True
+                    backup = self._pick_backup(primary, hedge=False)
+                    if backup is not None:
+                        self.fallbacks += 1
+                        logger.warning(f"⚠️ {primary.name} failed, falling back to {backup.name}")
+                        tasks[self._start(backup, question, context)] = (backup, False)
+
+            raise LLMProvidersFailed(errors) from errors[-1][1]
+        finally:
+            # The loser (or everything, if the caller was cancelled) stops here
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict:
+        """Per-provider counters, latency percentiles and hedge win rate"""
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_win_rate": round(self.hedge_wins / self.hedges, 4) if self.hedges else None,
+            "fallbacks": self.fallbacks,
+            "providers": {
+                provider.name: {
+                    "circuit": provider.breaker.state,
+                    "requests": provider.requests,
+                    "failures": provider.failures,
+                    "wins": provider.wins,
+                    "p50_ms": self._ms(provider.percentile(50)),
+                    "p95_ms": self._ms(provider.percentile(95)),
+                    "p99_ms": self._ms(provider.percentile(99)),
+                    "hedge_delay_ms": self._ms(self._hedge_delay(provider))
+                }
+                for provider in self.providers
+            }
+        }
+
+    def _start(self, provider: _Provider, question: str, context: str) -> asyncio.Task:
+        provider.requests += 1
+        return asyncio.create_task(self._call(provider, question, context))
+
+    async def _call(self, provider: _Provider, question: str, context: str) -> str:
+        started = time.perf_counter()
+        try:
+            answer = await provider.client.generate_answer(question, context)
+        except asyncio.CancelledError:
+            # A hedge loser took at least this long; leaving it out would bias the percentile down
+            provider.latencies.append(time.perf_counter() - started)
+            provider.breaker.on_cancel()
+            raise
+        except Exception:
+            provider.failures += 1
+            provider.breaker.on_failure()
+            raise
+        provider.latencies.append(time.perf_counter() - started)
+        provider.breaker.on_success()
+        return answer
+
+    def _pick(self) -> _Provider:
+        """First provider whose circuit lets a request through (the primary when all are open)"""
+        for provider in self.providers:
+            if provider.breaker.allow():
+                return provider
+        logger.warning("⚠️ All LLM circuits are open, trying the primary provider")
+        return self.providers[0]
+
+    def _pick_backup(self, primary: _Provider, hedge: bool) -> Optional[_Provider]:
+        """Alternate provider with a closed circuit, or the primary itself for same-provider hedges"""
+        if hedge and settings.LLM_HEDGE_TARGET == "same":
+            return primary
+        # A single provider is neither hedged (duplicate paid request) nor retried at once
+        for provider in self.providers:
+            if provider is not primary and provider.breaker.allow():
+                return provider
+        return None
+
+    def _hedge_delay(self, provider: _Provider) -> float:
+        delay = provider.percentile(settings.LLM_HEDGE_PERCENTILE)
+        if delay is None:
+            delay = settings.LLM_HEDGE_INITIAL_DELAY_MS / 1000
+        return max(delay, settings.LLM_HEDGE_MIN_DELAY_MS / 1000)
+
+    @staticmethod
+    def _ms(seconds: Optional[float]) -> Optional[int]:
+        return int(seconds * 1000) if seconds is not None else None
+
+
+@lru_cache(maxsize=None)
+def get_llm_router() -> LLMRouter:
+    """Process-wide router, latency history and circuit state must outlive a request"""
+    from app.infrastructure.llm.openai_llm import OpenAILLM
+
+    providers = {"openai": OpenAILLM()}
+    if settings.GEMINI_API_KEY:
+        from app.infrastructure.llm.gemini_llm import GeminiLLM
+        providers["gemini"] = GeminiLLM()
+
+    primary = settings.LLM_PRIMARY_PROVIDER
+    if primary not in providers:
+        raise ValueError(f"LLM_PRIMARY_PROVIDER '{primary}' is not configured")
+    ordered = {primary: providers.pop(primary), **providers}
+    logger.info(f"✅ LLM router: {list(ordered)} (hedging {'on' if settings.LLM_HEDGE_ENABLED else 'off'})")
+    return LLMRouter(ordered)
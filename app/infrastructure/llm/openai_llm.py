@@ -1,5 +1,5 @@
 import logging
-from openai import OpenAI
+from openai import AsyncOpenAI
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -10,7 +10,7 @@ class OpenAILLM:
     
     def __init__(self):
         try:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+            self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
             self.model_name = settings.OPENAI_LLM_MODEL
             logger.info(f"✅ OpenAI LLM configured: {self.model_name}")
         except Exception as e:
@@ -47,7 +47,7 @@ Javob:"""
                 }
             ]
             
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model_name,
                 messages=messages,
                 temperature=settings.LLM_TEMPERATURE,
@@ -73,4 +73,8 @@ Javob:"""
                     "2. Bir necha daqiqa kuting"
                 )
             
-            raise Exception(f"OpenAI LLM xatoligi: {str(e)}")
\ No newline at end of file
+            raise Exception(f"OpenAI LLM xatoligi: {str(e)}")
+    
+    async def ping(self) -> None:
+        """Check the API is reachable and the key valid (model lookup, no tokens used)"""
+        await self.client.models.retrieve(self.model_name)
\ No newline at end of file
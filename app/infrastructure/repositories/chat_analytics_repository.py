@@ -0,0 +1,133 @@
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Serializes refreshes of several API instances (pg_try_advisory_xact_lock key)
+REFRESH_LOCK_ID = 4_046_001
+
+# Upper bounds of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [100, 250, 500, 1000, 1500, 2000, 3000, 5000, 8000, 13000, 20000, 30000, 60000]
+
+# Hours recomputed behind the newest summarized hour: chats of a still
+# open transaction may commit with a created_at in an hour already summarized
+REFRESH_OVERLAP_HOURS = 1
+
+
+def _percentile(counts: Dict[int, int], q: float) -> Optional[int]:
+    """Upper bound of the histogram bucket holding the q-th percentile"""
+    total = sum(counts.values())
+    if not total:
+        return None
+    rank = total * q / 100
+    seen = 0
+    for bucket in sorted(counts):
+        seen += counts[bucket]
+        if seen >= rank:
+            # width_bucket: 0 is below the first bound, len(bounds) is above the last
+            return LATENCY_BUCKETS_MS[min(bucket, len(LATENCY_BUCKETS_MS) - 1)]
+    return LATENCY_BUCKETS_MS[-1]
+
+
+class ChatAnalyticsRepository:
+    """
+    Hourly chat summaries for the analytics API (PostgreSQL only)
+
+    refresh() recomputes only the hours from the newest summarized hour on,
+    so each run reads the chats of the last hour or two through the
+    (created_at, id) index. Reads aggregate the small summary tables.
+    """
+
+    def try_lock(self, db: Session) -> bool:
+        """Take the refresh lock until the end of the transaction (False if another refresh holds it)"""
+        return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": REFRESH_LOCK_ID}).scalar())
+
+    def refresh(self, db: Session) -> Optional[datetime]:
+        """
+        Recompute the summaries of the hours since the last refresh
+
+        Returns:
+            Start of the first hour recomputed (None on the first, full, refresh)
+        """
+        try:
+            since = db.execute(text(
+                f"SELECT max(hour) - interval '{REFRESH_OVERLAP_HOURS} hour' FROM chat_hourly_stats"
+            )).scalar()
+            params = {"since": since, "bounds": LATENCY_BUCKETS_MS}
+            window = "(CAST(:since AS timestamptz) IS NULL OR created_at >= CAST(:since AS timestamptz))"
+            hour = "date_trunc('hour', created_at, 'UTC')"
+
+            for table in ("chat_hourly_stats", "chat_latency_hourly", "chat_document_hourly"):
+                db.execute(text(f"DELETE FROM {table} WHERE CAST(:since AS timestamptz) IS NULL OR hour >= CAST(:since AS timestamptz)"), params)
+
+            db.execute(text(
+                f"INSERT INTO chat_hourly_stats (hour, chat_count, answered_count, updated_at) "
+                f"SELECT {hour}, count(*), count(*) FILTER (WHERE answered), now() "
+                f"FROM chat WHERE {window} GROUP BY 1"
+            ), params)
+            db.execute(text(
+                f"INSERT INTO chat_latency_hourly (hour, bucket, chat_count) "
+                f"SELECT {hour}, width_bucket(latency_ms, CAST(:bounds AS integer[])), count(*) "
+                f"FROM chat WHERE {window} AND latency_ms IS NOT NULL GROUP BY 1, 2"
+            ), params)
+            db.execute(text(
+                f"INSERT INTO chat_document_hourly (hour, document_id, citations) "
+                f"SELECT {hour}, source->>'document_id', count(*) "
+                f"FROM chat, jsonb_array_elements(coalesce(sources, '[]'::jsonb)) AS source "
+                f"WHERE {window} AND source->>'document_id' IS NOT NULL GROUP BY 1, 2"
+            ), params)
+            return since
+        except Exception as e:
+            logger.error(f"Error refreshing chat analytics: {str(e)}")
+            raise
+
+    def summary(self, db: Session, since: datetime, until: datetime, top_documents: int) -> Dict:
+        """
+        Aggregate the hourly summaries of [since, until)
+
+        Returns:
+            Totals, no-answer rate, latency percentiles, questions per hour
+            and the most cited documents
+        """
+        try:
+            params = {"since": since, "until": until, "limit": top_documents}
+            hours = db.execute(text(
+                "SELECT hour, chat_count, answered_count FROM chat_hourly_stats "
+                "WHERE hour >= :since AND hour < :until ORDER BY hour"
+            ), params).all()
+            buckets = dict(db.execute(text(
+                "SELECT bucket, sum(chat_count) FROM chat_latency_hourly "
+                "WHERE hour >= :since AND hour < :until GROUP BY bucket"
+            ), params).all())
+            documents = db.execute(text(
+                "SELECT stats.document_id, documents.filename, sum(stats.citations) AS citations "
+                "FROM chat_document_hourly stats "
+                "LEFT JOIN documents ON CAST(documents.id AS text) = stats.document_id "
+                "WHERE stats.hour >= :since AND stats.hour < :until "
+                "GROUP BY stats.document_id, documents.filename "
+                "ORDER BY citations DESC LIMIT :limit"
+            ), params).all()
+            refreshed_at = db.execute(text("SELECT max(updated_at) FROM chat_hourly_stats")).scalar()
+
+            questions = sum(row.chat_count for row in hours)
+            answered = sum(row.answered_count for row in hours)
+            buckets = {int(bucket): int(count) for bucket, count in buckets.items()}
+            return {
+                "refreshed_at": refreshed_at,
+                "questions": questions,
+                "answered": answered,
+                "no_answer_rate": round(1 - answered / questions, 4) if questions else None,
+                "latency_p50_ms": _percentile(buckets, 50),
+                "latency_p95_ms": _percentile(buckets, 95),
+                "questions_per_hour": [{"hour": row.hour, "questions": row.chat_count} for row in hours],
+                "top_documents": [
+                    {"document_id": row.document_id, "filename": row.filename, "citations": int(row.citations)}
+                    for row in documents
+                ]
+            }
+        except Exception as e:
+            logger.error(f"Error reading chat analytics: {str(e)}")
+            raise
@@ -0,0 +1,223 @@
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Serializes maintenance runs of several API instances (pg_try_advisory_xact_lock key)
+MAINTENANCE_LOCK_ID = 4_044_001
+
+BOUND_PATTERN = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+# Catches rows of months without a partition (created by migration 004)
+DEFAULT_PARTITION = "chat_default"
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    years, index = divmod(month.month - 1 + months, 12)
+    return month.replace(year=month.year + years, month=index + 1, day=1)
+
+
+def partition_name(month: date) -> str:
+    return f"chat_p{month:%Y_%m}"
+
+
+def month_bounds(month: date) -> Tuple[datetime, datetime]:
+    """UTC range [first day of month, first day of next month)"""
+    end = add_months(month, 1)
+    return (
+        datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+        datetime(end.year, end.month, 1, tzinfo=timezone.utc)
+    )
+
+
+def _parse_bound(bound: str) -> Optional[datetime]:
+    """Partition bound literal to datetime (None for MINVALUE/MAXVALUE)"""
+    bound = bound.strip().strip("'")
+    if bound.upper() in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(bound).astimezone(timezone.utc)
+
+
+class ChatPartition:
+    """Partition of the chat table with its range (None = unbounded)"""
+
+    def __init__(self, name: str, lower: Optional[datetime], upper: Optional[datetime]):
+        self.name = name
+        self.lower = lower
+        self.upper = upper
+
+    def overlaps(self, lower: datetime, upper: datetime) -> bool:
+        return (self.lower is None or self.lower < upper) and (self.upper is None or self.upper > lower)
+
+    def __repr__(self):
+        return f"<ChatPartition(name={self.name}, lower={self.lower}, upper={self.upper})>"
+
+
+class ChatPartitionRepository:
+    """
+    Maintenance of the monthly chat partitions (PostgreSQL only)
+
+    Partitions are created ahead of time so inserts rarely fall into the
+    DEFAULT partition (rows that did are moved into the month's partition
+    when it is created), rows are rolled up into chat_daily_stats per complete UTC day,
+    and partitions whose whole range is past the retention window are
+    dropped or detached (kept as standalone archive tables). Dropping a
+    partition is a metadata change, unlike DELETE it neither scans nor
+    bloats the table.
+    """
+
+    def try_lock(self, db: Session) -> bool:
+        """Take the maintenance lock until the end of the transaction (False if another run holds it)"""
+        return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_ID}).scalar())
+
+    def list_partitions(self, db: Session) -> List[ChatPartition]:
+        """Partitions of the chat table, oldest first"""
+        try:
+            rows = db.execute(text(
+                "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+                "FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = 'chat'"
+            )).all()
+            partitions = []
+            for name, bound in rows:
+                match = BOUND_PATTERN.search(bound or "")
+                if match is None:
+                    # DEFAULT partition, holds no range of its own
+                    continue
+                partitions.append(ChatPartition(name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+            epoch = datetime.min.replace(tzinfo=timezone.utc)
+            return sorted(partitions, key=lambda partition: partition.lower or epoch)
+        except Exception as e:
+            logger.error(f"Error listing chat partitions: {str(e)}")
+            raise
+
+    def ensure_partitions(self, db: Session, today: date, months_ahead: int) -> List[str]:
+        """
+        Create the partitions of the current month and months_ahead months after it
+
+        Rows of a month that reached the DEFAULT partition first are moved
+        into the new partition before it is attached (attaching checks that
+        the DEFAULT partition holds no rows of the range).
+
+        Returns:
+            Names of the partitions created
+        """
+        try:
+            existing = self.list_partitions(db)
+            has_default = db.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is not None
+            created = []
+            for offset in range(months_ahead + 1):
+                start = add_months(month_start(today), offset)
+                lower, upper = month_bounds(start)
+                # Months still inside the legacy partition are covered already
+                if any(partition.overlaps(lower, upper) for partition in existing):
+                    continue
+                name = partition_name(start)
+                bounds = f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+                if has_default:
+                    db.execute(text(f"CREATE TABLE {name} (LIKE chat INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+                    moved = db.execute(
+                        text(
+                            f"WITH moved AS ("
+                            f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :lower AND created_at < :upper "
+                            f"RETURNING *"
+                            f") INSERT INTO {name} SELECT * FROM moved"
+                        ),
+                        {"lower": lower, "upper": upper}
+                    ).rowcount
+                    if moved:
+                        logger.warning(f"Moved {moved} chats from {DEFAULT_PARTITION} into {name}")
+                    db.execute(text(f"ALTER TABLE chat ATTACH PARTITION {name} {bounds}"))
+                else:
+                    db.execute(text(f"CREATE TABLE {name} PARTITION OF chat {bounds}"))
+                created.append(name)
+            if created:
+                logger.info(f"Created chat partitions: {', '.join(created)}")
+            return created
+        except Exception as e:
+            logger.error(f"Error creating chat partitions: {str(e)}")
+            raise
+
+    def rollup_daily_stats(self, db: Session, until: date) -> Tuple[int, Optional[date]]:
+        """
+        Roll up chats of complete days before until that are not rolled up yet
+
+        Days are upserted, so a run repeated after a crash overwrites
+        instead of double counting.
+
+        Returns:
+            (days written, first day written)
+        """
+        try:
+            last_day = db.execute(text("SELECT max(day) FROM chat_daily_stats")).scalar()
+            since = datetime.combine(last_day, datetime.min.time(), timezone.utc) if last_day else None
+            result = db.execute(
+                text(
+                    "INSERT INTO chat_daily_stats "
+                    "(day, chat_count, no_source_count, source_count, question_chars, answer_chars, updated_at) "
+                    "SELECT (created_at AT TIME ZONE 'UTC')::date AS day, "
+                    "count(*), "
+                    "count(*) FILTER (WHERE sources IS NULL OR jsonb_array_length(sources) = 0), "
+                    "coalesce(sum(jsonb_array_length(coalesce(sources, '[]'::jsonb))), 0), "
+                    "coalesce(sum(length(question)), 0), "
+                    "coalesce(sum(length(answer)), 0), "
+                    "now() "
+                    "FROM chat "
+                    "WHERE created_at < :until "
+                    "AND (CAST(:since AS timestamptz) IS NULL OR created_at >= CAST(:since AS timestamptz) + interval '1 day') "
+                    "GROUP BY 1 "
+                    "ON CONFLICT (day) DO UPDATE SET "
+                    "chat_count = EXCLUDED.chat_count, "
+                    "no_source_count = EXCLUDED.no_source_count, "
+                    "source_count = EXCLUDED.source_count, "
+                    "question_chars = EXCLUDED.question_chars, "
+                    "answer_chars = EXCLUDED.answer_chars, "
+                    "updated_at = now() "
+                    "RETURNING day"
+                ),
+                {"until": datetime.combine(until, datetime.min.time(), timezone.utc), "since": since}
+            )
+            days = [row[0] for row in result]
+            if days:
+                logger.info(f"Rolled up chat statistics of {len(days)} days")
+            return len(days), min(days) if days else None
+        except Exception as e:
+            logger.error(f"Error rolling up chat statistics: {str(e)}")
+            raise
+
+    def expire_partitions(self, db: Session, keep_from: datetime, archive: bool) -> List[str]:
+        """
+        Drop (or detach, when archiving) partitions whose range ends before keep_from
+
+        Roll up statistics first, the rows are gone from chat afterwards.
+
+        Returns:
+            Names of the expired partitions
+        """
+        try:
+            expired = [
+                partition for partition in self.list_partitions(db)
+                if partition.upper is not None and partition.upper <= keep_from
+            ]
+            for partition in expired:
+                if archive:
+                    db.execute(text(f"ALTER TABLE chat DETACH PARTITION {partition.name}"))
+                    db.execute(text(f"ALTER TABLE {partition.name} RENAME TO archive_{partition.name}"))
+                else:
+                    db.execute(text(f"DROP TABLE {partition.name}"))
+            if expired:
+                action = "Archived" if archive else "Dropped"
+                logger.info(f"{action} chat partitions: {', '.join(partition.name for partition in expired)}")
+            return [partition.name for partition in expired]
+        except Exception as e:
+            logger.error(f"Error expiring chat partitions: {str(e)}")
+            raise
@@ -1,10 +1,18 @@
 import logging
+import uuid
+from datetime import datetime
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from app.domain.models import Chat
 
 logger = logging.getLogger(__name__)
 
+# Where the answer of a chat came from (chat.answer_source)
+ANSWER_SOURCE_GENERATED = "generated"
+ANSWER_SOURCE_FAQ = "faq"
+ANSWER_SOURCE_CACHE = "cache"
+
 
 class ChatRepository:
     """Repository for Chat model"""
@@ -14,7 +22,10 @@ class ChatRepository:
         db: Session,
         question: str,
         answer: str,
-        sources: Optional[List[dict]] = None
+        sources: Optional[List[dict]] = None,
+        answered: bool = True,
+        latency_ms: Optional[int] = None,
+        answer_source: str = ANSWER_SOURCE_GENERATED
     ) -> Chat:
         """
         Create new chat record
@@ -24,15 +35,34 @@ class ChatRepository:
             question: User question
             answer: AI answer
             sources: Source documents
+            answered: False when no answer could be given
+            latency_ms: Time to answer
+            answer_source: Generated for this question or reused (FAQ, semantic cache)
             
         Returns:
             Created Chat object
         """
+        return self.insert_chat(db, question, answer, sources, answered, latency_ms, answer_source)
+    
+    def insert_chat(
+        self,
+        db: Session,
+        question: str,
+        answer: str,
+        sources: Optional[List[dict]] = None,
+        answered: bool = True,
+        latency_ms: Optional[int] = None,
+        answer_source: str = ANSWER_SOURCE_GENERATED
+    ) -> Chat:
+        """Create new chat record, blocking (run in a thread to bound its time)"""
         try:
             chat = Chat(
                 question=question,
                 answer=answer,
-                sources=sources
+                sources=sources,
+                answered=answered,
+                latency_ms=latency_ms,
+                answer_source=answer_source
             )
             db.add(chat)
             db.commit()
@@ -78,4 +108,42 @@ class ChatRepository:
             return db.query(Chat).order_by(Chat.created_at.desc()).limit(limit).all()
         except Exception as e:
             logger.error(f"Error getting recent chats: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    async def list_chats(
+        self,
+        db: Session,
+        limit: int,
+        before: Optional[Tuple[datetime, uuid.UUID]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Chat]:
+        """
+        Page of chats, newest first, by keyset on (created_at, id)
+        
+        Unlike OFFSET, the cost does not grow with the page number: the
+        (created_at, id) index is entered right after the last chat seen,
+        and the created_at range prunes partitions.
+        
+        Args:
+            db: Database session
+            limit: Page size
+            before: (created_at, id) of the last chat of the previous page
+            since: Only chats created at or after
+            until: Only chats created before
+            
+        Returns:
+            List of Chat objects
+        """
+        try:
+            query = db.query(Chat)
+            if before is not None:
+                query = query.filter(tuple_(Chat.created_at, Chat.id) < tuple_(*before))
+            if since is not None:
+                query = query.filter(Chat.created_at >= since)
+            if until is not None:
+                query = query.filter(Chat.created_at < until)
+            return query.order_by(Chat.created_at.desc(), Chat.id.desc()).limit(limit).all()
+        except Exception as e:
+            logger.error(f"Error listing chats: {str(e)}")
+            raise
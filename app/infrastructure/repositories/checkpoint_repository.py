@@ -0,0 +1,279 @@
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint statuses
+STATUS_RUNNING = "running"
+STATUS_PARTIAL = "partial"
+STATUS_FAILED = "failed"
+STATUS_COMPLETED = "completed"
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _write_json(path: str, data) -> None:
+    """Write JSON atomically so a crash never leaves a truncated checkpoint"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class IngestionCheckpoint:
+    """
+    Persistent progress of a single document ingestion
+
+    The manifest records the source file, configuration signature and which
+    batches are already stored in the vector store. Each embedded batch is
+    saved with its chunk boundaries and embeddings so a resumed run neither
+    re-embeds nor re-upserts finished work.
+    """
+
+    def __init__(self, directory: str, manifest: Dict):
+        self.directory = directory
+        self.manifest = manifest
+        self._lock = threading.Lock()
+
+    @property
+    def document_id(self) -> str:
+        return self.manifest["document_id"]
+
+    @property
+    def file_path(self) -> str:
+        return self.manifest["file_path"]
+
+    @property
+    def status(self) -> str:
+        return self.manifest["status"]
+
+    def matches(self, signature: Dict) -> bool:
+        """Check that the checkpoint was produced with the same chunking/embedding setup"""
+        return self.manifest.get("signature") == signature
+
+    def is_upserted(self, batch_no: int) -> bool:
+        """Check if batch is already stored in the vector store"""
+        return batch_no in self.manifest["upserted_batches"]
+
+    def load_batch(self, batch_no: int) -> Optional[Tuple[List[List[int]], Dict[int, List[float]]]]:
+        """
+        Load saved batch
+
+        Returns:
+            (chunk boundaries, embeddings by chunk index) or None if the batch was not saved
+        """
+        path = self._batch_path(batch_no)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            embeddings = data.get("embeddings") or {}
+            if isinstance(embeddings, list):
+                # Batches saved before deduplication hold one embedding per chunk
+                embeddings = dict(zip((b[0] for b in data["boundaries"]), embeddings))
+            return data["boundaries"], {int(index): vector for index, vector in dict(embeddings).items()}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable checkpoint batch {path}: {str(e)}")
+            return None
+
+    def save_batch(self, batch_no: int, boundaries: List[List[int]], embeddings: Dict[int, List[float]]) -> None:
+        """Persist embeddings of a batch before it is upserted"""
+        _write_json(self._batch_path(batch_no), {
+            "batch": batch_no,
+            "boundaries": boundaries,
+            "embeddings": {str(index): vector for index, vector in embeddings.items()}
+        })
+
+    def mark_upserted(self, batch_no: int, chunks_count: int, point_ids: Optional[List[str]] = None) -> None:
+        """Record that a batch is stored in the vector store, with the point of each chunk"""
+        with self._lock:
+            if batch_no not in self.manifest["upserted_batches"]:
+                self.manifest["upserted_batches"].append(batch_no)
+                self.manifest["chunks_indexed"] += chunks_count
+            if point_ids is not None:
+                self.manifest.setdefault("batch_points", {})[str(batch_no)] = point_ids
+            self._save_manifest()
+
+    def batch_points(self, batch_no: int) -> Optional[List[str]]:
+        """Points the chunks of an upserted batch resolved to"""
+        return self.manifest.get("batch_points", {}).get(str(batch_no))
+
+    def update(self, **fields) -> None:
+        """Update manifest fields and persist them"""
+        with self._lock:
+            self.manifest.update(fields)
+            self._save_manifest()
+
+    def reset(self, signature: Dict) -> None:
+        """Drop saved progress (configuration changed)"""
+        with self._lock:
+            self._remove_batches()
+            self.manifest.update({
+                "signature": signature,
+                "upserted_batches": [],
+                "batch_points": {},
+                "chunks_indexed": 0,
+                "total_chunks": None
+            })
+            self._save_manifest()
+
+    def complete(self, total_chunks: int) -> None:
+        """Mark ingestion finished and drop the saved embeddings"""
+        with self._lock:
+            self._remove_batches()
+            self.manifest.update({
+                "status": STATUS_COMPLETED,
+                "total_chunks": total_chunks,
+                "chunks_indexed": total_chunks,
+                "error": None
+            })
+            self._save_manifest()
+
+    def fail(self, error: str) -> None:
+        """Mark ingestion failed, keeping progress for a later resume"""
+        status = STATUS_PARTIAL if self.manifest["upserted_batches"] else STATUS_FAILED
+        self.update(status=status, error=error)
+
+    def _batch_path(self, batch_no: int) -> str:
+        return os.path.join(self.directory, f"batch_{batch_no:06d}.json")
+
+    def _remove_batches(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.startswith("batch_"):
+                os.remove(os.path.join(self.directory, name))
+
+    def _save_manifest(self) -> None:
+        self.manifest["updated_at"] = _now()
+        _write_json(os.path.join(self.directory, MANIFEST_FILE), self.manifest)
+
+
+class CheckpointClaim:
+    """
+    Exclusive hold of a document's checkpoint
+
+    Backed by flock on a lock file in the checkpoint directory, so it also
+    excludes other processes sharing INGEST_CHECKPOINT_DIR (API replicas on
+    the same volume) and is released by the kernel if the holder dies.
+    """
+
+    def __init__(self, document_id: str, fd: int):
+        self.document_id = document_id
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class IngestionCheckpointRepository:
+    """File-based registry of ingestion checkpoints (one directory per document)"""
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = base_dir or settings.INGEST_CHECKPOINT_DIR
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def open(
+        self,
+        document_id: str,
+        file_path: str,
+        filename: Optional[str],
+        signature: Dict
+    ) -> IngestionCheckpoint:
+        """
+        Load checkpoint of a document or create a new one
+
+        Args:
+            document_id: Document identifier
+            file_path: Path to the source file
+            filename: Original file name
+            signature: Chunking/embedding configuration
+
+        Returns:
+            IngestionCheckpoint
+        """
+        checkpoint = self.get(document_id)
+        if checkpoint is not None:
+            return checkpoint
+
+        directory = os.path.join(self.base_dir, document_id)
+        os.makedirs(directory, exist_ok=True)
+        now = _now()
+        checkpoint = IngestionCheckpoint(directory, {
+            "document_id": document_id,
+            "filename": filename or os.path.basename(file_path),
+            "file_path": file_path,
+            "status": STATUS_RUNNING,
+            "signature": signature,
+            "upserted_batches": [],
+            "batch_points": {},
+            "chunks_indexed": 0,
+            "total_chunks": None,
+            "attempts": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        })
+        checkpoint.update()
+        return checkpoint
+
+    def claim(self, document_id: str) -> Optional[CheckpointClaim]:
+        """
+        Take the document's checkpoint without waiting
+
+        Returns:
+            CheckpointClaim to release when done, or None if another ingestion
+            (in this or another process) holds it
+        """
+        directory = os.path.join(self.base_dir, document_id)
+        os.makedirs(directory, exist_ok=True)
+        fd = os.open(os.path.join(directory, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return CheckpointClaim(document_id, fd)
+
+    def get(self, document_id: str) -> Optional[IngestionCheckpoint]:
+        """Get checkpoint by document ID"""
+        directory = os.path.join(self.base_dir, document_id)
+        path = os.path.join(directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return IngestionCheckpoint(directory, json.load(f))
+        except Exception as e:
+            logger.error(f"Error reading checkpoint {path}: {str(e)}")
+            return None
+
+    def list_checkpoints(self, statuses: Optional[List[str]] = None) -> List[IngestionCheckpoint]:
+        """List checkpoints, optionally filtered by status"""
+        checkpoints = []
+        for document_id in sorted(os.listdir(self.base_dir)):
+            checkpoint = self.get(document_id)
+            if checkpoint and (not statuses or checkpoint.status in statuses):
+                checkpoints.append(checkpoint)
+        return checkpoints
+
+    def delete(self, document_id: str) -> bool:
+        """Delete checkpoint directory"""
+        directory = os.path.join(self.base_dir, document_id)
+        if not os.path.isdir(directory):
+            return False
+        shutil.rmtree(directory)
+        return True
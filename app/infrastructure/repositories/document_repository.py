@@ -0,0 +1,294 @@
+import logging
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.domain.models import Document, IngestionJob
+from app.infrastructure.repositories.ingestion_job_repository import STATUS_QUEUED as JOB_STATUS_QUEUED, STATUS_RUNNING as JOB_STATUS_RUNNING
+
+logger = logging.getLogger(__name__)
+
+# Document statuses
+STATUS_PROCESSING = "processing"
+STATUS_INDEXED = "indexed"
+STATUS_PARTIAL = "partial"
+STATUS_FAILED = "failed"
+
+
+def source_version(document: Document) -> str:
+    """Changes whenever the document is replaced or indexed again"""
+    indexed_at = document.indexed_at.isoformat() if document.indexed_at else ""
+    return f"{document.content_hash}:{indexed_at}"
+
+
+class DocumentRepository:
+    """Repository for Document model"""
+
+    async def create_document(
+        self,
+        db: Session,
+        document_id: str,
+        filename: str,
+        content_hash: str,
+        size_bytes: int,
+        embedding_model: str
+    ) -> Document:
+        """
+        Register new document
+
+        Args:
+            db: Database session
+            document_id: Document identifier
+            filename: Original file name
+            content_hash: SHA-256 of the file contents
+            size_bytes: File size
+            embedding_model: Embedding model the chunks will use
+
+        Returns:
+            Created Document object
+        """
+        try:
+            document = Document(
+                id=document_id,
+                filename=filename,
+                content_hash=content_hash,
+                size_bytes=size_bytes,
+                status=STATUS_PROCESSING,
+                chunk_count=0,
+                embedding_model=embedding_model
+            )
+            db.add(document)
+            db.commit()
+            db.refresh(document)
+
+            logger.info(f"Registered document {document_id} ({filename})")
+            return document
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error creating document: {str(e)}")
+            raise
+
+    async def get_document(self, db: Session, document_id: str) -> Optional[Document]:
+        """
+        Get document by ID
+
+        Args:
+            db: Database session
+            document_id: Document identifier
+
+        Returns:
+            Document object or None
+        """
+        try:
+            return db.query(Document).filter(Document.id == document_id).first()
+        except Exception as e:
+            logger.error(f"Error getting document: {str(e)}")
+            raise
+
+    async def get_versions(self, db: Session, document_ids: Iterable[str]) -> Dict[str, Tuple[str, Optional[datetime]]]:
+        """
+        Current version and indexing time of the indexed documents among document_ids
+
+        Args:
+            db: Database session
+            document_ids: Document identifiers (as cited in sources)
+
+        Returns:
+            document_id -> (source_version, indexed_at); missing, failed and
+            still processing documents are left out
+        """
+        try:
+            ids = []
+            for document_id in set(document_ids):
+                try:
+                    ids.append(uuid.UUID(str(document_id)))
+                except ValueError:
+                    continue
+            if not ids:
+                return {}
+            documents = (
+                db.query(Document)
+                .filter(Document.id.in_(ids), Document.status == STATUS_INDEXED)
+                .all()
+            )
+            return {str(document.id): (source_version(document), document.indexed_at) for document in documents}
+        except Exception as e:
+            logger.error(f"Error getting document versions: {str(e)}")
+            raise
+
+    async def get_by_hash(
+        self,
+        db: Session,
+        content_hash: str,
+        embedding_model: str
+    ) -> Optional[Document]:
+        """
+        Get document by content hash
+
+        Args:
+            db: Database session
+            content_hash: SHA-256 of the file contents
+            embedding_model: Embedding model
+
+        Returns:
+            Document object or None
+        """
+        try:
+            return (
+                db.query(Document)
+                .filter(Document.content_hash == content_hash)
+                .filter(Document.embedding_model == embedding_model)
+                .first()
+            )
+        except Exception as e:
+            logger.error(f"Error getting document by hash: {str(e)}")
+            raise
+
+    async def list_documents(
+        self,
+        db: Session,
+        status: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> List[Document]:
+        """
+        List documents, newest first
+
+        Args:
+            db: Database session
+            status: Filter by status
+            limit: Number of records to return
+            offset: Number of records to skip
+
+        Returns:
+            List of Document objects
+        """
+        try:
+            query = db.query(Document)
+            if status:
+                query = query.filter(Document.status == status)
+            return query.order_by(Document.created_at.desc()).offset(offset).limit(limit).all()
+        except Exception as e:
+            logger.error(f"Error listing documents: {str(e)}")
+            raise
+
+    async def count_documents(self, db: Session, status: Optional[str] = None) -> int:
+        """Count documents, optionally by status"""
+        try:
+            query = db.query(Document)
+            if status:
+                query = query.filter(Document.status == status)
+            return query.count()
+        except Exception as e:
+            logger.error(f"Error counting documents: {str(e)}")
+            raise
+
+    async def get_chunk_totals(self, db: Session) -> Tuple[int, int]:
+        """
+        Sum chunk counts over all documents
+
+        Returns:
+            Tuple of (chunks, chunks attached to existing points)
+        """
+        try:
+            chunks, duplicates = db.query(
+                func.coalesce(func.sum(Document.chunk_count), 0),
+                func.coalesce(func.sum(Document.duplicate_chunk_count), 0)
+            ).one()
+            return int(chunks), int(duplicates)
+        except Exception as e:
+            logger.error(f"Error summing chunk counts: {str(e)}")
+            raise
+
+    async def processing_expired(self, db: Session, document: Document, timeout_seconds: float) -> bool:
+        """
+        Check if a document was left in processing by a crashed ingestion
+
+        Its row has not been updated for timeout_seconds and no queued or
+        running ingestion job exists for it. Such a document is treated as
+        failed: it can be uploaded again or deleted.
+
+        Args:
+            db: Database session
+            document: Document in processing
+            timeout_seconds: Time without updates after which it counts as abandoned
+
+        Returns:
+            True if the document may be taken over
+        """
+        try:
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=timeout_seconds)
+            stale = (
+                db.query(Document.id)
+                .filter(
+                    Document.id == document.id,
+                    Document.status == STATUS_PROCESSING,
+                    Document.updated_at < cutoff
+                )
+                .first()
+            )
+            if stale is None:
+                return False
+
+            active_job = (
+                db.query(IngestionJob.id)
+                .filter(
+                    IngestionJob.document_id == document.id,
+                    IngestionJob.status.in_([JOB_STATUS_QUEUED, JOB_STATUS_RUNNING])
+                )
+                .first()
+            )
+            return active_job is None
+        except Exception as e:
+            logger.error(f"Error checking processing document: {str(e)}")
+            raise
+
+    async def update_document(self, db: Session, document_id: str, **fields) -> Optional[Document]:
+        """
+        Update document fields
+
+        Args:
+            db: Database session
+            document_id: Document identifier
+            **fields: Column values to set
+
+        Returns:
+            Updated Document object or None if it is not registered
+        """
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if document is None:
+                return None
+
+            for name, value in fields.items():
+                setattr(document, name, value)
+            db.commit()
+            db.refresh(document)
+            return document
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error updating document: {str(e)}")
+            raise
+
+    async def delete_document(self, db: Session, document_id: str) -> bool:
+        """
+        Delete document from registry
+
+        Args:
+            db: Database session
+            document_id: Document identifier
+
+        Returns:
+            True if a record was deleted
+        """
+        try:
+            deleted = db.query(Document).filter(Document.id == document_id).delete()
+            db.commit()
+            return deleted > 0
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error deleting document: {str(e)}")
+            raise
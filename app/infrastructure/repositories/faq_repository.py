@@ -0,0 +1,58 @@
+import logging
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.domain.models import Chat, FaqEntry
+from app.infrastructure.repositories.chat_repository import ANSWER_SOURCE_GENERATED
+
+logger = logging.getLogger(__name__)
+
+# Serializes mining runs of several API instances (pg_try_advisory_xact_lock key)
+MINING_LOCK_ID = 4_048_001
+
+
+class FaqRepository:
+    """Repository for FaqEntry model and the chat history it is mined from"""
+
+    def try_lock(self, db: Session) -> bool:
+        """Take the mining lock until the end of the transaction (False if another run holds it, PostgreSQL only)"""
+        return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MINING_LOCK_ID}).scalar())
+
+    def recent_answered_chats(self, db: Session, since: datetime, limit: int) -> List[Chat]:
+        """Answered chats with sources created since, newest first (generated answers only, reused ones would reinforce themselves)"""
+        try:
+            return (
+                db.query(Chat)
+                .filter(
+                    Chat.created_at >= since,
+                    Chat.answered.is_(True),
+                    Chat.answer_source == ANSWER_SOURCE_GENERATED,
+                    Chat.sources.isnot(None)
+                )
+                .order_by(Chat.created_at.desc())
+                .limit(limit)
+                .all()
+            )
+        except Exception as e:
+            logger.error(f"Error reading chats for FAQ mining: {str(e)}")
+            raise
+
+    def list_entries(self, db: Session) -> List[FaqEntry]:
+        """All FAQ entries, most asked first"""
+        try:
+            return db.query(FaqEntry).order_by(FaqEntry.chat_count.desc()).all()
+        except Exception as e:
+            logger.error(f"Error listing FAQ entries: {str(e)}")
+            raise
+
+    def replace_entries(self, db: Session, entries: List[Dict]) -> int:
+        """Replace all FAQ entries (committed by the caller)"""
+        try:
+            db.query(FaqEntry).delete(synchronize_session=False)
+            db.add_all(FaqEntry(**entry) for entry in entries)
+            db.flush()
+            return len(entries)
+        except Exception as e:
+            logger.error(f"Error replacing FAQ entries: {str(e)}")
+            raise
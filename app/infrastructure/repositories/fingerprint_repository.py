@@ -0,0 +1,151 @@
+import logging
+from sqlalchemy import or_, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from typing import Dict, List, Set, Tuple
+from app.domain.models import ChunkFingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkFingerprintRepository:
+    """Repository for ChunkFingerprint model"""
+
+    async def find_candidates(
+        self,
+        db: Session,
+        content_hashes: List[str],
+        bands: List[Set[int]]
+    ) -> List[ChunkFingerprint]:
+        """
+        Find fingerprints matching any hash or sharing any SimHash band
+
+        Args:
+            db: Database session
+            content_hashes: Exact hashes to look up
+            bands: Band values to probe, one set per band position
+
+        Returns:
+            Candidate fingerprints (near matches still need a distance check)
+        """
+        try:
+            conditions = []
+            if content_hashes:
+                conditions.append(ChunkFingerprint.content_hash.in_(content_hashes))
+            for position, values in enumerate(bands):
+                if values:
+                    conditions.append(getattr(ChunkFingerprint, f"band{position}").in_(values))
+            if not conditions:
+                return []
+            return db.query(ChunkFingerprint).filter(or_(*conditions)).all()
+        except Exception as e:
+            logger.error(f"Error finding chunk fingerprints: {str(e)}")
+            raise
+
+    async def register(self, db: Session, entries: List[Dict]) -> None:
+        """
+        Insert fingerprints of newly stored points
+
+        Entries whose hash or point is already registered are skipped, e.g. when
+        two documents with the same chunk are ingested at the same time.
+
+        Args:
+            db: Database session
+            entries: Column values (point_id, content_hash, simhash, band0-3, document_ids)
+        """
+        if not entries:
+            return
+        try:
+            db.execute(insert(ChunkFingerprint).values(entries).on_conflict_do_nothing())
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error registering chunk fingerprints: {str(e)}")
+            raise
+
+    async def add_reference(self, db: Session, point_ids: List[str], document_id: str) -> Dict[str, List[str]]:
+        """
+        Attach document to existing points
+
+        Args:
+            db: Database session
+            point_ids: Points the document's duplicate chunks resolve to
+            document_id: Referencing document
+
+        Returns:
+            Mapping of point ID to its referencing documents after the update
+        """
+        if not point_ids:
+            return {}
+        try:
+            rows = (
+                db.query(ChunkFingerprint)
+                .filter(ChunkFingerprint.point_id.in_(point_ids))
+                .with_for_update()
+                .all()
+            )
+            refs = {}
+            for row in rows:
+                if document_id not in row.document_ids:
+                    row.document_ids = row.document_ids + [document_id]
+                    row.ref_count = len(row.document_ids)
+                refs[str(row.point_id)] = list(row.document_ids)
+            db.commit()
+            return refs
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error adding chunk references: {str(e)}")
+            raise
+
+    async def release_document(self, db: Session, document_id: str) -> Tuple[List[str], Dict[str, List[str]]]:
+        """
+        Drop document's references to shared points
+
+        Args:
+            db: Database session
+            document_id: Document being deleted
+
+        Returns:
+            Tuple of (point IDs no longer referenced by anyone,
+            mapping of still referenced point IDs to their remaining documents)
+        """
+        try:
+            rows = (
+                db.query(ChunkFingerprint)
+                .filter(ChunkFingerprint.document_ids.contains([document_id]))
+                .with_for_update()
+                .all()
+            )
+            orphaned, retained = [], {}
+            for row in rows:
+                remaining = [doc_id for doc_id in row.document_ids if doc_id != document_id]
+                if remaining:
+                    row.document_ids = remaining
+                    row.ref_count = len(remaining)
+                    retained[str(row.point_id)] = remaining
+                else:
+                    orphaned.append(str(row.point_id))
+                    db.delete(row)
+            db.commit()
+            return orphaned, retained
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error releasing chunk references: {str(e)}")
+            raise
+
+    async def get_stats(self, db: Session) -> Tuple[int, int]:
+        """
+        Get deduplication totals
+
+        Returns:
+            Tuple of (stored points, chunk references)
+        """
+        try:
+            points, references = db.query(
+                func.count(ChunkFingerprint.point_id),
+                func.coalesce(func.sum(ChunkFingerprint.ref_count), 0)
+            ).one()
+            return points, int(references)
+        except Exception as e:
+            logger.error(f"Error getting fingerprint stats: {str(e)}")
+            raise
@@ -0,0 +1,253 @@
+import logging
+import uuid
+from typing import Dict, List, Optional
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session, defer
+from app.domain.models import IngestionJob
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_DEAD = "dead"
+
+
+class ClaimedJob:
+    """Job leased to a worker"""
+
+    def __init__(self, job_id: str, document_id: str, filename: str, attempts: int, max_attempts: int):
+        self.id = job_id
+        self.document_id = document_id
+        self.filename = filename
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+
+    def __repr__(self):
+        return f"<ClaimedJob(id={self.id}, document_id={self.document_id}, attempt={self.attempts}/{self.max_attempts})>"
+
+
+class IngestionJobRepository:
+    """
+    Ingestion job queue (PostgreSQL only)
+
+    Workers claim the oldest due job with FOR UPDATE SKIP LOCKED, so
+    concurrent claims never wait on or hand out the same row. A claim is a
+    lease: the worker extends it with heartbeats, and a job whose lease ran
+    out (worker crashed or hung) is claimed again by another worker. Every
+    method runs in its own short transaction.
+    """
+
+    async def enqueue(self, db: Session, document_id: str, filename: str, payload: bytes, max_attempts: int) -> IngestionJob:
+        """
+        Queue the ingestion of an uploaded file
+
+        Args:
+            db: Database session
+            document_id: Registered document to ingest
+            filename: Original file name
+            payload: File contents
+            max_attempts: Claims before the job is dead-lettered
+
+        Returns:
+            Created IngestionJob object
+        """
+        try:
+            job = IngestionJob(
+                document_id=document_id,
+                filename=filename,
+                payload=payload,
+                status=STATUS_QUEUED,
+                attempts=0,
+                max_attempts=max_attempts
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+
+            logger.info(f"Queued ingestion job {job.id} for document {document_id}")
+            return job
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error queueing ingestion job: {str(e)}")
+            raise
+
+    def claim(self, db: Session, worker_id: str, lease_seconds: float) -> Optional[ClaimedJob]:
+        """
+        Lease the oldest due job: queued and past its backoff, or running with an expired lease
+
+        Returns:
+            ClaimedJob (attempts already counts this claim) or None when nothing is due
+        """
+        try:
+            row = db.execute(
+                text(
+                    "UPDATE ingestion_jobs SET "
+                    "status = :running, attempts = attempts + 1, locked_by = :worker, "
+                    "lease_expires_at = now() + make_interval(secs => :lease), heartbeat_at = now(), updated_at = now() "
+                    "WHERE id = ("
+                    "  SELECT id FROM ingestion_jobs "
+                    "  WHERE (status = :queued AND run_after <= now()) "
+                    "  OR (status = :running AND lease_expires_at < now()) "
+                    "  ORDER BY run_after "
+                    "  LIMIT 1 FOR UPDATE SKIP LOCKED"
+                    ") "
+                    "RETURNING id, document_id, filename, attempts, max_attempts"
+                ),
+                {"running": STATUS_RUNNING, "queued": STATUS_QUEUED, "worker": worker_id, "lease": lease_seconds}
+            ).first()
+            db.commit()
+            if row is None:
+                return None
+            return ClaimedJob(str(row.id), str(row.document_id), row.filename, row.attempts, row.max_attempts)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error claiming ingestion job: {str(e)}")
+            raise
+
+    def get_payload(self, db: Session, job_id: str) -> Optional[bytes]:
+        """File contents of a job"""
+        try:
+            return db.query(IngestionJob.payload).filter(IngestionJob.id == uuid.UUID(job_id)).scalar()
+        except Exception as e:
+            logger.error(f"Error reading ingestion job payload: {str(e)}")
+            raise
+
+    def heartbeat(self, db: Session, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """
+        Extend the lease of a running job
+
+        Returns:
+            False when the worker no longer holds the lease (it expired and
+            another worker claimed the job)
+        """
+        try:
+            result = db.execute(
+                text(
+                    "UPDATE ingestion_jobs SET "
+                    "lease_expires_at = now() + make_interval(secs => :lease), heartbeat_at = now(), updated_at = now() "
+                    "WHERE id = :id AND locked_by = :worker AND status = :running"
+                ),
+                {"id": job_id, "worker": worker_id, "lease": lease_seconds, "running": STATUS_RUNNING}
+            )
+            db.commit()
+            return result.rowcount == 1
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error extending ingestion job lease: {str(e)}")
+            raise
+
+    def complete(self, db: Session, job_id: str, worker_id: str) -> bool:
+        """Mark a job done and drop its payload (False if the lease was lost)"""
+        try:
+            result = db.execute(
+                text(
+                    "UPDATE ingestion_jobs SET "
+                    "status = :completed, payload = NULL, locked_by = NULL, lease_expires_at = NULL, "
+                    "last_error = NULL, finished_at = now(), updated_at = now() "
+                    "WHERE id = :id AND locked_by = :worker AND status = :running"
+                ),
+                {"id": job_id, "worker": worker_id, "completed": STATUS_COMPLETED, "running": STATUS_RUNNING}
+            )
+            db.commit()
+            return result.rowcount == 1
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error completing ingestion job: {str(e)}")
+            raise
+
+    def fail(self, db: Session, job_id: str, worker_id: str, error: str, retry_in_seconds: Optional[float]) -> bool:
+        """
+        Record a failed attempt
+
+        Args:
+            retry_in_seconds: Backoff before the job is due again (None dead-letters it)
+
+        Returns:
+            False if the lease was lost
+        """
+        try:
+            if retry_in_seconds is None:
+                status, finished = STATUS_DEAD, "now()"
+            else:
+                status, finished = STATUS_QUEUED, "NULL"
+            result = db.execute(
+                text(
+                    "UPDATE ingestion_jobs SET "
+                    f"status = :status, run_after = now() + make_interval(secs => :delay), finished_at = {finished}, "
+                    "locked_by = NULL, lease_expires_at = NULL, last_error = :error, updated_at = now() "
+                    "WHERE id = :id AND locked_by = :worker AND status = :running"
+                ),
+                {
+                    "id": job_id,
+                    "worker": worker_id,
+                    "status": status,
+                    "delay": retry_in_seconds or 0,
+                    "error": error,
+                    "running": STATUS_RUNNING
+                }
+            )
+            db.commit()
+            return result.rowcount == 1
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error failing ingestion job: {str(e)}")
+            raise
+
+    async def retry(self, db: Session, job_id: str) -> bool:
+        """Put a dead-lettered job back in the queue with fresh attempts"""
+        try:
+            updated = (
+                db.query(IngestionJob)
+                .filter(IngestionJob.id == uuid.UUID(str(job_id)), IngestionJob.status == STATUS_DEAD)
+                .update({
+                    IngestionJob.status: STATUS_QUEUED,
+                    IngestionJob.attempts: 0,
+                    IngestionJob.run_after: func.now(),
+                    IngestionJob.finished_at: None
+                }, synchronize_session=False)
+            )
+            db.commit()
+            return updated == 1
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error retrying ingestion job: {str(e)}")
+            raise
+
+    async def get_job(self, db: Session, job_id: str) -> Optional[IngestionJob]:
+        """Get job by ID"""
+        try:
+            return (
+                db.query(IngestionJob)
+                .options(defer(IngestionJob.payload))
+                .filter(IngestionJob.id == uuid.UUID(str(job_id)))
+                .first()
+            )
+        except ValueError:
+            return None
+        except Exception as e:
+            logger.error(f"Error getting ingestion job: {str(e)}")
+            raise
+
+    async def list_jobs(self, db: Session, status: Optional[str] = None, limit: int = 100) -> List[IngestionJob]:
+        """Most recent jobs, optionally filtered by status"""
+        try:
+            # Payloads stay in the database, listings only need the metadata
+            query = db.query(IngestionJob).options(defer(IngestionJob.payload))
+            if status:
+                query = query.filter(IngestionJob.status == status)
+            return query.order_by(IngestionJob.created_at.desc()).limit(limit).all()
+        except Exception as e:
+            logger.error(f"Error listing ingestion jobs: {str(e)}")
+            raise
+
+    async def count_by_status(self, db: Session) -> Dict[str, int]:
+        """Number of jobs per status"""
+        try:
+            rows = db.query(IngestionJob.status, func.count()).group_by(IngestionJob.status).all()
+            return {status: count for status, count in rows}
+        except Exception as e:
+            logger.error(f"Error counting ingestion jobs: {str(e)}")
+            raise
@@ -0,0 +1,490 @@
+import fcntl
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per step of the exact search, bounds the float32 scratch memory
+SEARCH_BLOCK_ROWS = 65536
+# Smallest allocation of the vector file, in rows
+MIN_CAPACITY = 1024
+# Lock file coordinating the processes that open the same collection
+LOCK_FILE = ".lock"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS points (
+    point_id TEXT PRIMARY KEY,
+    row INTEGER NOT NULL,
+    keys TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+
+class MmapCollection:
+    """
+    Vector collection stored in a memory-mapped matrix with a SQLite payload sidecar
+
+    Vectors are normalized on insert (cosine similarity is a dot product) and
+    appended as rows of vectors.<generation>.bin. The sidecar maps point IDs
+    to rows and holds payloads and filter keys (the documents of a chunk, the
+    chunk of a sentence). Opening a collection reads only the sidecar's IDs and
+    keys; vector pages are loaded by the OS as searches touch them.
+
+    Deleted and replaced points leave tombstoned rows behind. Once their share
+    exceeds compact_ratio, live rows are copied into the next generation file
+    and the sidecar is switched to it in one transaction, so a crash at any
+    point leaves either the old or the new generation intact.
+
+    Instances are shared per path within the process and threads are
+    serialized by a lock. Several processes may open the same path (uvicorn
+    workers, the ingestion worker): writes hold an exclusive flock on the
+    collection's lock file and reads a shared one, and every write bumps a
+    version in the sidecar. An operation that finds the version changed
+    reloads the maps and the vector file first, so writes and compactions of
+    other processes are seen by the next read. A generation file removed by
+    another process's compaction stays mapped until that reload.
+    """
+
+    _instances: Dict[str, "MmapCollection"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str, dtype: str = "float32", compact_ratio: float = 0.25):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self._lock_fd = os.open(os.path.join(path, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        self._db = sqlite3.connect(os.path.join(path, "payloads.sqlite3"), check_same_thread=False)
+        self._configured_dtype = np.dtype(dtype)
+        self.dim: Optional[int] = None
+        self.dtype = self._configured_dtype
+        self.generation = 0
+        self._rows = 0
+        self._matrix: Optional[np.memmap] = None
+        # Sidecar version the in-memory maps were loaded at (None forces a load)
+        self._version: Optional[int] = None
+
+        with self._locked(exclusive=True, refresh=False):
+            self._db.executescript(_SCHEMA)
+            self._refresh()
+            self._remove_stale_files()
+        if self.dtype != self._configured_dtype:
+            logger.warning(f"{path} stores {self.dtype} vectors, ignoring configured {dtype}")
+
+    @classmethod
+    def shared(cls, path: str, dtype: str = "float32", compact_ratio: float = 0.25) -> "MmapCollection":
+        """Collection at path, opened once per process"""
+        key = os.path.abspath(path)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(path, dtype, compact_ratio)
+            return cls._instances[key]
+
+    @property
+    def count(self) -> int:
+        """Number of live points"""
+        with self._locked(exclusive=False):
+            return len(self._index)
+
+    @property
+    def deleted(self) -> int:
+        """Number of tombstoned rows"""
+        with self._locked(exclusive=False):
+            return self._rows - len(self._index)
+
+    def upsert(self, points: Sequence[Tuple[str, Sequence[float], List[str], Dict]]) -> int:
+        """
+        Append points, replacing points with the same ID
+
+        Args:
+            points: (point_id, vector, filter keys, payload) per point
+
+        Returns:
+            Number of points stored
+        """
+        if not points:
+            return 0
+        vectors = self._normalize(np.asarray([vector for _, vector, _, _ in points], dtype=np.float32))
+        with self._locked(exclusive=True):
+            if self.dim is None:
+                self._create(vectors.shape[1])
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Invalid embedding dimension: {vectors.shape[1]}, expected {self.dim}")
+
+            # A point given twice in one call keeps its last version
+            last = {point_id: position for position, (point_id, _, _, _) in enumerate(points)}
+            positions = sorted(last.values())
+            replaced = [self._index[point_id] for point_id in last if point_id in self._index]
+
+            start = self._rows
+            self._reserve(start + len(positions))
+            self._matrix[start:start + len(positions)] = vectors[positions].astype(self.dtype)
+            self._matrix.flush()
+
+            rows = {}
+            for offset, position in enumerate(positions):
+                rows[points[position][0]] = start + offset
+            self._db.executemany(
+                "INSERT OR REPLACE INTO points (point_id, row, keys, payload) VALUES (?, ?, ?, ?)",
+                [
+                    (point_id, rows[point_id], json.dumps(keys), json.dumps(payload))
+                    for point_id, _, keys, payload in (points[position] for position in positions)
+                ]
+            )
+            self._set_meta(rows=start + len(positions))
+            self._commit()
+
+            for row in replaced:
+                self._forget(row)
+            self._rows = start + len(positions)
+            for position in positions:
+                point_id, _, keys, _ = points[position]
+                self._remember(point_id, rows[point_id], keys)
+
+        if replaced:
+            self._maybe_compact()
+        return len(positions)
+
+    def delete(self, point_ids: Iterable[str]) -> int:
+        """Tombstone points by ID, returns the number deleted"""
+        with self._locked(exclusive=True):
+            deleted = self._delete(point_ids)
+        if deleted:
+            self._maybe_compact()
+        return deleted
+
+    def delete_by_keys(self, keys: Iterable[str]) -> List[str]:
+        """Tombstone points having any of the filter keys, returns their IDs"""
+        with self._locked(exclusive=True):
+            point_ids = [self._row_ids[row] for row in self._rows_for(keys)]
+            self._delete(point_ids)
+        if point_ids:
+            self._maybe_compact()
+        return point_ids
+
+    def update(self, updates: Dict[str, Tuple[List[str], Dict]]) -> int:
+        """
+        Replace filter keys and merge payload fields of existing points
+
+        Args:
+            updates: Point ID to (filter keys, payload fields)
+
+        Returns:
+            Number of points updated
+        """
+        with self._locked(exclusive=True):
+            known = [point_id for point_id in updates if point_id in self._index]
+            payloads = self._payloads(known)
+            for point_id in known:
+                payloads[point_id].update(updates[point_id][1])
+            self._db.executemany(
+                "UPDATE points SET keys = ?, payload = ? WHERE point_id = ?",
+                [(json.dumps(updates[point_id][0]), json.dumps(payloads[point_id]), point_id) for point_id in known]
+            )
+            self._commit()
+            for point_id in known:
+                row = self._index[point_id]
+                self._forget(row)
+                self._remember(point_id, row, updates[point_id][0])
+            return len(known)
+
+    def retrieve(self, point_ids: Sequence[str], with_vectors: bool = False) -> List[Tuple[str, Dict, Optional[List[float]]]]:
+        """(point_id, payload, vector) of the points that exist, in the given order"""
+        with self._locked(exclusive=False):
+            known = [point_id for point_id in dict.fromkeys(point_ids) if point_id in self._index]
+            payloads = self._payloads(known)
+            vectors = None
+            if with_vectors and known:
+                rows = np.fromiter((self._index[point_id] for point_id in known), dtype=np.int64, count=len(known))
+                vectors = self._matrix[rows].astype(np.float32)
+            return [
+                (point_id, payloads[point_id], vectors[i].tolist() if vectors is not None else None)
+                for i, point_id in enumerate(known)
+            ]
+
+    def search(
+        self,
+        queries: Sequence[Sequence[float]],
+        top_k: int,
+        keys: Optional[Sequence[Optional[List[str]]]] = None
+    ) -> List[List[Tuple[str, float, Dict]]]:
+        """
+        Exact top-k cosine search
+
+        Args:
+            queries: Query vectors
+            top_k: Results per query
+            keys: Per query, filter keys a point must have one of (None searches all)
+
+        Returns:
+            Per query, (point_id, score, payload) best first
+        """
+        queries = self._normalize(np.asarray(queries, dtype=np.float32))
+        results: List[List[Tuple[int, float]]] = [[] for _ in range(len(queries))]
+        with self._locked(exclusive=False):
+            if not self._index or top_k <= 0:
+                return [[] for _ in range(len(queries))]
+            if queries.shape[1] != self.dim:
+                raise ValueError(f"Invalid query dimension: {queries.shape[1]}, expected {self.dim}")
+
+            unfiltered = [i for i in range(len(queries)) if not keys or not keys[i]]
+            if unfiltered:
+                for i, hits in zip(unfiltered, self._scan(queries[unfiltered], top_k)):
+                    results[i] = hits
+            for i in range(len(queries)):
+                if keys and keys[i]:
+                    results[i] = self._search_rows(queries[i], self._rows_for(keys[i]), top_k)
+
+            payloads = self._payloads([self._row_ids[row] for hits in results for row, _ in hits])
+            return [
+                [(self._row_ids[row], score, payloads[self._row_ids[row]]) for row, score in hits]
+                for hits in results
+            ]
+
+    def keys(self) -> List[str]:
+        """Filter keys of the live points"""
+        with self._locked(exclusive=False):
+            return list(self._keys)
+
+    def mean_by_key(self) -> Dict[str, Tuple[List[float], int]]:
+        """Normalized mean vector and point count per filter key"""
+        with self._locked(exclusive=False):
+            means = {}
+            for key, rows in self._keys.items():
+                if not rows:
+                    continue
+                total = self._matrix[np.fromiter(sorted(rows), dtype=np.int64)].astype(np.float64).sum(axis=0)
+                norm = np.linalg.norm(total)
+                if norm > 0:
+                    means[key] = ((total / norm).tolist(), len(rows))
+            return means
+
+    def compact(self) -> None:
+        """Copy live rows into a new generation file and drop the tombstones"""
+        with self._locked(exclusive=True):
+            removed = self._rows - len(self._index)
+            if self._matrix is None or removed == 0:
+                return
+            live = np.flatnonzero(self._alive[:self._rows])
+            generation = self.generation + 1
+            capacity = max(MIN_CAPACITY, len(live))
+            matrix = np.memmap(self._vectors_path(generation), dtype=self.dtype, mode="w+", shape=(capacity, self.dim))
+            for start in range(0, len(live), SEARCH_BLOCK_ROWS):
+                rows = live[start:start + SEARCH_BLOCK_ROWS]
+                matrix[start:start + len(rows)] = self._matrix[rows]
+            matrix.flush()
+
+            self._db.executemany(
+                "UPDATE points SET row = ? WHERE point_id = ?",
+                [(new_row, self._row_ids[int(row)]) for new_row, row in enumerate(live)]
+            )
+            self._set_meta(rows=len(live), generation=generation)
+            self._commit()
+
+            old_path = self._vectors_path(self.generation)
+            del matrix
+            self._matrix = None
+            self.generation = generation
+            self._rows = len(live)
+            os.remove(old_path)
+            self._load()
+            logger.info(f"Compacted {self.path}: {removed} deleted rows dropped, {self._rows} kept")
+
+    @contextmanager
+    def _locked(self, exclusive: bool, refresh: bool = True) -> Iterator[None]:
+        """Serialize threads and processes, then catch up with writes made by other processes"""
+        with self._lock:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                if refresh:
+                    self._refresh()
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """Reload meta, vector file and maps if the sidecar version moved since they were loaded"""
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        version = int(row[0]) if row else 0
+        if version == self._version:
+            return
+        meta = dict(self._db.execute("SELECT key, value FROM meta").fetchall())
+        self.dim = int(meta["dim"]) if "dim" in meta else None
+        self.dtype = np.dtype(meta.get("dtype", self._configured_dtype))
+        self.generation = int(meta.get("generation", 0))
+        self._rows = int(meta.get("rows", 0))
+        self._matrix = None
+        self._load()
+        self._version = version
+
+    def _commit(self) -> None:
+        """Commit the pending sidecar changes together with a version bump"""
+        self._version = (self._version or 0) + 1
+        self._set_meta(version=self._version)
+        self._db.commit()
+
+    def _delete(self, point_ids: Iterable[str]) -> int:
+        rows = [self._index[point_id] for point_id in set(point_ids) if point_id in self._index]
+        if not rows:
+            return 0
+        self._db.executemany(
+            "DELETE FROM points WHERE point_id = ?",
+            [(self._row_ids[row],) for row in rows]
+        )
+        self._commit()
+        for row in rows:
+            self._forget(row)
+        return len(rows)
+
+    def _scan(self, queries: np.ndarray, top_k: int) -> List[List[Tuple[int, float]]]:
+        """Blockwise scan of all rows keeping a running top-k per query"""
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, self._rows, SEARCH_BLOCK_ROWS):
+            stop = min(start + SEARCH_BLOCK_ROWS, self._rows)
+            scores = queries @ self._matrix[start:stop].astype(np.float32, copy=False).T
+            scores[:, ~self._alive[start:stop]] = -np.inf
+            k = min(top_k, stop - start)
+            block_best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_rows = np.concatenate([best_rows, block_best + start], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, block_best, axis=1)], axis=1)
+            if best_rows.shape[1] > top_k:
+                keep = np.argpartition(-best_scores, top_k - 1, axis=1)[:, :top_k]
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        return [
+            [(int(row), float(score)) for row, score in zip(rows, scores) if np.isfinite(score)]
+            for rows, scores in zip(best_rows, best_scores)
+        ]
+
+    def _search_rows(self, query: np.ndarray, rows: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        """Score only the given rows (filtered search)"""
+        if len(rows) == 0:
+            return []
+        scores = self._matrix[rows].astype(np.float32, copy=False) @ query
+        k = min(top_k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(rows[i]), float(scores[i])) for i in best]
+
+    def _rows_for(self, keys: Iterable[str]) -> np.ndarray:
+        rows = set()
+        for key in keys:
+            rows.update(self._keys.get(key, ()))
+        return np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+
+    def _payloads(self, point_ids: List[str]) -> Dict[str, Dict]:
+        payloads = {}
+        unique = list(dict.fromkeys(point_ids))
+        # Stay under SQLite's bound parameter limit
+        for start in range(0, len(unique), 500):
+            part = unique[start:start + 500]
+            placeholders = ",".join("?" * len(part))
+            for point_id, payload in self._db.execute(
+                f"SELECT point_id, payload FROM points WHERE point_id IN ({placeholders})", part
+            ):
+                payloads[point_id] = json.loads(payload)
+        return payloads
+
+    def _load(self) -> None:
+        """Open the vector file and rebuild the in-memory ID and key maps from the sidecar"""
+        self._index: Dict[str, int] = {}
+        self._keys: Dict[str, set] = {}
+        self._row_ids: Dict[int, str] = {}
+        self._row_keys: Dict[int, List[str]] = {}
+        if self.dim is None:
+            self._alive = np.zeros(0, dtype=bool)
+            return
+
+        size = os.path.getsize(self._vectors_path(self.generation))
+        capacity = size // (self.dim * self.dtype.itemsize)
+        self._matrix = np.memmap(self._vectors_path(self.generation), dtype=self.dtype, mode="r+", shape=(capacity, self.dim))
+        self._alive = np.zeros(capacity, dtype=bool)
+        for point_id, row, keys in self._db.execute("SELECT point_id, row, keys FROM points"):
+            self._remember(point_id, row, json.loads(keys))
+
+    def _create(self, dim: int) -> None:
+        self.dim = dim
+        np.memmap(self._vectors_path(self.generation), dtype=self.dtype, mode="w+", shape=(MIN_CAPACITY, dim)).flush()
+        self._set_meta(dim=dim, dtype=self.dtype.name, generation=self.generation, rows=0)
+        self._commit()
+        self._load()
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the vector file (doubling) so it holds at least rows"""
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2)
+        self._matrix.flush()
+        self._matrix = None
+        with open(self._vectors_path(self.generation), "r+b") as file:
+            file.truncate(capacity * self.dim * self.dtype.itemsize)
+        self._matrix = np.memmap(self._vectors_path(self.generation), dtype=self.dtype, mode="r+", shape=(capacity, self.dim))
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._alive = alive
+
+    def _remember(self, point_id: str, row: int, keys: List[str]) -> None:
+        self._index[point_id] = row
+        self._row_ids[row] = point_id
+        self._row_keys[row] = list(keys)
+        self._alive[row] = True
+        for key in keys:
+            self._keys.setdefault(key, set()).add(row)
+
+    def _forget(self, row: int) -> None:
+        point_id = self._row_ids.pop(row)
+        if self._index.get(point_id) == row:
+            del self._index[point_id]
+        self._alive[row] = False
+        for key in self._row_keys.pop(row, ()):
+            rows = self._keys.get(key)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._keys[key]
+
+    def _maybe_compact(self) -> None:
+        with self._locked(exclusive=False):
+            due = self._rows and (self._rows - len(self._index)) / self._rows > self.compact_ratio
+        if due:
+            self.compact()
+
+    def _set_meta(self, **values) -> None:
+        self._db.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in values.items()]
+        )
+
+    def _vectors_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"vectors.{generation}.bin")
+
+    def _remove_stale_files(self) -> None:
+        """Drop vector files of generations an interrupted compaction left behind"""
+        current = f"vectors.{self.generation}.bin"
+        for name in os.listdir(self.path):
+            if name.startswith("vectors.") and name.endswith(".bin") and name != current:
+                os.remove(os.path.join(self.path, name))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        if vectors.ndim != 2:
+            raise ValueError("Expected a list of vectors")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
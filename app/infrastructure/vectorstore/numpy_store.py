@@ -0,0 +1,398 @@
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.domain.chunks import make_document_point_id, make_point_id, make_sentence_point_id
+from app.infrastructure.vectorstore.mmap_collection import MmapCollection
+
+logger = logging.getLogger(__name__)
+
+
+class NumpyVectorStore:
+    """
+    In-process vector store on memory-mapped NumPy arrays
+
+    Drop-in replacement for the Qdrant client for small corpora (edge
+    deployments, CI) where running a Qdrant server is pure overhead. Search is
+    exact. Chunks, sentences and document vectors live in three collections
+    under NUMPY_STORE_DIR, named like their Qdrant counterparts. API workers
+    and the ingestion worker may share the directory; each collection locks
+    and reloads itself across processes.
+    """
+
+    def __init__(self):
+        try:
+            self.collection_name = settings.QDRANT_COLLECTION_NAME
+            self.chunks = self._open(self.collection_name)
+            self.sentences = self._open(f"{self.collection_name}_sentences")
+            self.documents = self._open(f"{self.collection_name}_docs")
+            # Set once every document with chunks has a centroid (see VectorStoreImpl.ensure_document_vectors)
+            self.document_vectors_ready = False
+            logger.info(
+                f"✅ Opened local vector store at {settings.NUMPY_STORE_DIR} "
+                f"({self.chunks.count} points, {self.chunks.deleted} deleted rows)"
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to open local vector store: {str(e)}")
+            raise
+
+    @staticmethod
+    def _open(name: str) -> MmapCollection:
+        return MmapCollection.shared(
+            os.path.join(settings.NUMPY_STORE_DIR, name),
+            dtype=settings.NUMPY_STORE_DTYPE,
+            compact_ratio=settings.NUMPY_STORE_COMPACT_RATIO
+        )
+
+    async def add_documents(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        document_id: str,
+        chunk_indices: Optional[List[int]] = None,
+        payloads: Optional[List[Dict]] = None
+    ) -> int:
+        """
+        Add documents to vector store
+
+        Args:
+            texts: List of text chunks
+            embeddings: List of embeddings
+            document_id: Document identifier
+            chunk_indices: Chunk positions in the document (defaults to 0..n-1)
+            payloads: Extra payload fields per chunk
+
+        Returns:
+            Number of documents added
+        """
+        try:
+            if not texts or not embeddings:
+                logger.warning("No texts or embeddings provided")
+                return 0
+
+            if len(texts) != len(embeddings):
+                raise ValueError(f"Texts ({len(texts)}) and embeddings ({len(embeddings)}) length mismatch")
+
+            if chunk_indices is None:
+                chunk_indices = list(range(len(texts)))
+
+            points = []
+            for i, (text, embedding) in enumerate(zip(texts, embeddings)):
+                payload = dict(payloads[i]) if payloads else {}
+                payload.update({
+                    "text": text,
+                    "document_id": document_id,
+                    "document_ids": [document_id],
+                    "chunk_index": chunk_indices[i]
+                })
+                points.append((make_point_id(document_id, chunk_indices[i]), embedding, [document_id], payload))
+
+            count = await asyncio.to_thread(self.chunks.upsert, points)
+            logger.info(f"✅ Added {count} points to local collection '{self.collection_name}'")
+            return count
+
+        except Exception as e:
+            logger.error(f"❌ Error adding documents: {str(e)}")
+            raise
+
+    async def search(
+        self,
+        query_embedding: List[float],
+        top_k: Optional[int] = None,
+        document_ids: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Search similar documents
+
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of results to return (defaults to settings.TOP_K_RESULTS)
+            document_ids: Restrict the search to chunks of these documents
+
+        Returns:
+            List of search results with content and score
+        """
+        try:
+            return (await self.search_batch([query_embedding], top_k, [document_ids]))[0]
+        except Exception as e:
+            logger.error(f"❌ Error searching: {str(e)}")
+            raise
+
+    async def search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: Optional[int] = None,
+        document_ids: Optional[List[Optional[List[str]]]] = None
+    ) -> List[List[Dict]]:
+        """
+        Search similar documents for several queries at once
+
+        Args:
+            query_embeddings: Query embedding vectors
+            top_k: Number of results per query (defaults to settings.TOP_K_RESULTS)
+            document_ids: Per query, documents to restrict the search to
+
+        Returns:
+            Search results per query, in query order
+        """
+        try:
+            if not query_embeddings:
+                return []
+            if top_k is None:
+                top_k = settings.TOP_K_RESULTS
+
+            all_hits = await asyncio.to_thread(self.chunks.search, query_embeddings, top_k, document_ids)
+            return [[self._to_result(*hit) for hit in hits] for hits in all_hits]
+
+        except Exception as e:
+            logger.error(f"❌ Error batch searching: {str(e)}")
+            raise
+
+    async def search_documents(self, query_embeddings: List[List[float]], top_n: int) -> List[List[str]]:
+        """Shortlist documents by their centroid vectors"""
+        try:
+            if not query_embeddings:
+                return []
+            all_hits = await asyncio.to_thread(self.documents.search, query_embeddings, top_n)
+            return [[payload["document_id"] for _, _, payload in hits] for hits in all_hits]
+        except Exception as e:
+            logger.error(f"❌ Error searching document vectors: {str(e)}")
+            raise
+
+    async def upsert_document_vector(self, document_id: str, vector: List[float], chunk_count: int) -> None:
+        """Store centroid vector of a document"""
+        try:
+            await asyncio.to_thread(
+                self.documents.upsert,
+                [(
+                    make_document_point_id(document_id),
+                    vector,
+                    [document_id],
+                    {"document_id": document_id, "chunk_count": chunk_count}
+                )]
+            )
+        except Exception as e:
+            logger.error(f"❌ Error storing document vector: {str(e)}")
+            raise
+
+    async def delete_document_vector(self, document_id: str) -> bool:
+        """Delete centroid vector of a document"""
+        try:
+            await asyncio.to_thread(self.documents.delete, [make_document_point_id(document_id)])
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error deleting document vector: {str(e)}")
+            return False
+
+    async def get_vectors(self, point_ids: List[str]) -> Dict[str, List[float]]:
+        """Fetch stored chunk vectors (missing points are left out)"""
+        try:
+            records = await asyncio.to_thread(self.chunks.retrieve, point_ids, True)
+            return {point_id: vector for point_id, _, vector in records}
+        except Exception as e:
+            logger.error(f"❌ Error getting vectors: {str(e)}")
+            raise
+
+    async def get_chunks(self, point_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch stored chunk texts and positions (missing points are left out)"""
+        try:
+            records = await asyncio.to_thread(self.chunks.retrieve, point_ids, False)
+            return {
+                point_id: {
+                    "content": payload.get("text", ""),
+                    "document_id": payload.get("document_id", ""),
+                    "chunk_index": payload.get("chunk_index", 0)
+                }
+                for point_id, payload, _ in records
+            }
+        except Exception as e:
+            logger.error(f"❌ Error getting chunks: {str(e)}")
+            raise
+
+    async def rebuild_document_vectors(self) -> int:
+        """Recompute every document centroid from the stored chunks"""
+        try:
+            means = await asyncio.to_thread(self.chunks.mean_by_key)
+            await asyncio.to_thread(
+                self.documents.upsert,
+                [
+                    (make_document_point_id(document_id), vector, [document_id], {"document_id": document_id, "chunk_count": count})
+                    for document_id, (vector, count) in means.items()
+                ]
+            )
+            self.document_vectors_ready = True
+            logger.info(f"✅ Rebuilt {len(means)} document vectors")
+            return len(means)
+        except Exception as e:
+            logger.error(f"❌ Error rebuilding document vectors: {str(e)}")
+            raise
+
+    async def missing_document_vectors(self) -> List[str]:
+        """Documents referenced by chunks that have no centroid"""
+        try:
+            chunk_documents = await asyncio.to_thread(self.chunks.keys)
+            documents = await asyncio.to_thread(self.documents.keys)
+            return sorted(set(chunk_documents) - set(documents))
+        except Exception as e:
+            logger.error(f"❌ Error listing documents without vectors: {str(e)}")
+            raise
+
+    @staticmethod
+    def _to_result(point_id: str, score: float, payload: Dict) -> Dict:
+        """Convert scored point to search result"""
+        return {
+            "content": payload.get("text", ""),
+            "score": score,
+            "document_id": payload.get("document_id", ""),
+            "chunk_index": payload.get("chunk_index", 0),
+            "char_start": payload.get("char_start"),
+            "char_end": payload.get("char_end"),
+            "point_id": point_id,
+            "sentence_count": payload.get("sentence_count", 0)
+        }
+
+    async def delete_by_document_id(self, document_id: str) -> bool:
+        """
+        Delete all points referencing a document, with their sentences
+
+        Args:
+            document_id: Document identifier
+
+        Returns:
+            Success status
+        """
+        try:
+            point_ids = await asyncio.to_thread(self.chunks.delete_by_keys, [document_id])
+            await asyncio.to_thread(self.sentences.delete_by_keys, point_ids)
+            logger.info(f"🗑️ Deleted {len(point_ids)} points of document {document_id}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error deleting documents: {str(e)}")
+            return False
+
+    async def delete_points(self, point_ids: List[str]) -> bool:
+        """
+        Delete points by ID, with their sentences
+
+        Args:
+            point_ids: Point identifiers
+
+        Returns:
+            Success status
+        """
+        try:
+            if not point_ids:
+                return True
+            await asyncio.to_thread(self.chunks.delete, point_ids)
+            await asyncio.to_thread(self.sentences.delete_by_keys, point_ids)
+            logger.info(f"🗑️ Deleted {len(point_ids)} points")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error deleting points: {str(e)}")
+            return False
+
+    async def set_document_refs(self, refs: Dict[str, List[str]]) -> None:
+        """
+        Set the documents referencing each shared point
+
+        Args:
+            refs: Point ID to referencing document IDs
+        """
+        try:
+            if refs:
+                await asyncio.to_thread(
+                    self.chunks.update,
+                    {
+                        point_id: (document_ids, {"document_id": document_ids[0], "document_ids": document_ids})
+                        for point_id, document_ids in refs.items()
+                    }
+                )
+                logger.info(f"🔗 Updated document references of {len(refs)} points")
+        except Exception as e:
+            logger.error(f"❌ Error updating document references: {str(e)}")
+            raise
+
+    async def add_sentences(
+        self,
+        chunk_point_ids: List[str],
+        spans: List[List[List[int]]],
+        embeddings: List[List[List[float]]]
+    ) -> int:
+        """
+        Store sentence embeddings of chunks
+
+        Args:
+            chunk_point_ids: Point IDs of the chunks
+            spans: Per chunk, [start, end] of each sentence within the chunk text
+            embeddings: Per chunk, embedding of each sentence
+
+        Returns:
+            Number of sentences stored
+        """
+        try:
+            points = [
+                (
+                    make_sentence_point_id(chunk_point_id, sentence_no),
+                    embedding,
+                    [chunk_point_id],
+                    {"chunk_point_id": chunk_point_id, "sentence_no": sentence_no, "start": span[0], "end": span[1]}
+                )
+                for chunk_point_id, chunk_spans, chunk_embeddings in zip(chunk_point_ids, spans, embeddings)
+                for sentence_no, (span, embedding) in enumerate(zip(chunk_spans, chunk_embeddings))
+            ]
+            count = await asyncio.to_thread(self.sentences.upsert, points)
+            if count:
+                logger.info(f"✅ Added {count} sentences to local collection '{self.collection_name}_sentences'")
+            return count
+        except Exception as e:
+            logger.error(f"❌ Error adding sentences: {str(e)}")
+            raise
+
+    async def get_sentences(self, chunks: Dict[str, int]) -> Dict[str, Tuple[List[List[int]], List[List[float]]]]:
+        """
+        Fetch sentence spans and embeddings of chunks
+
+        Args:
+            chunks: Chunk point ID to its sentence count
+
+        Returns:
+            Chunk point ID to (sentence spans, sentence embeddings); chunks
+            whose sentences are incomplete are left out
+        """
+        try:
+            ids = [
+                make_sentence_point_id(chunk_point_id, sentence_no)
+                for chunk_point_id, count in chunks.items()
+                for sentence_no in range(count)
+            ]
+            if not ids:
+                return {}
+
+            # Sentence IDs are generated in order, so records come back grouped and sorted
+            records = await asyncio.to_thread(self.sentences.retrieve, ids, True)
+            by_chunk: Dict[str, list] = {}
+            for _, payload, vector in records:
+                by_chunk.setdefault(payload["chunk_point_id"], []).append((payload, vector))
+
+            return {
+                chunk_point_id: (
+                    [[payload["start"], payload["end"]] for payload, _ in chunk_records],
+                    [vector for _, vector in chunk_records]
+                )
+                for chunk_point_id, chunk_records in by_chunk.items()
+                if len(chunk_records) == chunks[chunk_point_id]
+            }
+        except Exception as e:
+            logger.error(f"❌ Error getting sentences: {str(e)}")
+            raise
+
+    def get_collection_info(self) -> Dict:
+        """Get collection information"""
+        return {
+            "name": self.collection_name,
+            "vectors_count": self.chunks.count,
+            "points_count": self.chunks.count,
+            "deleted_rows": self.chunks.deleted,
+            "status": "local"
+        }
@@ -1,10 +1,12 @@
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from qdrant_client import QdrantClient as QdrantClientLib
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+from qdrant_client.models import Distance, VectorParams, PointStruct, SearchRequest
+from qdrant_client.http.models import Filter, FieldCondition, MatchAny, MatchValue, PayloadSchemaType, PointIdsList
 from app.core.config import settings
-import uuid
+from app.domain.chunks import make_document_point_id, make_point_id, make_sentence_point_id
+import asyncio
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +40,10 @@ class QdrantClient:
                 logger.info("✅ Connected to local Qdrant")
             
             self.collection_name = settings.QDRANT_COLLECTION_NAME
+            self.sentence_collection_name = f"{self.collection_name}_sentences"
+            self.document_collection_name = f"{self.collection_name}_docs"
+            # Set once every document with chunks has a centroid (see VectorStoreImpl.ensure_document_vectors)
+            self.document_vectors_ready = False
             self._ensure_collection()
             
         except Exception as e:
@@ -64,16 +70,59 @@ class QdrantClient:
                 logger.info(f"✅ Collection '{self.collection_name}' created successfully (1536 dimensions)")
             else:
                 logger.info(f"✅ Collection '{self.collection_name}' already exists")
+            
+            # Derived collections hold vectors of the same embedding model as the chunks
+            vector_size = self._vector_size()
+            
+            # Sentence embeddings used for context compression
+            self.has_sentences = self.sentence_collection_name in collection_names
+            if settings.COMPRESSION_ENABLED and not self.has_sentences:
+                logger.info(f"📦 Creating collection: {self.sentence_collection_name}")
+                self.client.create_collection(
+                    collection_name=self.sentence_collection_name,
+                    vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
+                )
+                self.client.create_payload_index(
+                    collection_name=self.sentence_collection_name,
+                    field_name="chunk_point_id",
+                    field_schema=PayloadSchemaType.KEYWORD
+                )
+                self.has_sentences = True
+            
+            # Document centroids used for hierarchical retrieval
+            self.has_document_vectors = self.document_collection_name in collection_names
+            if settings.HIERARCHICAL_SEARCH_ENABLED:
+                if not self.has_document_vectors:
+                    logger.info(f"📦 Creating collection: {self.document_collection_name}")
+                    self.client.create_collection(
+                        collection_name=self.document_collection_name,
+                        vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
+                    )
+                    self.has_document_vectors = True
+                # Filtered chunk search needs the document fields indexed
+                for field_name in ("document_id", "document_ids"):
+                    self.client.create_payload_index(
+                        collection_name=self.collection_name,
+                        field_name=field_name,
+                        field_schema=PayloadSchemaType.KEYWORD
+                    )
                 
         except Exception as e:
             logger.error(f"❌ Error ensuring collection: {str(e)}")
             raise
     
+    def _vector_size(self) -> int:
+        """Vector size of the chunk collection"""
+        vectors = self.client.get_collection(self.collection_name).config.params.vectors
+        return vectors.size
+    
     async def add_documents(
         self, 
         texts: List[str], 
         embeddings: List[List[float]], 
-        document_id: str
+        document_id: str,
+        chunk_indices: Optional[List[int]] = None,
+        payloads: Optional[List[Dict]] = None
     ) -> int:
         """
         Add documents to vector store
@@ -82,6 +131,8 @@ class QdrantClient:
             texts: List of text chunks
             embeddings: List of embeddings (1536 dimensions each)
             document_id: Document identifier
+            chunk_indices: Chunk positions in the document (defaults to 0..n-1)
+            payloads: Extra payload fields per chunk
             
         Returns:
             Number of documents added
@@ -94,22 +145,29 @@ class QdrantClient:
             if len(texts) != len(embeddings):
                 raise ValueError(f"Texts ({len(texts)}) and embeddings ({len(embeddings)}) length mismatch")
             
+            if chunk_indices is None:
+                chunk_indices = list(range(len(texts)))
+            
             points = []
-            for idx, (text, embedding) in enumerate(zip(texts, embeddings)):
+            for i, (text, embedding) in enumerate(zip(texts, embeddings)):
                 # Validate embedding dimension
                 if len(embedding) != 1536:
                     logger.error(f"Invalid embedding dimension: {len(embedding)}, expected 1536")
                     continue
                 
-                point_id = str(uuid.uuid4())
+                payload = dict(payloads[i]) if payloads else {}
+                payload.update({
+                    "text": text,
+                    "document_id": document_id,
+                    "document_ids": [document_id],  # Grows when other documents share the chunk
+                    "chunk_index": chunk_indices[i]
+                })
+                
+                point_id = make_point_id(document_id, chunk_indices[i])
                 point = PointStruct(
                     id=point_id,
                     vector=embedding,
-                    payload={
-                        "text": text,
-                        "document_id": document_id,
-                        "chunk_index": idx
-                    }
+                    payload=payload
                 )
                 points.append(point)
             
@@ -117,7 +175,9 @@ class QdrantClient:
                 logger.error("No valid points to insert")
                 return 0
             
-            self.client.upsert(
+            # Run the blocking upsert in a thread so pipeline stages keep running
+            await asyncio.to_thread(
+                self.client.upsert,
                 collection_name=self.collection_name,
                 points=points
             )
@@ -132,7 +192,8 @@ class QdrantClient:
     async def search(
         self, 
         query_embedding: List[float], 
-        top_k: Optional[int] = None
+        top_k: Optional[int] = None,
+        document_ids: Optional[List[str]] = None
     ) -> List[Dict]:
         """
         Search similar documents
@@ -140,6 +201,7 @@ class QdrantClient:
         Args:
             query_embedding: Query embedding vector (1536 dimensions)
             top_k: Number of results to return (defaults to settings.TOP_K_RESULTS)
+            document_ids: Restrict the search to chunks of these documents
             
         Returns:
             List of search results with content and score
@@ -152,20 +214,15 @@ class QdrantClient:
             if len(query_embedding) != 1536:
                 raise ValueError(f"Invalid query embedding dimension: {len(query_embedding)}, expected 1536")
             
-            search_result = self.client.search(
+            search_result = await asyncio.to_thread(
+                self.client.search,
                 collection_name=self.collection_name,
                 query_vector=query_embedding,
+                query_filter=self._documents_filter(document_ids),
                 limit=top_k
             )
             
-            results = []
-            for hit in search_result:
-                results.append({
-                    "content": hit.payload.get("text", ""),
-                    "score": hit.score,
-                    "document_id": hit.payload.get("document_id", ""),
-                    "chunk_index": hit.payload.get("chunk_index", 0)
-                })
+            results = [self._to_result(hit) for hit in search_result]
             
             logger.info(f"🔍 Found {len(results)} similar documents")
             return results
@@ -174,6 +231,309 @@ class QdrantClient:
             logger.error(f"❌ Error searching documents: {str(e)}")
             raise
     
+    async def search_batch(
+        self, 
+        query_embeddings: List[List[float]], 
+        top_k: Optional[int] = None,
+        document_ids: Optional[List[Optional[List[str]]]] = None
+    ) -> List[List[Dict]]:
+        """
+        Search similar documents for several queries in one request
+        
+        Args:
+            query_embeddings: Query embedding vectors (1536 dimensions each)
+            top_k: Number of results per query (defaults to settings.TOP_K_RESULTS)
+            document_ids: Per query, documents to restrict the search to
+            
+        Returns:
+            Search results per query, in query order
+        """
+        try:
+            if not query_embeddings:
+                return []
+            
+            if top_k is None:
+                top_k = settings.TOP_K_RESULTS
+            
+            for embedding in query_embeddings:
+                if len(embedding) != 1536:
+                    raise ValueError(f"Invalid query embedding dimension: {len(embedding)}, expected 1536")
+            
+            batch_result = await asyncio.to_thread(
+                self.client.search_batch,
+                collection_name=self.collection_name,
+                requests=[
+                    SearchRequest(
+                        vector=embedding,
+                        filter=self._documents_filter(document_ids[i] if document_ids else None),
+                        limit=top_k,
+                        with_payload=True
+                    )
+                    for i, embedding in enumerate(query_embeddings)
+                ]
+            )
+            
+            results = [[self._to_result(hit) for hit in hits] for hits in batch_result]
+            
+            logger.info(f"🔍 Batch search for {len(results)} queries")
+            return results
+            
+        except Exception as e:
+            logger.error(f"❌ Error batch searching documents: {str(e)}")
+            raise
+    
+    async def search_documents(self, query_embeddings: List[List[float]], top_n: int) -> List[List[str]]:
+        """
+        Shortlist documents by their centroid vectors
+        
+        Args:
+            query_embeddings: Query embedding vectors
+            top_n: Documents per query
+            
+        Returns:
+            Per query, IDs of the closest documents
+        """
+        try:
+            if not query_embeddings or not self.has_document_vectors:
+                return [[] for _ in query_embeddings]
+            
+            batch_result = await asyncio.to_thread(
+                self.client.search_batch,
+                collection_name=self.document_collection_name,
+                requests=[
+                    SearchRequest(vector=embedding, limit=top_n, with_payload=True)
+                    for embedding in query_embeddings
+                ]
+            )
+            return [[hit.payload["document_id"] for hit in hits] for hits in batch_result]
+            
+        except Exception as e:
+            logger.error(f"❌ Error searching document vectors: {str(e)}")
+            raise
+    
+    async def upsert_document_vector(self, document_id: str, vector: List[float], chunk_count: int) -> None:
+        """
+        Store centroid vector of a document
+        
+        Args:
+            document_id: Document identifier
+            vector: Normalized mean of the document's chunk embeddings
+            chunk_count: Number of chunks averaged
+        """
+        try:
+            if not self.has_document_vectors:
+                return
+            await asyncio.to_thread(
+                self.client.upsert,
+                collection_name=self.document_collection_name,
+                points=[
+                    PointStruct(
+                        id=make_document_point_id(document_id),
+                        vector=vector,
+                        payload={"document_id": document_id, "chunk_count": chunk_count}
+                    )
+                ]
+            )
+            logger.info(f"✅ Stored document vector of {document_id} ({chunk_count} chunks)")
+            
+        except Exception as e:
+            logger.error(f"❌ Error storing document vector: {str(e)}")
+            raise
+    
+    async def delete_document_vector(self, document_id: str) -> bool:
+        """Delete centroid vector of a document"""
+        try:
+            if not self.has_document_vectors:
+                return True
+            await asyncio.to_thread(
+                self.client.delete,
+                collection_name=self.document_collection_name,
+                points_selector=PointIdsList(points=[make_document_point_id(document_id)])
+            )
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error deleting document vector: {str(e)}")
+            return False
+    
+    async def get_vectors(self, point_ids: List[str]) -> Dict[str, List[float]]:
+        """
+        Fetch stored chunk vectors
+        
+        Args:
+            point_ids: Point identifiers
+            
+        Returns:
+            Point ID to vector (missing points are left out)
+        """
+        try:
+            if not point_ids:
+                return {}
+            records = await asyncio.to_thread(
+                self.client.retrieve,
+                collection_name=self.collection_name,
+                ids=point_ids,
+                with_payload=False,
+                with_vectors=True
+            )
+            return {str(record.id): record.vector for record in records}
+        except Exception as e:
+            logger.error(f"❌ Error getting vectors: {str(e)}")
+            raise
+    
+    async def get_chunks(self, point_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch stored chunk texts and positions
+        
+        Args:
+            point_ids: Point identifiers
+            
+        Returns:
+            Point ID to content, document_id and chunk_index (missing points are left out)
+        """
+        try:
+            if not point_ids:
+                return {}
+            records = await asyncio.to_thread(
+                self.client.retrieve,
+                collection_name=self.collection_name,
+                ids=list(dict.fromkeys(point_ids)),
+                with_payload=["text", "document_id", "chunk_index"],
+                with_vectors=False
+            )
+            return {
+                str(record.id): {
+                    "content": record.payload.get("text", ""),
+                    "document_id": record.payload.get("document_id", ""),
+                    "chunk_index": record.payload.get("chunk_index", 0)
+                }
+                for record in records
+            }
+        except Exception as e:
+            logger.error(f"❌ Error getting chunks: {str(e)}")
+            raise
+    
+    async def rebuild_document_vectors(self) -> int:
+        """
+        Recompute every document centroid from the stored chunks
+        
+        Used to backfill documents ingested before hierarchical retrieval
+        was enabled. Shared points count towards each referencing document.
+        
+        Returns:
+            Number of document vectors stored
+        """
+        try:
+            if not self.has_document_vectors:
+                return 0
+            
+            sums: Dict[str, np.ndarray] = {}
+            counts: Dict[str, int] = {}
+            offset = None
+            while True:
+                records, offset = await asyncio.to_thread(
+                    self.client.scroll,
+                    collection_name=self.collection_name,
+                    limit=512,
+                    offset=offset,
+                    with_payload=["document_id", "document_ids"],
+                    with_vectors=True
+                )
+                for record in records:
+                    vector = np.asarray(record.vector, dtype=np.float64)
+                    for document_id in record.payload.get("document_ids") or [record.payload.get("document_id")]:
+                        if document_id:
+                            sums[document_id] = sums.get(document_id, 0) + vector
+                            counts[document_id] = counts.get(document_id, 0) + 1
+                if offset is None:
+                    break
+            
+            for document_id, total in sums.items():
+                norm = np.linalg.norm(total)
+                if norm > 0:
+                    await self.upsert_document_vector(document_id, (total / norm).tolist(), counts[document_id])
+            
+            self.document_vectors_ready = True
+            logger.info(f"✅ Rebuilt {len(sums)} document vectors")
+            return len(sums)
+            
+        except Exception as e:
+            logger.error(f"❌ Error rebuilding document vectors: {str(e)}")
+            raise
+    
+    async def missing_document_vectors(self) -> List[str]:
+        """
+        Documents referenced by chunks that have no centroid
+        
+        Scrolls the chunk payloads (without vectors) and the document vectors.
+        """
+        try:
+            if not self.has_document_vectors:
+                return []
+            
+            chunk_documents = set()
+            offset = None
+            while True:
+                records, offset = await asyncio.to_thread(
+                    self.client.scroll,
+                    collection_name=self.collection_name,
+                    limit=2048,
+                    offset=offset,
+                    with_payload=["document_id", "document_ids"],
+                    with_vectors=False
+                )
+                for record in records:
+                    chunk_documents.update(record.payload.get("document_ids") or [record.payload.get("document_id")])
+                if offset is None:
+                    break
+            
+            documents = set()
+            offset = None
+            while True:
+                records, offset = await asyncio.to_thread(
+                    self.client.scroll,
+                    collection_name=self.document_collection_name,
+                    limit=2048,
+                    offset=offset,
+                    with_payload=["document_id"],
+                    with_vectors=False
+                )
+                documents.update(record.payload.get("document_id") for record in records)
+                if offset is None:
+                    break
+            
+            chunk_documents.discard(None)
+            return sorted(chunk_documents - documents)
+            
+        except Exception as e:
+            logger.error(f"❌ Error listing documents without vectors: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _documents_filter(document_ids: Optional[List[str]]) -> Optional[Filter]:
+        """Match chunks referenced by any of the documents (points stored before deduplication carry only document_id)"""
+        if not document_ids:
+            return None
+        return Filter(
+            should=[
+                FieldCondition(key="document_ids", match=MatchAny(any=document_ids)),
+                FieldCondition(key="document_id", match=MatchAny(any=document_ids))
+            ]
+        )
+    
+    @staticmethod
+    def _to_result(hit) -> Dict:
+        """Convert scored point to search result"""
+        return {
+            "content": hit.payload.get("text", ""),
+            "score": hit.score,
+            "document_id": hit.payload.get("document_id", ""),
+            "chunk_index": hit.payload.get("chunk_index", 0),
+            "char_start": hit.payload.get("char_start"),
+            "char_end": hit.payload.get("char_end"),
+            "point_id": str(hit.id),
+            "sentence_count": hit.payload.get("sentence_count", 0)
+        }
+    
     async def delete_by_document_id(self, document_id: str) -> bool:
         """
         Delete all points for a document
@@ -185,16 +545,36 @@ class QdrantClient:
             Success status
         """
         try:
+            document_filter = Filter(
+                must=[
+                    FieldCondition(
+                        key="document_id",
+                        match=MatchValue(value=document_id)
+                    )
+                ]
+            )
+            
+            if self.has_sentences:
+                # Collect point IDs so the chunks' sentences are deleted with them
+                point_ids, offset = [], None
+                while True:
+                    records, offset = await asyncio.to_thread(
+                        self.client.scroll,
+                        collection_name=self.collection_name,
+                        scroll_filter=document_filter,
+                        limit=1000,
+                        offset=offset,
+                        with_payload=False,
+                        with_vectors=False
+                    )
+                    point_ids.extend(str(record.id) for record in records)
+                    if offset is None:
+                        break
+                return await self.delete_points(point_ids)
+            
             self.client.delete(
                 collection_name=self.collection_name,
-                points_selector=Filter(
-                    must=[
-                        FieldCondition(
-                            key="document_id",
-                            match=MatchValue(value=document_id)
-                        )
-                    ]
-                )
+                points_selector=document_filter
             )
             logger.info(f"🗑️ Deleted documents with id: {document_id}")
             return True
@@ -203,6 +583,161 @@ class QdrantClient:
             logger.error(f"❌ Error deleting documents: {str(e)}")
             return False
     
+    async def delete_points(self, point_ids: List[str]) -> bool:
+        """
+        Delete points by ID
+        
+        Args:
+            point_ids: Point identifiers
+            
+        Returns:
+            Success status
+        """
+        try:
+            if not point_ids:
+                return True
+            
+            await asyncio.to_thread(
+                self.client.delete,
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=point_ids)
+            )
+            if self.has_sentences:
+                await asyncio.to_thread(
+                    self.client.delete,
+                    collection_name=self.sentence_collection_name,
+                    points_selector=Filter(
+                        must=[FieldCondition(key="chunk_point_id", match=MatchAny(any=point_ids))]
+                    )
+                )
+            logger.info(f"🗑️ Deleted {len(point_ids)} points")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Error deleting points: {str(e)}")
+            return False
+    
+    async def set_document_refs(self, refs: Dict[str, List[str]]) -> None:
+        """
+        Set the documents referencing each shared point
+        
+        The first remaining document becomes the point's document_id, so a
+        point stays attributed to a live document after its owner is deleted.
+        
+        Args:
+            refs: Point ID to referencing document IDs
+        """
+        try:
+            def apply():
+                for point_id, document_ids in refs.items():
+                    self.client.set_payload(
+                        collection_name=self.collection_name,
+                        payload={"document_id": document_ids[0], "document_ids": document_ids},
+                        points=[point_id]
+                    )
+            
+            if refs:
+                await asyncio.to_thread(apply)
+                logger.info(f"🔗 Updated document references of {len(refs)} points")
+            
+        except Exception as e:
+            logger.error(f"❌ Error updating document references: {str(e)}")
+            raise
+    
+    async def add_sentences(
+        self,
+        chunk_point_ids: List[str],
+        spans: List[List[List[int]]],
+        embeddings: List[List[List[float]]]
+    ) -> int:
+        """
+        Store sentence embeddings of chunks
+        
+        Args:
+            chunk_point_ids: Point IDs of the chunks
+            spans: Per chunk, [start, end] of each sentence within the chunk text
+            embeddings: Per chunk, embedding of each sentence
+            
+        Returns:
+            Number of sentences stored
+        """
+        try:
+            points = [
+                PointStruct(
+                    id=make_sentence_point_id(chunk_point_id, sentence_no),
+                    vector=embedding,
+                    payload={
+                        "chunk_point_id": chunk_point_id,
+                        "sentence_no": sentence_no,
+                        "start": span[0],
+                        "end": span[1]
+                    }
+                )
+                for chunk_point_id, chunk_spans, chunk_embeddings in zip(chunk_point_ids, spans, embeddings)
+                for sentence_no, (span, embedding) in enumerate(zip(chunk_spans, chunk_embeddings))
+            ]
+            if not points:
+                return 0
+            
+            await asyncio.to_thread(
+                self.client.upsert,
+                collection_name=self.sentence_collection_name,
+                points=points
+            )
+            logger.info(f"✅ Added {len(points)} sentences to collection '{self.sentence_collection_name}'")
+            return len(points)
+            
+        except Exception as e:
+            logger.error(f"❌ Error adding sentences: {str(e)}")
+            raise
+    
+    async def get_sentences(self, chunks: Dict[str, int]) -> Dict[str, Tuple[List[List[int]], List[List[float]]]]:
+        """
+        Fetch sentence spans and embeddings of chunks
+        
+        Args:
+            chunks: Chunk point ID to its sentence count
+            
+        Returns:
+            Chunk point ID to (sentence spans, sentence embeddings); chunks
+            whose sentences are incomplete are left out
+        """
+        try:
+            ids = [
+                make_sentence_point_id(chunk_point_id, sentence_no)
+                for chunk_point_id, count in chunks.items()
+                for sentence_no in range(count)
+            ]
+            if not ids or not self.has_sentences:
+                return {}
+            
+            records = await asyncio.to_thread(
+                self.client.retrieve,
+                collection_name=self.sentence_collection_name,
+                ids=ids,
+                with_payload=True,
+                with_vectors=True
+            )
+            
+            by_chunk: Dict[str, list] = {}
+            for record in records:
+                by_chunk.setdefault(record.payload["chunk_point_id"], []).append(record)
+            
+            sentences = {}
+            for chunk_point_id, chunk_records in by_chunk.items():
+                if len(chunk_records) != chunks[chunk_point_id]:
+                    continue
+                chunk_records.sort(key=lambda record: record.payload["sentence_no"])
+                sentences[chunk_point_id] = (
+                    [[record.payload["start"], record.payload["end"]] for record in chunk_records],
+                    [record.vector for record in chunk_records]
+                )
+            return sentences
+            
+        except Exception as e:
+            logger.error(f"❌ Error getting sentences: {str(e)}")
+            raise
+    
     def get_collection_info(self) -> Dict:
         """Get collection information"""
         try:
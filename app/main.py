@@ -1,11 +1,14 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+import asyncio
 import logging
+import time
 
 from app.core.config import settings
-from app.presentation.routers import upload, query
-from sqlalchemy import text
+from app.presentation.admission import AdmissionController, AdmissionMiddleware
+from app.presentation.routers import upload, query, ingestion, documents, chats
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -13,6 +16,80 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+STARTED_AT = time.monotonic()
+
+
+async def start_up(app: FastAPI):
+    """Warm up clients and pools, run the first dependency checks, then report ready"""
+    from app.presentation.health import HealthChecker
+    from app.presentation.warmup import warm_up
+    
+    if settings.WARMUP_ENABLED:
+        try:
+            app.state.warmup_report = await warm_up()
+        except Exception as e:
+            logger.error(f"Warm-up failed: {str(e)}")
+    
+    try:
+        health = HealthChecker.from_settings()
+        await health.check_now()
+        health.start()
+        app.state.health = health
+    except Exception as e:
+        logger.error(f"Starting health checks failed: {str(e)}")
+    app.state.ready = True
+
+
+async def resume_interrupted_ingestions():
+    """Continue ingestions that were interrupted by a restart"""
+    from app.presentation.dependencies import get_ingestion_service
+    
+    try:
+        await get_ingestion_service().resume_interrupted()
+    except Exception as e:
+        logger.error(f"Resuming interrupted ingestions failed: {str(e)}")
+
+
+async def backfill_document_vectors():
+    """Store missing document vectors, hierarchical search is used once every document has one"""
+    from app.application.impl.vector_store_impl import VectorStoreImpl
+    
+    try:
+        await VectorStoreImpl().ensure_document_vectors()
+    except Exception as e:
+        logger.error(f"Backfilling document vectors failed: {str(e)}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start warm-up and ingestion resume in background, the server accepts connections at once"""
+    app.state.ready = False
+    app.state.warmup_report = []
+    app.state.health = None
+    tasks = [asyncio.create_task(start_up(app))]
+    # With the job queue, workers own interrupted ingestions (lease expiry, backoff, dead-lettering)
+    if settings.INGEST_RESUME_ON_STARTUP and not settings.INGEST_JOB_QUEUE_ENABLED:
+        # Run in background so startup is not delayed by large documents
+        tasks.append(asyncio.create_task(resume_interrupted_ingestions()))
+    if settings.HIERARCHICAL_SEARCH_ENABLED:
+        tasks.append(asyncio.create_task(backfill_document_vectors()))
+    if settings.CHAT_MAINTENANCE_ENABLED:
+        from app.presentation.chat_maintenance import chat_maintenance_loop
+        tasks.append(asyncio.create_task(chat_maintenance_loop()))
+    if settings.CHAT_ANALYTICS_ENABLED:
+        from app.presentation.chat_maintenance import chat_analytics_loop
+        tasks.append(asyncio.create_task(chat_analytics_loop()))
+    if settings.FAQ_ENABLED:
+        from app.presentation.faq_jobs import faq_index_loop, faq_mining_loop
+        tasks.append(asyncio.create_task(faq_index_loop()))
+        tasks.append(asyncio.create_task(faq_mining_loop()))
+    yield
+    for task in tasks:
+        task.cancel()
+    if app.state.health is not None:
+        app.state.health.stop()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
@@ -20,9 +97,16 @@ app = FastAPI(
     description="RAG tizimi - Word hujjatlar bilan ishlash",
     docs_url="/docs",          # Swagger UI
     redoc_url="/redoc",        # ReDoc
-    openapi_url="/openapi.json"  # OpenAPI schema
+    openapi_url="/openapi.json",  # OpenAPI schema
+    lifespan=lifespan
 )
 
+# Admission control: per-class concurrency limits and bounded queues, shed load early
+# (added before CORS so CORS wraps it and 429/503 rejections carry CORS headers)
+admission = AdmissionController.from_settings()
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,11 +114,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],  # Readable by browsers on admission rejections
 )
 
 # Include routers
 app.include_router(upload.router, prefix="/api/v1", tags=["Upload"])
 app.include_router(query.router, prefix="/api/v1", tags=["Query"])
+app.include_router(ingestion.router, prefix="/api/v1", tags=["Ingestion"])
+app.include_router(documents.router, prefix="/api/v1", tags=["Documents"])
+app.include_router(chats.router, prefix="/api/v1", tags=["Chats"])
 
 
 @app.get("/", tags=["Root"])
@@ -50,29 +138,49 @@ async def root():
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Health check endpoint"""
-    try:
-        from app.core.database import engine
-        
-        # Check database connection
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        
-        return {
-            "status": "healthy",
-            "service": settings.APP_NAME,
-            "version": settings.APP_VERSION,
-            "database": "connected"
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return {
-            "status": "unhealthy",
-            "service": settings.APP_NAME,
-            "version": settings.APP_VERSION,
-            "database": "disconnected",
-            "error": str(e)
-        }
+    """Health check endpoint (cached results of the background dependency checks)"""
+    health = app.state.health
+    dependencies = health.dependencies() if health is not None else {}
+    database = dependencies.get("database", {})
+    healthy = app.state.ready and health is not None and health.ready()
+    return {
+        "status": "healthy" if healthy else "unhealthy",
+        "service": settings.APP_NAME,
+        "version": settings.APP_VERSION,
+        "database": "connected" if database.get("ok") else "disconnected",
+        "dependencies": dependencies
+    }
+
+
+@app.get("/livez", tags=["Health"])
+async def liveness():
+    """Process is serving requests and the health check loop is not stuck (dependencies are not checked)"""
+    health = app.state.health
+    alive = health is None or health.alive()
+    content = {"alive": alive, "uptime_seconds": int(time.monotonic() - STARTED_AT)}
+    return JSONResponse(status_code=200 if alive else 503, content=content)
+
+
+@app.get("/readyz", tags=["Health"])
+async def readiness():
+    """
+    Ready once warm-up has finished and every dependency group passes its
+    latest check (503 otherwise, so no traffic reaches a cold or cut-off instance)
+    """
+    health = app.state.health
+    ready = app.state.ready and health is not None and health.ready()
+    content = {
+        "ready": ready,
+        "warmup": app.state.warmup_report,
+        "dependencies": health.dependencies() if health is not None else {}
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
+
+@app.get("/admission/stats", tags=["Health"])
+async def admission_stats():
+    """Active requests, queue lengths, queue-wait times and rejections per traffic class"""
+    return {"enabled": settings.ADMISSION_ENABLED, "pools": admission.stats()}
 
 
 @app.exception_handler(Exception)
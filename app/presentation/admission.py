@@ -0,0 +1,240 @@
+"""
+Admission control at the API edge
+
+Requests are sorted into traffic classes with their own concurrency limit
+and bounded wait queue, so a burst in one class (a large upload batch)
+cannot take the slots of another (queries). Requests that would only pile
+up behind provider rate limits are rejected right away with Retry-After.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Queue-wait samples kept per pool for percentiles
+WAIT_WINDOW = 1000
+# Smoothing of the average time a request holds a slot (for Retry-After)
+SERVICE_TIME_ALPHA = 0.1
+
+
+class AdmissionRejected(Exception):
+    """Request was shed instead of queued"""
+
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(reason)
+
+
+class AdmissionPool:
+    """
+    Concurrency limit with a bounded FIFO wait queue
+
+    A request runs at once while fewer than limit are active. Otherwise it
+    waits in the queue for up to max_wait seconds; a full queue rejects with
+    429 and an expired wait with 503, both with a Retry-After estimated from
+    the queue length and the average time a request holds its slot.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, max_wait: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: deque = deque()
+        self._waits: deque = deque(maxlen=WAIT_WINDOW)
+        self._service_time = 1.0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> float:
+        """
+        Take a slot, waiting in the queue if needed
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            AdmissionRejected: Queue full or wait expired
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._record_admission(0.0)
+            return 0.0
+
+        if len(self._waiters) >= self.queue_size:
+            self.rejected_full += 1
+            raise AdmissionRejected(429, self.retry_after(), f"{self.name} queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            # Slots are handed over by release(), active is not decremented in between
+            await asyncio.wait_for(waiter, timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self.rejected_timeout += 1
+            raise AdmissionRejected(503, self.retry_after(), f"{self.name} queue wait exceeded {self.max_wait:g}s")
+        except asyncio.CancelledError:
+            # Client went away: give back a slot that was handed over meanwhile
+            self._discard(waiter)
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+        waited = time.monotonic() - started
+        self._record_admission(waited)
+        return waited
+
+    def release(self, held: Optional[float] = None) -> None:
+        """Free a slot, handing it to the oldest waiter if there is one"""
+        if held is not None:
+            self._service_time += SERVICE_TIME_ALPHA * (held - self._service_time)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free for a new request"""
+        rounds = (len(self._waiters) + 1) / self.limit
+        return min(max(math.ceil(rounds * self._service_time), 1), 300)
+
+    def stats(self) -> Dict:
+        waits = np.asarray(self._waits) if self._waits else None
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "wait_avg_ms": int(waits.mean() * 1000) if waits is not None else 0,
+            "wait_p95_ms": int(np.percentile(waits, 95) * 1000) if waits is not None else 0,
+            "wait_max_ms": int(waits.max() * 1000) if waits is not None else 0,
+            "service_time_ms": int(self._service_time * 1000)
+        }
+
+    def _record_admission(self, waited: float) -> None:
+        self.admitted += 1
+        self._waits.append(waited)
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+class AdmissionController:
+    """Maps requests to pools by path prefix (write requests only, reads pass through)"""
+
+    def __init__(self, routes: List[Tuple[str, AdmissionPool]]):
+        # Longest prefix first, so more specific routes win
+        self.routes = sorted(routes, key=lambda route: len(route[0]), reverse=True)
+        self.pools = {pool.name: pool for _, pool in routes}
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        query = AdmissionPool(
+            "query",
+            settings.ADMISSION_QUERY_CONCURRENCY,
+            settings.ADMISSION_QUERY_QUEUE_SIZE,
+            settings.ADMISSION_QUERY_MAX_WAIT_SECONDS
+        )
+        upload = AdmissionPool(
+            "upload",
+            settings.ADMISSION_UPLOAD_CONCURRENCY,
+            settings.ADMISSION_UPLOAD_QUEUE_SIZE,
+            settings.ADMISSION_UPLOAD_MAX_WAIT_SECONDS
+        )
+        routes = [(prefix, query) for prefix in settings.ADMISSION_QUERY_PATHS_LIST]
+        routes += [(prefix, upload) for prefix in settings.ADMISSION_UPLOAD_PATHS_LIST]
+        return cls(routes)
+
+    def pool_for(self, method: str, path: str) -> Optional[AdmissionPool]:
+        if method != "POST":
+            return None
+        for prefix, pool in self.routes:
+            if path.startswith(prefix):
+                return pool
+        return None
+
+    def stats(self) -> Dict:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying the admission controller
+
+    The slot is held until the response is fully sent, streamed responses
+    included. Time spent in the queue is exposed to handlers as
+    request.state.queue_wait_seconds so their deadlines can account for it.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        pool = self.controller.pool_for(scope["method"], scope["path"])
+        if pool is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            waited = await pool.acquire()
+        except AdmissionRejected as rejected:
+            logger.warning(f"Shedding {scope['method']} {scope['path']}: {rejected.reason} (retry after {rejected.retry_after}s)")
+            await self._reject(send, rejected)
+            return
+
+        scope.setdefault("state", {})["queue_wait_seconds"] = waited
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release(held=time.monotonic() - started)
+
+    @staticmethod
+    async def _reject(send, rejected: AdmissionRejected) -> None:
+        body = json.dumps({
+            "success": False,
+            "message": "Server band, iltimos keyinroq qayta urinib ko'ring",
+            "detail": rejected.reason,
+            "retry_after": rejected.retry_after
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": rejected.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(rejected.retry_after).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,146 @@
+"""
+Chat history export CLI
+
+Streams chats to a CSV, NDJSON or Parquet file with constant memory and
+saves a cursor next to it after every batch, so an interrupted export can
+continue where it stopped:
+
+    python -m app.presentation.chat_export --format csv --output chats.csv --since 2024-01-01
+    python -m app.presentation.chat_export --format csv --output chats.csv --since 2024-01-01 --resume
+
+CSV and NDJSON resume by appending to the file (cut back to the last saved
+batch first). A Parquet file cannot be appended to, a resumed run writes
+the next part file (chats.part1.parquet, ...) to read together as a dataset.
+"""
+
+import argparse
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+from app.application.impl.chat_export import ChatExport
+from app.core.config import settings
+from app.domain.chat_cursor import decode_chat_cursor
+
+logger = logging.getLogger(__name__)
+
+
+def _state_path(output: Path) -> Path:
+    return output.with_name(output.name + ".cursor")
+
+
+def _load_state(output: Path) -> Optional[Dict]:
+    path = _state_path(output)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def _save_state(output: Path, state: Dict) -> None:
+    # Replace atomically, a crash never leaves a half-written cursor
+    path = _state_path(output)
+    temp = path.with_name(path.name + ".tmp")
+    temp.write_text(json.dumps(state))
+    os.replace(temp, path)
+
+
+def _part_path(output: Path, part: int) -> Path:
+    if part == 0:
+        return output
+    return output.with_name(f"{output.stem}.part{part}{output.suffix}")
+
+
+def run_export(
+    export_format: str,
+    output: Path,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    resume: bool = False
+) -> Dict:
+    """
+    Export chats to output, saving the cursor after every batch
+
+    Args:
+        export_format: csv, ndjson or parquet
+        output: Target file
+        since / until: Creation time range
+        batch_size: Rows per batch (default CHAT_EXPORT_BATCH_SIZE)
+        resume: Continue from the cursor saved by an interrupted run
+
+    Returns:
+        Rows written by this run, total rows and the last cursor
+    """
+    from app.core.database import engine
+
+    state = _load_state(output) if resume else None
+    if not resume:
+        _state_path(output).unlink(missing_ok=True)
+    if state is not None and state["format"] != export_format:
+        raise ValueError(f"{output} was exported as {state['format']}, not {export_format}")
+
+    after = decode_chat_cursor(state["cursor"]) if state and state["cursor"] else None
+    part = 0
+    if state is not None and export_format == "parquet":
+        part = state["part"] + 1
+    appending = state is not None and export_format != "parquet"
+
+    export = ChatExport(
+        engine,
+        export_format,
+        batch_size or settings.CHAT_EXPORT_BATCH_SIZE,
+        since=since,
+        until=until,
+        after=after,
+        header=not appending
+    )
+    path = _part_path(output, part)
+    total = state["rows"] if state else 0
+
+    with open(path, "r+b" if appending else "wb") as file:
+        if appending:
+            # Drop whatever was written after the last saved cursor
+            file.truncate(state["offset"])
+            file.seek(state["offset"])
+        for chunk in export.stream():
+            file.write(chunk)
+            # Parquet parts are only readable once complete, save the cursor after the footer
+            if export_format == "parquet" or export.cursor is None:
+                continue
+            file.flush()
+            os.fsync(file.fileno())
+            _save_state(output, {
+                "format": export_format,
+                "cursor": export.cursor,
+                "offset": file.tell(),
+                "rows": total + export.rows,
+                "part": part
+            })
+
+    if export_format == "parquet":
+        _save_state(output, {
+            "format": export_format,
+            "cursor": export.cursor or (state["cursor"] if state else None),
+            "offset": 0,
+            "rows": total + export.rows,
+            "part": part
+        })
+
+    return {"output": str(path), "rows": export.rows, "total_rows": total + export.rows, "cursor": export.cursor}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Export chat history")
+    parser.add_argument("--format", choices=["csv", "ndjson", "parquet"], default="csv")
+    parser.add_argument("--output", type=Path, required=True)
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only chats created at or after (ISO 8601)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Only chats created before (ISO 8601)")
+    parser.add_argument("--batch-size", type=int, help="Rows per batch (default CHAT_EXPORT_BATCH_SIZE)")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted export of --output")
+    args = parser.parse_args()
+
+    print(run_export(args.format, args.output, args.since, args.until, args.batch_size, args.resume))
@@ -0,0 +1,138 @@
+"""
+Chat table maintenance jobs
+
+Maintenance creates monthly chat partitions ahead of time, rolls complete
+days up into chat_daily_stats and expires partitions past
+CHAT_RETENTION_MONTHS. The analytics refresh recomputes the hourly summary
+tables behind /chats/analytics for the hours since its last run. Both run
+periodically inside the API (every instance tries, an advisory lock lets
+one of them through) or once from cron:
+
+    python -m app.presentation.chat_maintenance
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict
+from sqlalchemy import text
+from app.core.config import settings
+from app.infrastructure.repositories.chat_analytics_repository import ChatAnalyticsRepository
+from app.infrastructure.repositories.chat_partition_repository import (
+    ChatPartitionRepository,
+    add_months,
+    month_start,
+)
+
+logger = logging.getLogger(__name__)
+
+# Partition DDL locks the chat table briefly; waiting longer behind a slow
+# query would also hold up every insert queued behind the DDL
+DDL_LOCK_TIMEOUT = "5s"
+
+
+def run_chat_maintenance() -> Dict:
+    """
+    Run one maintenance pass in a single transaction
+
+    Returns:
+        What was created, rolled up and expired (skipped=True when another
+        instance holds the lock or the database is not PostgreSQL)
+    """
+    from app.core.database import SessionLocal, engine
+
+    if engine.dialect.name != "postgresql":
+        return {"skipped": True, "reason": f"{engine.dialect.name} has no partitioned chat table"}
+
+    repo = ChatPartitionRepository()
+    db = SessionLocal()
+    try:
+        if not repo.try_lock(db):
+            db.rollback()
+            return {"skipped": True, "reason": "another maintenance run holds the lock"}
+        db.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+
+        today = datetime.now(timezone.utc).date()
+        created = repo.ensure_partitions(db, today, settings.CHAT_PARTITION_MONTHS_AHEAD)
+        days, first_day = repo.rollup_daily_stats(db, until=today)
+
+        # Whole months only: a partition goes once its last day is older than the window
+        keep_month = add_months(month_start(today), -settings.CHAT_RETENTION_MONTHS)
+        keep_from = datetime(keep_month.year, keep_month.month, 1, tzinfo=timezone.utc)
+        expired = []
+        if settings.CHAT_RETENTION_MONTHS > 0:
+            expired = repo.expire_partitions(db, keep_from, archive=settings.CHAT_ARCHIVE_EXPIRED)
+
+        db.commit()
+        return {
+            "skipped": False,
+            "created_partitions": created,
+            "rolled_up_days": days,
+            "rolled_up_from": first_day.isoformat() if first_day else None,
+            "expired_partitions": expired,
+            "archived": settings.CHAT_ARCHIVE_EXPIRED
+        }
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Chat maintenance failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+def run_chat_analytics_refresh() -> Dict:
+    """
+    Refresh the hourly chat summaries in a single transaction
+
+    Returns:
+        First hour recomputed (skipped=True when another instance holds the
+        lock or the database is not PostgreSQL)
+    """
+    from app.core.database import SessionLocal, engine
+
+    if engine.dialect.name != "postgresql":
+        return {"skipped": True, "reason": f"{engine.dialect.name} has no chat analytics tables"}
+
+    repo = ChatAnalyticsRepository()
+    db = SessionLocal()
+    try:
+        if not repo.try_lock(db):
+            db.rollback()
+            return {"skipped": True, "reason": "another refresh holds the lock"}
+        since = repo.refresh(db)
+        db.commit()
+        return {"skipped": False, "refreshed_from": since.isoformat() if since else None}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Chat analytics refresh failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+async def chat_maintenance_loop() -> None:
+    """Run maintenance now and then every CHAT_MAINTENANCE_INTERVAL_HOURS"""
+    while True:
+        try:
+            # DDL waits for locks on the chat table, keep it off the event loop
+            report = await asyncio.to_thread(run_chat_maintenance)
+            logger.info(f"Chat maintenance: {report}")
+        except Exception as e:
+            logger.error(f"Chat maintenance run failed: {str(e)}")
+        await asyncio.sleep(settings.CHAT_MAINTENANCE_INTERVAL_HOURS * 3600)
+
+
+async def chat_analytics_loop() -> None:
+    """Refresh the chat summaries every CHAT_ANALYTICS_REFRESH_SECONDS"""
+    while True:
+        try:
+            await asyncio.to_thread(run_chat_analytics_refresh)
+        except Exception as e:
+            logger.error(f"Chat analytics refresh run failed: {str(e)}")
+        await asyncio.sleep(settings.CHAT_ANALYTICS_REFRESH_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    print(run_chat_maintenance())
+    print(run_chat_analytics_refresh())
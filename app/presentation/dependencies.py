@@ -0,0 +1,26 @@
+"""
+Service factories shared by routers and background tasks
+"""
+
+from typing import Optional
+from app.application.impl.word_extractor_impl import WordExtractorImpl
+from app.application.impl.document_service_impl import DocumentServiceImpl
+from app.application.impl.embedding_service_impl import EmbeddingServiceImpl
+from app.application.impl.vector_store_impl import VectorStoreImpl
+from app.application.impl.ingestion_service_impl import IngestionServiceImpl
+from app.infrastructure.repositories.checkpoint_repository import IngestionCheckpointRepository
+
+
+def get_ingestion_service(checkpoints: Optional[IngestionCheckpointRepository] = None) -> IngestionServiceImpl:
+    """Build ingestion service with its dependencies (checkpoints under INGEST_CHECKPOINT_DIR unless given)"""
+    word_extractor = WordExtractorImpl()
+    document_service = DocumentServiceImpl(word_extractor)
+    embedding_service = EmbeddingServiceImpl()
+    vector_store = VectorStoreImpl()
+    
+    return IngestionServiceImpl(
+        document_service=document_service,
+        embedding_service=embedding_service,
+        vector_store=vector_store,
+        checkpoints=checkpoints
+    )
@@ -0,0 +1,131 @@
+"""
+FAQ jobs
+
+Mining clusters the questions of the last FAQ_LOOKBACK_DAYS and replaces
+faq_entries every FAQ_MINING_INTERVAL_HOURS (every instance tries, on
+PostgreSQL an advisory lock lets one of them through). Every instance
+reloads its in-memory FAQ index from faq_entries every
+FAQ_INDEX_REFRESH_SECONDS, leaving out entries whose source documents were
+deleted, replaced or indexed again since they were mined. Mining can also
+run once from cron:
+
+    python -m app.presentation.faq_jobs
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+import numpy as np
+from app.application.impl.chat_sources import hydrate_sources
+from app.application.impl.embedding_service_impl import EmbeddingServiceImpl
+from app.application.impl.faq_index import get_faq_index
+from app.application.impl.faq_miner import FaqMiner
+from app.application.impl.vector_store_impl import VectorStoreImpl
+from app.core.config import settings
+from app.infrastructure.repositories.document_repository import DocumentRepository
+from app.infrastructure.repositories.faq_repository import FaqRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def run_faq_mining() -> Dict:
+    """
+    Mine FAQ entries from recent chats and replace the stored ones
+
+    Returns:
+        Entries written (skipped=True when another instance holds the lock)
+    """
+    from app.core.database import SessionLocal, engine
+
+    repo = FaqRepository()
+    db = SessionLocal()
+    try:
+        if engine.dialect.name == "postgresql" and not repo.try_lock(db):
+            db.rollback()
+            return {"skipped": True, "reason": "another mining run holds the lock"}
+
+        since = datetime.now(timezone.utc) - timedelta(days=settings.FAQ_LOOKBACK_DAYS)
+        chats = await asyncio.to_thread(repo.recent_answered_chats, db, since, settings.FAQ_MAX_CHATS)
+        document_ids = {source.get("document_id") for chat in chats for source in chat.sources or []}
+        documents = await DocumentRepository().get_versions(db, document_ids - {None})
+
+        entries = await FaqMiner.from_settings(EmbeddingServiceImpl()).mine(chats, documents)
+        await asyncio.to_thread(repo.replace_entries, db, entries)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"FAQ mining failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+    await reload_faq_index()
+    return {"skipped": False, "chats": len(chats), "entries": len(entries)}
+
+
+async def reload_faq_index() -> int:
+    """
+    Load the current FAQ entries into this instance's index
+
+    Returns:
+        Entries loaded
+    """
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        entries = await asyncio.to_thread(FaqRepository().list_entries, db)
+        document_ids = {document_id for entry in entries for document_id in entry.source_versions}
+        documents = await DocumentRepository().get_versions(db, document_ids)
+    finally:
+        db.close()
+
+    current = [
+        entry for entry in entries
+        if all(documents.get(document_id, (None,))[0] == version for document_id, version in entry.source_versions.items())
+    ]
+    if len(current) < len(entries):
+        logger.info(f"Left out {len(entries) - len(current)} FAQ entries with changed source documents")
+
+    # Chunk text is resolved once here, a match is answered without any lookup
+    sources = await hydrate_sources(VectorStoreImpl(), [entry.sources for entry in current])
+    get_faq_index().load([
+        {
+            "id": entry.id,
+            "question": entry.question,
+            "answer": entry.answer,
+            "sources": entry_sources,
+            "variants": entry.variants,
+            "centroid": np.frombuffer(entry.centroid, dtype=np.float32),
+            "document_ids": list(entry.source_versions)
+        }
+        for entry, entry_sources in zip(current, sources)
+    ])
+    return len(current)
+
+
+async def faq_mining_loop() -> None:
+    """Mine FAQ entries now and then every FAQ_MINING_INTERVAL_HOURS"""
+    while True:
+        try:
+            report = await run_faq_mining()
+            logger.info(f"FAQ mining: {report}")
+        except Exception as e:
+            logger.error(f"FAQ mining run failed: {str(e)}")
+        await asyncio.sleep(settings.FAQ_MINING_INTERVAL_HOURS * 3600)
+
+
+async def faq_index_loop() -> None:
+    """Reload the FAQ index every FAQ_INDEX_REFRESH_SECONDS"""
+    while True:
+        try:
+            await reload_faq_index()
+        except Exception as e:
+            logger.error(f"FAQ index reload failed: {str(e)}")
+        await asyncio.sleep(settings.FAQ_INDEX_REFRESH_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    print(asyncio.run(run_faq_mining()))
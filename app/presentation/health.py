@@ -0,0 +1,188 @@
+"""
+Background dependency checks for the health probes
+
+Probes must not do I/O themselves: a synchronous database ping inside an
+async handler blocks the event loop, and checking on every probe multiplies
+the load on the dependencies. The checker verifies Postgres, the vector
+store and the LLM providers periodically, each with a timeout, and the
+probes only read the cached results.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import text
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A result older than this many check intervals no longer counts
+STALE_INTERVALS = 3
+
+
+def _ping_database() -> Dict:
+    from app.core.database import engine
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return {"pool": engine.pool.status()}
+
+
+def _ping_vector_store() -> Dict:
+    from app.application.impl.vector_store_impl import get_vector_store_client
+
+    info = get_vector_store_client().get_collection_info()
+    if not info:
+        raise Exception("Collection info unavailable")
+    return {"backend": settings.VECTOR_STORE_BACKEND, "points_count": info.get("points_count")}
+
+
+class _Check:
+    """One dependency check with its schedule and last result"""
+
+    def __init__(self, name: str, group: str, run: Callable[[], Awaitable[Dict]], interval: float):
+        self.name = name
+        self.group = group
+        self.run = run
+        self.interval = interval
+        self.task: Optional[asyncio.Task] = None
+        self.started_at = 0.0
+        self.result: Optional[Dict] = None
+        self.checked_at: Optional[float] = None
+
+    def due(self, now: float) -> bool:
+        return self.checked_at is None or now - self.checked_at >= self.interval
+
+    def fresh(self, now: float) -> bool:
+        return self.checked_at is not None and now - self.checked_at < self.interval * STALE_INTERVALS
+
+    def report(self, now: float) -> Dict:
+        if self.result is None:
+            return {"ok": False, "group": self.group, "error": "not checked yet"}
+        report = {"group": self.group, **self.result, "age_seconds": round(now - self.checked_at, 1)}
+        if not self.fresh(now):
+            report.update(ok=False, error=report.get("error") or "result is stale")
+        return report
+
+
+class HealthChecker:
+    """
+    Periodic dependency checks with cached results
+
+    Every check belongs to a group. The instance is ready when each group
+    has at least one passing, fresh check, so one LLM provider being down is
+    fine as long as the other one answers. A check still running from the
+    previous round (a hung connect) is not started again but reported as
+    failed, so hanging dependencies cannot pile up threads.
+    """
+
+    def __init__(self, interval: float, timeout: float):
+        self.interval = interval
+        self.timeout = timeout
+        self.checks: List[_Check] = []
+        self.started_at = time.monotonic()
+        self.last_round_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls) -> "HealthChecker":
+        checker = cls(settings.HEALTH_CHECK_INTERVAL_SECONDS, settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+        # Blocking client calls run in threads, off the event loop
+        checker.add("database", "database", lambda: asyncio.to_thread(_ping_database))
+        checker.add("vector_store", "vector_store", lambda: asyncio.to_thread(_ping_vector_store))
+        checker.add_llm_providers()
+        return checker
+
+    def add(self, name: str, group: str, run: Callable[[], Awaitable[Dict]], interval: Optional[float] = None) -> None:
+        self.checks.append(_Check(name, group, run, interval or self.interval))
+
+    def add_llm_providers(self) -> None:
+        """One check per provider of the LLM router, at the (longer) provider interval"""
+        from app.infrastructure.llm.llm_router import get_llm_router
+
+        for provider in get_llm_router().providers:
+            async def ping(provider=provider) -> Dict:
+                await provider.client.ping()
+                return {"circuit": provider.breaker.state}
+
+            self.add(f"llm_{provider.name}", "llm", ping, settings.HEALTH_PROVIDER_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        for check in self.checks:
+            if check.task is not None:
+                check.task.cancel()
+
+    async def check_now(self) -> None:
+        """Run all checks that are due, concurrently"""
+        now = time.monotonic()
+        due = [check for check in self.checks if check.due(now)]
+        await asyncio.gather(*(self._run(check) for check in due))
+        self.last_round_at = time.monotonic()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.check_now()
+            except Exception as e:
+                logger.error(f"Health check round failed: {str(e)}")
+            await asyncio.sleep(min(check.interval for check in self.checks) if self.checks else self.interval)
+
+    async def _run(self, check: _Check) -> None:
+        if check.task is not None and not check.task.done():
+            elapsed = time.monotonic() - check.started_at
+            self._record(check, {"ok": False, "latency_ms": int(elapsed * 1000), "error": "previous check still running"})
+            return
+
+        check.started_at = time.monotonic()
+        check.task = asyncio.create_task(check.run())
+        # A check finishing after its timeout is not awaited again, retrieve its error here
+        check.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        done, _ = await asyncio.wait([check.task], timeout=self.timeout)
+        latency_ms = int((time.monotonic() - check.started_at) * 1000)
+
+        if not done:
+            result = {"ok": False, "latency_ms": latency_ms, "error": f"timed out after {self.timeout:g}s"}
+        elif check.task.exception() is not None:
+            result = {"ok": False, "latency_ms": latency_ms, "error": str(check.task.exception())}
+        else:
+            result = {"ok": True, "latency_ms": latency_ms, **(check.task.result() or {})}
+        self._record(check, result)
+
+    def _record(self, check: _Check, result: Dict) -> None:
+        was_ok = check.result["ok"] if check.result else None
+        if result["ok"] != was_ok:
+            if result["ok"]:
+                logger.info(f"✅ {check.name} is reachable ({result['latency_ms']} ms)")
+            else:
+                logger.warning(f"⚠️ {check.name} check failed: {result['error']}")
+        check.result = result
+        check.checked_at = time.monotonic()
+
+    def dependencies(self) -> Dict[str, Dict]:
+        now = time.monotonic()
+        return {check.name: check.report(now) for check in self.checks}
+
+    def ready(self) -> bool:
+        """Every group has a passing, fresh check"""
+        now = time.monotonic()
+        groups: Dict[str, bool] = {}
+        for check in self.checks:
+            passing = check.result is not None and check.result["ok"] and check.fresh(now)
+            groups[check.group] = groups.get(check.group, False) or passing
+        return bool(groups) and all(groups.values())
+
+    def alive(self) -> bool:
+        """The check loop is still running and completing rounds (a stuck loop means a wedged process)"""
+        if self._task is None:
+            return True
+        if self._task.done():
+            return False
+        last = self.last_round_at or self.started_at
+        return time.monotonic() - last < self.interval * STALE_INTERVALS + self.timeout
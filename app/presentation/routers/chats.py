@@ -0,0 +1,157 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+import logging
+import uuid
+from app.core.config import settings
+from app.core.database import engine, get_db
+from app.application.impl.chat_export import ChatExport
+from app.application.impl.chat_sources import hydrate_sources
+from app.application.impl.vector_store_impl import VectorStoreImpl
+from app.domain.chat_cursor import decode_chat_cursor, encode_chat_cursor
+from app.domain.models import Chat
+from app.domain.schemas import ChatAnalyticsResponse, ChatHistoryItem, ChatPageResponse
+from app.infrastructure.repositories.chat_analytics_repository import ChatAnalyticsRepository
+from app.infrastructure.repositories.chat_repository import ChatRepository
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        return decode_chat_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Noto'g'ri cursor")
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Aware UTC time; values sent without a timezone are taken as UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+async def _to_items(chats: List[Chat]) -> List[ChatHistoryItem]:
+    """Resolve the sources of all chats with one vector store lookup"""
+    sources = await hydrate_sources(VectorStoreImpl(), [chat.sources for chat in chats])
+    return [
+        ChatHistoryItem(
+            id=chat.id,
+            question=chat.question,
+            answer=chat.answer,
+            answered=chat.answered,
+            latency_ms=chat.latency_ms,
+            answer_source=chat.answer_source,
+            sources=chat_sources,
+            created_at=chat.created_at
+        )
+        for chat, chat_sources in zip(chats, sources)
+    ]
+
+
+@router.get("/chats", response_model=ChatPageResponse)
+async def list_chats(
+    limit: int = Query(20, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    since: Optional[datetime] = Query(None, description="Only chats created at or after"),
+    until: Optional[datetime] = Query(None, description="Only chats created before"),
+    db: Session = Depends(get_db)
+):
+    """
+    Chat history, newest first, paginated by cursor
+    
+    - **cursor**: Continue after the last chat of the previous page
+    - **since** / **until**: Creation time range (UTC when sent without a timezone)
+    """
+    limit = min(limit, settings.CHAT_PAGE_MAX_SIZE)
+    before = _decode_cursor(cursor) if cursor else None
+    
+    # One extra row tells whether another page follows
+    chats = await ChatRepository().list_chats(db, limit + 1, before=before, since=_utc(since), until=_utc(until))
+    next_cursor = encode_chat_cursor(chats[limit - 1].created_at, chats[limit - 1].id) if len(chats) > limit else None
+    
+    try:
+        items = await _to_items(chats[:limit])
+    except Exception as e:
+        logger.error(f"Error loading chat sources: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return ChatPageResponse(chats=items, next_cursor=next_cursor)
+
+
+@router.get("/chats/analytics", response_model=ChatAnalyticsResponse)
+async def get_chat_analytics(
+    since: Optional[datetime] = Query(None, description="Range start (default: 7 days ago)"),
+    until: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    top_documents: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Questions per hour, latency percentiles, no-answer rate and most cited documents
+    
+    Read from hourly summaries refreshed every CHAT_ANALYTICS_REFRESH_SECONDS,
+    so the chat table itself is not scanned.
+    Bounds sent without a timezone are taken as UTC.
+    """
+    until = _utc(until) or datetime.now(timezone.utc)
+    since = _utc(since) or until - timedelta(days=7)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since until dan oldin bo'lishi kerak")
+    if db.get_bind().dialect.name != "postgresql":
+        raise HTTPException(status_code=501, detail="Analitika faqat PostgreSQL bilan ishlaydi")
+    
+    summary = ChatAnalyticsRepository().summary(db, since, until, top_documents)
+    return ChatAnalyticsResponse(since=since, until=until, **summary)
+
+
+@router.get("/chats/export")
+async def export_chats(
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+    since: Optional[datetime] = Query(None, description="Only chats created at or after"),
+    until: Optional[datetime] = Query(None, description="Only chats created before"),
+    after: Optional[str] = Query(None, description="Cursor of the last chat already exported")
+):
+    """
+    Export chat history as CSV, NDJSON or Parquet, oldest first
+    
+    Rows are streamed in batches of CHAT_EXPORT_BATCH_SIZE through a
+    server-side cursor, so any range can be exported with constant memory.
+    Sources are exported as chunk references.
+    
+    - **after**: Resume after a chat (cursor as returned by /chats or saved by the export CLI)
+    """
+    after_position = _decode_cursor(after) if after else None
+    try:
+        export = ChatExport(
+            engine,
+            format,
+            settings.CHAT_EXPORT_BATCH_SIZE,
+            since=_utc(since),
+            until=_utc(until),
+            after=after_position
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    filename = f"chats-{datetime.now(timezone.utc):%Y%m%d%H%M%S}.{export.extension}"
+    # Sync generator: Starlette iterates it in the threadpool, off the event loop
+    return StreamingResponse(
+        export.stream(),
+        media_type=export.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/chats/{chat_id}", response_model=ChatHistoryItem)
+async def get_chat(chat_id: uuid.UUID, db: Session = Depends(get_db)):
+    """Get one chat with its sources"""
+    chat = await ChatRepository().get_chat_by_id(db, chat_id)
+    if chat is None:
+        raise HTTPException(status_code=404, detail="Suhbat topilmadi")
+    return (await _to_items([chat]))[0]
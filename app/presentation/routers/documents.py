@@ -0,0 +1,115 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+import logging
+import os
+from app.core.config import settings
+from app.core.database import get_db
+from app.application.impl.faq_index import get_faq_index
+from app.application.impl.semantic_cache import get_semantic_cache
+from app.domain.schemas import DocumentResponse, DocumentDetailResponse, DocumentListResponse, DedupStatsResponse
+from app.infrastructure.repositories.checkpoint_repository import IngestionCheckpointRepository
+from app.infrastructure.repositories.document_repository import DocumentRepository, STATUS_PROCESSING
+from app.infrastructure.repositories.fingerprint_repository import ChunkFingerprintRepository
+from app.presentation.dependencies import get_ingestion_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/documents", response_model=DocumentListResponse)
+async def list_documents(
+    status: Optional[str] = Query(None, description="processing, indexed, partial or failed"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    List uploaded documents from the registry
+    
+    - **status**: Filter by ingestion status
+    """
+    document_repo = DocumentRepository()
+    documents = await document_repo.list_documents(db, status=status, limit=limit, offset=offset)
+    total = await document_repo.count_documents(db, status=status)
+    
+    return DocumentListResponse(
+        total=total,
+        documents=[DocumentResponse.model_validate(document) for document in documents]
+    )
+
+
+@router.get("/documents/dedup/stats", response_model=DedupStatsResponse)
+async def get_dedup_stats(db: Session = Depends(get_db)):
+    """Points and embedding calls saved by chunk deduplication"""
+    stored_points, references = await ChunkFingerprintRepository().get_stats(db)
+    total_chunks, duplicate_chunks = await DocumentRepository().get_chunk_totals(db)
+    
+    return DedupStatsResponse(
+        stored_points=stored_points,
+        document_references=references,
+        total_chunks=total_chunks,
+        duplicate_chunks=duplicate_chunks,
+        saved_ratio=round(duplicate_chunks / total_chunks, 4) if total_chunks else 0.0
+    )
+
+
+@router.post("/documents/vectors/rebuild")
+async def rebuild_document_vectors():
+    """Recompute document vectors used by hierarchical search from the stored chunks"""
+    if not settings.HIERARCHICAL_SEARCH_ENABLED:
+        raise HTTPException(status_code=409, detail="Ierarxik qidiruv o'chirilgan")
+    
+    try:
+        count = await get_ingestion_service().vector_store.rebuild_document_vectors()
+    except Exception as e:
+        logger.error(f"Error rebuilding document vectors: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {"success": True, "documents": count}
+
+
+@router.get("/documents/{document_id}", response_model=DocumentDetailResponse)
+async def get_document(document_id: str, db: Session = Depends(get_db)):
+    """Get registered document with its point IDs"""
+    document = await DocumentRepository().get_document(db, document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Hujjat topilmadi")
+    return DocumentDetailResponse.model_validate(document)
+
+
+@router.delete("/documents/{document_id}")
+async def delete_document(document_id: str, db: Session = Depends(get_db)):
+    """Delete document: its points (shared ones are kept), checkpoint and registry entry"""
+    document_repo = DocumentRepository()
+    document = await document_repo.get_document(db, document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Hujjat topilmadi")
+    
+    if document.status == STATUS_PROCESSING and not await document_repo.processing_expired(
+        db, document, settings.INGEST_PROCESSING_TIMEOUT_SECONDS
+    ):
+        raise HTTPException(status_code=409, detail="Hujjat hozir qayta ishlanmoqda")
+    
+    # Partially indexed documents have no recorded point IDs yet, they are found by document_id
+    deleted = await get_ingestion_service().remove_document_points(document_id, document.point_ids or None)
+    
+    if not deleted:
+        raise HTTPException(status_code=502, detail="Vektor bazasidan o'chirishda xatolik")
+    
+    checkpoints = IngestionCheckpointRepository()
+    checkpoint = checkpoints.get(document_id)
+    if checkpoint is not None:
+        if os.path.exists(checkpoint.file_path):
+            os.remove(checkpoint.file_path)
+        checkpoints.delete(document_id)
+    
+    await document_repo.delete_document(db, document_id)
+    # Stored answers citing the document stop here at once; other instances drop
+    # FAQ entries on their next reload and cached answers on their next hit
+    get_faq_index().invalidate_documents([document_id])
+    get_semantic_cache().invalidate_documents([document_id])
+    logger.info(f"Deleted document {document_id} ({len(document.point_ids or [])} points)")
+    
+    return {"success": True, "document_id": document_id}
@@ -0,0 +1,175 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+import logging
+import os
+from app.core.database import get_db
+from app.domain.models import IngestionJob
+from app.domain.schemas import (
+    IngestionJobResponse,
+    IngestionJobListResponse,
+    IngestionQueueResponse,
+    QueuedIngestionJobResponse,
+    UploadResponse,
+)
+from app.infrastructure.repositories.checkpoint_repository import (
+    IngestionCheckpoint,
+    IngestionCheckpointRepository,
+    STATUS_RUNNING,
+)
+from app.infrastructure.repositories.ingestion_job_repository import IngestionJobRepository
+from app.presentation.dependencies import get_ingestion_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _to_response(checkpoint: IngestionCheckpoint) -> IngestionJobResponse:
+    manifest = checkpoint.manifest
+    return IngestionJobResponse(
+        document_id=manifest["document_id"],
+        filename=manifest["filename"],
+        status=manifest["status"],
+        chunks_indexed=manifest["chunks_indexed"],
+        total_chunks=manifest["total_chunks"],
+        batches_indexed=len(manifest["upserted_batches"]),
+        attempts=manifest["attempts"],
+        error=manifest["error"],
+        created_at=manifest["created_at"],
+        updated_at=manifest["updated_at"]
+    )
+
+
+def _to_queued_response(job: IngestionJob) -> QueuedIngestionJobResponse:
+    return QueuedIngestionJobResponse(
+        id=str(job.id),
+        document_id=str(job.document_id),
+        filename=job.filename,
+        status=job.status,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        run_after=job.run_after,
+        locked_by=job.locked_by,
+        lease_expires_at=job.lease_expires_at,
+        heartbeat_at=job.heartbeat_at,
+        last_error=job.last_error,
+        finished_at=job.finished_at,
+        created_at=job.created_at,
+        updated_at=job.updated_at
+    )
+
+
+@router.get("/ingestion/jobs", response_model=IngestionJobListResponse)
+async def list_ingestion_jobs(
+    status: Optional[str] = Query(None, description="running, partial, failed or completed")
+):
+    """
+    List ingestion jobs and their progress
+    
+    - **status**: Filter by status (e.g. `partial` for partially indexed documents)
+    """
+    repository = IngestionCheckpointRepository()
+    checkpoints = repository.list_checkpoints([status] if status else None)
+    
+    return IngestionJobListResponse(
+        total=len(checkpoints),
+        jobs=[_to_response(checkpoint) for checkpoint in checkpoints]
+    )
+
+
+@router.get("/ingestion/jobs/{document_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(document_id: str):
+    """Get ingestion progress of a document"""
+    checkpoint = IngestionCheckpointRepository().get(document_id)
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail="Ingestion topilmadi")
+    return _to_response(checkpoint)
+
+
+@router.post("/ingestion/jobs/{document_id}/resume", response_model=UploadResponse)
+async def resume_ingestion_job(document_id: str):
+    """Resume a failed or interrupted ingestion from its last checkpoint"""
+    checkpoint = IngestionCheckpointRepository().get(document_id)
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail="Ingestion topilmadi")
+    
+    if checkpoint.status == STATUS_RUNNING:
+        raise HTTPException(status_code=409, detail="Ingestion allaqachon davom etmoqda")
+    
+    try:
+        report = await get_ingestion_service().resume(document_id)
+    except Exception as e:
+        logger.error(f"Error resuming ingestion {document_id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return UploadResponse(
+        success=True,
+        message=f"Fayl qayta ishlandi ({report.resumed_batches} ta bo'lak guruhi checkpointdan tiklandi)",
+        document_id=document_id,
+        chunks_count=report.chunks_count
+    )
+
+
+@router.delete("/ingestion/jobs/{document_id}")
+async def delete_ingestion_job(document_id: str):
+    """Discard an unfinished ingestion: its checkpoint, source file and stored points"""
+    repository = IngestionCheckpointRepository()
+    checkpoint = repository.get(document_id)
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail="Ingestion topilmadi")
+    
+    if checkpoint.status == STATUS_RUNNING:
+        raise HTTPException(status_code=409, detail="Ingestion allaqachon davom etmoqda")
+    
+    if checkpoint.manifest["chunks_indexed"] and checkpoint.manifest["total_chunks"] is None:
+        await get_ingestion_service().remove_document_points(document_id)
+    
+    if os.path.exists(checkpoint.file_path):
+        os.remove(checkpoint.file_path)
+    repository.delete(document_id)
+    
+    return {"success": True, "document_id": document_id}
+
+
+@router.get("/ingestion/queue", response_model=IngestionQueueResponse)
+async def list_queued_ingestion_jobs(
+    status: Optional[str] = Query(None, description="queued, running, completed or dead"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Ingestion queue: job counts per status and the most recent jobs
+    
+    - **status**: Filter by status (e.g. `dead` for dead-lettered jobs)
+    """
+    repository = IngestionJobRepository()
+    jobs = await repository.list_jobs(db, status=status, limit=limit)
+    return IngestionQueueResponse(
+        counts=await repository.count_by_status(db),
+        jobs=[_to_queued_response(job) for job in jobs]
+    )
+
+
+@router.get("/ingestion/queue/{job_id}", response_model=QueuedIngestionJobResponse)
+async def get_queued_ingestion_job(job_id: str, db: Session = Depends(get_db)):
+    """Get an ingestion queue job"""
+    job = await IngestionJobRepository().get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Navbatdagi ish topilmadi")
+    return _to_queued_response(job)
+
+
+@router.post("/ingestion/queue/{job_id}/retry", response_model=QueuedIngestionJobResponse)
+async def retry_queued_ingestion_job(job_id: str, db: Session = Depends(get_db)):
+    """Put a dead-lettered job back in the queue with fresh attempts"""
+    repository = IngestionJobRepository()
+    job = await repository.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Navbatdagi ish topilmadi")
+    
+    if not await repository.retry(db, job_id):
+        raise HTTPException(status_code=409, detail="Faqat muvaffaqiyatsiz tugagan (dead) ishni qayta navbatga qo'yish mumkin")
+    
+    db.refresh(job)
+    return _to_queued_response(job)
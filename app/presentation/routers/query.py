@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+import json
 import logging
 import traceback
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.deadline import Deadline, DeadlineExceeded
 from app.application.impl.embedding_service_impl import EmbeddingServiceImpl
 from app.application.impl.vector_store_impl import VectorStoreImpl
 from app.application.impl.query_service_impl import QueryServiceImpl
-from app.domain.schemas import QueryRequest, QueryResponse
+from app.application.impl.semantic_cache import get_semantic_cache
+from app.infrastructure.llm.llm_router import LLMProvidersFailed, get_llm_router
+from app.domain.schemas import QueryRequest, QueryResponse, BatchQueryRequest
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +22,7 @@ router = APIRouter()
 @router.post("/query", response_model=QueryResponse)
 async def query_documents(
     request: QueryRequest,
+    http_request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -23,6 +30,12 @@ async def query_documents(
     
     - **question**: Question to ask about uploaded documents
     """
+    # The budget starts when the request arrives (admission queue included), every stage below spends from it
+    timeout = settings.QUERY_TIMEOUT_SECONDS
+    if request.timeout_seconds is not None:
+        timeout = min(timeout, request.timeout_seconds)
+    deadline = Deadline(timeout - getattr(http_request.state, "queue_wait_seconds", 0.0))
+    
     try:
         logger.info(f"Received query: {request.question}")
         
@@ -46,9 +59,10 @@ async def query_documents(
         
         # Process query
         logger.info("Processing query...")
-        answer, sources = await query_service.process_query(
+        answer, sources, diagnostics = await query_service.process_query(
             question=request.question,
-            db=db
+            db=db,
+            deadline=deadline
         )
         logger.info(f"Query processed successfully, found {len(sources)} sources")
         
@@ -56,12 +70,27 @@ async def query_documents(
             success=True,
             question=request.question,
             answer=answer,
-            sources=sources
+            sources=sources,
+            diagnostics=diagnostics
         )
         
     except HTTPException as he:
         logger.error(f"HTTP Exception: {he.detail}")
         raise
+    
+    except DeadlineExceeded as de:
+        logger.error(f"Query timed out: {str(de)}")
+        raise HTTPException(
+            status_code=504,
+            detail=f"Savolni qayta ishlash vaqti tugadi ({de.stage})"
+        )
+    
+    except LLMProvidersFailed as lf:
+        logger.error(f"All LLM providers failed: {str(lf)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Javob berish xizmati vaqtincha ishlamayapti, keyinroq urinib ko'ring"
+        )
         
     except Exception as e:
         logger.error(f"CRITICAL ERROR in query_documents:")
@@ -72,4 +101,73 @@ async def query_documents(
         raise HTTPException(
             status_code=500,
             detail=f"Savolni qayta ishlashda xatolik: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/query/llm/stats")
+async def get_llm_stats():
+    """LLM provider latencies, circuit states and hedge win rate"""
+    return get_llm_router().stats()
+
+
+@router.get("/query/cache/stats")
+async def get_semantic_cache_stats():
+    """Semantic cache hit rate, size and the latest false-hit audit samples"""
+    return {"enabled": settings.SEMANTIC_CACHE_ENABLED, **get_semantic_cache().stats()}
+
+
+@router.post("/query/batch")
+async def query_documents_batch(
+    request: BatchQueryRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Query uploaded documents with many questions at once
+    
+    All questions are embedded in one request and searched with one batched
+    vector search. Answers are streamed as NDJSON (one BatchQueryResult per
+    line) in the order they complete; `index` refers to the request order.
+    
+    - **questions**: Questions to ask about uploaded documents
+    - **save_history**: Store answers in chat history
+    """
+    questions = [question.strip() for question in request.questions]
+    if len(questions) > settings.QUERY_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Bir so'rovda {settings.QUERY_BATCH_MAX_QUESTIONS} tadan ortiq savol bo'lmasligi kerak"
+        )
+    empty = [index for index, question in enumerate(questions) if not question]
+    if empty:
+        raise HTTPException(status_code=400, detail=f"Savol bo'sh bo'lmasligi kerak (indekslar: {empty})")
+    too_long = [index for index, question in enumerate(questions) if len(question) > 1000]
+    if too_long:
+        raise HTTPException(status_code=400, detail=f"Savol 1000 belgidan oshmasligi kerak (indekslar: {too_long})")
+    
+    logger.info(f"Received batch query with {len(questions)} questions")
+    query_service = QueryServiceImpl(
+        embedding_service=EmbeddingServiceImpl(),
+        vector_store=VectorStoreImpl()
+    )
+    results = query_service.process_batch(questions, db, save_history=request.save_history)
+    
+    try:
+        # Embedding and search run before the first answer: fail with a status code, not mid-stream
+        first = await results.__anext__()
+    except Exception as e:
+        await results.aclose()
+        logger.error(f"Batch query failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Savollarni qayta ishlashda xatolik: {str(e)}")
+    
+    async def stream():
+        yield first.model_dump_json() + "\n"
+        try:
+            async for result in results:
+                yield result.model_dump_json() + "\n"
+        except Exception as e:
+            logger.error(f"Batch query stream aborted: {str(e)}")
+            yield f'{{"success": false, "error": {json.dumps(str(e))}}}\n'
+        finally:
+            await results.aclose()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
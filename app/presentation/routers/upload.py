@@ -2,17 +2,20 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from sqlalchemy.orm import Session
 import os
 import uuid
+import hashlib
 import logging
 import traceback
 import asyncio
 from typing import List
 from app.core.config import settings
 from app.core.database import get_db
-from app.application.impl.word_extractor_impl import WordExtractorImpl
-from app.application.impl.document_service_impl import DocumentServiceImpl
-from app.application.impl.embedding_service_impl import EmbeddingServiceImpl
-from app.application.impl.vector_store_impl import VectorStoreImpl
-from app.application.impl.ingestion_service_impl import IngestionServiceImpl
+from app.infrastructure.repositories.document_repository import (
+    DocumentRepository,
+    STATUS_INDEXED,
+    STATUS_PROCESSING,
+)
+from app.infrastructure.repositories.ingestion_job_repository import IngestionJobRepository
+from app.presentation.dependencies import get_ingestion_service
 from app.domain.schemas import UploadResponse, BatchUploadResponse
 
 logger = logging.getLogger(__name__)
@@ -24,12 +27,55 @@ UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+async def enqueue_file(
+    db: Session,
+    document_id: str,
+    filename: str,
+    content_hash: str,
+    contents: bytes,
+    register: bool,
+    embedding_model: str
+) -> dict:
+    """Register the document and queue its ingestion for the workers (python -m app.worker)"""
+    document_repo = DocumentRepository()
+    if register:
+        await document_repo.create_document(
+            db,
+            document_id=document_id,
+            filename=filename,
+            content_hash=content_hash,
+            size_bytes=len(contents),
+            embedding_model=embedding_model
+        )
+    else:
+        await document_repo.update_document(db, document_id, status=STATUS_PROCESSING, error=None)
+    
+    # The file travels in the job row, a worker on any node can run it
+    job = await IngestionJobRepository().enqueue(
+        db,
+        document_id=document_id,
+        filename=filename,
+        payload=contents,
+        max_attempts=settings.INGEST_JOB_MAX_ATTEMPTS
+    )
+    return {
+        "filename": filename,
+        "success": True,
+        "error": None,
+        "document_id": document_id,
+        "chunks_count": 0,
+        "job_id": str(job.id),
+        "queued": True
+    }
+
+
 async def process_single_file(
     file: UploadFile,
     db: Session
 ) -> dict:
     """Process a single file and return result"""
     file_path = None
+    ingestion_started = False
     
     try:
         logger.info(f"Processing file: {file.filename}")
@@ -60,50 +106,93 @@ async def process_single_file(
                 "chunks_count": 0
             }
         
-        # Generate unique document ID
-        document_id = str(uuid.uuid4())
+        # Skip ingestion for files that are already indexed
+        content_hash = hashlib.sha256(contents).hexdigest()
+        document_repo = DocumentRepository()
+        ingestion_service = get_ingestion_service()
+        embedding_model = ingestion_service.embedding_model
+        existing = await document_repo.get_by_hash(db, content_hash, embedding_model)
+        
+        if existing is not None and existing.status == STATUS_INDEXED:
+            logger.info(f"{file.filename} is a duplicate of document {existing.id}, skipping ingestion")
+            return {
+                "filename": file.filename,
+                "success": True,
+                "error": None,
+                "document_id": str(existing.id),
+                "chunks_count": existing.chunk_count,
+                "duplicate": True
+            }
+        
+        if existing is not None and existing.status == STATUS_PROCESSING and not await document_repo.processing_expired(
+            db, existing, settings.INGEST_PROCESSING_TIMEOUT_SECONDS
+        ):
+            return {
+                "filename": file.filename,
+                "success": False,
+                "error": "Bu fayl hozir qayta ishlanmoqda",
+                "document_id": str(existing.id),
+                "chunks_count": 0
+            }
+        
+        if existing is not None:
+            # Partially indexed, failed earlier or abandoned in processing: continue under the same ID
+            document_id = str(existing.id)
+        else:
+            # Generate unique document ID
+            document_id = str(uuid.uuid4())
+        
+        if settings.INGEST_JOB_QUEUE_ENABLED:
+            return await enqueue_file(
+                db, document_id, file.filename, content_hash, contents,
+                register=existing is None,
+                embedding_model=embedding_model
+            )
         
         # Save file temporarily
         file_path = os.path.join(UPLOAD_DIR, f"{document_id}{file_ext}")
         with open(file_path, "wb") as f:
             f.write(contents)
         
-        # Initialize services
-        word_extractor = WordExtractorImpl()
-        document_service = DocumentServiceImpl(word_extractor)
-        embedding_service = EmbeddingServiceImpl()
-        vector_store = VectorStoreImpl()
-        
-        ingestion_service = IngestionServiceImpl(
-            document_service=document_service,
-            embedding_service=embedding_service,
-            vector_store=vector_store
-        )
+        if existing is None:
+            await document_repo.create_document(
+                db,
+                document_id=document_id,
+                filename=file.filename,
+                content_hash=content_hash,
+                size_bytes=file_size,
+                embedding_model=embedding_model
+            )
         
-        # Process document
-        success, chunks_count = await ingestion_service.ingest_document(
+        # Process document (the service removes the file once it is indexed)
+        ingestion_started = True
+        report = await ingestion_service.ingest(
             file_path=file_path,
-            document_id=document_id
+            document_id=document_id,
+            filename=file.filename
         )
         
-        # Clean up temporary file
-        try:
-            if file_path and os.path.exists(file_path):
-                os.remove(file_path)
-        except Exception as e:
-            logger.warning(f"Could not remove temporary file: {str(e)}")
-        
         return {
             "filename": file.filename,
-            "success": success,
+            "success": True,
             "error": None,
             "document_id": document_id,
-            "chunks_count": chunks_count
+            "chunks_count": report.chunks_count
         }
         
     except Exception as e:
         logger.error(f"Error processing {file.filename}: {str(e)}")
         
+        if ingestion_started:
+            # Keep the file and checkpoint so the ingestion can be resumed
+            return {
+                "filename": file.filename,
+                "success": False,
+                "error": str(e),
+                "document_id": document_id,
+                "chunks_count": 0
+            }
+        
         # Clean up file if exists
         if file_path and os.path.exists(file_path):
             try:
@@ -133,16 +222,29 @@ async def upload_document(
     result = await process_single_file(file, db)
     
     if not result["success"]:
+        detail = result["error"] or "Failed to process document"
+        if result["document_id"]:
+            # Ingestion started, progress is checkpointed and can be resumed
+            detail = f"{detail} (document_id: {result['document_id']})"
         raise HTTPException(
             status_code=400,
-            detail=result["error"] or "Failed to process document"
+            detail=detail
         )
     
+    if result.get("duplicate"):
+        message = "Bu fayl avval yuklangan, mavjud hujjat qaytarildi"
+    elif result.get("queued"):
+        message = "Fayl yuklandi va qayta ishlash navbatiga qo'yildi"
+    else:
+        message = "Fayl muvaffaqiyatli yuklandi va qayta ishlandi"
+    
     return UploadResponse(
         success=True,
-        message="Fayl muvaffaqiyatli yuklandi va qayta ishlandi",
+        message=message,
         document_id=result["document_id"],
-        chunks_count=result["chunks_count"]
+        chunks_count=result["chunks_count"],
+        duplicate=result.get("duplicate", False),
+        job_id=result.get("job_id")
     )
 
 
@@ -164,9 +266,14 @@ async def upload_multiple_documents(
     
     logger.info(f"Starting batch upload of {len(files)} files")
     
-    # Process all files concurrently
-    tasks = [process_single_file(file, db) for file in files]
-    results = await asyncio.gather(*tasks)
+    # A few files at a time, a large batch must not monopolize the embedding quota
+    semaphore = asyncio.Semaphore(settings.UPLOAD_BATCH_FILE_CONCURRENCY)
+    
+    async def process(file: UploadFile):
+        async with semaphore:
+            return await process_single_file(file, db)
+    
+    results = await asyncio.gather(*(process(file) for file in files))
     
     # Separate successful and failed uploads
     successful = [r for r in results if r["success"]]
@@ -0,0 +1,120 @@
+"""
+Startup warm-up
+
+Everything the first request would otherwise pay for is done once before
+the instance reports ready: database pool connections are opened, the
+tokenizers loaded, the shared provider clients constructed (which checks
+the vector store collections) and a dummy search run to bring the index
+into memory. Steps are best-effort; a failing step is logged and reported
+but does not stop the ones after it.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List
+from sqlalchemy import text
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Dimension of the dummy query (text-embedding-3-small, like the collections)
+WARMUP_VECTOR_DIM = 1536
+
+
+def _open_db_connections() -> Dict:
+    """Check out WARMUP_DB_CONNECTIONS connections at once, so the pool keeps them open"""
+    from app.core.database import engine
+
+    connections = []
+    try:
+        for _ in range(settings.WARMUP_DB_CONNECTIONS):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+    return {"connections": len(connections)}
+
+
+def _load_tokenizers() -> Dict:
+    from app.infrastructure.embeddings.tokenizer import get_encoding, is_fallback
+
+    models = [settings.OPENAI_EMBEDDING_MODEL, settings.OPENAI_LLM_MODEL]
+    encodings = {}
+    for model in models:
+        encodings[model] = get_encoding(model).name
+    # Models counted with the fallback encoding (see the warning logged by get_encoding)
+    return {"models": models, "encodings": encodings, "fallback": [model for model in models if is_fallback(model)]}
+
+
+def _open_vector_store() -> Dict:
+    from app.application.impl.vector_store_impl import get_vector_store_client
+
+    return {"backend": settings.VECTOR_STORE_BACKEND, **get_vector_store_client().get_collection_info()}
+
+
+def _create_embedding_client() -> Dict:
+    from app.infrastructure.embeddings.openai_embedding import get_embedding_client
+
+    return {"model": get_embedding_client().model_name}
+
+
+def _create_llm_router() -> Dict:
+    from app.infrastructure.llm.llm_router import get_llm_router
+
+    return {"providers": [provider.name for provider in get_llm_router().providers]}
+
+
+async def _dummy_search() -> Dict:
+    from app.application.impl.vector_store_impl import get_vector_store_client
+
+    query = [1.0] + [0.0] * (WARMUP_VECTOR_DIM - 1)
+    results = await get_vector_store_client().search(query, top_k=1)
+    return {"results": len(results)}
+
+
+async def _run_step(name: str, step: Callable) -> Dict:
+    started = time.perf_counter()
+    try:
+        # Blocking steps (connects, file and network I/O) run off the event loop
+        if asyncio.iscoroutinefunction(step):
+            details = await step()
+        else:
+            details = await asyncio.to_thread(step)
+        report = {"step": name, "ok": True, **details}
+    except Exception as e:
+        logger.error(f"❌ Warm-up step {name} failed: {str(e)}")
+        report = {"step": name, "ok": False, "error": str(e)}
+    report["ms"] = int((time.perf_counter() - started) * 1000)
+    return report
+
+
+async def warm_up() -> List[Dict]:
+    """
+    Run the warm-up steps in order
+
+    Returns:
+        Per step: name, ok, duration in ms and step details or error
+    """
+    started = time.perf_counter()
+    steps = [
+        ("database", _open_db_connections),
+        ("tokenizers", _load_tokenizers),
+        ("vector_store", _open_vector_store),
+        ("embedding_client", _create_embedding_client),
+        ("llm_router", _create_llm_router),
+        ("dummy_search", _dummy_search)
+    ]
+    report = []
+    for name, step in steps:
+        report.append(await _run_step(name, step))
+
+    failed = [step["step"] for step in report if not step["ok"]]
+    elapsed = time.perf_counter() - started
+    if failed:
+        logger.warning(f"⚠️ Warm-up finished in {elapsed:.2f}s with failed steps: {', '.join(failed)}")
+    else:
+        logger.info(f"✅ Warm-up finished in {elapsed:.2f}s")
+    return report
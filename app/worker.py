@@ -0,0 +1,237 @@
+"""
+Ingestion worker
+
+Claims queued ingestion jobs from the ingestion_jobs table and runs them
+through IngestionServiceImpl. Workers coordinate only through PostgreSQL
+(FOR UPDATE SKIP LOCKED), so throughput grows by starting more of them on
+any node that reaches the database, vector store and embedding API:
+
+    python -m app.worker --concurrency 2
+
+A claimed job is leased for INGEST_JOB_LEASE_SECONDS and the lease is
+extended every INGEST_JOB_HEARTBEAT_SECONDS while the ingestion runs. A
+worker that dies stops heartbeating and its job is claimed again once the
+lease runs out. Failed attempts are retried with exponential backoff;
+after max_attempts claims the job is dead-lettered (status dead) until it
+is retried through the API. SIGTERM stops claiming and lets running jobs
+finish; a second signal cancels them and hands them back to the queue.
+
+Each job runs in a private temporary directory (the file and its
+ingestion checkpoint) that is removed when the job ends, so workers share
+nothing on disk with each other or with the API. A retried job starts
+over: points left behind by the failed attempt are removed first.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import signal
+import socket
+import tempfile
+from typing import Optional
+from app.core.config import settings
+from app.infrastructure.repositories.ingestion_job_repository import ClaimedJob, IngestionJobRepository
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_seconds(attempt: int) -> float:
+    """Delay before retrying after the attempt-th failure (doubling, capped, with jitter)"""
+    delay = min(
+        settings.INGEST_JOB_BACKOFF_SECONDS * 2 ** (attempt - 1),
+        settings.INGEST_JOB_BACKOFF_MAX_SECONDS
+    )
+    # Jitter spreads out retries of jobs that failed together (e.g. provider outage)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class IngestionWorker:
+    """
+    Runs up to concurrency claimed jobs at a time
+
+    Args:
+        worker_id: Lease owner name, unique per process
+        concurrency: Jobs run at once
+        poll_seconds: Wait before looking again when no job is due
+        lease_seconds: Lease taken by a claim and by each heartbeat
+        heartbeat_seconds: Interval of lease extensions
+    """
+
+    def __init__(self, worker_id: str, concurrency: int, poll_seconds: float, lease_seconds: float, heartbeat_seconds: float):
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.repo = IngestionJobRepository()
+        self.stopping = asyncio.Event()
+        self._slots = []
+
+    @classmethod
+    def from_settings(cls, concurrency: Optional[int] = None) -> "IngestionWorker":
+        return cls(
+            worker_id=f"{socket.gethostname()}:{os.getpid()}",
+            concurrency=concurrency or settings.INGEST_WORKER_CONCURRENCY,
+            poll_seconds=settings.INGEST_WORKER_POLL_SECONDS,
+            lease_seconds=settings.INGEST_JOB_LEASE_SECONDS,
+            heartbeat_seconds=settings.INGEST_JOB_HEARTBEAT_SECONDS
+        )
+
+    async def run(self) -> None:
+        """Work until stop() is called and the running jobs are done"""
+        logger.info(f"Ingestion worker {self.worker_id} started with {self.concurrency} slots")
+        self._slots = [asyncio.create_task(self._slot()) for _ in range(self.concurrency)]
+        await asyncio.gather(*self._slots, return_exceptions=True)
+        logger.info(f"Ingestion worker {self.worker_id} stopped")
+
+    def stop(self) -> None:
+        """First call: finish running jobs, claim no more. Second call: cancel them"""
+        if self.stopping.is_set():
+            logger.warning("Cancelling running ingestion jobs")
+            for slot in self._slots:
+                slot.cancel()
+            return
+        logger.info("Stopping after the running ingestion jobs")
+        self.stopping.set()
+
+    async def _slot(self) -> None:
+        while not self.stopping.is_set():
+            try:
+                job = await asyncio.to_thread(self._with_session, self.repo.claim, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Claiming a job failed: {str(e)}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_job(job)
+
+    async def _run_job(self, job: ClaimedJob) -> None:
+        """Ingest a claimed job under heartbeats, then complete, retry or dead-letter it"""
+        if job.attempts > job.max_attempts:
+            # Claimed again after its last attempt lost the lease: the worker died on it
+            await self._fail(job, "Lease expired on the last attempt", retry=False)
+            return
+
+        logger.info(f"Running ingestion job {job.id} for document {job.document_id} (attempt {job.attempts}/{job.max_attempts})")
+        ingestion = asyncio.create_task(self._ingest(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job, ingestion))
+        try:
+            await ingestion
+        except asyncio.CancelledError:
+            if heartbeat.done() and not heartbeat.cancelled():
+                # Lease lost: the job belongs to another worker now, leave it alone
+                return
+            # Shutting down: hand the job back right away, the attempt still counts
+            ingestion.cancel()
+            await self._fail(job, "Worker stopped", retry=True, delay=0.0)
+            raise
+        except Exception as e:
+            logger.error(f"Ingestion job {job.id} failed: {str(e)}")
+            await self._fail(job, str(e), retry=job.attempts < job.max_attempts)
+            return
+        finally:
+            heartbeat.cancel()
+
+        completed = await asyncio.to_thread(self._with_session, self.repo.complete, job.id, self.worker_id)
+        if completed:
+            logger.info(f"Completed ingestion job {job.id}")
+        else:
+            logger.warning(f"Ingestion job {job.id} finished after its lease was lost")
+
+    async def _ingest(self, job: ClaimedJob) -> None:
+        from app.infrastructure.repositories.checkpoint_repository import IngestionCheckpointRepository
+        from app.presentation.dependencies import get_ingestion_service
+
+        payload = await asyncio.to_thread(self._with_session, self.repo.get_payload, job.id)
+        if payload is None:
+            raise ValueError(f"Ingestion job {job.id} has no file contents")
+
+        work_dir = await asyncio.to_thread(tempfile.mkdtemp, prefix=f"ingest-{job.id}-")
+        try:
+            file_path = os.path.join(work_dir, f"{job.document_id}{os.path.splitext(job.filename)[1].lower()}")
+            await asyncio.to_thread(self._write_file, file_path, payload)
+
+            # The checkpoint lives only as long as this attempt, retries go through the queue
+            service = get_ingestion_service(
+                checkpoints=IngestionCheckpointRepository(base_dir=os.path.join(work_dir, "checkpoints"))
+            )
+            if job.attempts > 1:
+                await service.remove_document_points(job.document_id)
+            await service.ingest(file_path=file_path, document_id=job.document_id, filename=job.filename)
+        finally:
+            await asyncio.to_thread(shutil.rmtree, work_dir, True)
+
+    async def _heartbeat(self, job: ClaimedJob, ingestion: asyncio.Task) -> None:
+        """Extend the lease while the ingestion runs; cancel it when the lease is lost"""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                held = await asyncio.to_thread(
+                    self._with_session, self.repo.heartbeat, job.id, self.worker_id, self.lease_seconds
+                )
+            except Exception as e:
+                # Database unreachable: keep going, the lease may still outlast the outage
+                logger.error(f"Heartbeat of ingestion job {job.id} failed: {str(e)}")
+                continue
+            if not held:
+                logger.warning(f"Lost the lease of ingestion job {job.id}, cancelling it")
+                ingestion.cancel()
+                return
+
+    async def _fail(self, job: ClaimedJob, error: str, retry: bool, delay: Optional[float] = None) -> None:
+        retry_in = (backoff_seconds(job.attempts) if delay is None else delay) if retry else None
+        try:
+            await asyncio.to_thread(self._with_session, self.repo.fail, job.id, self.worker_id, error, retry_in)
+        except Exception as e:
+            # The lease runs out and the job is claimed again
+            logger.error(f"Recording failure of ingestion job {job.id} failed: {str(e)}")
+            return
+        if retry:
+            logger.info(f"Ingestion job {job.id} retries in {retry_in:.0f}s")
+        else:
+            logger.error(f"Ingestion job {job.id} dead-lettered after {job.attempts} attempts: {error}")
+
+    @staticmethod
+    def _with_session(method, *args):
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return method(db, *args)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _write_file(file_path: str, payload: bytes) -> None:
+        with open(file_path, "wb") as f:
+            f.write(payload)
+
+
+async def main(concurrency: Optional[int] = None) -> None:
+    from app.core.database import engine
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit(f"The ingestion queue needs PostgreSQL, not {engine.dialect.name}")
+
+    worker = IngestionWorker.from_settings(concurrency)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, worker.stop)
+    await worker.run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Run queued document ingestions")
+    parser.add_argument("--concurrency", type=int, help="Jobs run at once (default INGEST_WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.concurrency))
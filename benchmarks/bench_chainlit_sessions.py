@@ -0,0 +1,130 @@
+"""
+Benchmark: concurrent Chainlit sessions, per-session blocking clients vs. shared async clients
+
+Latencies are measured from the arrival of each question (all sessions
+start at once, the next question follows the previous answer), so time a
+session spends waiting for a blocked event loop is included.
+
+Simulates the request path of app/app.py with fixed latencies for the
+Gemini and Chroma calls (chainlit and chromadb are not needed), so it shows
+how the event loop behaves under many sessions rather than provider speed:
+
+    before: Chroma client opened per session, blocking embed / query /
+            generate_content on the event loop, no query embedding cache
+    after:  clients shared per process, embed and query in threads with an
+            LRU cache of query embeddings, answer streamed asynchronously
+
+Usage:
+    python benchmarks/bench_chainlit_sessions.py [--sessions 50] [--questions 4] [--distinct 40]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import OrderedDict
+
+
+class Latencies:
+    def __init__(self, args):
+        self.client = args.client_ms / 1000
+        self.embed = args.embed_ms / 1000
+        self.search = args.search_ms / 1000
+        self.first_token = args.first_token_ms / 1000
+        self.generate = args.generate_ms / 1000
+        self.tokens = args.tokens
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)]
+
+
+async def run_before(latency, questions, arrived):
+    """One session of the previous app: everything blocks the loop, the answer arrives in one piece"""
+    # Sessions all start at arrived, time spent waiting for the blocked loop counts
+    await asyncio.sleep(0)
+    time.sleep(latency.client)  # setUpGoogleAPI + chromadb.PersistentClient per session
+    results = []
+    started = arrived
+    for question in questions:
+        time.sleep(latency.embed)  # embed_content(task_type="retrieval_document"), uncached
+        time.sleep(latency.search)  # db.query
+        time.sleep(latency.generate)  # model.generate_content
+        await asyncio.sleep(0)
+        elapsed = time.perf_counter() - started
+        results.append((elapsed, elapsed))
+        started = time.perf_counter()
+    return results
+
+
+async def run_after(latency, questions, cache, shared, arrived):
+    """One session of the current app: shared clients, threads for blocking calls, streamed answer"""
+    if not shared:
+        await asyncio.to_thread(time.sleep, latency.client)  # First session opens the shared client
+        shared.append(True)
+    results = []
+    started = arrived
+    for question in questions:
+        if question in cache:
+            cache.move_to_end(question)
+        else:
+            await asyncio.to_thread(time.sleep, latency.embed)
+            cache[question] = True
+        await asyncio.to_thread(time.sleep, latency.search)
+
+        await asyncio.sleep(latency.first_token)
+        first_token = time.perf_counter() - started
+        step = (latency.generate - latency.first_token) / max(latency.tokens - 1, 1)
+        for _ in range(latency.tokens - 1):
+            await asyncio.sleep(step)
+        results.append((first_token, time.perf_counter() - started))
+        started = time.perf_counter()
+    return results
+
+
+async def simulate(flow, args):
+    latency = Latencies(args)
+    rng = random.Random(42)
+    pool = [f"savol {i}" for i in range(args.distinct)]
+    cache, shared = OrderedDict(), []
+    started = time.perf_counter()
+
+    async def session():
+        questions = [rng.choice(pool) for _ in range(args.questions)]
+        if flow == "before":
+            return await run_before(latency, questions, started)
+        return await run_after(latency, questions, cache, shared, started)
+
+    sessions = await asyncio.gather(*(session() for _ in range(args.sessions)))
+    wall = time.perf_counter() - started
+    results = [result for session_results in sessions for result in session_results]
+    return wall, [first for first, _ in results], [total for _, total in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=50, help="Concurrent chat sessions")
+    parser.add_argument("--questions", type=int, default=4, help="Questions per session")
+    parser.add_argument("--distinct", type=int, default=40, help="Distinct questions (repeats hit the cache)")
+    parser.add_argument("--client-ms", type=float, default=150)
+    parser.add_argument("--embed-ms", type=float, default=80)
+    parser.add_argument("--search-ms", type=float, default=15)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--generate-ms", type=float, default=1200)
+    parser.add_argument("--tokens", type=int, default=40, help="Streamed chunks per answer")
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.questions} questions ({args.distinct} distinct)")
+    print(f"{'flow':<8}{'wall s':>9}{'ttft p50':>11}{'ttft p95':>11}{'answer p50':>13}{'answer p95':>13}")
+    for flow in ("before", "after"):
+        wall, first, total = asyncio.run(simulate(flow, args))
+        print(
+            f"{flow:<8}{wall:>9.2f}"
+            f"{statistics.median(first):>10.2f}s{percentile(first, 95):>10.2f}s"
+            f"{statistics.median(total):>12.2f}s{percentile(total, 95):>12.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
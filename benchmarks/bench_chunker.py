@@ -0,0 +1,131 @@
+"""
+Benchmark: legacy character chunker vs. single-pass token chunker
+
+Usage:
+    python benchmarks/bench_chunker.py [--paragraphs 20000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from app.application.impl.text_chunker import TextChunker
+from app.domain.chunks import BLOCK_HEADING, BLOCK_PARAGRAPH, BLOCK_TABLE, blocks_to_text, build_blocks
+from app.infrastructure.embeddings.tokenizer import Tokenizer
+
+WORDS = (
+    "hujjat shartnoma tomonlar majburiyat muddat to'lov xizmat ko'rsatish "
+    "договор стороны обязательства срок оплата услуги agreement party term"
+).split()
+
+
+def legacy_chunk_text(text: str, chunk_size: int, chunk_overlap: int, max_chunks: int) -> list:
+    """Previous DocumentServiceImpl.chunk_text, bounded so the benchmark cannot hang"""
+    chunks = []
+    start = 0
+    text_length = len(text)
+    
+    while start < text_length:
+        end = start + chunk_size
+        chunk = text[start:end]
+        
+        if end < text_length:
+            last_period = chunk.rfind('.')
+            last_newline = chunk.rfind('\n')
+            boundary = max(last_period, last_newline)
+            
+            if boundary > chunk_size * 0.5:
+                end = start + boundary + 1
+                chunk = text[start:end]
+        
+        chunks.append(chunk.strip())
+        if len(chunks) >= max_chunks:
+            raise RuntimeError(f"legacy chunker did not terminate (overlap={chunk_overlap})")
+        start = end - chunk_overlap
+    
+    return chunks
+
+
+def make_document(paragraphs: int, seed: int = 42) -> list:
+    """Generate (kind, text) parts resembling an extracted Word document"""
+    rng = random.Random(seed)
+    parts = []
+    for i in range(paragraphs):
+        if i % 25 == 0:
+            parts.append((BLOCK_HEADING, f"{i // 25 + 1}. " + " ".join(rng.choices(WORDS, k=4)).capitalize()))
+        elif i % 40 == 0:
+            rows = [" | ".join(rng.choices(WORDS, k=3)) for _ in range(rng.randint(3, 8))]
+            parts.append((BLOCK_TABLE, "\n".join(rows)))
+        else:
+            sentences = [
+                " ".join(rng.choices(WORDS, k=rng.randint(6, 20))).capitalize() + "."
+                for _ in range(rng.randint(1, 6))
+            ]
+            parts.append((BLOCK_PARAGRAPH, " ".join(sentences)))
+    return parts
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=500, help="legacy chunk size (characters)")
+    parser.add_argument("--chunk-overlap", type=int, default=50, help="legacy overlap (characters)")
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--overlap-tokens", type=int, default=32)
+    args = parser.parse_args()
+
+    blocks = build_blocks(make_document(args.paragraphs))
+    text = blocks_to_text(blocks)
+    tokenizer = Tokenizer()
+    chunker = TextChunker(args.max_tokens, args.overlap_tokens, tokenizer.count)
+
+    print(f"Document: {len(text):,} characters, {len(blocks):,} blocks")
+
+    legacy_time, legacy_chunks = timed(
+        lambda: legacy_chunk_text(text, args.chunk_size, args.chunk_overlap, max_chunks=len(text)),
+        args.repeat
+    )
+    new_time, new_chunks = timed(lambda: list(chunker.iter_chunks(text, blocks)), args.repeat)
+
+    # The legacy chunker never tokenizes, so also report the cost of counting its output
+    count_time, _ = timed(lambda: tokenizer.count_many(legacy_chunks), args.repeat)
+
+    print(f"{'implementation':<32}{'seconds':>10}{'chunks':>10}{'MB/s':>10}")
+    for name, seconds, chunks in (
+        ("legacy (chars)", legacy_time, legacy_chunks),
+        ("legacy (chars) + token count", legacy_time + count_time, legacy_chunks),
+        ("single-pass (tokens)", new_time, new_chunks),
+    ):
+        print(f"{name:<32}{seconds:>10.3f}{len(chunks):>10}{len(text) / seconds / 1e6:>10.2f}")
+
+    oversized = sum(1 for chunk in new_chunks if chunk.token_count > args.max_tokens)
+    print(f"single-pass chunks over {args.max_tokens} tokens: {oversized}")
+
+    # Settings that made the legacy chunker hang (overlap >= effective chunk length)
+    try:
+        legacy_chunk_text(text[:20000], 40, 30, max_chunks=100000)
+        print("legacy chunker with CHUNK_SIZE=40, CHUNK_OVERLAP=30: terminated")
+    except RuntimeError as e:
+        print(f"legacy chunker with CHUNK_SIZE=40, CHUNK_OVERLAP=30: {e}")
+    tiny = TextChunker(8, 7, tokenizer.count)
+    print(f"single-pass chunker with max_tokens=8, overlap=7: {sum(1 for _ in tiny.iter_chunks(text[:20000]))} chunks")
+
+
+if __name__ == "__main__":
+    main()
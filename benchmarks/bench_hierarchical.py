@@ -0,0 +1,115 @@
+"""
+Benchmark: flat chunk search vs. two-stage (document shortlist → chunk) search
+
+Simulates a corpus of documents whose chunks cluster around a per-document
+topic vector and measures exact brute-force search latency and recall@k of
+the hierarchical search against the flat top-k, as the corpus grows.
+
+Usage:
+    python benchmarks/bench_hierarchical.py [--sizes 10000,50000,200000] [--top-docs 5]
+"""
+import argparse
+import time
+
+import numpy as np
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def make_corpus(chunks: int, chunks_per_doc: int, dim: int, spread: float, rng: np.random.Generator):
+    """Chunk vectors, their document of origin and the per-document centroids"""
+    documents = max(chunks // chunks_per_doc, 1)
+    topics = normalize(rng.standard_normal((documents, dim)).astype(np.float32))
+    owners = rng.integers(0, documents, size=chunks)
+    noise = normalize(rng.standard_normal((chunks, dim)).astype(np.float32))
+    vectors = normalize(topics[owners] + spread * noise)
+
+    # Same as ingestion: normalized mean of the document's chunk vectors
+    sums = np.zeros((documents, dim), dtype=np.float32)
+    np.add.at(sums, owners, vectors)
+    centroids = normalize(sums + 1e-12)
+    return vectors, owners, centroids
+
+
+def make_queries(vectors: np.ndarray, count: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    """Queries close to random chunks, as questions about a passage would be"""
+    picks = rng.integers(0, len(vectors), size=count)
+    offsets = normalize(rng.standard_normal((count, vectors.shape[1])).astype(np.float32))
+    return normalize(vectors[picks] + noise * offsets)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+def flat_search(vectors: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    return top_k(vectors @ query, k)
+
+
+def hierarchical_search(
+    vectors: np.ndarray,
+    by_document: list,
+    centroids: np.ndarray,
+    query: np.ndarray,
+    k: int,
+    top_docs: int
+) -> np.ndarray:
+    documents = top_k(centroids @ query, top_docs)
+    candidates = np.concatenate([by_document[d] for d in documents])
+    if len(candidates) == 0:
+        return flat_search(vectors, query, k)
+    return candidates[top_k(vectors[candidates] @ query, k)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,50000,200000", help="corpus sizes in chunks")
+    parser.add_argument("--chunks-per-doc", type=int, default=40)
+    parser.add_argument("--dim", type=int, default=256, help="vector size (1536 in production)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=6)
+    parser.add_argument("--top-docs", type=int, default=5)
+    parser.add_argument("--spread", type=float, default=0.9, help="length of chunk noise around the unit document topic")
+    parser.add_argument("--query-noise", type=float, default=0.5, help="length of query noise around its chunk")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(
+        f"k={args.top_k}, top documents={args.top_docs}, {args.chunks_per_doc} chunks/document, "
+        f"dim={args.dim}, {args.queries} queries"
+    )
+    print(f"{'chunks':>10}{'documents':>11}{'flat ms':>10}{'hier ms':>10}{'speedup':>9}{'recall@k':>10}{'scanned':>10}")
+
+    for size in (int(value) for value in args.sizes.split(",")):
+        vectors, owners, centroids = make_corpus(size, args.chunks_per_doc, args.dim, args.spread, rng)
+        order = np.argsort(owners, kind="stable")
+        bounds = np.searchsorted(owners[order], np.arange(len(centroids) + 1))
+        by_document = [order[bounds[d]:bounds[d + 1]] for d in range(len(centroids))]
+        queries = make_queries(vectors, args.queries, args.query_noise, rng)
+
+        started = time.perf_counter()
+        expected = [flat_search(vectors, query, args.top_k) for query in queries]
+        flat_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        started = time.perf_counter()
+        found = [
+            hierarchical_search(vectors, by_document, centroids, query, args.top_k, args.top_docs)
+            for query in queries
+        ]
+        hier_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        recall = np.mean([len(set(a) & set(b)) / len(a) for a, b in zip(expected, found)])
+        scanned = len(centroids) + args.top_docs * size / len(centroids)
+        print(
+            f"{size:>10,}{len(centroids):>11,}{flat_ms:>10.3f}{hier_ms:>10.3f}"
+            f"{flat_ms / hier_ms:>8.1f}x{recall:>10.3f}{scanned / size:>9.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Startup profile: import time of app.main broken down by top-level package
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter and
+sums the self time of every imported module per top-level package, so the
+packages that dominate a cold start stand out.
+
+Usage:
+    python benchmarks/bench_startup.py [--module app.main] [--top 20] [--repeat 3]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# import time: self [us] | cumulative | imported package
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(module: str) -> dict:
+    """Self time in microseconds per top-level package, for one fresh import"""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr)
+
+    totals = defaultdict(int)
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            totals[match.group(4).split(".")[0]] += int(match.group(1))
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = [profile(args.module) for _ in range(args.repeat)]
+    packages = set().union(*runs)
+    # Median per package over the runs, the first one pays for cold .pyc/page cache
+    medians = {package: statistics.median(run.get(package, 0) for run in runs) for package in packages}
+    total = sum(medians.values())
+
+    print(f"import {args.module}: {total / 1000:.0f} ms ({len(packages)} top-level packages, median of {args.repeat})")
+    print(f"{'package':<28}{'ms':>10}{'share':>9}")
+    for package, micros in sorted(medians.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{package:<28}{micros / 1000:>10.1f}{micros / total:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
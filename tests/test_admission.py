@@ -0,0 +1,138 @@
+import asyncio
+import pytest
+from app.presentation.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    AdmissionPool,
+    AdmissionRejected,
+)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_slots_are_handed_to_waiters_in_order():
+    async def scenario():
+        pool = AdmissionPool("query", limit=1, queue_size=2, max_wait=1.0)
+        assert await pool.acquire() == 0.0
+        order = []
+
+        async def wait(name):
+            await pool.acquire()
+            order.append(name)
+
+        first = asyncio.create_task(wait("first"))
+        second = asyncio.create_task(wait("second"))
+        await asyncio.sleep(0)
+        assert (pool.active, pool.waiting) == (1, 2)
+
+        pool.release()
+        await first
+        pool.release()
+        await second
+        pool.release()
+        return pool, order
+
+    pool, order = run(scenario())
+    assert order == ["first", "second"]
+    assert (pool.active, pool.waiting, pool.admitted) == (0, 0, 3)
+
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        pool = AdmissionPool("upload", limit=1, queue_size=1, max_wait=1.0)
+        await pool.acquire()
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await pool.acquire()
+        waiter.cancel()
+        return pool, rejected.value
+
+    pool, rejected = run(scenario())
+    assert rejected.status_code == 429
+    assert rejected.retry_after >= 1
+    assert pool.rejected_full == 1
+
+
+def test_expired_wait_is_rejected_with_503():
+    async def scenario():
+        pool = AdmissionPool("query", limit=1, queue_size=5, max_wait=0.01)
+        await pool.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await pool.acquire()
+        return pool, rejected.value
+
+    pool, rejected = run(scenario())
+    assert rejected.status_code == 503
+    assert (pool.rejected_timeout, pool.waiting, pool.active) == (1, 0, 1)
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        pool = AdmissionPool("query", limit=1, queue_size=5, max_wait=1.0)
+        await pool.acquire()
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        pool.release()
+        return pool
+
+    pool = run(scenario())
+    assert (pool.active, pool.waiting) == (0, 0)
+
+
+def test_controller_routes_post_requests_by_longest_prefix():
+    query = AdmissionPool("query", 1, 1, 1.0)
+    upload = AdmissionPool("upload", 1, 1, 1.0)
+    controller = AdmissionController([("/api/v1/query", query), ("/api/v1/query/batch", upload)])
+
+    assert controller.pool_for("POST", "/api/v1/query") is query
+    assert controller.pool_for("POST", "/api/v1/query/batch") is upload
+    assert controller.pool_for("GET", "/api/v1/query") is None
+    assert controller.pool_for("POST", "/api/v1/documents") is None
+
+
+def test_middleware_sheds_with_retry_after():
+    async def scenario():
+        pool = AdmissionPool("query", limit=1, queue_size=0, max_wait=1.0)
+        controller = AdmissionController([("/api/v1/query", pool)])
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+
+        middleware = AdmissionMiddleware(app, controller)
+        scope = {"type": "http", "method": "POST", "path": "/api/v1/query"}
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        running = asyncio.create_task(middleware(dict(scope), None, send))
+        await asyncio.sleep(0)
+        await middleware(dict(scope), None, send)
+        release.set()
+        await running
+        return pool, sent
+
+    pool, sent = run(scenario())
+    shed, body, ok = sent
+    assert shed["status"] == 429
+    assert (b"retry-after", b"1") in shed["headers"]
+    assert b"queue is full" in body["body"]
+    assert ok["status"] == 200
+    assert pool.active == 0
+
+
+def test_cors_wraps_admission_rejections():
+    from starlette.middleware.cors import CORSMiddleware
+    from app.main import app
+
+    # user_middleware lists the outermost layer first
+    layers = [middleware.cls for middleware in app.user_middleware]
+    assert layers.index(CORSMiddleware) < layers.index(AdmissionMiddleware)
+    assert "Retry-After" in app.user_middleware[layers.index(CORSMiddleware)].options["expose_headers"]
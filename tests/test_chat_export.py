@@ -0,0 +1,50 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest
+from app.application.impl.chat_export import COLUMNS, _create_encoder
+
+ROWS = [
+    SimpleNamespace(
+        id=uuid.UUID(int=index),
+        created_at=datetime(2026, 10, 1, index, tzinfo=timezone.utc),
+        question=f"savol {index}",
+        answer=f"javob {index}",
+        answered=True,
+        answer_source=answer_source,
+        latency_ms=100 + index,
+        sources=[{"point_id": "p", "document_id": "d", "chunk_index": index, "score": 0.9}]
+    )
+    for index, answer_source in enumerate(["generated", "faq", "cache"])
+]
+
+
+def encode(export_format: str) -> bytes:
+    encoder = _create_encoder(export_format, header=True)
+    return encoder.start() + encoder.write(ROWS) + encoder.finish()
+
+
+def test_csv_has_every_column():
+    header, *records = list(csv.reader(io.StringIO(encode("csv").decode("utf-8"))))
+
+    assert header == COLUMNS
+    assert [dict(zip(header, record))["answer_source"] for record in records] == ["generated", "faq", "cache"]
+
+
+def test_ndjson_has_every_column():
+    records = [json.loads(line) for line in encode("ndjson").decode("utf-8").splitlines()]
+
+    assert [list(record) for record in records] == [COLUMNS] * 3
+    assert [record["answer_source"] for record in records] == ["generated", "faq", "cache"]
+
+
+def test_parquet_has_every_column():
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    table = pq.read_table(io.BytesIO(encode("parquet")))
+
+    assert table.column_names == COLUMNS
+    assert table.column("answer_source").to_pylist() == ["generated", "faq", "cache"]
@@ -0,0 +1,125 @@
+from datetime import date, datetime, timezone
+from app.infrastructure.repositories.chat_partition_repository import (
+    ChatPartition,
+    ChatPartitionRepository,
+    add_months,
+    month_bounds,
+    partition_name,
+)
+
+
+class FakeResult:
+    def __init__(self, rows=(), scalar=None, rowcount=0):
+        self.rows = list(rows)
+        self._scalar = scalar
+        self.rowcount = rowcount
+
+    def all(self):
+        return self.rows
+
+    def scalar(self):
+        return self._scalar
+
+
+class FakeSession:
+    """Records statements; answers the catalog queries ensure_partitions runs"""
+
+    def __init__(self, bounds, has_default=True, default_rows=0):
+        self.bounds = bounds
+        self.has_default = has_default
+        self.default_rows = default_rows
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append((sql, params))
+        if "FROM pg_inherits" in sql:
+            return FakeResult(rows=self.bounds)
+        if "to_regclass" in sql:
+            return FakeResult(scalar="chat_default" if self.has_default else None)
+        if sql.startswith("WITH moved"):
+            return FakeResult(rowcount=self.default_rows)
+        return FakeResult()
+
+    def sql(self, prefix):
+        return [sql for sql, _ in self.statements if sql.startswith(prefix)]
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_month_arithmetic_crosses_years():
+    assert add_months(date(2026, 11, 1), 1) == date(2026, 12, 1)
+    assert add_months(date(2026, 12, 1), 1) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 3, 1), -14) == date(2025, 1, 1)
+
+
+def test_partition_name_and_bounds():
+    assert partition_name(date(2027, 1, 1)) == "chat_p2027_01"
+    assert month_bounds(date(2026, 12, 1)) == (utc(2026, 12, 1), utc(2027, 1, 1))
+    assert month_bounds(date(2028, 2, 1)) == (utc(2028, 2, 1), utc(2028, 3, 1))
+
+
+def test_overlaps_uses_half_open_ranges():
+    legacy = ChatPartition("chat_legacy", None, utc(2026, 11, 1))
+    assert legacy.overlaps(*month_bounds(date(2026, 10, 1)))
+    assert not legacy.overlaps(*month_bounds(date(2026, 11, 1)))
+
+    november = ChatPartition("chat_p2026_11", utc(2026, 11, 1), utc(2026, 12, 1))
+    assert not november.overlaps(*month_bounds(date(2026, 12, 1)))
+
+
+def test_list_partitions_parses_bounds_and_skips_default():
+    db = FakeSession([
+        ("chat_p2026_12", "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"),
+        ("chat_default", "DEFAULT"),
+        ("chat_legacy", "FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00+00')"),
+    ])
+    partitions = ChatPartitionRepository().list_partitions(db)
+
+    assert [partition.name for partition in partitions] == ["chat_legacy", "chat_p2026_12"]
+    assert partitions[0].lower is None
+    assert partitions[1].upper == utc(2027, 1, 1)
+
+
+def test_ensure_partitions_skips_existing_months_and_drains_default():
+    db = FakeSession(
+        [
+            ("chat_legacy", "FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00+00')"),
+            ("chat_p2026_11", "FOR VALUES FROM ('2026-11-01 00:00:00+00') TO ('2026-12-01 00:00:00+00')"),
+        ],
+        default_rows=3
+    )
+    created = ChatPartitionRepository().ensure_partitions(db, today=date(2026, 11, 30), months_ahead=2)
+
+    assert created == ["chat_p2026_12", "chat_p2027_01"]
+    moves = [params for sql, params in db.statements if sql.startswith("WITH moved")]
+    assert moves[0] == {"lower": utc(2026, 12, 1), "upper": utc(2027, 1, 1)}
+    assert db.sql("ALTER TABLE chat ATTACH PARTITION")[1] == (
+        "ALTER TABLE chat ATTACH PARTITION chat_p2027_01 "
+        "FOR VALUES FROM ('2027-01-01T00:00:00+00:00') TO ('2027-02-01T00:00:00+00:00')"
+    )
+
+
+def test_ensure_partitions_without_default_creates_partitions_directly():
+    db = FakeSession([], has_default=False)
+    created = ChatPartitionRepository().ensure_partitions(db, today=date(2026, 12, 15), months_ahead=1)
+
+    assert created == ["chat_p2026_12", "chat_p2027_01"]
+    assert db.sql("WITH moved") == []
+    assert len(db.sql("CREATE TABLE chat_p2027_01 PARTITION OF chat")) == 1
+
+
+def test_expire_partitions_keeps_ranges_reaching_into_the_window():
+    db = FakeSession([
+        ("chat_legacy", "FOR VALUES FROM (MINVALUE) TO ('2025-11-01 00:00:00+00')"),
+        ("chat_p2025_11", "FOR VALUES FROM ('2025-11-01 00:00:00+00') TO ('2025-12-01 00:00:00+00')"),
+        ("chat_p2025_12", "FOR VALUES FROM ('2025-12-01 00:00:00+00') TO ('2026-01-01 00:00:00+00')"),
+    ])
+    expired = ChatPartitionRepository().expire_partitions(db, keep_from=utc(2025, 12, 1), archive=True)
+
+    assert expired == ["chat_legacy", "chat_p2025_11"]
+    assert db.sql("DROP TABLE") == []
+    assert db.sql("ALTER TABLE chat_p2025_11 RENAME TO archive_chat_p2025_11")
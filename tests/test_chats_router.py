@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+from app.core.database import get_db
+from app.main import app
+from app.presentation.routers import chats
+
+
+class FakeAnalyticsRepository:
+    calls = []
+
+    def summary(self, db, since, until, top_documents):
+        self.calls.append((since, until))
+        return {"questions": 0, "answered": 0, "questions_per_hour": [], "top_documents": []}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    session = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="postgresql")))
+    FakeAnalyticsRepository.calls = []
+    monkeypatch.setattr(chats, "ChatAnalyticsRepository", FakeAnalyticsRepository)
+    app.dependency_overrides[get_db] = lambda: session
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db)
+
+
+def test_naive_bounds_are_taken_as_utc(client):
+    response = client.get("/api/v1/chats/analytics", params={"since": "2026-10-01T00:00:00"})
+
+    assert response.status_code == 200
+    since, until = FakeAnalyticsRepository.calls[0]
+    assert since == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    assert until.tzinfo is not None
+
+
+def test_mixed_bounds_are_compared_in_utc(client):
+    response = client.get(
+        "/api/v1/chats/analytics",
+        params={"since": "2026-10-01T05:00:00+05:00", "until": "2026-10-01T00:00:00"}
+    )
+
+    assert response.status_code == 400
+
+    response = client.get(
+        "/api/v1/chats/analytics",
+        params={"since": "2026-10-01T04:00:00+05:00", "until": "2026-10-01T00:00:00"}
+    )
+
+    assert response.status_code == 200
+    assert FakeAnalyticsRepository.calls == [
+        (datetime(2026, 9, 30, 23, tzinfo=timezone.utc), datetime(2026, 10, 1, tzinfo=timezone.utc))
+    ]
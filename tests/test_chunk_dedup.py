@@ -0,0 +1,136 @@
+import asyncio
+import random
+from types import SimpleNamespace
+import pytest
+from app.application.impl.chunk_deduplicator import ChunkDeduplicator
+from app.application.impl.chunk_fingerprint import (
+    SimHashIndex,
+    content_hash,
+    from_signed64,
+    hamming_distance,
+    is_near_duplicate,
+    simhash,
+    to_signed64,
+)
+from app.core.config import settings
+from app.domain.chunks import TextChunk
+
+random.seed(7)
+VOCABULARY = [f"soz{i}" for i in range(400)]
+BASE = " ".join(random.choice(VOCABULARY) for _ in range(120))
+
+
+class FakeSession:
+    def close(self):
+        pass
+
+
+class FakeRepository:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    async def find_candidates(self, db, content_hashes, bands):
+        return self.rows
+
+
+class FakeVectorStore:
+    def __init__(self, texts):
+        self.texts = texts
+        self.lookups = []
+
+    async def get_chunks(self, point_ids):
+        self.lookups.append(point_ids)
+        return {point_id: {"content": self.texts[point_id]} for point_id in point_ids if point_id in self.texts}
+
+
+def stored(point_id: str, text: str):
+    return SimpleNamespace(point_id=point_id, content_hash=content_hash(text), simhash=to_signed64(simhash(text)))
+
+
+def chunk(index: int, text: str) -> TextChunk:
+    return TextChunk(index=index, text=text, start=0, end=len(text), token_count=len(text.split()))
+
+
+def deduplicator(rows=(), texts=None):
+    return ChunkDeduplicator(
+        "doc-2",
+        vector_store=FakeVectorStore(texts or {}),
+        repository=FakeRepository(rows),
+        session_factory=FakeSession
+    )
+
+
+@pytest.fixture
+def near_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "DEDUP_NEAR_ENABLED", True)
+
+
+def test_simhash_is_stable_and_close_for_small_edits():
+    assert simhash(BASE) == simhash(BASE.upper() + " !")
+    assert simhash("") == 0
+    edited = BASE.replace(BASE.split()[5], "boshqa", 1)
+    assert hamming_distance(simhash(BASE), simhash(edited)) <= 8
+    assert hamming_distance(simhash(BASE), simhash("butunlay boshqa matn " * 20)) > 8
+
+
+def test_signed_round_trip():
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        assert from_signed64(to_signed64(value)) == value
+        assert -(1 << 63) <= to_signed64(value) < (1 << 63)
+
+
+def test_index_finds_within_distance_closest_first():
+    index = SimHashIndex(max_distance=3)
+    index.add(0b1111, "far")
+    index.add(0b0001, "near")
+    index.add(1 << 40 | 0b111111, "too far")
+
+    assert index.find_all(0b0000) == ["near"]
+    assert index.find_all(0b0011) == ["near", "far"]
+    assert index.find(0b0011) == "near"
+    assert index.find((1 << 64) - 1) is None
+
+
+def test_text_check_rejects_changed_numbers():
+    text = f"Ariza 30 kun ichida ko'rib chiqiladi. {BASE}"
+    assert is_near_duplicate(text, text + " qo'shimcha", 0.9)
+    assert not is_near_duplicate(text, text.replace("30", "90"), 0.9)
+    assert not is_near_duplicate(text, "Ariza 30 kun " + " ".join(reversed(BASE.split())), 0.9)
+
+
+def test_exact_duplicates_only_by_default():
+    text = f"Ariza 30 kun ichida. {BASE}"
+    near_copy = text.replace("30", "90")
+    dedup = deduplicator(rows=[stored("p1", text)], texts={"p1": text})
+
+    result = asyncio.run(dedup.classify([chunk(0, text + " "), chunk(1, near_copy), chunk(2, near_copy)]))
+
+    assert [(c.index, point_id) for c, point_id in result.shared] == [(0, "p1")]
+    assert [c.index for c in result.new] == [1]
+    assert [(c.index, earlier) for c, earlier in result.repeated] == [(2, 1)]
+    assert dedup.vector_store.lookups == []
+
+
+def test_near_duplicate_needs_text_confirmation(near_enabled):
+    text = f"Ariza 30 kun ichida. {BASE}"
+    reworded = text + " qo'shimcha"
+    other_figure = text.replace("30", "90")
+    dedup = deduplicator(rows=[stored("p1", text)], texts={"p1": text})
+
+    result = asyncio.run(dedup.classify([chunk(0, reworded), chunk(1, other_figure)]))
+
+    assert [(c.index, point_id) for c, point_id in result.shared] == [(0, "p1")]
+    assert [c.index for c in result.new] == [1]
+    assert dedup.vector_store.lookups == [["p1"]]
+
+
+def test_near_repeat_within_document(near_enabled):
+    text = f"Ariza 30 kun ichida. {BASE}"
+    dedup = deduplicator()
+
+    first = asyncio.run(dedup.classify([chunk(0, text)]))
+    second = asyncio.run(dedup.classify([chunk(1, text + " qo'shimcha"), chunk(2, text.replace("30", "90"))]))
+
+    assert [c.index for c in first.new] == [0]
+    assert [(c.index, earlier) for c, earlier in second.repeated] == [(1, 0)]
+    assert [c.index for c in second.new] == [2]
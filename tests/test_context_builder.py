@@ -0,0 +1,96 @@
+from app.application.impl.context_builder import PASSAGE_SEPARATOR, ContextBuilder, _text_overlap
+
+DOCUMENT = " ".join(f"word{i}" for i in range(100))
+
+
+def words(text: str) -> int:
+    return len(text.split())
+
+
+def span_hit(start: int, end: int, chunk_index: int, score: float, document_id: str = "doc") -> dict:
+    """Hit cut out of DOCUMENT with matching character offsets"""
+    return {
+        "content": DOCUMENT[start:end],
+        "score": score,
+        "document_id": document_id,
+        "chunk_index": chunk_index,
+        "char_start": start,
+        "char_end": end
+    }
+
+
+def test_offset_overlap_is_merged_once():
+    builder = ContextBuilder(1000, words)
+    first, second = span_hit(0, 120, 0, 0.8), span_hit(80, 200, 1, 0.9)
+
+    context = builder.build([first, second])
+
+    assert context.text == DOCUMENT[:200]
+    assert len(context.passages) == 1
+    assert context.passages[0].chunk_indices == [0, 1]
+    assert context.passages[0].score == 0.9
+    assert (context.merged_chunks, context.dropped_chunks) == (1, 0)
+    assert context.used_hits == [second, first]
+    assert context.tokens_saved == words(DOCUMENT[:120] + DOCUMENT[80:200]) - words(DOCUMENT[:200])
+
+
+def test_contained_and_overlapping_non_neighbours():
+    builder = ContextBuilder(1000, words)
+    outer, inner, later = span_hit(0, 200, 0, 0.9), span_hit(50, 150, 3, 0.7), span_hit(190, 300, 5, 0.6)
+
+    context = builder.build([outer, inner, later])
+
+    assert context.text == DOCUMENT[:300]
+    assert context.passages[0].chunk_indices == [0, 3, 5]
+    assert context.merged_chunks == 2
+
+
+def test_gap_between_neighbours_keeps_both_texts():
+    builder = ContextBuilder(1000, words)
+
+    context = builder.build([span_hit(0, 50, 0, 0.9), span_hit(100, 150, 1, 0.8)])
+
+    assert context.text == DOCUMENT[:50] + "\n" + DOCUMENT[100:150]
+    assert context.merged_chunks == 1
+
+
+def test_text_overlap_fallback_without_offsets():
+    builder = ContextBuilder(1000, words)
+    first = {"content": DOCUMENT[:120], "score": 0.9, "document_id": "doc", "chunk_index": 0}
+    second = {"content": DOCUMENT[80:200], "score": 0.8, "document_id": "doc", "chunk_index": 1}
+    unrelated = {"content": "completely different text here", "score": 0.7, "document_id": "doc", "chunk_index": 2}
+
+    context = builder.build([first, second, unrelated])
+
+    assert context.text == DOCUMENT[:200] + "\n" + unrelated["content"]
+    assert context.merged_chunks == 2
+
+
+def test_text_overlap():
+    assert _text_overlap("abcdefghijklmnopqrstuvwxyz", "klmnopqrstuvwxyz and more") == 16
+    assert _text_overlap("abcdefghijklmnopqrstuvwxyz", "short") == 0
+    assert _text_overlap("abcdefghijklmnopqrstuvwxyz", "zyxwvutsrqponmlkjih") == 0
+
+
+def test_separate_documents_ordered_by_score():
+    builder = ContextBuilder(1000, words)
+    low, high = span_hit(0, 40, 0, 0.5, "a"), span_hit(0, 40, 0, 0.9, "b")
+
+    context = builder.build([low, high])
+
+    assert [passage.document_id for passage in context.passages] == ["b", "a"]
+    assert context.text == PASSAGE_SEPARATOR.join([high["content"], low["content"]])
+    assert context.merged_chunks == 0
+
+
+def test_budget_admits_best_first_and_counts_dropped():
+    best, big, small = span_hit(0, 50, 0, 0.9, "a"), span_hit(0, 400, 0, 0.8, "b"), span_hit(0, 30, 0, 0.7, "c")
+    builder = ContextBuilder(words(best["content"]) + words(small["content"]), words)
+
+    context = builder.build([small, big, best], original_hits=[small, big, best])
+
+    assert context.used_hits == [best, small]
+    assert context.dropped_chunks == 1
+    assert context.tokens == words(context.text) <= builder.max_tokens
+    assert context.raw_tokens == words(PASSAGE_SEPARATOR.join(h["content"] for h in [small, big, best]))
+    assert builder.with_max_tokens(5).build([best]).dropped_chunks == 1
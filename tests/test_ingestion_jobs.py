@@ -0,0 +1,269 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.core.config import settings
+from app.infrastructure.repositories.ingestion_job_repository import (
+    STATUS_COMPLETED,
+    STATUS_DEAD,
+    STATUS_QUEUED,
+    STATUS_RUNNING,
+    ClaimedJob,
+    IngestionJobRepository,
+)
+from app import worker as worker_module
+from app.worker import IngestionWorker, backoff_seconds
+
+
+class FakeJobRepository:
+    """In-memory stand-in for IngestionJobRepository, records how jobs ended"""
+
+    def __init__(self, heartbeat_held: bool = True):
+        self.heartbeat_held = heartbeat_held
+        self.completed = []
+        self.failed = []
+        self.heartbeats = 0
+
+    def get_payload(self, db, job_id):
+        return b"file contents"
+
+    def heartbeat(self, db, job_id, worker_id, lease_seconds):
+        self.heartbeats += 1
+        return self.heartbeat_held
+
+    def complete(self, db, job_id, worker_id):
+        self.completed.append(job_id)
+        return True
+
+    def fail(self, db, job_id, worker_id, error, retry_in_seconds):
+        self.failed.append((job_id, error, retry_in_seconds))
+        return True
+
+
+def make_worker(repo, heartbeat_seconds=0.01):
+    worker = IngestionWorker("test:1", concurrency=1, poll_seconds=0.01, lease_seconds=1.0, heartbeat_seconds=heartbeat_seconds)
+    worker.repo = repo
+    worker._with_session = lambda method, *args: method(None, *args)
+    return worker
+
+
+def job(attempts=1, max_attempts=3):
+    return ClaimedJob(str(uuid.uuid4()), str(uuid.uuid4()), "report.docx", attempts, max_attempts)
+
+
+@pytest.fixture
+def fixed_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_JOB_BACKOFF_SECONDS", 10.0)
+    monkeypatch.setattr(settings, "INGEST_JOB_BACKOFF_MAX_SECONDS", 60.0)
+    monkeypatch.setattr(worker_module.random, "uniform", lambda low, high: 1.0)
+
+
+def test_backoff_doubles_up_to_the_cap(fixed_backoff):
+    assert [backoff_seconds(attempt) for attempt in range(1, 6)] == [10.0, 20.0, 40.0, 60.0, 60.0]
+
+
+def test_backoff_jitter_stays_within_bounds(monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_JOB_BACKOFF_SECONDS", 10.0)
+    monkeypatch.setattr(settings, "INGEST_JOB_BACKOFF_MAX_SECONDS", 60.0)
+    delays = [backoff_seconds(2) for _ in range(200)]
+    assert all(16.0 <= delay <= 24.0 for delay in delays)
+
+
+def test_successful_job_is_completed():
+    repo = FakeJobRepository()
+    worker = make_worker(repo)
+    claimed = job()
+
+    async def ingest(job):
+        await asyncio.sleep(0.03)
+
+    worker._ingest = ingest
+    asyncio.run(worker._run_job(claimed))
+    assert repo.completed == [claimed.id]
+    assert repo.failed == []
+    assert repo.heartbeats >= 1
+
+
+def test_failed_attempt_is_retried_with_backoff(fixed_backoff):
+    repo = FakeJobRepository()
+    worker = make_worker(repo)
+    claimed = job(attempts=2, max_attempts=3)
+
+    async def ingest(job):
+        raise RuntimeError("embedding API down")
+
+    worker._ingest = ingest
+    asyncio.run(worker._run_job(claimed))
+    assert repo.failed == [(claimed.id, "embedding API down", 20.0)]
+    assert repo.completed == []
+
+
+def test_failed_last_attempt_is_dead_lettered():
+    repo = FakeJobRepository()
+    worker = make_worker(repo)
+    claimed = job(attempts=3, max_attempts=3)
+
+    async def ingest(job):
+        raise RuntimeError("corrupt file")
+
+    worker._ingest = ingest
+    asyncio.run(worker._run_job(claimed))
+    assert repo.failed == [(claimed.id, "corrupt file", None)]
+
+
+def test_job_reclaimed_after_its_last_lease_expired_is_dead_lettered():
+    repo = FakeJobRepository()
+    worker = make_worker(repo)
+    claimed = job(attempts=4, max_attempts=3)
+    ran = []
+
+    async def ingest(job):
+        ran.append(job)
+
+    worker._ingest = ingest
+    asyncio.run(worker._run_job(claimed))
+    assert ran == []
+    assert repo.failed == [(claimed.id, "Lease expired on the last attempt", None)]
+
+
+def test_lost_lease_cancels_the_ingestion_and_leaves_the_job_alone():
+    repo = FakeJobRepository(heartbeat_held=False)
+    worker = make_worker(repo)
+    cancelled = []
+
+    async def ingest(job):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(job.id)
+            raise
+
+    worker._ingest = ingest
+    claimed = job()
+    asyncio.run(worker._run_job(claimed))
+    assert cancelled == [claimed.id]
+    assert repo.completed == [] and repo.failed == []
+
+
+def test_jobs_run_in_a_private_directory_that_is_removed(monkeypatch):
+    from app.presentation import dependencies
+
+    seen = {}
+
+    class FakeIngestionService:
+        def __init__(self, checkpoints):
+            seen["checkpoint_dir"] = checkpoints.base_dir
+
+        async def remove_document_points(self, document_id):
+            seen["removed"] = document_id
+
+        async def ingest(self, file_path, document_id, filename):
+            with open(file_path, "rb") as f:
+                seen["contents"] = f.read()
+            seen["file_path"] = file_path
+
+    monkeypatch.setattr(dependencies, "get_ingestion_service", lambda checkpoints=None: FakeIngestionService(checkpoints))
+    worker = make_worker(FakeJobRepository())
+
+    retried = job(attempts=2)
+    asyncio.run(worker._ingest(retried))
+
+    work_dir = os.path.dirname(seen["file_path"])
+    assert seen["contents"] == b"file contents"
+    assert seen["checkpoint_dir"] == os.path.join(work_dir, "checkpoints")
+    assert not os.path.exists(work_dir)
+    # A retry starts over, points of the failed attempt are removed first
+    assert seen["removed"] == retried.document_id
+
+
+# Repository SQL needs PostgreSQL (FOR UPDATE SKIP LOCKED, make_interval)
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL (PostgreSQL) not set")
+
+
+@pytest.fixture
+def db():
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import sessionmaker
+    from app.domain.models import IngestionJob
+
+    engine = create_engine(TEST_DATABASE_URL)
+    IngestionJob.__table__.drop(engine, checkfirst=True)
+    IngestionJob.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        IngestionJob.__table__.drop(engine)
+        engine.dispose()
+
+
+def _set(db, job_id, **values):
+    from sqlalchemy import text
+
+    assignments = ", ".join(f"{column} = :{column}" for column in values)
+    db.execute(text(f"UPDATE ingestion_jobs SET {assignments} WHERE id = :id"), {"id": job_id, **values})
+    db.commit()
+
+
+def _get(db, job_id):
+    from app.domain.models import IngestionJob
+
+    db.expire_all()
+    return db.query(IngestionJob).filter(IngestionJob.id == uuid.UUID(job_id)).one()
+
+
+@postgres
+def test_claim_takes_due_jobs_once(db):
+    repo = IngestionJobRepository()
+    queued = asyncio.run(repo.enqueue(db, str(uuid.uuid4()), "a.docx", b"a", max_attempts=3))
+
+    claimed = repo.claim(db, "worker-1", lease_seconds=60)
+    assert claimed.id == str(queued.id) and claimed.attempts == 1
+    assert repo.claim(db, "worker-2", lease_seconds=60) is None
+    assert _get(db, claimed.id).status == STATUS_RUNNING
+
+    assert repo.complete(db, claimed.id, "worker-1")
+    row = _get(db, claimed.id)
+    assert row.status == STATUS_COMPLETED and row.payload is None
+
+
+@postgres
+def test_expired_lease_is_claimed_by_another_worker(db):
+    repo = IngestionJobRepository()
+    asyncio.run(repo.enqueue(db, str(uuid.uuid4()), "a.docx", b"a", max_attempts=3))
+    claimed = repo.claim(db, "worker-1", lease_seconds=60)
+
+    _set(db, claimed.id, lease_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+    reclaimed = repo.claim(db, "worker-2", lease_seconds=60)
+    assert reclaimed.id == claimed.id and reclaimed.attempts == 2
+
+    # The first worker lost the lease: its heartbeat and completion are refused
+    assert not repo.heartbeat(db, claimed.id, "worker-1", 60)
+    assert not repo.complete(db, claimed.id, "worker-1")
+    assert repo.heartbeat(db, claimed.id, "worker-2", 60)
+
+
+@postgres
+def test_failed_job_waits_for_its_backoff_then_dead_letters(db):
+    repo = IngestionJobRepository()
+    asyncio.run(repo.enqueue(db, str(uuid.uuid4()), "a.docx", b"a", max_attempts=2))
+    claimed = repo.claim(db, "worker-1", lease_seconds=60)
+
+    assert repo.fail(db, claimed.id, "worker-1", "boom", retry_in_seconds=3600)
+    row = _get(db, claimed.id)
+    assert row.status == STATUS_QUEUED and row.last_error == "boom"
+    assert repo.claim(db, "worker-1", lease_seconds=60) is None
+
+    _set(db, claimed.id, run_after=datetime.now(timezone.utc) - timedelta(seconds=1))
+    claimed = repo.claim(db, "worker-1", lease_seconds=60)
+    assert claimed.attempts == 2
+    assert repo.fail(db, claimed.id, "worker-1", "boom again", retry_in_seconds=None)
+    assert _get(db, claimed.id).status == STATUS_DEAD
+    assert repo.claim(db, "worker-1", lease_seconds=60) is None
+
+    assert asyncio.run(repo.retry(db, claimed.id))
+    row = _get(db, claimed.id)
+    assert row.status == STATUS_QUEUED and row.attempts == 0
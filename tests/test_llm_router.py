@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.infrastructure.llm.llm_router import LLMProvidersFailed, LLMRouter
+
+
+class FakeLLM:
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def generate_answer(self, question: str, context: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return f"answer {self.calls}"
+
+
+@pytest.fixture
+def fast_hedge(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_TARGET", "alternate")
+    monkeypatch.setattr(settings, "LLM_HEDGE_INITIAL_DELAY_MS", 10)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY_MS", 10)
+
+
+def test_single_provider_is_not_hedged(fast_hedge):
+    slow = FakeLLM(delay=0.1)
+    router = LLMRouter({"openai": slow})
+
+    assert asyncio.run(router.generate_answer("q", "c")) == "answer 1"
+    assert slow.calls == 1
+    assert router.hedges == 0
+
+
+def test_slow_primary_is_hedged_to_alternate(fast_hedge):
+    slow, fast = FakeLLM(delay=0.5), FakeLLM()
+    router = LLMRouter({"openai": slow, "gemini": fast})
+
+    assert asyncio.run(router.generate_answer("q", "c")) == "answer 1"
+    assert (slow.calls, fast.calls) == (1, 1)
+    assert (router.hedges, router.hedge_wins) == (1, 1)
+
+
+def test_failure_falls_back_then_raises_when_all_fail():
+    broken = FakeLLM(error=RuntimeError("boom"))
+    backup = FakeLLM()
+    router = LLMRouter({"openai": broken, "gemini": backup})
+    assert asyncio.run(router.generate_answer("q", "c")) == "answer 1"
+    assert router.fallbacks == 1
+
+    router = LLMRouter({"openai": broken, "gemini": FakeLLM(error=ValueError("down"))})
+    with pytest.raises(LLMProvidersFailed) as failed:
+        asyncio.run(router.generate_answer("q", "c"))
+    assert [name for name, _ in failed.value.errors] == ["openai", "gemini"]
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from app.infrastructure.vectorstore.mmap_collection import MmapCollection
+
+
+def _point(point_id, vector, key, **payload):
+    return (point_id, vector, [key], {"document_id": key, **payload})
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "chunks")
+
+
+def test_upsert_search_and_replace(path):
+    collection = MmapCollection(path, compact_ratio=1.0)
+    collection.upsert([
+        _point("a", [1, 0, 0], "d1", text="a"),
+        _point("b", [0, 1, 0], "d2", text="b"),
+    ])
+    assert collection.count == 2
+
+    hits = collection.search([[1, 0.1, 0]], top_k=1)[0]
+    assert [point_id for point_id, _, _ in hits] == ["a"]
+    assert hits[0][2]["text"] == "a"
+
+    # Replacing a point tombstones its old row
+    collection.upsert([_point("a", [0, 0, 1], "d1", text="a2")])
+    assert collection.count == 2
+    assert collection.deleted == 1
+    hits = collection.search([[0, 0, 1]], top_k=1)[0]
+    assert hits[0][0] == "a" and hits[0][2]["text"] == "a2"
+
+
+def test_filtered_search_and_delete_by_keys(path):
+    collection = MmapCollection(path, compact_ratio=1.0)
+    collection.upsert([
+        _point("a", [1, 0], "d1"),
+        _point("b", [0.9, 0.1], "d2"),
+        _point("c", [0, 1], "d2"),
+    ])
+    hits = collection.search([[1, 0]], top_k=3, keys=[["d2"]])[0]
+    assert [point_id for point_id, _, _ in hits] == ["b", "c"]
+
+    assert sorted(collection.delete_by_keys(["d2"])) == ["b", "c"]
+    assert collection.count == 1
+    assert collection.keys() == ["d1"]
+    assert collection.search([[0, 1]], top_k=3, keys=[["d2"]])[0] == []
+
+
+def test_compaction_keeps_live_points(path):
+    collection = MmapCollection(path, compact_ratio=0.25)
+    collection.upsert([_point(str(i), [i + 1, 1], f"d{i % 2}") for i in range(8)])
+    assert collection.delete(["0", "1", "2"]) == 3
+
+    # 3 of 8 rows deleted exceeds the ratio: rows were copied into the next generation
+    assert collection.generation == 1
+    assert collection.deleted == 0
+    assert collection.count == 5
+    retrieved = collection.retrieve(["7", "3"], with_vectors=True)
+    assert [point_id for point_id, _, _ in retrieved] == ["7", "3"]
+    expected = np.array([8, 1]) / np.linalg.norm([8, 1])
+    assert np.allclose(retrieved[0][2], expected, atol=1e-6)
+
+
+def test_reopen_restores_points(path):
+    collection = MmapCollection(path, compact_ratio=0.25)
+    collection.upsert([_point(str(i), [i + 1, 1], "d1") for i in range(4)])
+    collection.delete(["0", "1"])
+    collection.update({"3": (["d2"], {"title": "x"})})
+    generation = collection.generation
+
+    reopened = MmapCollection(path)
+    assert reopened.generation == generation
+    assert reopened.count == 2
+    assert sorted(reopened.keys()) == ["d1", "d2"]
+    assert reopened.retrieve(["3"])[0][1] == {"document_id": "d1", "title": "x"}
+
+
+def test_writes_of_another_instance_are_visible(path):
+    # Two instances on one path behave like two processes (separate lock file descriptions)
+    writer = MmapCollection(path, compact_ratio=0.25)
+    reader = MmapCollection(path)
+    assert reader.count == 0
+
+    writer.upsert([_point(str(i), [i + 1, 1], "d1") for i in range(4)])
+    assert reader.count == 4
+    assert reader.search([[4, 1]], top_k=1)[0][0][0] == "3"
+
+    # Compaction in the writer replaces the generation file the reader had mapped
+    writer.delete(["0", "1"])
+    assert writer.generation == 1
+    assert reader.count == 2
+    assert reader.generation == 1
+    assert [point_id for point_id, _, _ in reader.retrieve(["2", "3"], with_vectors=True)] == ["2", "3"]
+
+    reader.upsert([_point("4", [1, 5], "d2")])
+    assert writer.count == 3
+    assert writer.search([[1, 5]], top_k=1, keys=[["d2"]])[0][0][0] == "4"
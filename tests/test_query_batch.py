@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from app.application.impl import query_service_impl
+from app.application.impl.context_builder import ContextBuilder
+from app.application.impl.query_service_impl import QueryServiceImpl
+from app.core.config import settings
+
+
+class FakeEmbeddings:
+    async def embed_texts(self, texts):
+        return [[float(i)] for i in range(len(texts))]
+
+
+class FakeVectorStore:
+    document_vectors_ready = True
+
+    def __init__(self, results):
+        self.results = results
+
+    async def search_batch(self, embeddings, top_k, document_ids=None):
+        return [self.results[int(embedding[0])] for embedding in embeddings]
+
+
+class FakeCompressor:
+    """Counts concurrent sentence lookups"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def compress(self, question_embedding, search_results):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return search_results, None
+
+
+class FakeLLM:
+    def __init__(self, delays):
+        self.delays = delays
+
+    async def generate_answer(self, question, context):
+        await asyncio.sleep(self.delays[question])
+        if question == "broken":
+            raise RuntimeError("provider down")
+        return f"answer to {question}"
+
+
+def hit(document_id: str) -> dict:
+    return {"content": f"text of {document_id}", "score": 0.9, "document_id": document_id, "chunk_index": 0}
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    def make(results, delays, compressor=None):
+        monkeypatch.setattr(settings, "HIERARCHICAL_SEARCH_ENABLED", False)
+        monkeypatch.setattr(query_service_impl, "get_llm_router", lambda: FakeLLM(delays))
+        return QueryServiceImpl(
+            FakeEmbeddings(),
+            FakeVectorStore(results),
+            context_builder=ContextBuilder(1000, lambda text: len(text.split())),
+            compressor=compressor
+        )
+    return make
+
+
+async def collect(service, questions):
+    return [result async for result in service.process_batch(questions, db=None)]
+
+
+def test_results_in_completion_order_with_errors_in_band(make_service):
+    questions = ["slow", "broken", "empty", "fast"]
+    service = make_service(
+        [[hit("a")], [hit("b")], [], [hit("c")]],
+        {"slow": 0.05, "broken": 0.02, "fast": 0.0}
+    )
+
+    results = asyncio.run(collect(service, questions))
+
+    assert [result.index for result in results] == [2, 3, 1, 0]
+    by_index = {result.index: result for result in results}
+    assert by_index[0].success and by_index[0].answer == "answer to slow"
+    assert [source.document_id for source in by_index[0].sources] == ["a"]
+    assert not by_index[1].success and by_index[1].error == "provider down"
+    assert by_index[2].success and by_index[2].sources == []
+    assert by_index[3].question == "fast"
+
+
+def test_compression_is_capped_by_concurrency(make_service, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BATCH_LLM_CONCURRENCY", 2)
+    questions = [f"q{i}" for i in range(6)]
+    compressor = FakeCompressor()
+    service = make_service([[hit(f"d{i}")] for i in range(6)], {q: 0.0 for q in questions}, compressor)
+
+    results = asyncio.run(collect(service, questions))
+
+    assert sorted(result.index for result in results) == list(range(6))
+    assert all(result.success for result in results)
+    assert compressor.peak == 2
@@ -0,0 +1,97 @@
+import asyncio
+import time
+import pytest
+from app.application.impl import query_service_impl
+from app.application.impl.context_builder import ContextBuilder
+from app.application.impl.query_service_impl import DEGRADED_HISTORY_NOT_SAVED, QueryServiceImpl
+from app.core.config import settings
+from app.core.deadline import Deadline
+
+
+class FakeEmbeddings:
+    async def embed_text(self, text):
+        return [0.0]
+
+
+class FakeVectorStore:
+    def __init__(self, results):
+        self.results = results
+
+    async def search(self, embedding, top_k, document_ids=None):
+        return self.results
+
+
+class FakeLLM:
+    async def generate_answer(self, question, context):
+        return "answer"
+
+
+class SlowChatRepository:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.saved = []
+
+    def insert_chat(self, db, **chat):
+        time.sleep(self.delay)
+        self.saved.append(chat)
+
+
+class FakeSession:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    monkeypatch.setattr(settings, "HIERARCHICAL_SEARCH_ENABLED", False)
+    monkeypatch.setattr(settings, "QUERY_PERSIST_RESERVE_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "QUERY_MIN_LLM_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "QUERY_SHRINK_CONTEXT_SECONDS", 0.0)
+    monkeypatch.setattr(query_service_impl, "get_llm_router", FakeLLM)
+
+    def make(results, save_delay):
+        service = QueryServiceImpl(
+            FakeEmbeddings(),
+            FakeVectorStore(results),
+            context_builder=ContextBuilder(1000, lambda text: len(text.split())),
+            compressor=None
+        )
+        service.chat_repo = SlowChatRepository(save_delay)
+        service.session_factory = FakeSession
+        return service
+    return make
+
+
+def test_history_saved_within_deadline(make_service):
+    service = make_service([{"content": "text", "score": 0.9, "document_id": "d", "chunk_index": 0}], 0.0)
+
+    answer, sources, diagnostics = asyncio.run(service.process_query("q", db=None, deadline=Deadline(5)))
+
+    assert answer == "answer"
+    assert diagnostics.degradations == []
+    assert [chat["answered"] for chat in service.chat_repo.saved] == [True]
+
+
+def test_slow_save_is_cut_at_deadline(make_service):
+    service = make_service([{"content": "text", "score": 0.9, "document_id": "d", "chunk_index": 0}], 0.5)
+
+    async def timed():
+        started = time.perf_counter()
+        result = await service.process_query("q", db=None, deadline=Deadline(0.1))
+        return result, time.perf_counter() - started
+
+    # The abandoned insert keeps its thread; asyncio.run waits for it on exit
+    (answer, _, diagnostics), seconds = asyncio.run(timed())
+
+    assert seconds < 0.4
+    assert answer == "answer"
+    assert DEGRADED_HISTORY_NOT_SAVED in diagnostics.degradations
+
+
+def test_no_results_reports_unsaved_history(make_service):
+    service = make_service([], 0.5)
+
+    answer, sources, diagnostics = asyncio.run(service.process_query("q", db=None, deadline=Deadline(0.1)))
+
+    assert sources == []
+    assert diagnostics.degradations == [DEGRADED_HISTORY_NOT_SAVED]
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from app.application.impl import query_service_impl, semantic_cache
+from app.application.impl.context_builder import ContextBuilder
+from app.application.impl.query_service_impl import QueryServiceImpl
+from app.application.impl.semantic_cache import SemanticCache
+from app.domain.schemas import SourceDocument
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache, "time", SimpleNamespace(monotonic=lambda: now[0], time=time.time))
+    return now
+
+
+def make_cache(capacity: int = 3, ttl_seconds: float = 60.0) -> SemanticCache:
+    return SemanticCache(capacity=capacity, threshold=0.9, ttl_seconds=ttl_seconds, audit_samples=10)
+
+
+def source(point_id: str, document_id: str = "doc-a") -> SourceDocument:
+    return SourceDocument(content="text", score=0.9, document_id=document_id, chunk_index=0, point_id=point_id)
+
+
+def test_lookup_hits_paraphrase_within_threshold(clock):
+    cache = make_cache()
+    cache.store([1.0, 0.0, 0.0], "q1", "a1", [source("p1")], {"doc-a": "v1"})
+
+    hit = cache.lookup([0.99, 0.05, 0.0])
+
+    assert (hit.question, hit.answer, hit.document_versions) == ("q1", "a1", {"doc-a": "v1"})
+    assert hit.score > 0.99
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.lookup([0.0, 0.0, 0.0]) is None
+    assert cache.lookup([1.0, 0.0]) is None
+
+
+def test_store_replaces_near_identical_and_overwrites_oldest(clock):
+    cache = make_cache(capacity=2)
+    cache.store([1.0, 0.0, 0.0], "q1", "old", [], {"doc-a": "v1"})
+    cache.store([0.999, 0.01, 0.0], "q1 again", "new", [], {"doc-a": "v1"})
+
+    assert cache.lookup([1.0, 0.0, 0.0]).answer == "new"
+    assert cache.stats()["size"] == 1
+
+    cache.store([0.0, 1.0, 0.0], "q2", "a2", [], {"doc-b": "v1"})
+    cache.store([0.0, 0.0, 1.0], "q3", "a3", [], {"doc-c": "v1"})
+
+    # Slot 0 held q1 and was next in line
+    assert cache.lookup([1.0, 0.0, 0.0]) is None
+    assert cache.lookup([0.0, 1.0, 0.0]).answer == "a2"
+    assert cache.lookup([0.0, 0.0, 1.0]).answer == "a3"
+
+
+def test_expired_answers_are_not_reused(clock):
+    cache = make_cache(ttl_seconds=60.0)
+    cache.store([1.0, 0.0, 0.0], "q1", "a1", [], {"doc-a": "v1"})
+    clock[0] += 30
+    cache.store([0.0, 1.0, 0.0], "q2", "a2", [], {"doc-b": "v1"})
+
+    clock[0] += 31
+    assert cache.lookup([1.0, 0.0, 0.0]) is None
+    assert cache.lookup([0.0, 1.0, 0.0]).answer == "a2"
+    assert cache.stats()["size"] == 1
+
+
+def test_invalidate_documents_drops_citing_answers(clock):
+    cache = make_cache()
+    cache.store([1.0, 0.0, 0.0], "q1", "a1", [], {"doc-a": "v1"})
+    cache.store([0.0, 1.0, 0.0], "q2", "a2", [], {"doc-a": "v1", "doc-b": "v1"})
+    cache.store([0.0, 0.0, 1.0], "q3", "a3", [], {"doc-c": "v1"})
+
+    assert cache.invalidate_documents(["doc-a"]) == 2
+    assert cache.lookup([1.0, 0.0, 0.0]) is None
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.lookup([0.0, 0.0, 1.0]).answer == "a3"
+    assert cache.stats()["stale"] == 2
+
+
+def test_audit_flags_low_source_overlap(clock):
+    cache = make_cache()
+    cache.store([1.0, 0.0, 0.0], "q1", "a1", [source("p1"), source("p2")], {"doc-a": "v1"})
+    hit = cache.lookup([1.0, 0.0, 0.0])
+
+    assert not cache.record_audit("paraphrase", hit, ["p1", "p2", "p3"])["suspected_false_hit"]
+    assert cache.record_audit("other", hit, ["p3"])["suspected_false_hit"]
+    assert cache.stats()["suspected_false_hits"] == 1
+
+
+class FakeDocumentRepository:
+    def __init__(self, versions):
+        self.versions = versions
+
+    async def get_versions(self, db, document_ids):
+        return {document_id: self.versions[document_id] for document_id in document_ids if document_id in self.versions}
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    monkeypatch.setattr(query_service_impl, "get_llm_router", lambda: None)
+
+    def make(cache, versions):
+        service = QueryServiceImpl(
+            embedding_service=None,
+            vector_store=None,
+            context_builder=ContextBuilder(1000, lambda text: len(text.split())),
+            compressor=None,
+            semantic_cache=cache
+        )
+        service.document_repo = FakeDocumentRepository(versions)
+        return service
+    return make
+
+
+def test_lookup_discards_answer_of_changed_document(clock, make_service):
+    cache = make_cache()
+    cache.store([1.0, 0.0, 0.0], "q1", "a1", [source("p1")], {"doc-a": "v1"})
+
+    current = make_service(cache, {"doc-a": ("v1", "ready")})
+    assert asyncio.run(current._cache_lookup([1.0, 0.0, 0.0], db=None)).answer == "a1"
+
+    changed = make_service(cache, {"doc-a": ("v2", "ready")})
+    assert asyncio.run(changed._cache_lookup([1.0, 0.0, 0.0], db=None)) is None
+    # Dropped for good, even once the versions match again
+    assert asyncio.run(current._cache_lookup([1.0, 0.0, 0.0], db=None)) is None
+    assert (cache.stats()["hits"], cache.stats()["stale"]) == (1, 1)
+
+
+def test_lookup_discards_answer_of_deleted_document(clock, make_service):
+    cache = make_cache()
+    cache.store([1.0, 0.0, 0.0], "q1", "a1", [source("p1")], {"doc-a": "v1"})
+
+    assert asyncio.run(make_service(cache, {})._cache_lookup([1.0, 0.0, 0.0], db=None)) is None
+    assert cache.lookup([1.0, 0.0, 0.0]) is None